@@ -0,0 +1,73 @@
+# Times consolidateComplexIntersections(auto_identify=True) on synthetic grids of dense signalized intersections.
+# Every grid intersection is mapped as a 2x2 cluster of signalized nodes connected by short links, which is the
+# worst case for complex intersection identification.
+#
+# usage: python dev/benchmarks/bench_intersections.py [grid_size ...]
+
+import os
+import sys
+import tempfile
+import time
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(parent_dir)
+
+import osm2gmns as og
+
+
+BLOCK_SPACING = 0.002       # degree, about 200 m
+CLUSTER_SPACING = 0.0001    # degree, about 10 m
+
+
+def writeSignalGridOsm(filepath, grid_size):
+    """
+    Write an osm file with grid_size x grid_size signalized intersections. Each intersection is a 2x2 cluster of
+    signalized nodes; every street is a dual carriageway passing through one row (or column) of each cluster.
+    """
+    number_of_lines = 2 * grid_size
+
+    def nodeId(row, col):
+        return row * number_of_lines + col + 1
+
+    def coord(idx):
+        return (idx // 2) * BLOCK_SPACING + (idx % 2) * CLUSTER_SPACING
+
+    max_coord = coord(number_of_lines - 1)
+    with open(filepath, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6" generator="osm2gmns-benchmark">\n')
+        f.write(f' <bounds minlat="0" minlon="0" maxlat="{max_coord:.7f}" maxlon="{max_coord:.7f}"/>\n')
+        for row in range(number_of_lines):
+            for col in range(number_of_lines):
+                f.write(f' <node id="{nodeId(row, col)}" lat="{coord(row):.7f}" lon="{coord(col):.7f}">'
+                        f'<tag k="highway" v="traffic_signals"/></node>\n')
+        way_id = 1
+        for row in range(number_of_lines):
+            f.write(f' <way id="{way_id}">')
+            f.write(''.join(f'<nd ref="{nodeId(row, col)}"/>' for col in range(number_of_lines)))
+            f.write('<tag k="highway" v="primary"/><tag k="oneway" v="yes"/></way>\n')
+            way_id += 1
+        for col in range(number_of_lines):
+            f.write(f' <way id="{way_id}">')
+            f.write(''.join(f'<nd ref="{nodeId(row, col)}"/>' for row in range(number_of_lines)))
+            f.write('<tag k="highway" v="primary"/><tag k="oneway" v="yes"/></way>\n')
+            way_id += 1
+        f.write('</osm>\n')
+
+
+def main():
+    grid_sizes = [int(arg) for arg in sys.argv[1:]] or [10, 20, 40, 80]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print('grid_size,intersections,nodes_before,nodes_after,seconds')
+        for grid_size in grid_sizes:
+            filepath = os.path.join(tmp_dir, f'signal_grid_{grid_size}.osm')
+            writeSignalGridOsm(filepath, grid_size)
+            net = og.getNetFromFile(filepath)
+            nodes_before = net.number_of_nodes
+            time_start = time.perf_counter()
+            og.consolidateComplexIntersections(net, auto_identify=True)
+            seconds = time.perf_counter() - time_start
+            print(f'{grid_size},{grid_size * grid_size},{nodes_before},{net.number_of_nodes},{seconds:.3f}')
+
+
+if __name__ == '__main__':
+    main()
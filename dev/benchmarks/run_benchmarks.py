@@ -0,0 +1,170 @@
+# Times the main osm2gmns functions on synthetic maps (see synthetic_osm.py) at several scales and thread counts, and
+# saves the results as json so that runs on different commits can be compared.
+#
+# usage: python dev/benchmarks/run_benchmarks.py [--grid-sizes 20 50 100] [--threads 1 4] [--repeat 3]
+#                                                [--format osm] [--output results.json] [--compare baseline.json]
+#
+# Each run is a separate process, since the number of OpenMP threads is fixed when the library is loaded. The fastest
+# of the repeated runs is reported for each function.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(parent_dir)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_osm import writeSyntheticOsm
+
+
+FUNCTIONS = ['getNetFromFile', 'consolidateComplexIntersections', 'generateNodeActivityInfo', 'generateNodePOIInfo',
+             'fillLinkAttributesWithDefaultValues', 'outputNetToCSV']
+RESULT_FORMAT_VERSION = 1
+
+
+def runWorker(osm_filepath, output_folder):
+    """Runs the functions once in this process and prints their timings as json."""
+    import osm2gmns as og
+
+    seconds = {}
+
+    time_start = time.perf_counter()
+    net = og.getNetFromFile(osm_filepath, mode_types=['auto', 'railway'], POI=True)
+    seconds['getNetFromFile'] = time.perf_counter() - time_start
+    network_size = {'nodes': net.number_of_nodes, 'links': net.number_of_links}
+
+    time_start = time.perf_counter()
+    og.consolidateComplexIntersections(net, auto_identify=True)
+    seconds['consolidateComplexIntersections'] = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    og.generateNodeActivityInfo(net)
+    seconds['generateNodeActivityInfo'] = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    og.generateNodePOIInfo(net)
+    seconds['generateNodePOIInfo'] = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    og.fillLinkAttributesWithDefaultValues(net, default_lanes=True, default_speed=True, default_capacity=True)
+    seconds['fillLinkAttributesWithDefaultValues'] = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    og.outputNetToCSV(net, output_folder)
+    seconds['outputNetToCSV'] = time.perf_counter() - time_start
+
+    print(json.dumps({'seconds': seconds, 'network': network_size, 'stats': net.stats}))
+
+
+def runOnce(osm_filepath, threads):
+    with tempfile.TemporaryDirectory() as output_folder:
+        env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', osm_filepath, output_folder],
+                                   env=env, stdout=subprocess.PIPE, check=True, text=True)
+    # the last line is the result, the library may print before it
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def gitCommit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=parent_dir, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, check=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=parent_dir,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, text=True).stdout != ''
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def runBenchmarks(grid_sizes, thread_counts, repeat, file_format, seed):
+    commit, dirty = gitCommit()
+    results = {'version': RESULT_FORMAT_VERSION,
+               'commit': commit,
+               'dirty': dirty,
+               'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+               'platform': platform.platform(),
+               'python': platform.python_version(),
+               'cpu_count': os.cpu_count(),
+               'seed': seed,
+               'cases': []}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for grid_size in grid_sizes:
+            osm_filepath = os.path.join(tmp_dir, f'synthetic_{grid_size}.{file_format}')
+            osm_elements = writeSyntheticOsm(osm_filepath, grid_size, seed)
+            for threads in thread_counts:
+                runs = [runOnce(osm_filepath, threads) for _ in range(repeat)]
+                best = {function: min(run['seconds'][function] for run in runs) for function in FUNCTIONS}
+                results['cases'].append({'grid_size': grid_size, 'threads': threads, 'osm_elements': osm_elements,
+                                         'network': runs[0]['network'], 'best_seconds': best,
+                                         'runs': [run['seconds'] for run in runs], 'stats': runs[0]['stats']})
+                print(f'grid_size {grid_size}, threads {threads}: ' +
+                      ', '.join(f'{function} {best[function]:.3f}s' for function in FUNCTIONS))
+    return results
+
+
+def compareResults(results, baseline, threshold):
+    """Prints the ratio of each time to the baseline. Returns the number of ratios above threshold."""
+    baseline_cases = {(case['grid_size'], case['threads']): case for case in baseline['cases']}
+    print(f'compared to {baseline.get("commit")}: time / baseline time')
+    number_of_regressions = 0
+    for case in results['cases']:
+        baseline_case = baseline_cases.get((case['grid_size'], case['threads']))
+        if baseline_case is None:
+            continue
+        ratios = []
+        for function in FUNCTIONS:
+            baseline_seconds = baseline_case['best_seconds'].get(function)
+            if not baseline_seconds:
+                continue
+            ratio = case['best_seconds'][function] / baseline_seconds
+            flag = ''
+            if ratio > threshold:
+                flag = ' (slower)'
+                number_of_regressions += 1
+            ratios.append(f'{function} {ratio:.2f}{flag}')
+        print(f'grid_size {case["grid_size"]}, threads {case["threads"]}: ' + ', '.join(ratios))
+    return number_of_regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark osm2gmns on synthetic osm files.')
+    parser.add_argument('--grid-sizes', type=int, nargs='+', default=[20, 50, 100],
+                        help='blocks along each side of the synthetic maps')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help='numbers of OpenMP threads')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each case, the fastest is reported')
+    parser.add_argument('--format', choices=['osm', 'osm.gz', 'pbf'], default='osm', dest='file_format',
+                        help='format of the synthetic files. pbf requires the osmium command line tool')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json', help='json file the results are saved to')
+    parser.add_argument('--compare', help='json file of earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='with --compare, times above threshold x baseline are reported as slower')
+    parser.add_argument('--worker', nargs=2, metavar=('OSM_FILEPATH', 'OUTPUT_FOLDER'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        runWorker(*args.worker)
+        return
+
+    results = runBenchmarks(args.grid_sizes, sorted(set(args.threads)), args.repeat, args.file_format, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'results saved to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compareResults(results, baseline, args.threshold) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# Writes synthetic osm files of configurable size for benchmarks. A map is a grid of streets with
+# - arterials (primary, mapped as dual carriageways) every few lines, and secondary and residential streets between
+#   them. Crossings of two arterials are clusters of 4 signalized nodes.
+# - railway lines between street rows, not connected to streets
+# - POIs in blocks, mapped as closed building ways or as multipolygon relations with an inner ring
+# Maps with the same arguments are identical.
+#
+# usage: python dev/benchmarks/synthetic_osm.py output_filepath [grid_size] [seed]
+#   .osm, .osm.gz and .osm.bz2 files are written directly. .pbf files are converted from xml with the osmium command
+#   line tool (osmium-tool), which must be on PATH.
+
+import bz2
+import gzip
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+BLOCK_SPACING = 0.002       # degree, about 200 m
+CARRIAGEWAY_SPACING = 0.0001    # degree, about 10 m
+ARTERIAL_SPACING = 5        # every 5th grid line is an arterial
+RAILWAY_SPACING = 8         # a railway line between every 8th pair of rows
+POI_RATIO = 0.5             # share of blocks with a POI
+MULTIPOLYGON_RATIO = 0.3    # share of POIs mapped as multipolygon relations
+
+
+class _OsmXmlWriter:
+    def __init__(self, f):
+        self.f = f
+        self.next_node_id = 1
+        self.next_way_id = 1
+        self.next_relation_id = 1
+        self.number_of_nodes = 0
+        self.number_of_ways = 0
+        self.number_of_relations = 0
+
+    @staticmethod
+    def _tags(tags):
+        return ''.join(f'<tag k="{key}" v="{value}"/>' for key, value in tags.items())
+
+    def node(self, lon, lat, tags=None):
+        node_id = self.next_node_id
+        self.next_node_id += 1
+        self.number_of_nodes += 1
+        if tags:
+            self.f.write(f' <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}">{self._tags(tags)}</node>\n')
+        else:
+            self.f.write(f' <node id="{node_id}" lat="{lat:.7f}" lon="{lon:.7f}"/>\n')
+        return node_id
+
+    def way(self, node_ids, tags):
+        way_id = self.next_way_id
+        self.next_way_id += 1
+        self.number_of_ways += 1
+        refs = ''.join(f'<nd ref="{node_id}"/>' for node_id in node_ids)
+        self.f.write(f' <way id="{way_id}">{refs}{self._tags(tags)}</way>\n')
+        return way_id
+
+    def relation(self, members, tags):
+        relation_id = self.next_relation_id
+        self.next_relation_id += 1
+        self.number_of_relations += 1
+        member_str = ''.join(f'<member type="way" ref="{way_id}" role="{role}"/>' for way_id, role in members)
+        self.f.write(f' <relation id="{relation_id}">{member_str}{self._tags(tags)}</relation>\n')
+        return relation_id
+
+
+def _gridLines(grid_size):
+    """
+    Returns the street lines along one axis as (coordinate, grid index, carriageway) tuples. carriageway is None for
+    two-way streets, and 0 or 1 for the two oneway carriageways of an arterial.
+    """
+    lines = []
+    for idx in range(grid_size + 1):
+        if idx % ARTERIAL_SPACING == 0:
+            lines.append((idx * BLOCK_SPACING, idx, 0))
+            lines.append((idx * BLOCK_SPACING + CARRIAGEWAY_SPACING, idx, 1))
+        else:
+            lines.append((idx * BLOCK_SPACING, idx, None))
+    return lines
+
+
+def _streetTags(grid_idx, carriageway):
+    if carriageway is not None:
+        return {'highway': 'primary', 'oneway': 'yes', 'lanes': '2', 'maxspeed': '50 mph', 'name': f'Avenue {grid_idx}'}
+    if grid_idx % 2 == 0:
+        return {'highway': 'secondary', 'lanes': '2', 'name': f'Street {grid_idx}'}
+    return {'highway': 'residential', 'name': f'Street {grid_idx}'}
+
+
+def _writeElements(writer, grid_size, rng):
+    x_lines = _gridLines(grid_size)
+    y_lines = _gridLines(grid_size)
+
+    # street nodes. osm files store all nodes before ways, so POI and railway nodes are created first as well
+    grid_node_ids = [[0] * len(x_lines) for _ in range(len(y_lines))]
+    for row, (lat, _, row_carriageway) in enumerate(y_lines):
+        for col, (lon, _, col_carriageway) in enumerate(x_lines):
+            signalized = row_carriageway is not None and col_carriageway is not None
+            grid_node_ids[row][col] = writer.node(lon, lat, {'highway': 'traffic_signals'} if signalized else None)
+
+    railway_node_ids = []
+    extent = grid_size * BLOCK_SPACING + CARRIAGEWAY_SPACING
+    for row_idx in range(RAILWAY_SPACING // 2, grid_size, RAILWAY_SPACING):
+        lat = (row_idx + 0.5) * BLOCK_SPACING
+        number_of_points = 2 * grid_size + 1
+        railway_node_ids.append([writer.node(extent * idx / (number_of_points - 1), lat)
+                                 for idx in range(number_of_points)])
+
+    # a POI is a ring inside the block, multipolygons have a second ring inside it
+    pois = []
+    for block_row in range(grid_size):
+        for block_col in range(grid_size):
+            if rng.random() >= POI_RATIO:
+                continue
+            min_lon = block_col * BLOCK_SPACING + CARRIAGEWAY_SPACING
+            min_lat = block_row * BLOCK_SPACING + CARRIAGEWAY_SPACING
+            size = BLOCK_SPACING - CARRIAGEWAY_SPACING
+            is_multipolygon = rng.random() < MULTIPOLYGON_RATIO
+            rings = []
+            for inset in ((0.2, 0.5) if is_multipolygon else (0.2,)):
+                lon0, lat0 = min_lon + inset * size / 2, min_lat + inset * size / 2
+                lon1, lat1 = min_lon + size - inset * size / 2, min_lat + size - inset * size / 2
+                rings.append([writer.node(lon, lat) for lon, lat in ((lon0, lat0), (lon1, lat0), (lon1, lat1),
+                                                                      (lon0, lat1))])
+            pois.append((is_multipolygon, rings, rng.choice(['school', 'hospital', 'parking', 'place_of_worship'])))
+
+    # streets
+    for row, (_, grid_idx, carriageway) in enumerate(y_lines):
+        node_ids = grid_node_ids[row]
+        writer.way(node_ids if carriageway != 1 else node_ids[::-1], _streetTags(grid_idx, carriageway))
+    for col, (_, grid_idx, carriageway) in enumerate(x_lines):
+        node_ids = [grid_node_ids[row][col] for row in range(len(y_lines))]
+        writer.way(node_ids if carriageway != 1 else node_ids[::-1], _streetTags(grid_idx, carriageway))
+
+    for node_ids in railway_node_ids:
+        writer.way(node_ids, {'railway': 'rail', 'usage': 'main', 'gauge': '1435'})
+
+    for is_multipolygon, rings, amenity in pois:
+        if not is_multipolygon:
+            writer.way(rings[0] + rings[0][:1], {'building': 'yes', 'amenity': amenity})
+            continue
+        # the outer ring is split into two ways, as often done for large multipolygons
+        outer = rings[0]
+        outer_way_ids = [writer.way(outer[:3], {}), writer.way(outer[2:] + outer[:1], {})]
+        inner_way_id = writer.way(rings[1] + rings[1][:1], {})
+        writer.relation([(way_id, 'outer') for way_id in outer_way_ids] + [(inner_way_id, 'inner')],
+                        {'type': 'multipolygon', 'building': 'yes', 'amenity': amenity})
+
+
+def writeSyntheticOsm(filepath, grid_size=50, seed=0):
+    """
+    Writes a synthetic osm file with grid_size x grid_size blocks.
+
+    Parameters
+    ----------
+    filepath : str
+        Output path. The format is chosen by the extension: .osm, .osm.gz, .osm.bz2 or .pbf. Writing .pbf files
+        requires the osmium command line tool.
+    grid_size : int
+        Number of blocks along each side of the map.
+    seed : int
+        Seed of the random placement of POIs.
+
+    Returns
+    -------
+    dict
+        Numbers of nodes, ways and relations written.
+    """
+
+    if filepath.endswith('.pbf'):
+        osmium_tool = shutil.which('osmium')
+        if osmium_tool is None:
+            raise RuntimeError('writing .pbf files requires the osmium command line tool (osmium-tool)')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xml_filepath = os.path.join(tmp_dir, 'map.osm')
+            counts = writeSyntheticOsm(xml_filepath, grid_size, seed)
+            subprocess.run([osmium_tool, 'cat', xml_filepath, '-o', filepath, '--overwrite'], check=True)
+        return counts
+
+    if filepath.endswith('.gz'):
+        f = gzip.open(filepath, 'wt', encoding='utf-8')
+    elif filepath.endswith('.bz2'):
+        f = bz2.open(filepath, 'wt', encoding='utf-8')
+    else:
+        f = open(filepath, 'w', encoding='utf-8')
+    with f:
+        max_coord = grid_size * BLOCK_SPACING + CARRIAGEWAY_SPACING
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6" generator="osm2gmns-benchmark">\n')
+        f.write(f' <bounds minlat="0" minlon="0" maxlat="{max_coord:.7f}" maxlon="{max_coord:.7f}"/>\n')
+        writer = _OsmXmlWriter(f)
+        _writeElements(writer, grid_size, random.Random(seed))
+        f.write('</osm>\n')
+    return {'nodes': writer.number_of_nodes, 'ways': writer.number_of_ways, 'relations': writer.number_of_relations}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print('usage: python dev/benchmarks/synthetic_osm.py output_filepath [grid_size] [seed]')
+        sys.exit(1)
+    grid_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    counts = writeSyntheticOsm(sys.argv[1], grid_size, seed)
+    print(f'{counts["nodes"]} nodes, {counts["ways"]} ways and {counts["relations"]} relations written to {sys.argv[1]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,8 @@
 
 
 from osm2gmns.osm2gmns import initlib
-from osm2gmns.osm2gmns import getNetFromFile, generateNodeActivityInfo, fillLinkAttributesWithDefaultValues, consolidateComplexIntersections, outputNetToCSV
+from osm2gmns.osm2gmns import getNetFromFile, getNetFromCSV, getNetFromArrow, applyOsmChange, generateNodeActivityInfo, generateNodePOIInfo, fillLinkAttributesWithDefaultValues, consolidateComplexIntersections, outputNetToCSV, outputNetToArrow
+from osm2gmns.osm2gmns import RunControl, OperationCancelled, setNumThreads, runAsync
 from osm2gmns.downloader import downloadOSMData
 
 __version__ = '1.0.1'
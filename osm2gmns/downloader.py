@@ -19,18 +19,45 @@
 
 
 import os
+import gzip
+import time
+import heapq
+import shutil
+import hashlib
+import threading
 import http.client as httplib
 import urllib.parse as urlparse
 import base64
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 
 
 
 _url = "www.overpass-api.de/api/interpreter"
 # alternatives: overpass.kumi.systems/api/interpreter, sumo.dlr.de/osm/api/interpreter
 
+_chunk_size = 1 << 16
+_retry_statuses = {429, 500, 502, 503, 504}
+_retry_delay = 5.0
+# elements of osm files are ordered by type, then by id
+_element_order = {'node': 0, 'way': 1, 'relation': 2}
 
-def _readCompressed(conn, urlpath, query, filename):
-    conn.request("POST", "/" + urlpath, """
+
+class _RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _buildQuery(area_id, bbox):
+    if bbox is None:
+        node_query = '<area-query ref="%s"/>' % area_id
+    else:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        node_query = '<bbox-query s="%s" w="%s" n="%s" e="%s"/>' % (min_lat, min_lon, max_lat, max_lon)
+        if area_id is not None:
+            node_query = '<query type="node"><area-query ref="%s"/>%s</query>' % (area_id, node_query)
+    return """
     <osm-script timeout="240" element-limit="1073741824">
     <union>
        %s
@@ -43,37 +70,203 @@ def _readCompressed(conn, urlpath, query, filename):
        <recurse type="way-node"/>
     </union>
     <print mode="body"/>
-    </osm-script>""" % query)
-    response = conn.getresponse()
-    # print(response.status, response.reason)
-    if response.status == 200:
-        print('valid reponses got from API server.')
-        print('receving data...')
-        out = open(filename, "wb")
-        out.write(response.read())
-        out.close()
-        print(f'map data has been written to {filename}')
-
-
-def downloadOSMData(area_id, output_filepath='map.osm', url=_url):
+    </osm-script>""" % node_query
+
+
+def _splitIntoTiles(bbox, tile_size):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if tile_size is None:
+        return [bbox]
+    number_of_columns = max(int(-(-(max_lon - min_lon) // tile_size)), 1)
+    number_of_rows = max(int(-(-(max_lat - min_lat) // tile_size)), 1)
+    # neighbouring tiles share their edges, which are rounded to the precision of osm coordinates
+    lons = [round(min_lon + (max_lon - min_lon) * i / number_of_columns, 7) for i in range(number_of_columns)] + [max_lon]
+    lats = [round(min_lat + (max_lat - min_lat) * j / number_of_rows, 7) for j in range(number_of_rows)] + [max_lat]
+    return [(lons[i], lats[j], lons[i + 1], lats[j + 1]) for j in range(number_of_rows) for i in range(number_of_columns)]
+
+
+def _createConnection(url, timeout):
+    if url.scheme == "https" and os.environ.get("https_proxy") is not None:
+        headers = {}
+        proxy_url = urlparse.urlparse(os.environ.get("https_proxy"))
+        if proxy_url.username and proxy_url.password:
+            auth = '%s:%s' % (proxy_url.username, proxy_url.password)
+            headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(auth.encode()).decode()
+        conn = httplib.HTTPSConnection(proxy_url.hostname, proxy_url.port, timeout=timeout)
+        conn.set_tunnel(url.hostname, url.port or 443, headers)
+    elif url.scheme == "https":
+        conn = httplib.HTTPSConnection(url.hostname, url.port, timeout=timeout)
+    else:
+        conn = httplib.HTTPConnection(url.hostname, url.port, timeout=timeout)
+    return conn
+
+
+class _ConnectionPool:
+    """One persistent connection per worker thread, so that a pool of n threads keeps at most n connections open."""
+
+    def __init__(self, url, timeout):
+        self._url = url
+        self._timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = _createConnection(self._url, self._timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def discard(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+def _isCompleteOsmFile(filepath):
+    with open(filepath, 'rb') as f:
+        f.seek(max(os.path.getsize(filepath) - 64, 0))
+        return b'</osm>' in f.read()
+
+
+def _downloadQuery(pool, url, query, filepath, retries):
+    """
+    Streams the response of one query to filepath. The response is written to filepath.part first and moved to
+    filepath once it is complete. A partial file left by a failed attempt or an earlier call is resumed with a range
+    request, or downloaded again if the server does not support ranges.
+    """
+
+    if os.path.exists(filepath):
+        return
+    part_filepath = filepath + '.part'
+    for attempt in range(retries + 1):
+        try:
+            offset = os.path.getsize(part_filepath) if os.path.exists(part_filepath) else 0
+            headers = {'Range': 'bytes=%d-' % offset} if offset > 0 else {}
+            conn = pool.get()
+            conn.request("POST", url.path or "/", query, headers)
+            response = conn.getresponse()
+            if response.status == 416:
+                response.read()
+                os.remove(part_filepath)
+                raise _RetryableError('the partial download cannot be resumed')
+            if response.status not in (200, 206):
+                response.read()
+                retry_after = response.getheader('Retry-After')
+                message = f'{response.status} {response.reason}'
+                if response.status in _retry_statuses:
+                    raise _RetryableError(message, float(retry_after) if retry_after and retry_after.isdigit() else None)
+                raise RuntimeError(f'the API server responded {message}')
+            with open(part_filepath, 'ab' if response.status == 206 else 'wb') as f:
+                while True:
+                    chunk = response.read(_chunk_size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            if not _isCompleteOsmFile(part_filepath):
+                raise _RetryableError('incomplete response')
+            os.replace(part_filepath, filepath)
+            return
+        except (OSError, httplib.HTTPException, _RetryableError) as e:
+            pool.discard()
+            if attempt == retries:
+                raise RuntimeError(f'failed to download map data after {retries + 1} attempts: {e}') from e
+            delay = getattr(e, 'retry_after', None) or _retry_delay * 2 ** attempt
+            print(f'WARNING: {e}. retrying in {delay:.0f} seconds')
+            time.sleep(delay)
+
+
+def _iterOsmElements(filepath):
+    """Yields (type order, id, xml) of the nodes, ways and relations in an osm file, without loading the whole file."""
+
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag in _element_order:
+            elem.tail = None
+            yield _element_order[elem.tag], int(elem.get('id')), ET.tostring(elem, encoding='utf-8')
+        root.clear()
+
+
+def _mergeOsmFiles(filepaths, output_file, bbox):
+    # every file is sorted by element type and id, so the files are merged in one pass and elements in more than one
+    # file, such as ways crossing tile edges, are written once
+    output_file.write(b"<?xml version='1.0' encoding='UTF-8'?>\n<osm version=\"0.6\" generator=\"osm2gmns\">\n")
+    min_lon, min_lat, max_lon, max_lat = bbox
+    output_file.write(f'  <bounds minlat="{min_lat}" minlon="{min_lon}" maxlat="{max_lat}" maxlon="{max_lon}"/>\n'.encode())
+    last_key = None
+    for element_order, element_id, element in heapq.merge(*[_iterOsmElements(filepath) for filepath in filepaths],
+                                                           key=lambda item: (item[0], item[1])):
+        if (element_order, element_id) == last_key:
+            continue
+        last_key = (element_order, element_id)
+        output_file.write(b'  ' + element + b'\n')
+    output_file.write(b'</osm>\n')
+
+
+def downloadOSMData(area_id=None, output_filepath='map.osm', url=_url, bbox=None, tile_size=None, max_connections=4,
+                    retries=3, compress=False, timeout=300):
     """
     Downloads OpenStreetMap (OSM) data for a specified region using the Overpass API.
 
-    This function queries the Overpass API for a given OSM relation ID, retrieves
-    the corresponding map data, and saves it to a local file.
+    This function queries the Overpass API for a given OSM relation ID or bounding
+    box, retrieves the corresponding map data, and saves it to a local file.
+    Responses are streamed to disk in chunks. Failed requests are retried, and
+    partially downloaded data is kept next to the output file, so that calling
+    the function again resumes an interrupted download.
 
     Parameters
     ----------
-    area_id : int
+    area_id : int or None
         The OpenStreetMap relation ID for the area of interest.
         See the 'Get OSM Data' section in the user guide
         for details on finding relation IDs.
     output_filepath : str
         The desired filepath for the downloaded OSM data.
         If no extension or an unsupported extension
-        is provided, '.osm' will be used. Supported extensions: '.osm', '.xml'.
+        is provided, '.osm' will be used. Supported extensions: '.osm', '.xml',
+        optionally followed by '.gz'.
     url : str
         The URL of the Overpass API endpoint.
+    bbox : tuple of float or None
+        (min_lon, min_lat, max_lon, max_lat) of the area of interest. If both
+        `area_id` and `bbox` are given, data in the area within the bbox is
+        downloaded. The bbox is written to the output file as its bounds.
+    tile_size : float or None
+        Only used with `bbox`. If given, the bbox is split into tiles of at
+        most `tile_size` degrees in each direction, which are downloaded
+        concurrently and merged into one file. Elements on tile edges are
+        written once.
+    max_connections : int
+        The maximum number of concurrent connections to the API server when
+        downloading tiles.
+    retries : int
+        The number of times a failed request is retried. Retries wait
+        exponentially longer, or as long as the server asks for.
+    compress : bool
+        If True, the output file is compressed with gzip and '.gz' is appended
+        to `output_filepath` if needed. osm2gmns reads compressed files
+        directly. Output files ending with '.gz' are always compressed.
+    timeout : float
+        The timeout in seconds of each connection attempt and socket read.
 
     Returns
     -------
@@ -82,34 +275,65 @@ def downloadOSMData(area_id, output_filepath='map.osm', url=_url):
         messages to the console.
     """
 
+    if area_id is None and bbox is None:
+        raise ValueError('either area_id or bbox must be provided')
+
     file_name, file_extension = os.path.splitext(output_filepath)
+    if file_extension == '.gz':
+        compress = True
+        file_name, file_extension = os.path.splitext(file_name)
     if not file_extension:
         print(f'WARNING: no file extension in output_filepath {output_filepath}, output_filepath is changed to {file_name}.osm')
-        output_filepath = f'{file_name}.osm'
+        file_extension = '.osm'
     elif file_extension not in ['.osm', '.xml']:
         print(f'WARNING: the file extension in output_filepath {output_filepath} is not supported, output_filepath is changed to {file_name}.osm')
-        output_filepath = f'{file_name}.osm'
+        file_extension = '.osm'
+    output_filepath = f'{file_name}{file_extension}' + ('.gz' if compress else '')
 
     if "http" in url:
         url = urlparse.urlparse(url)
     else:
         url = urlparse.urlparse("https://" + url)
-    if os.environ.get("https_proxy") is not None:
-        headers = {}
-        proxy_url = urlparse.urlparse(os.environ.get("https_proxy"))
-        if proxy_url.username and proxy_url.password:
-            auth = '%s:%s' % (proxy_url.username, proxy_url.password)
-            headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(auth)
-        conn = httplib.HTTPSConnection(proxy_url.hostname, proxy_url.port)
-        conn.set_tunnel(url.hostname, 443, headers)
-    else:
-        if url.scheme == "https":
-            conn = httplib.HTTPSConnection(url.hostname, url.port)
-        else:
-            conn = httplib.HTTPConnection(url.hostname, url.port)
 
-    if area_id < 3600000000:
+    if area_id is not None and area_id < 3600000000:
         area_id += 3600000000
-    _readCompressed(conn, url.path, '<area-query ref="%s"/>' % area_id, output_filepath)
+    if bbox is not None:
+        bbox = tuple(float(value) for value in bbox)
+        tiles = _splitIntoTiles(bbox, tile_size)
+    else:
+        tiles = [None]
+    queries = [_buildQuery(area_id, tile) for tile in tiles]
+
+    # responses are kept in a download folder until the output file is written. file names depend on the queries, so
+    # that only matching responses are reused when resuming
+    download_folder = output_filepath + '.download'
+    os.makedirs(download_folder, exist_ok=True)
+    query_filepaths = [os.path.join(download_folder, hashlib.sha1(query.encode()).hexdigest()[:16] + '.osm')
+                       for query in queries]
 
-    conn.close()
+    pool = _ConnectionPool(url, timeout)
+    try:
+        if len(queries) == 1:
+            _downloadQuery(pool, url, queries[0], query_filepaths[0], retries)
+        else:
+            print(f'downloading {len(queries)} tiles...')
+            with ThreadPoolExecutor(max_workers=max(max_connections, 1)) as executor:
+                futures = [executor.submit(_downloadQuery, pool, url, query, query_filepath, retries)
+                           for query, query_filepath in zip(queries, query_filepaths)]
+                for tile_no, future in enumerate(futures, 1):
+                    future.result()
+                    print(f'tile {tile_no}/{len(futures)} downloaded')
+    finally:
+        pool.close()
+    print('receiving data done')
+
+    temporary_filepath = output_filepath + '.part'
+    with (gzip.open(temporary_filepath, 'wb') if compress else open(temporary_filepath, 'wb')) as output_file:
+        if bbox is None:
+            with open(query_filepaths[0], 'rb') as query_file:
+                shutil.copyfileobj(query_file, output_file, _chunk_size)
+        else:
+            _mergeOsmFiles(query_filepaths, output_file, bbox)
+    os.replace(temporary_filepath, output_filepath)
+    shutil.rmtree(download_folder, ignore_errors=True)
+    print(f'map data has been written to {output_filepath}')
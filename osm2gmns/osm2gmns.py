@@ -6,6 +6,9 @@
 import platform
 import ctypes
 import os
+import json
+import asyncio
+import threading
 
 current_os = platform.system()
 if current_os == "Darwin":
@@ -30,6 +33,8 @@ class StrIntDict(ctypes.Structure):
 class StrFloatDict(ctypes.Structure):
     _fields_ = [("key", ctypes.c_char_p), ("value", ctypes.c_float)]
 
+_ProgressCallbackType = ctypes.CFUNCTYPE(None, ctypes.c_char_p, ctypes.c_bool, ctypes.c_char_p)
+
 
 def initlib():
     if oglib is None:
@@ -39,6 +44,14 @@ def initlib():
 
     oglib.releaseNetworkMemoryPy.argtypes = [ctypes.c_void_p]
 
+    oglib.createRunControlPy.argtypes = [ctypes.c_int32, _ProgressCallbackType]
+    oglib.createRunControlPy.restype = ctypes.c_void_p
+    oglib.cancelRunControlPy.argtypes = [ctypes.c_void_p]
+    oglib.isRunControlCancelledPy.argtypes = [ctypes.c_void_p]
+    oglib.isRunControlCancelledPy.restype = ctypes.c_bool
+    oglib.releaseRunControlPy.argtypes = [ctypes.c_void_p]
+    oglib.setDefaultNumThreadsPy.argtypes = [ctypes.c_int32]
+
     oglib.getNetFromFilePy.argtypes = [ctypes.c_char_p,
                                        ctypes.POINTER(ctypes.c_char_p), ctypes.c_size_t,
                                        ctypes.POINTER(ctypes.c_char_p), ctypes.c_size_t,
@@ -47,25 +60,56 @@ def initlib():
                                        ctypes.POINTER(ctypes.c_char_p), ctypes.c_size_t,
                                        ctypes.POINTER(ctypes.c_char_p), ctypes.c_size_t,
                                        ctypes.POINTER(ctypes.c_char_p), ctypes.c_size_t,
-                                       ctypes.c_bool]
+                                       ctypes.c_bool, ctypes.c_char_p,
+                                       ctypes.c_char_p, ctypes.c_uint64,
+                                       ctypes.c_void_p]
     oglib.getNetFromFilePy.restype = ctypes.c_void_p
 
-    oglib.consolidateComplexIntersectionsPy.argtypes = [ctypes.c_void_p, ctypes.c_bool, ctypes.c_char_p, ctypes.c_float]
+    oglib.getNetFromCSVPy.argtypes = [ctypes.c_char_p, ctypes.c_void_p]
+    oglib.getNetFromCSVPy.restype = ctypes.c_void_p
+    oglib.getNetFromArrowPy.argtypes = [ctypes.c_char_p, ctypes.c_void_p]
+    oglib.getNetFromArrowPy.restype = ctypes.c_void_p
+
+    oglib.applyOsmChangePy.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p]
+    oglib.applyOsmChangePy.restype = ctypes.c_bool
 
-    oglib.generateNodeActivityInfoPy.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    oglib.consolidateComplexIntersectionsPy.argtypes = [ctypes.c_void_p, ctypes.c_bool, ctypes.c_char_p, ctypes.c_float,
+                                                        ctypes.c_void_p]
+
+    oglib.generateNodeActivityInfoPy.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p]
+    oglib.generateNodePOIInfoPy.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
 
     oglib.fillLinkAttributesWithDefaultValuesPy.argtypes = [ctypes.c_void_p,
                                                             ctypes.c_bool, ctypes.POINTER(StrIntDict), ctypes.c_size_t,
                                                             ctypes.c_bool, ctypes.POINTER(StrFloatDict), ctypes.c_size_t,
-                                                            ctypes.c_bool, ctypes.POINTER(StrIntDict), ctypes.c_size_t]
+                                                            ctypes.c_bool, ctypes.POINTER(StrIntDict), ctypes.c_size_t,
+                                                            ctypes.c_void_p]
 
-    oglib.outputNetToCSVPy.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    oglib.outputNetToCSVPy.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p]
+    oglib.outputNetToArrowPy.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p]
+
+    oglib.getNetworkStatsPy.argtypes = [ctypes.c_void_p]
+    oglib.getNetworkStatsPy.restype = ctypes.c_char_p
+    oglib.writeNetworkStatsTracePy.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    oglib.writeNetworkStatsTracePy.restype = ctypes.c_bool
 
     oglib.getNumberOfNodesPy.argtypes = [ctypes.c_void_p]
     oglib.getNumberOfNodesPy.restype = ctypes.c_uint64
     oglib.getNumberOfLinksPy.argtypes = [ctypes.c_void_p]
     oglib.getNumberOfLinksPy.restype = ctypes.c_uint64
 
+    oglib.getNodeIdsPy.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int64)]
+    oglib.getNodeCoordsPy.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_double)]
+    oglib.getLinkIdsPy.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int64), ctypes.POINTER(ctypes.c_int64),
+                                   ctypes.POINTER(ctypes.c_int64)]
+    oglib.getLinkAttributesPy.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_double),
+                                          ctypes.POINTER(ctypes.c_int32), ctypes.POINTER(ctypes.c_float),
+                                          ctypes.POINTER(ctypes.c_int32), ctypes.POINTER(ctypes.c_int32)]
+    oglib.getNumberOfLinkGeometryCoordsPy.argtypes = [ctypes.c_void_p]
+    oglib.getNumberOfLinkGeometryCoordsPy.restype = ctypes.c_uint64
+    oglib.getLinkGeometriesPy.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int64),
+                                          ctypes.POINTER(ctypes.c_double)]
+
     oglib.initializeAbslLoggingPy()
 
 
@@ -84,13 +128,303 @@ class Network:
     def number_of_links(self):
         return oglib.getNumberOfLinksPy(self.cnet)
 
+    @property
+    def stats(self):
+        """
+        Timing and memory statistics of the stages the network went through.
+
+        Stages are recorded by the functions that create, modify and output
+        the network, together with the main steps inside them.
+
+        Returns
+        -------
+        dict
+            {'stages': [...]}, stages in the order they started. Each stage is
+            a dict with 'name', 'depth' (0 for the functions called from
+            Python, larger for the steps nested in them), 'start_time',
+            'wall_time' and 'cpu_time' (seconds, cpu time of all threads),
+            'peak_rss_delta' (bytes the peak resident memory of the process
+            grew by during the stage), 'threads' (maximum number of threads)
+            and 'counts' (dict of the numbers of elements processed).
+
+        Notes
+        -----
+        'cpu_time' and 'peak_rss_delta' are measured for the whole process,
+        not per call. When several calls run side by side, e.g., on threads
+        with their own `RunControl`, the values of each network include the
+        work of the other calls. The peak resident memory only grows, so a
+        stage that needs less memory than an earlier stage or call of the
+        process reports 0.
+        """
+
+        return json.loads(oglib.getNetworkStatsPy(self.cnet).decode())
+
+    def writeStatsTrace(self, filepath='stats_trace.json'):
+        """
+        Writes the stages in `stats` to a Chrome trace file.
+
+        The file uses the Chrome trace event format and can be opened in
+        chrome://tracing or https://ui.perfetto.dev to view the stages on a
+        timeline.
+
+        Parameters
+        ----------
+        filepath : str
+            Path of the JSON file to write.
+
+        Returns
+        -------
+        None
+        """
+
+        if not oglib.writeNetworkStatsTracePy(self.cnet, filepath.encode()):
+            raise RuntimeError(f'failed to write the stats trace file {filepath!r}')
+
+    def getNodeArrays(self):
+        """
+        Returns node attributes as contiguous arrays, in the same order as node.csv.
+
+        Values are copied from the network into buffers allocated once per
+        array, without creating Python objects per node. Arrays are NumPy
+        arrays if NumPy is installed, and memoryview objects otherwise.
+
+        Returns
+        -------
+        dict
+            'node_id' (int64, shape (n,)) and 'coords' (float64, shape (n, 2),
+            x_coord and y_coord in WGS84).
+        """
+
+        number_of_nodes = self.number_of_nodes
+        node_ids = (ctypes.c_int64 * number_of_nodes)()
+        node_coords = (ctypes.c_double * (2 * number_of_nodes))()
+        oglib.getNodeIdsPy(self.cnet, node_ids)
+        oglib.getNodeCoordsPy(self.cnet, node_coords)
+        return {'node_id': _asArray(node_ids), 'coords': _asArray(node_coords, (number_of_nodes, 2))}
+
+    def getLinkArrays(self):
+        """
+        Returns link attributes as contiguous arrays, in the same order as link.csv.
+
+        Values are copied from the network into buffers allocated once per
+        array, without creating Python objects per link. Arrays are NumPy
+        arrays if NumPy is installed, and memoryview objects otherwise.
+
+        Returns
+        -------
+        dict
+            'link_id', 'from_node_id', 'to_node_id' (int64), 'length' (float64,
+            meters), 'lanes' (int32, -1 if missing), 'free_speed' (float32, NaN
+            if missing), 'capacity' (int32, -1 if missing) and 'link_type'
+            (int32, the link_type number in link.csv), all of shape (m,).
+        """
+
+        number_of_links = self.number_of_links
+        link_ids = (ctypes.c_int64 * number_of_links)()
+        from_node_ids = (ctypes.c_int64 * number_of_links)()
+        to_node_ids = (ctypes.c_int64 * number_of_links)()
+        lengths = (ctypes.c_double * number_of_links)()
+        lanes = (ctypes.c_int32 * number_of_links)()
+        free_speeds = (ctypes.c_float * number_of_links)()
+        capacities = (ctypes.c_int32 * number_of_links)()
+        link_types = (ctypes.c_int32 * number_of_links)()
+        oglib.getLinkIdsPy(self.cnet, link_ids, from_node_ids, to_node_ids)
+        oglib.getLinkAttributesPy(self.cnet, lengths, lanes, free_speeds, capacities, link_types)
+        return {'link_id': _asArray(link_ids), 'from_node_id': _asArray(from_node_ids),
+                'to_node_id': _asArray(to_node_ids), 'length': _asArray(lengths), 'lanes': _asArray(lanes),
+                'free_speed': _asArray(free_speeds), 'capacity': _asArray(capacities),
+                'link_type': _asArray(link_types)}
+
+    def getLinkGeometryArrays(self):
+        """
+        Returns link geometries as one flat coordinate buffer with offsets.
+
+        Returns
+        -------
+        tuple
+            (offsets, coords). offsets (int64, shape (m + 1,)): the coordinates
+            of the i-th link are coords[offsets[i]:offsets[i + 1]]. coords
+            (float64, shape (k, 2)): x and y of all link geometry points.
+        """
+
+        number_of_links = self.number_of_links
+        number_of_coords = oglib.getNumberOfLinkGeometryCoordsPy(self.cnet)
+        offsets = (ctypes.c_int64 * (number_of_links + 1))()
+        coords = (ctypes.c_double * (2 * number_of_coords))()
+        oglib.getLinkGeometriesPy(self.cnet, offsets, coords)
+        return _asArray(offsets), _asArray(coords, (number_of_coords, 2))
+
+
+class OperationCancelled(Exception):
+    """Raised by osm2gmns functions called while their `RunControl` is cancelled."""
+
+
+class RunControl:
+    """
+    Number of threads, progress reporting and cancellation of osm2gmns calls.
+
+    osm2gmns functions called in a ``with`` block of a RunControl use its
+    settings. The block applies to the calls made on the thread that entered
+    it, so conversions running side by side on different threads can each
+    use their own control, e.g., to share the cores of a host without
+    oversubscribing them.
+
+    `cancel` can be called from any thread. Running calls stop at their next
+    check, between stages, file buffers and output batches, and raise
+    `OperationCancelled`, as do later calls in the block. Networks being
+    built by cancelled calls are discarded. `applyOsmChange` either leaves
+    the network unchanged or completes the update. Other networks being
+    modified and files being written by cancelled calls may be incomplete.
+
+    Parameters
+    ----------
+    num_threads : int, optional
+        Number of threads of the calls, used by the parallel loops and the
+        OSM file reader. If None, the number set by `setNumThreads` is used.
+    progress_callback : callable, optional
+        Called as progress_callback(stage, finished, counts) on the thread
+        making the calls. stage is the name of a stage as in `Network.stats`.
+        finished is False when the stage begins and while an OSM file is read,
+        and True when the stage ends. counts is a dict of the numbers of
+        elements processed, e.g., {'bytes_read': ..., 'file_size': ...} while
+        reading. Exceptions raised in the callback are printed and ignored.
+
+    Examples
+    --------
+    >>> control = og.RunControl(num_threads=2, progress_callback=print)
+    >>> with control:
+    ...     net = og.getNetFromFile('map.osm')
+    """
+
+    def __init__(self, num_threads=None, progress_callback=None):
+        self._progress_callback = progress_callback
+        # referenced as long as the library may call it
+        self._ccallback = _ProgressCallbackType(self._reportProgress) if progress_callback is not None else None
+        self.ccontrol = oglib.createRunControlPy(num_threads or 0, self._ccallback)
+
+    def __del__(self):
+        oglib.releaseRunControlPy(self.ccontrol)
+
+    def __enter__(self):
+        _runControlStack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _runControlStack().pop()
+
+    def cancel(self):
+        """Cancels the running and later calls using this control. Cannot be undone."""
+        oglib.cancelRunControlPy(self.ccontrol)
+
+    @property
+    def cancelled(self):
+        return oglib.isRunControlCancelledPy(self.ccontrol)
+
+    def _reportProgress(self, stage, finished, counts):
+        self._progress_callback(stage.decode(), finished, json.loads(counts.decode()))
+
+
+_thread_local = threading.local()
+
+def _runControlStack():
+    if not hasattr(_thread_local, 'run_controls'):
+        _thread_local.run_controls = []
+    return _thread_local.run_controls
+
+def _currentRunControl():
+    run_controls = _runControlStack()
+    return run_controls[-1].ccontrol if run_controls else None
+
+def _raiseIfCancelled():
+    run_controls = _runControlStack()
+    if run_controls and run_controls[-1].cancelled:
+        raise OperationCancelled('the osm2gmns call was cancelled')
+
+
+def setNumThreads(num_threads=None):
+    """
+    Sets the number of threads of osm2gmns calls.
+
+    Applies to the calls of all threads, except those in the ``with`` block of
+    a `RunControl` with its own number of threads.
+
+    Parameters
+    ----------
+    num_threads : int, optional
+        Number of threads used by the parallel loops and the OSM file reader.
+        If None, the default is restored: the OMP_NUM_THREADS environment
+        variable if set, otherwise the number of cores.
+
+    Returns
+    -------
+    None
+    """
+
+    oglib.setDefaultNumThreadsPy(num_threads or 0)
+
+
+def _asArray(ctypes_array, shape=None):
+    # numpy arrays share the memory of the ctypes array. numpy is optional
+    try:
+        import numpy as np
+    except ImportError:
+        value_format = ctypes_array._type_._type_
+        view = memoryview(ctypes_array).cast('B').cast(value_format)
+        # memoryview cannot have a zero in its shape
+        return view if shape is None or len(view) == 0 else view.cast('B').cast(value_format, shape)
+    array = np.ctypeslib.as_array(ctypes_array)
+    return array if shape is None else array.reshape(shape)
+
 
 def _checkStringToTuple(arg_val):
     return (arg_val,) if isinstance(arg_val, str) else arg_val
 
+def _geoJSONPolygonsToWKT(polygons):
+    def ringToWKT(ring):
+        return '(' + ', '.join(f'{point[0]!r} {point[1]!r}' for point in ring) + ')'
+    def polygonToWKT(polygon):
+        return '(' + ', '.join(ringToWKT(ring) for ring in polygon) + ')'
+    if len(polygons) == 1:
+        return 'POLYGON ' + polygonToWKT(polygons[0])
+    return 'MULTIPOLYGON (' + ', '.join(polygonToWKT(polygon) for polygon in polygons) + ')'
+
+def _geoJSONToPolygons(geojson):
+    geojson_type = geojson.get('type')
+    if geojson_type == 'Polygon':
+        return [geojson['coordinates']]
+    if geojson_type == 'MultiPolygon':
+        return list(geojson['coordinates'])
+    if geojson_type == 'Feature':
+        return _geoJSONToPolygons(geojson['geometry'])
+    if geojson_type == 'FeatureCollection':
+        return [polygon for feature in geojson['features'] for polygon in _geoJSONToPolygons(feature)]
+    raise ValueError(f'unsupported GeoJSON type {geojson_type!r} for boundary, expected a Polygon or MultiPolygon')
+
+def _boundaryToWKT(boundary):
+    if boundary is None:
+        return ''
+    if isinstance(boundary, (tuple, list)):
+        if len(boundary) != 4:
+            raise ValueError('boundary as a bounding box must be (min_lon, min_lat, max_lon, max_lat)')
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in boundary)
+        if min_lon >= max_lon or min_lat >= max_lat:
+            raise ValueError(f'invalid bounding box {tuple(boundary)}')
+        return _geoJSONPolygonsToWKT([[[(min_lon, min_lat), (max_lon, min_lat), (max_lon, max_lat),
+                                        (min_lon, max_lat), (min_lon, min_lat)]]])
+    if isinstance(boundary, str):
+        if not boundary.lstrip().startswith('{'):
+            return boundary
+        boundary = json.loads(boundary)
+    if isinstance(boundary, dict):
+        polygons = _geoJSONToPolygons(boundary)
+        if not polygons:
+            raise ValueError('no polygon in the GeoJSON boundary')
+        return _geoJSONPolygonsToWKT(polygons)
+    raise TypeError(f'unsupported boundary type {type(boundary).__name__}')
+
 def getNetFromFile(filepath, mode_types='auto', link_types=[], connector_link_types=[], POI=False, POI_sampling_ratio=1.0,
                    osm_node_attributes=[], osm_link_attributes=[], osm_poi_attributes=[],
-                   strict_boundary=True):
+                   strict_boundary=True, boundary=None, cache_dir=None, cache_size_limit_mb=4096):
     """
     Parses an OpenStreetMap file and creates a transportation network object.
 
@@ -127,9 +461,30 @@ def getNetFromFile(filepath, mode_types='auto', link_types=[], connector_link_ty
         List of additional OSM tag keys whose values should be extracted as attributes
         for POIs. If empty, only default attributes are extracted.
     strict_boundary : bool
-        If True, clips links that cross the boundary of the downloaded OSM region.
-        If False, includes the full geometry of any link that partially falls
-        within the region.
+        Only used with `boundary`. If True, clips links that cross the boundary:
+        links are cut at their last node inside the region. If False, includes
+        the full geometry of any link that partially falls within the region.
+    boundary : tuple, str or dict, optional
+        Region to extract. Ways without any node in the region are dropped while
+        the file is parsed, so a small region can be extracted from a large file
+        without building the network of the whole file. Member ways of POI
+        relations with another member way in the region are kept whole, so that
+        the POIs of such relations are complete. Can be a bounding box
+        (min_lon, min_lat, max_lon, max_lat), a WKT POLYGON or MULTIPOLYGON, or
+        a GeoJSON Polygon, MultiPolygon, Feature or FeatureCollection given as a
+        dict or string. POIs disjoint from the region are also dropped. If None,
+        the whole file is parsed.
+    cache_dir : str, optional
+        Directory of an on-disk cache of parsed OSM data. The first call for an
+        OSM file stores the ways, relations and nodes relevant to any mode and
+        link type in the cache. Later calls for the same file load them instead
+        of parsing the file again, also with different `mode_types`,
+        `link_types`, `connector_link_types` and `POI`. Entries are invalidated
+        when the file is modified, and are specific to the OSM attribute,
+        `strict_boundary` and `boundary` arguments. If None, no cache is used.
+    cache_size_limit_mb : int
+        Maximum total size of the cache directory in megabytes. The least
+        recently used entries are removed when the limit is exceeded.
 
     Returns
     -------
@@ -137,6 +492,7 @@ def getNetFromFile(filepath, mode_types='auto', link_types=[], connector_link_ty
         An osm2gmns Network object containing the parsed transportation network data.
     """
         
+    boundary_wkt = _boundaryToWKT(boundary)
     network = Network()
 
     mode_types_byte_string = [mode_type.encode() for mode_type in _checkStringToTuple(mode_types)]
@@ -162,10 +518,122 @@ def getNetFromFile(filepath, mode_types='auto', link_types=[], connector_link_ty
                                           osm_node_attributes_arr, len(osm_node_attributes_arr),
                                           osm_link_attributes_arr, len(osm_link_attributes_arr),
                                           osm_poi_attributes_arr, len(osm_poi_attributes_arr),
-                                          strict_boundary)
+                                          strict_boundary, boundary_wkt.encode(),
+                                          os.fspath(cache_dir).encode() if cache_dir else b'',
+                                          int(cache_size_limit_mb * 1024 * 1024),
+                                          _currentRunControl())
+    _raiseIfCancelled()
+    if network.cnet is None:
+        raise RuntimeError(f'failed to load the network from {filepath!r}')
+    return network
+
+
+def getNetFromCSV(input_folder=''):
+    """
+    Loads a network from GMNS CSV files without parsing an OSM file again.
+
+    Reads node.csv and link.csv, e.g., files written by `outputNetToCSV` or
+    by other GMNS tools. Columns that are not written by osm2gmns are kept
+    as node and link attributes and are written back by `outputNetToCSV`.
+    Links without a geometry get a straight line between their end nodes,
+    and links without a length get the length of their geometry. POIs are
+    not loaded.
+
+    Parameters
+    ----------
+    input_folder : str
+        The directory containing node.csv and link.csv. If empty or not
+        provided, defaults to the current working directory.
+
+    Returns
+    -------
+    Network
+        An osm2gmns Network object that can be processed and exported like a
+        network created by `getNetFromFile`.
+    """
+
+    network = Network()
+    network.cnet = oglib.getNetFromCSVPy(input_folder.encode(), _currentRunControl())
+    _raiseIfCancelled()
+    if network.cnet is None:
+        raise RuntimeError(f'failed to load the network from csv files in {input_folder!r}')
+    return network
+
+
+def getNetFromArrow(input_folder=''):
+    """
+    Loads a network from Arrow IPC files without parsing an OSM file again.
+
+    Reads node.arrow and link.arrow written by `outputNetToArrow`, or any
+    uncompressed Arrow IPC (Feather V2) files with GMNS columns, e.g., written
+    by pyarrow.feather.write_feather(table, path, compression='uncompressed').
+    Link geometries can be stored as WKB or WKT. Otherwise behaves like
+    `getNetFromCSV`.
+
+    Parameters
+    ----------
+    input_folder : str
+        The directory containing node.arrow and link.arrow. If empty or not
+        provided, defaults to the current working directory.
+
+    Returns
+    -------
+    Network
+        An osm2gmns Network object that can be processed and exported like a
+        network created by `getNetFromFile`.
+    """
+
+    network = Network()
+    network.cnet = oglib.getNetFromArrowPy(input_folder.encode(), _currentRunControl())
+    _raiseIfCancelled()
+    if network.cnet is None:
+        raise RuntimeError(f'failed to load the network from arrow files in {input_folder!r}')
     return network
 
 
+def applyOsmChange(network, osc_filepath):
+    """
+    Updates a network with an OSM change file (.osc) instead of rebuilding it.
+
+    Applies the created, modified and deleted elements of an OSM change file,
+    such as the daily diffs published by OSM mirrors, to a network created by
+    `getNetFromFile`. Elements are selected with the arguments the network was
+    created with. Only the links of ways affected by the change are created
+    again; the resulting nodes and links are the same as those of a network
+    created from the updated OSM file, except for ids.
+
+    Parameters
+    ----------
+    network : Network
+        The osm2gmns Network object to modify. It must be created by
+        `getNetFromFile`, and complex intersections must not be consolidated.
+    osc_filepath : str
+        Path to the OSM change file (.osc or .osc.gz). Each element should
+        appear once in the file, as in the diffs of OSM mirrors or files
+        simplified by `osmium merge-changes --simplify`. Nodes of the network
+        are only kept if they are used by selected ways, so a change selecting
+        a way that uses a node neither in the network nor in the change file
+        cannot be applied. The network is then left unchanged and the updated
+        OSM file has to be parsed again with `getNetFromFile`.
+
+    Returns
+    -------
+    None
+        Modifies the input `network` object in place. Untouched nodes and links
+        keep their ids; new nodes and links get ids after the largest existing
+        ones, and POIs are numbered again if any of them changed. Node activity
+        information, node poi ids and default link attributes are not updated;
+        run `generateNodeActivityInfo`, `generateNodePOIInfo` and
+        `fillLinkAttributesWithDefaultValues` again if they are needed.
+    """
+
+    applied = oglib.applyOsmChangePy(network.cnet, osc_filepath.encode(), _currentRunControl())
+    if not applied:
+        # cancellation is only checked before the network is modified, in which case it is left unchanged
+        _raiseIfCancelled()
+        raise RuntimeError(f'failed to apply the osm change file {osc_filepath!r}')
+
+
 def consolidateComplexIntersections(network, auto_identify=False, intersection_filepath=None, int_buffer=20.0):
     """
     Consolidates multiple OSM nodes representing a single complex intersection into one node.
@@ -207,7 +675,9 @@ def consolidateComplexIntersections(network, auto_identify=False, intersection_f
     oglib.consolidateComplexIntersectionsPy(network.cnet, 
                                             auto_identify, 
                                             intersection_filepath.encode() if intersection_filepath is not None else ''.encode(), 
-                                            int_buffer)
+                                            int_buffer,
+                                            _currentRunControl())
+    _raiseIfCancelled()
 
 
 def generateNodeActivityInfo(network, zone_filepath=None):
@@ -241,7 +711,38 @@ def generateNodeActivityInfo(network, zone_filepath=None):
     """
 
     oglib.generateNodeActivityInfoPy(network.cnet,
-                                     zone_filepath.encode() if zone_filepath is not None else ''.encode())
+                                     zone_filepath.encode() if zone_filepath is not None else ''.encode(),
+                                     _currentRunControl())
+    _raiseIfCancelled()
+
+
+def generateNodePOIInfo(network):
+    """
+    Generates poi_id for nodes in the network.
+
+    Links POIs to the network. A node inside the polygon of a POI gets the
+    'poi_id' of that POI. A POI without any node inside is linked to the node
+    nearest to its centroid. Nodes and POIs are indexed with an STRtree, so
+    the search scales to networks with millions of buildings.
+
+    Parameters
+    ----------
+    network : Network
+        The osm2gmns Network object to modify. POIs are only available in
+        networks created by `getNetFromFile` with `POI=True`; other networks
+        are left unchanged.
+
+    Returns
+    -------
+    None
+        Modifies the input `network` object in place. A node inside or nearest
+        to several POIs gets the smallest 'poi_id' among them, and POIs the
+        node is inside take precedence over POIs it is nearest to. Other nodes
+        get no 'poi_id'.
+    """
+
+    oglib.generateNodePOIInfoPy(network.cnet, _currentRunControl())
+    _raiseIfCancelled()
 
 
 def fillLinkAttributesWithDefaultValues(network, 
@@ -290,7 +791,9 @@ def fillLinkAttributesWithDefaultValues(network,
     oglib.fillLinkAttributesWithDefaultValuesPy(network.cnet,
                                                 default_lanes, default_lanes_dict_, len(default_lanes_dict_),
                                                 default_speed, default_speed_dict_, len(default_speed_dict_),
-                                                default_capacity, default_capacity_dict_, len(default_capacity_dict_))
+                                                default_capacity, default_capacity_dict_, len(default_capacity_dict_),
+                                                _currentRunControl())
+    _raiseIfCancelled()
 
 
 def outputNetToCSV(network, output_folder=''):
@@ -315,4 +818,86 @@ def outputNetToCSV(network, output_folder=''):
         Creates CSV files in the specified output folder.
     """
     
-    oglib.outputNetToCSVPy(network.cnet, output_folder.encode())
+    oglib.outputNetToCSVPy(network.cnet, output_folder.encode(), _currentRunControl())
+    _raiseIfCancelled()
+
+
+def outputNetToArrow(network, output_folder=''):
+    """
+    Exports the network object data to Arrow IPC files with typed columns.
+
+    Writes node.arrow, link.arrow and poi.arrow with the same columns as the
+    CSV files written by `outputNetToCSV`. Columns keep their numeric types,
+    missing values are stored as nulls, and link and POI geometries are stored
+    as WKB (tagged with the 'geoarrow.wkb' extension name). The files can be
+    read much faster than the CSV files, e.g., with pyarrow.feather.read_table,
+    pandas.read_feather or polars.read_ipc.
+
+    Parameters
+    ----------
+    network : Network
+        The osm2gmns Network object containing the data to be exported.
+    output_folder : str
+        The directory path where the Arrow files will be saved. If empty or not
+        provided, defaults to the current working directory.
+
+    Returns
+    -------
+    None
+        Creates Arrow files in the specified output folder.
+    """
+
+    oglib.outputNetToArrowPy(network.cnet, output_folder.encode(), _currentRunControl())
+    _raiseIfCancelled()
+
+
+async def runAsync(function, *args, num_threads=None, progress_callback=None, **kwargs):
+    """
+    Runs osm2gmns calls in a worker thread without blocking the event loop.
+
+    function is called with args and kwargs in a thread of the default
+    executor of the running loop, in the ``with`` block of a new `RunControl`.
+    If the awaiting task is cancelled, the control is cancelled too, and the
+    worker is awaited before asyncio.CancelledError is raised, so that the
+    memory of the discarded network is released by then.
+
+    Parameters
+    ----------
+    function : callable
+        An osm2gmns function, e.g., `getNetFromFile`, or a function making
+        several osm2gmns calls.
+    *args, **kwargs
+        Arguments of function.
+    num_threads : int, optional
+        Number of threads of the calls, as in `RunControl`.
+    progress_callback : callable, optional
+        Called as in `RunControl`, but on the event loop thread.
+
+    Returns
+    -------
+    object
+        The return value of function.
+
+    Examples
+    --------
+    >>> net = await og.runAsync(og.getNetFromFile, 'map.osm', POI=True, num_threads=2)
+    """
+
+    loop = asyncio.get_running_loop()
+    loop_progress_callback = None
+    if progress_callback is not None:
+        def loop_progress_callback(stage, finished, counts):
+            loop.call_soon_threadsafe(progress_callback, stage, finished, counts)
+    control = RunControl(num_threads, loop_progress_callback)
+
+    def run():
+        with control:
+            return function(*args, **kwargs)
+
+    future = loop.run_in_executor(None, run)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        control.cancel()
+        await asyncio.gather(future, return_exceptions=True)
+        raise
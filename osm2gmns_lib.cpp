@@ -9,8 +9,10 @@
 #include <absl/log/initialize.h>
 #include <absl/log/log.h>
 
+#include <algorithm>
 #include <cstddef>
 #include <cstdint>
+#include <limits>
 #include <string>
 #include <vector>
 
@@ -19,6 +21,8 @@
 #include "src/io.h"
 #include "src/networks.h"
 #include "src/osmconfig.h"
+#include "src/runcontrol.h"
+#include "src/stats.h"
 
 #ifdef _WIN32
 #define C_API __declspec(dllexport)
@@ -95,13 +99,30 @@ C_API void initializeAbslLoggingPy() {
 
 C_API void releaseNetworkMemoryPy(Network* network) { delete network; };
 
+// the functions below that build, modify or write networks take an optional RunControl as their last argument, which
+// may be nullptr. networks are nullptr if the control was cancelled while building them
+
+C_API RunControl* createRunControlPy(int32_t num_threads, ProgressCallback progress_callback) {
+  return new RunControl(num_threads, progress_callback);
+};
+
+C_API void cancelRunControlPy(RunControl* control) { control->cancel(); };
+
+C_API bool isRunControlCancelledPy(const RunControl* control) { return control->cancelled(); };
+
+C_API void releaseRunControlPy(RunControl* control) { delete control; };
+
+C_API void setDefaultNumThreadsPy(int32_t num_threads) { setDefaultNumThreads(num_threads); };
+
 C_API Network* getNetFromFilePy(const char* osm_filepath, const char** mode_types_val, size_t mode_types_len,
                                 const char** link_types_val, size_t link_types_len,
                                 const char** connector_link_types_val, size_t connector_link_types_len, bool POI,
                                 float POI_sampling_ratio, const char** osm_node_attributes_val,
                                 size_t osm_node_attributes_len, const char** osm_link_attributes_val,
                                 size_t osm_link_attributes_len, const char** osm_poi_attributes_val,
-                                size_t osm_poi_attributes_len, bool strict_boundary) {
+                                size_t osm_poi_attributes_len, bool strict_boundary, const char* boundary,
+                                const char* cache_dir, uint64_t cache_size_limit, RunControl* control) {
+  const RunControlScope scope(control);
   const absl::flat_hash_set<ModeType> mode_types = parseModeTypes(mode_types_val, mode_types_len);
   const absl::flat_hash_set<HighWayLinkType> link_types = parseLinkTypes(link_types_val, link_types_len);
   const absl::flat_hash_set<HighWayLinkType> connector_link_types =
@@ -111,26 +132,49 @@ C_API Network* getNetFromFilePy(const char* osm_filepath, const char** mode_type
                            parseCharArraysToStringVector(osm_link_attributes_val, osm_link_attributes_len),
                            parseCharArraysToStringVector(osm_poi_attributes_val, osm_poi_attributes_len)};
   Network* network = getNetFromFile(osm_filepath, mode_types, link_types, connector_link_types, POI, POI_sampling_ratio,
-                                    osm_parsing_config, strict_boundary);
+                                    osm_parsing_config, strict_boundary, boundary, cache_dir, cache_size_limit);
   return network;
 };
 
+C_API Network* getNetFromCSVPy(const char* input_folder, RunControl* control) {
+  const RunControlScope scope(control);
+  return getNetFromCSV(input_folder);
+};
+
+C_API Network* getNetFromArrowPy(const char* input_folder, RunControl* control) {
+  const RunControlScope scope(control);
+  return getNetFromArrow(input_folder);
+};
+
 C_API void consolidateComplexIntersectionsPy(Network* network, bool auto_identify, const char* intersection_file,
-                                             float int_buffer) {
+                                             float int_buffer, RunControl* control) {
+  const RunControlScope scope(control);
   consolidateComplexIntersections(network, auto_identify, intersection_file, int_buffer);
 };
 
-C_API void generateNodeActivityInfoPy(Network* network, const char* zone_file) {
+C_API bool applyOsmChangePy(Network* network, const char* osc_filepath, RunControl* control) {
+  const RunControlScope scope(control);
+  return applyOsmChange(network, osc_filepath);
+};
+
+C_API void generateNodeActivityInfoPy(Network* network, const char* zone_file, RunControl* control) {
+  const RunControlScope scope(control);
   generateNodeActivityInfo(network, zone_file);
 };
 
+C_API void generateNodePOIInfoPy(Network* network, RunControl* control) {
+  const RunControlScope scope(control);
+  generateNodePOIInfo(network);
+};
+
 C_API void fillLinkAttributesWithDefaultValuesPy(Network* network, bool default_lanes,
                                                  const StrNumDict<int32_t>* default_lanes_dict_val,
                                                  size_t default_lanes_dict_len, bool default_speed,
                                                  const StrNumDict<float>* default_speed_dict_val,
                                                  size_t default_speed_dict_len, bool default_capacity,
                                                  const StrNumDict<int32_t>* default_capacity_dict_val,
-                                                 size_t default_capacity_dict_len) {
+                                                 size_t default_capacity_dict_len, RunControl* control) {
+  const RunControlScope scope(control);
   const absl::flat_hash_map<HighWayLinkType, int32_t> default_lanes_dict =
       parseLinkTypeToNumDict<int32_t>(default_lanes_dict_val, default_lanes_dict_len);
   const absl::flat_hash_map<HighWayLinkType, float> default_speed_dict =
@@ -141,10 +185,90 @@ C_API void fillLinkAttributesWithDefaultValuesPy(Network* network, bool default_
                                       default_capacity, default_capacity_dict);
 }
 
-C_API void outputNetToCSVPy(const Network* network, const char* output_folder) {
+C_API void outputNetToCSVPy(const Network* network, const char* output_folder, RunControl* control) {
+  const RunControlScope scope(control);
   outputNetToCSV(network, output_folder);
 };
 
+C_API void outputNetToArrowPy(const Network* network, const char* output_folder, RunControl* control) {
+  const RunControlScope scope(control);
+  outputNetToArrow(network, output_folder);
+};
+
+// the returned string stays valid until the next call from the same thread
+C_API const char* getNetworkStatsPy(const Network* network) {
+  thread_local std::string stats_json;
+  stats_json = network->stats()->toJson();
+  return stats_json.c_str();
+};
+
+C_API bool writeNetworkStatsTracePy(const Network* network, const char* trace_filepath) {
+  return network->stats()->writeChromeTrace(trace_filepath);
+};
+
 C_API size_t getNumberOfNodesPy(const Network* network) { return network->numberOfNodes(); };
 C_API size_t getNumberOfLinksPy(const Network* network) { return network->numberOfLinks(); };
+
+// the functions below copy node and link attributes into caller-allocated contiguous arrays, in the order of
+// nodeVector() and linkVector(). missing lanes and capacities are written as -1, missing free speeds as NaN
+
+C_API void getNodeIdsPy(const Network* network, int64_t* node_ids) {
+  const std::vector<Node*>& node_vector = network->nodeVector();
+  for (size_t idx = 0; idx < node_vector.size(); ++idx) {
+    node_ids[idx] = node_vector[idx]->nodeId();  // NOLINT
+  }
+};
+
+// (x, y) pairs, 2 * number of nodes values
+C_API void getNodeCoordsPy(const Network* network, double* node_coords) {
+  const std::vector<Node*>& node_vector = network->nodeVector();
+  for (size_t idx = 0; idx < node_vector.size(); ++idx) {
+    node_coords[2 * idx] = node_vector[idx]->x();      // NOLINT
+    node_coords[2 * idx + 1] = node_vector[idx]->y();  // NOLINT
+  }
+};
+
+C_API void getLinkIdsPy(const Network* network, int64_t* link_ids, int64_t* from_node_ids, int64_t* to_node_ids) {
+  const std::vector<Link*>& link_vector = network->linkVector();
+  for (size_t idx = 0; idx < link_vector.size(); ++idx) {
+    link_ids[idx] = link_vector[idx]->linkId();                   // NOLINT
+    from_node_ids[idx] = link_vector[idx]->fromNode()->nodeId();  // NOLINT
+    to_node_ids[idx] = link_vector[idx]->toNode()->nodeId();      // NOLINT
+  }
+};
+
+C_API void getLinkAttributesPy(const Network* network, double* lengths, int32_t* lanes, float* free_speeds,
+                               int32_t* capacities, int32_t* link_types) {
+  const std::vector<Link*>& link_vector = network->linkVector();
+  for (size_t idx = 0; idx < link_vector.size(); ++idx) {
+    const Link* link = link_vector[idx];
+    lengths[idx] = link->length();                                                           // NOLINT
+    lanes[idx] = link->lanes().value_or(-1);                                                 // NOLINT
+    free_speeds[idx] = link->freeSpeed().value_or(std::numeric_limits<float>::quiet_NaN());  // NOLINT
+    capacities[idx] = link->capacity().value_or(-1);                                         // NOLINT
+    link_types[idx] = getLinkTypeNo(link);                                                   // NOLINT
+  }
+};
+
+C_API size_t getNumberOfLinkGeometryCoordsPy(const Network* network) {
+  size_t number_of_coords = 0;
+  for (const Link* link : network->linkVector()) {
+    number_of_coords += link->numberOfCoordinates();
+  }
+  return number_of_coords;
+};
+
+// coordinates of link i are the (x, y) pairs offsets[i] to offsets[i + 1] - 1 of coords. offsets has number of links
+// + 1 values, coords has 2 * getNumberOfLinkGeometryCoordsPy() values
+C_API void getLinkGeometriesPy(const Network* network, int64_t* offsets, double* coords) {
+  const std::vector<Link*>& link_vector = network->linkVector();
+  int64_t offset = 0;
+  for (size_t idx = 0; idx < link_vector.size(); ++idx) {
+    offsets[idx] = offset;  // NOLINT
+    const Link* link = link_vector[idx];
+    std::copy(link->coordinates(), link->coordinates() + 2 * link->numberOfCoordinates(), coords + 2 * offset);  // NOLINT
+    offset += static_cast<int64_t>(link->numberOfCoordinates());
+  }
+  offsets[link_vector.size()] = offset;  // NOLINT
+};
 }
\ No newline at end of file
@@ -0,0 +1,901 @@
+#include "arrowipc.h"
+
+#include <absl/log/log.h>
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <filesystem>
+#include <functional>
+#include <ios>
+#include <iterator>
+#include <limits>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <utility>
+#include <vector>
+
+// values defined by the Arrow format specification (format/Schema.fbs, format/Message.fbs, format/File.fbs)
+constexpr std::string_view ARROW_MAGIC = "ARROW1";
+constexpr int16_t ARROW_METADATA_VERSION_V5 = 4;
+constexpr uint8_t ARROW_MESSAGE_HEADER_SCHEMA = 1;
+constexpr uint8_t ARROW_MESSAGE_HEADER_RECORD_BATCH = 3;
+constexpr uint8_t ARROW_TYPE_INT = 2;
+constexpr uint8_t ARROW_TYPE_FLOATING_POINT = 3;
+constexpr uint8_t ARROW_TYPE_BINARY = 4;
+constexpr uint8_t ARROW_TYPE_UTF8 = 5;
+constexpr uint8_t ARROW_TYPE_BOOL = 6;
+constexpr uint8_t ARROW_TYPE_NULL = 1;
+constexpr uint8_t ARROW_TYPE_DECIMAL = 7;
+constexpr uint8_t ARROW_TYPE_DATE = 8;
+constexpr uint8_t ARROW_TYPE_TIME = 9;
+constexpr uint8_t ARROW_TYPE_TIMESTAMP = 10;
+constexpr uint8_t ARROW_TYPE_INTERVAL = 11;
+constexpr uint8_t ARROW_TYPE_LIST = 12;
+constexpr uint8_t ARROW_TYPE_STRUCT = 13;
+constexpr uint8_t ARROW_TYPE_FIXED_SIZE_BINARY = 15;
+constexpr uint8_t ARROW_TYPE_FIXED_SIZE_LIST = 16;
+constexpr uint8_t ARROW_TYPE_MAP = 17;
+constexpr uint8_t ARROW_TYPE_DURATION = 18;
+constexpr uint8_t ARROW_TYPE_LARGE_BINARY = 19;
+constexpr uint8_t ARROW_TYPE_LARGE_UTF8 = 20;
+constexpr uint8_t ARROW_TYPE_LARGE_LIST = 21;
+constexpr int16_t ARROW_PRECISION_SINGLE = 1;
+constexpr int16_t ARROW_PRECISION_DOUBLE = 2;
+constexpr uint32_t ARROW_CONTINUATION_MARKER = 0xFFFFFFFF;
+constexpr size_t ARROW_ALIGNMENT = 8;
+constexpr size_t BITS_PER_BYTE = 8;
+constexpr size_t ARROW_BLOCK_SIZE = 24;
+constexpr size_t ARROW_FIELD_NODE_SIZE = 16;
+constexpr size_t ARROW_BUFFER_SIZE = 16;
+constexpr int32_t ARROW_INT16_BIT_WIDTH = 16;
+constexpr int32_t ARROW_INT32_BIT_WIDTH = 32;
+constexpr int32_t ARROW_INT64_BIT_WIDTH = 64;
+
+size_t alignUp(size_t size, size_t alignment) { return (size + alignment - 1) / alignment * alignment; }
+
+void padTo(std::vector<uint8_t>& buffer, size_t alignment) { buffer.resize(alignUp(buffer.size(), alignment), 0); }
+
+template <typename T>
+void appendScalar(std::vector<uint8_t>& buffer, T value) {
+  const size_t offset = buffer.size();
+  buffer.resize(offset + sizeof(T));
+  std::memcpy(buffer.data() + offset, &value, sizeof(T));
+}
+
+template <typename T>
+void writeScalar(std::vector<uint8_t>& buffer, size_t position, T value) {
+  std::memcpy(buffer.data() + position, &value, sizeof(T));
+}
+
+// Arrow metadata is serialized with flatbuffers. FlatBufferTable is a small front-to-back flatbuffer encoder: every
+// table is written as its vtable followed by its inline fields, and the objects it refers to (strings, vectors,
+// tables) are written after it, so that all unsigned offsets point forward as the format requires.
+class FlatBufferTable {
+ public:
+  template <typename T>
+  FlatBufferTable& addScalar(uint16_t slot, T value) {
+    Field field{slot, sizeof(T), std::vector<uint8_t>(sizeof(T)), nullptr};
+    std::memcpy(field.bytes.data(), &value, sizeof(T));
+    fields_.push_back(std::move(field));
+    return *this;
+  }
+
+  FlatBufferTable& addString(uint16_t slot, std::string value) {
+    return addObject(slot, [value = std::move(value)](std::vector<uint8_t>& buffer) {
+      padTo(buffer, sizeof(uint32_t));
+      const size_t position = buffer.size();
+      appendScalar(buffer, static_cast<uint32_t>(value.size()));
+      buffer.insert(buffer.end(), value.begin(), value.end());
+      buffer.push_back(0);
+      return position;
+    });
+  }
+
+  FlatBufferTable& addTable(uint16_t slot, FlatBufferTable table) {
+    return addObject(slot, [table = std::move(table)](std::vector<uint8_t>& buffer) { return table.write(buffer); });
+  }
+
+  FlatBufferTable& addTableVector(uint16_t slot, std::vector<FlatBufferTable> tables) {
+    return addObject(slot, [tables = std::move(tables)](std::vector<uint8_t>& buffer) {
+      padTo(buffer, sizeof(uint32_t));
+      const size_t position = buffer.size();
+      appendScalar(buffer, static_cast<uint32_t>(tables.size()));
+      buffer.resize(buffer.size() + tables.size() * sizeof(uint32_t), 0);
+      for (size_t idx = 0; idx < tables.size(); ++idx) {
+        const size_t offset_position = position + sizeof(uint32_t) * (idx + 1);
+        const size_t table_position = tables[idx].write(buffer);
+        writeScalar(buffer, offset_position, static_cast<uint32_t>(table_position - offset_position));
+      }
+      return position;
+    });
+  }
+
+  // structs are passed as raw little-endian bytes. all structs used by Arrow are 8-byte aligned
+  FlatBufferTable& addStructVector(uint16_t slot, size_t number_of_structs, std::vector<uint8_t> struct_bytes) {
+    return addObject(slot, [number_of_structs, struct_bytes = std::move(struct_bytes)](std::vector<uint8_t>& buffer) {
+      padTo(buffer, sizeof(uint32_t));
+      if ((buffer.size() + sizeof(uint32_t)) % ARROW_ALIGNMENT != 0) {
+        buffer.resize(buffer.size() + sizeof(uint32_t), 0);
+      }
+      const size_t position = buffer.size();
+      appendScalar(buffer, static_cast<uint32_t>(number_of_structs));
+      buffer.insert(buffer.end(), struct_bytes.begin(), struct_bytes.end());
+      return position;
+    });
+  }
+
+  // serializes the table as the root of a flatbuffer
+  [[nodiscard]] std::vector<uint8_t> finish() const {
+    std::vector<uint8_t> buffer(sizeof(uint32_t), 0);
+    const size_t root_position = write(buffer);
+    writeScalar(buffer, 0, static_cast<uint32_t>(root_position));
+    padTo(buffer, ARROW_ALIGNMENT);
+    return buffer;
+  }
+
+ private:
+  struct Field {
+    uint16_t slot;
+    size_t size;
+    std::vector<uint8_t> bytes;
+    // writes the referenced object and returns its position. nullptr for scalar fields
+    std::function<size_t(std::vector<uint8_t>&)> write_object;
+  };
+
+  FlatBufferTable& addObject(uint16_t slot, std::function<size_t(std::vector<uint8_t>&)> write_object) {
+    fields_.push_back(
+        Field{slot, sizeof(uint32_t), std::vector<uint8_t>(sizeof(uint32_t), 0), std::move(write_object)});
+    return *this;
+  }
+
+  size_t write(std::vector<uint8_t>& buffer) const {
+    uint16_t number_of_slots = 0;
+    std::vector<size_t> field_offsets(fields_.size());
+    size_t inline_size = sizeof(int32_t);
+    for (size_t idx = 0; idx < fields_.size(); ++idx) {
+      number_of_slots = std::max(number_of_slots, static_cast<uint16_t>(fields_[idx].slot + 1));
+      inline_size = alignUp(inline_size, fields_[idx].size);
+      field_offsets[idx] = inline_size;
+      inline_size += fields_[idx].size;
+    }
+
+    padTo(buffer, sizeof(uint16_t));
+    const size_t vtable_position = buffer.size();
+    const size_t vtable_size = sizeof(uint16_t) * (2 + number_of_slots);
+    const size_t table_position = alignUp(vtable_position + vtable_size, ARROW_ALIGNMENT);
+    buffer.resize(table_position + inline_size, 0);
+    writeScalar(buffer, vtable_position, static_cast<uint16_t>(vtable_size));
+    writeScalar(buffer, vtable_position + sizeof(uint16_t), static_cast<uint16_t>(inline_size));
+    for (size_t idx = 0; idx < fields_.size(); ++idx) {
+      writeScalar(buffer, vtable_position + sizeof(uint16_t) * (2 + fields_[idx].slot),
+                  static_cast<uint16_t>(field_offsets[idx]));
+      std::memcpy(buffer.data() + table_position + field_offsets[idx], fields_[idx].bytes.data(), fields_[idx].size);
+    }
+    writeScalar(buffer, table_position, static_cast<int32_t>(table_position - vtable_position));
+
+    for (size_t idx = 0; idx < fields_.size(); ++idx) {
+      if (fields_[idx].write_object == nullptr) {
+        continue;
+      }
+      const size_t offset_position = table_position + field_offsets[idx];
+      const size_t object_position = fields_[idx].write_object(buffer);
+      writeScalar(buffer, offset_position, static_cast<uint32_t>(object_position - offset_position));
+    }
+    return table_position;
+  }
+
+  std::vector<Field> fields_;
+};
+
+FlatBufferTable makeTypeTable(ArrowType type) {
+  FlatBufferTable type_table;
+  switch (type) {
+    case ArrowType::INT16:
+      type_table.addScalar<int32_t>(0, 16).addScalar<uint8_t>(1, 1);  // NOLINT
+      break;
+    case ArrowType::INT32:
+      type_table.addScalar<int32_t>(0, 32).addScalar<uint8_t>(1, 1);  // NOLINT
+      break;
+    case ArrowType::INT64:
+      type_table.addScalar<int32_t>(0, 64).addScalar<uint8_t>(1, 1);  // NOLINT
+      break;
+    case ArrowType::FLOAT32:
+      type_table.addScalar<int16_t>(0, ARROW_PRECISION_SINGLE);
+      break;
+    case ArrowType::FLOAT64:
+      type_table.addScalar<int16_t>(0, ARROW_PRECISION_DOUBLE);
+      break;
+    default:  // BOOL, UTF8 and BINARY have no type parameters
+      break;
+  }
+  return type_table;
+}
+
+uint8_t getTypeUnionId(ArrowType type) {
+  switch (type) {
+    case ArrowType::BOOL:
+      return ARROW_TYPE_BOOL;
+    case ArrowType::INT16:
+    case ArrowType::INT32:
+    case ArrowType::INT64:
+      return ARROW_TYPE_INT;
+    case ArrowType::FLOAT32:
+    case ArrowType::FLOAT64:
+      return ARROW_TYPE_FLOATING_POINT;
+    case ArrowType::UTF8:
+      return ARROW_TYPE_UTF8;
+    default:
+      return ARROW_TYPE_BINARY;
+  }
+}
+
+FlatBufferTable makeSchemaTable(const std::vector<ArrowField>& fields) {
+  std::vector<FlatBufferTable> field_tables;
+  field_tables.reserve(fields.size());
+  for (const ArrowField& field : fields) {
+    FlatBufferTable field_table;
+    field_table.addString(0, field.name)
+        .addScalar<uint8_t>(1, 1)
+        .addScalar<uint8_t>(2, getTypeUnionId(field.type))
+        .addTable(3, makeTypeTable(field.type))
+        .addTableVector(5, {});
+    if (!field.metadata.empty()) {
+      std::vector<FlatBufferTable> key_value_tables;
+      for (const auto& [key, value] : field.metadata) {
+        FlatBufferTable key_value_table;
+        key_value_table.addString(0, key).addString(1, value);
+        key_value_tables.push_back(std::move(key_value_table));
+      }
+      field_table.addTableVector(6, std::move(key_value_tables));  // NOLINT
+    }
+    field_tables.push_back(std::move(field_table));
+  }
+  FlatBufferTable schema_table;
+  schema_table.addScalar<int16_t>(0, 0).addTableVector(1, std::move(field_tables));
+  return schema_table;
+}
+
+std::vector<uint8_t> makeMessageMetadata(uint8_t header_type, FlatBufferTable header, int64_t body_length) {
+  FlatBufferTable message_table;
+  message_table.addScalar<int16_t>(0, ARROW_METADATA_VERSION_V5)
+      .addScalar<uint8_t>(1, header_type)
+      .addTable(2, std::move(header))
+      .addScalar<int64_t>(3, body_length);
+  const std::vector<uint8_t> flatbuffer = message_table.finish();
+  std::vector<uint8_t> metadata;
+  metadata.reserve(sizeof(uint32_t) + sizeof(int32_t) + flatbuffer.size());
+  appendScalar(metadata, ARROW_CONTINUATION_MARKER);
+  appendScalar(metadata, static_cast<int32_t>(flatbuffer.size()));
+  metadata.insert(metadata.end(), flatbuffer.begin(), flatbuffer.end());
+  return metadata;
+}
+
+ArrowColumn::ArrowColumn(ArrowType type) : type_(type) {
+  if (type_ == ArrowType::UTF8 || type_ == ArrowType::BINARY) {
+    value_offsets_.push_back(0);
+  }
+}
+
+ArrowColumn::ArrowColumn(ArrowType type, size_t length, size_t null_count, std::vector<uint8_t> validity_bitmap,
+                         std::vector<uint8_t> values, std::vector<int32_t> value_offsets)
+    : type_(type),
+      length_(length),
+      null_count_(null_count),
+      validity_bitmap_(std::move(validity_bitmap)),
+      values_(std::move(values)),
+      value_offsets_(std::move(value_offsets)) {}
+
+void ArrowColumn::setValid() {
+  if (length_ % BITS_PER_BYTE == 0) {
+    validity_bitmap_.push_back(0);
+  }
+  validity_bitmap_.back() |= static_cast<uint8_t>(1U << (length_ % BITS_PER_BYTE));
+  ++length_;
+}
+
+void ArrowColumn::appendNull() {
+  if (length_ % BITS_PER_BYTE == 0) {
+    validity_bitmap_.push_back(0);
+  }
+  switch (type_) {
+    case ArrowType::BOOL:
+      if (length_ % BITS_PER_BYTE == 0) {
+        values_.push_back(0);
+      }
+      break;
+    case ArrowType::INT16:
+      values_.resize(values_.size() + sizeof(int16_t), 0);
+      break;
+    case ArrowType::INT32:
+    case ArrowType::FLOAT32:
+      values_.resize(values_.size() + sizeof(int32_t), 0);
+      break;
+    case ArrowType::INT64:
+    case ArrowType::FLOAT64:
+      values_.resize(values_.size() + sizeof(int64_t), 0);
+      break;
+    default:
+      value_offsets_.push_back(value_offsets_.back());
+      break;
+  }
+  ++length_;
+  ++null_count_;
+}
+
+void ArrowColumn::appendBool(bool value) {
+  if (length_ % BITS_PER_BYTE == 0) {
+    values_.push_back(0);
+  }
+  if (value) {
+    values_.back() |= static_cast<uint8_t>(1U << (length_ % BITS_PER_BYTE));
+  }
+  setValid();
+}
+
+void ArrowColumn::appendBytes(std::string_view value) {
+  values_.insert(values_.end(), value.begin(), value.end());
+  value_offsets_.push_back(static_cast<int32_t>(values_.size()));
+  setValid();
+}
+
+bool ArrowColumn::isNull(size_t idx) const {
+  return null_count_ > 0 && (validity_bitmap_[idx / BITS_PER_BYTE] & (1U << (idx % BITS_PER_BYTE))) == 0;
+}
+
+bool ArrowColumn::boolValue(size_t idx) const {
+  return (values_[idx / BITS_PER_BYTE] & (1U << (idx % BITS_PER_BYTE))) != 0;
+}
+
+std::string_view ArrowColumn::bytes(size_t idx) const {
+  return {reinterpret_cast<const char*>(values_.data()) + value_offsets_[idx],  // NOLINT
+          static_cast<size_t>(value_offsets_[idx + 1] - value_offsets_[idx])};
+}
+
+ArrowType ArrowColumn::type() const { return type_; }
+size_t ArrowColumn::length() const { return length_; }
+size_t ArrowColumn::nullCount() const { return null_count_; }
+const std::vector<uint8_t>& ArrowColumn::validityBitmap() const { return validity_bitmap_; }
+const std::vector<uint8_t>& ArrowColumn::values() const { return values_; }
+const std::vector<int32_t>& ArrowColumn::valueOffsets() const { return value_offsets_; }
+
+ArrowFileWriter::ArrowFileWriter(const std::filesystem::path& filepath, std::vector<ArrowField> fields)
+    : file_(filepath, std::ios::binary), fields_(std::move(fields)) {
+  if (!file_) {
+    return;
+  }
+  // the file starts with the magic string padded to 8 bytes, followed by the schema message
+  std::vector<uint8_t> header(ARROW_MAGIC.begin(), ARROW_MAGIC.end());
+  padTo(header, ARROW_ALIGNMENT);
+  file_.write(reinterpret_cast<const char*>(header.data()), static_cast<std::streamsize>(header.size()));  // NOLINT
+  position_ += header.size();
+  writeMessage({makeMessageMetadata(ARROW_MESSAGE_HEADER_SCHEMA, makeSchemaTable(fields_), 0), {}});
+}
+
+bool ArrowFileWriter::isOpen() const { return file_.is_open(); }
+const std::vector<ArrowField>& ArrowFileWriter::fields() const { return fields_; }
+
+std::vector<ArrowColumn> ArrowFileWriter::makeRecordBatch() const {
+  std::vector<ArrowColumn> columns;
+  columns.reserve(fields_.size());
+  for (const ArrowField& field : fields_) {
+    columns.emplace_back(field.type);
+  }
+  return columns;
+}
+
+ArrowMessage ArrowFileWriter::encodeRecordBatch(const std::vector<ArrowColumn>& columns) {
+  const int64_t number_of_rows = columns.empty() ? 0 : static_cast<int64_t>(columns.front().length());
+  ArrowMessage message;
+  std::vector<uint8_t> field_nodes;
+  std::vector<uint8_t> buffers;
+  size_t number_of_buffers = 0;
+  auto append_buffer = [&message, &buffers, &number_of_buffers](const uint8_t* data, size_t size) {
+    appendScalar(buffers, static_cast<int64_t>(message.body.size()));
+    appendScalar(buffers, static_cast<int64_t>(size));
+    ++number_of_buffers;
+    message.body.insert(message.body.end(), data, data + size);
+    padTo(message.body, ARROW_ALIGNMENT);
+  };
+  for (const ArrowColumn& column : columns) {
+    appendScalar(field_nodes, static_cast<int64_t>(column.length()));
+    appendScalar(field_nodes, static_cast<int64_t>(column.nullCount()));
+    // the validity bitmap may be omitted if there are no nulls
+    const size_t validity_bitmap_size = column.nullCount() > 0 ? column.validityBitmap().size() : 0;
+    append_buffer(column.validityBitmap().data(), validity_bitmap_size);
+    if (column.type() == ArrowType::UTF8 || column.type() == ArrowType::BINARY) {
+      append_buffer(reinterpret_cast<const uint8_t*>(column.valueOffsets().data()),  // NOLINT
+                    column.valueOffsets().size() * sizeof(int32_t));
+    }
+    append_buffer(column.values().data(), column.values().size());
+  }
+
+  FlatBufferTable record_batch_table;
+  record_batch_table.addScalar<int64_t>(0, number_of_rows)
+      .addStructVector(1, columns.size(), std::move(field_nodes))
+      .addStructVector(2, number_of_buffers, std::move(buffers));
+  message.metadata = makeMessageMetadata(ARROW_MESSAGE_HEADER_RECORD_BATCH, std::move(record_batch_table),
+                                         static_cast<int64_t>(message.body.size()));
+  return message;
+}
+
+void ArrowFileWriter::writeMessage(const ArrowMessage& message) {
+  file_.write(reinterpret_cast<const char*>(message.metadata.data()),  // NOLINT
+              static_cast<std::streamsize>(message.metadata.size()));
+  file_.write(reinterpret_cast<const char*>(message.body.data()),  // NOLINT
+              static_cast<std::streamsize>(message.body.size()));
+  position_ += message.metadata.size() + message.body.size();
+}
+
+void ArrowFileWriter::writeRecordBatch(const ArrowMessage& message) {
+  record_batch_blocks_.emplace_back(static_cast<int64_t>(position_), static_cast<int32_t>(message.metadata.size()),
+                                    static_cast<int64_t>(message.body.size()));
+  writeMessage(message);
+}
+
+void ArrowFileWriter::close() {
+  if (!file_.is_open()) {
+    return;
+  }
+  // end-of-stream marker
+  std::vector<uint8_t> trailer;
+  appendScalar(trailer, ARROW_CONTINUATION_MARKER);
+  appendScalar(trailer, static_cast<int32_t>(0));
+
+  // Block structs: offset (int64), metadata length (int32, padded to 8 bytes), body length (int64)
+  std::vector<uint8_t> blocks;
+  for (const auto& [offset, metadata_length, body_length] : record_batch_blocks_) {
+    appendScalar(blocks, offset);
+    appendScalar(blocks, metadata_length);
+    appendScalar(blocks, static_cast<int32_t>(0));
+    appendScalar(blocks, body_length);
+  }
+  FlatBufferTable footer_table;
+  footer_table.addScalar<int16_t>(0, ARROW_METADATA_VERSION_V5)
+      .addTable(1, makeSchemaTable(fields_))
+      .addStructVector(2, 0, {})
+      .addStructVector(3, record_batch_blocks_.size(), std::move(blocks));
+  const std::vector<uint8_t> footer = footer_table.finish();
+  trailer.insert(trailer.end(), footer.begin(), footer.end());
+  appendScalar(trailer, static_cast<int32_t>(footer.size()));
+  trailer.insert(trailer.end(), ARROW_MAGIC.begin(), ARROW_MAGIC.end());
+  file_.write(reinterpret_cast<const char*>(trailer.data()), static_cast<std::streamsize>(trailer.size()));  // NOLINT
+  file_.close();
+  if (!file_) {
+    LOG(ERROR) << "failed to write arrow file";
+  }
+}
+
+// FlatBufferView reads tables from a flatbuffer. Every access is bounds-checked: reading out of range clears the
+// shared validity flag and returns a default value, so that a corrupted file is reported instead of crashing.
+class FlatBufferView {
+ public:
+  FlatBufferView(const uint8_t* data, size_t size, size_t table_position, bool* is_valid)
+      : data_(data), size_(size), table_position_(table_position), is_valid_(is_valid) {}
+
+  static FlatBufferView root(const uint8_t* data, size_t size, bool* is_valid) {
+    FlatBufferView view(data, size, 0, is_valid);
+    view.table_position_ = view.read<uint32_t>(0);
+    return view;
+  }
+
+  template <typename T>
+  [[nodiscard]] T scalar(uint16_t slot, T default_value) const {
+    const size_t position = fieldPosition(slot);
+    return position == 0 ? default_value : read<T>(position);
+  }
+
+  [[nodiscard]] bool has(uint16_t slot) const { return fieldPosition(slot) != 0; }
+
+  [[nodiscard]] std::optional<FlatBufferView> table(uint16_t slot) const {
+    const size_t position = fieldPosition(slot);
+    if (position == 0) {
+      return std::nullopt;
+    }
+    return FlatBufferView(data_, size_, position + read<uint32_t>(position), is_valid_);
+  }
+
+  [[nodiscard]] std::string string(uint16_t slot) const {
+    const auto [position, length] = vector(slot, 1);
+    if (length == 0) {
+      return {};
+    }
+    return {reinterpret_cast<const char*>(data_ + position), length};  // NOLINT
+  }
+
+  // position of the first element and number of elements of a vector. elements are checked to be in range
+  [[nodiscard]] std::pair<size_t, size_t> vector(uint16_t slot, size_t element_size) const {
+    const size_t position = fieldPosition(slot);
+    if (position == 0) {
+      return {0, 0};
+    }
+    const size_t vector_position = position + read<uint32_t>(position);
+    const size_t length = read<uint32_t>(vector_position);
+    if (!inBounds(vector_position + sizeof(uint32_t), length * element_size)) {
+      return {0, 0};
+    }
+    return {vector_position + sizeof(uint32_t), length};
+  }
+
+  [[nodiscard]] FlatBufferView tableAt(size_t element_position) const {
+    return {data_, size_, element_position + read<uint32_t>(element_position), is_valid_};
+  }
+
+  template <typename T>
+  [[nodiscard]] T read(size_t position) const {
+    T value{};
+    if (inBounds(position, sizeof(T))) {
+      std::memcpy(&value, data_ + position, sizeof(T));
+    }
+    return value;
+  }
+
+ private:
+  [[nodiscard]] bool inBounds(size_t position, size_t size) const {
+    if (position > size_ || size > size_ - position) {
+      *is_valid_ = false;
+      return false;
+    }
+    return true;
+  }
+
+  // position of a table field, 0 if the field is absent
+  [[nodiscard]] size_t fieldPosition(uint16_t slot) const {
+    const size_t vtable_position = table_position_ - read<int32_t>(table_position_);
+    const auto vtable_size = read<uint16_t>(vtable_position);
+    if (sizeof(uint16_t) * (2 + slot) >= vtable_size) {
+      return 0;
+    }
+    const auto field_offset = read<uint16_t>(vtable_position + sizeof(uint16_t) * (2 + slot));
+    return field_offset == 0 ? 0 : table_position_ + field_offset;
+  }
+
+  const uint8_t* data_;
+  size_t size_;
+  size_t table_position_;
+  bool* is_valid_;
+};
+
+// number of buffers of a field in record batches, excluding its children. nullopt for layouts that cannot be skipped
+std::optional<size_t> getNumberOfBuffers(uint8_t type_id) {
+  switch (type_id) {
+    case ARROW_TYPE_NULL:
+      return 0;
+    case ARROW_TYPE_STRUCT:
+    case ARROW_TYPE_FIXED_SIZE_LIST:
+      return 1;
+    case ARROW_TYPE_INT:
+    case ARROW_TYPE_FLOATING_POINT:
+    case ARROW_TYPE_BOOL:
+    case ARROW_TYPE_DECIMAL:
+    case ARROW_TYPE_DATE:
+    case ARROW_TYPE_TIME:
+    case ARROW_TYPE_TIMESTAMP:
+    case ARROW_TYPE_INTERVAL:
+    case ARROW_TYPE_FIXED_SIZE_BINARY:
+    case ARROW_TYPE_DURATION:
+    case ARROW_TYPE_LIST:
+    case ARROW_TYPE_LARGE_LIST:
+    case ARROW_TYPE_MAP:
+      return 2;
+    case ARROW_TYPE_BINARY:
+    case ARROW_TYPE_UTF8:
+    case ARROW_TYPE_LARGE_BINARY:
+    case ARROW_TYPE_LARGE_UTF8:
+      return 3;
+    default:  // unions, run-end encoded and view types
+      return std::nullopt;
+  }
+}
+
+// large (64-bit offset) string and binary columns are converted to their 32-bit offset counterparts
+std::optional<ArrowType> getArrowType(const FlatBufferView& field_table) {
+  const auto type_id = field_table.scalar<uint8_t>(2, 0);
+  const std::optional<FlatBufferView> type_table = field_table.table(3);
+  switch (type_id) {
+    case ARROW_TYPE_BOOL:
+      return ArrowType::BOOL;
+    case ARROW_TYPE_UTF8:
+    case ARROW_TYPE_LARGE_UTF8:
+      return ArrowType::UTF8;
+    case ARROW_TYPE_BINARY:
+    case ARROW_TYPE_LARGE_BINARY:
+      return ArrowType::BINARY;
+    case ARROW_TYPE_INT: {
+      if (!type_table.has_value() || type_table->scalar<uint8_t>(1, 0) == 0) {
+        return std::nullopt;
+      }
+      const auto bit_width = type_table->scalar<int32_t>(0, 0);
+      if (bit_width == ARROW_INT16_BIT_WIDTH) {
+        return ArrowType::INT16;
+      }
+      if (bit_width == ARROW_INT32_BIT_WIDTH) {
+        return ArrowType::INT32;
+      }
+      if (bit_width == ARROW_INT64_BIT_WIDTH) {
+        return ArrowType::INT64;
+      }
+      return std::nullopt;
+    }
+    case ARROW_TYPE_FLOATING_POINT: {
+      const int16_t precision = type_table.has_value() ? type_table->scalar<int16_t>(0, 0) : int16_t{0};
+      if (precision == ARROW_PRECISION_SINGLE) {
+        return ArrowType::FLOAT32;
+      }
+      if (precision == ARROW_PRECISION_DOUBLE) {
+        return ArrowType::FLOAT64;
+      }
+      return std::nullopt;
+    }
+    default:
+      return std::nullopt;
+  }
+}
+
+// counts the field nodes and buffers of a field and all its descendants. nullopt if a layout cannot be skipped
+std::optional<std::pair<size_t, size_t>> getFieldLayoutSize(const FlatBufferView& field_table) {
+  std::optional<size_t> number_of_buffers;
+  if (field_table.has(4)) {
+    number_of_buffers = 2;  // dictionary-encoded fields store integer indices
+  } else {
+    number_of_buffers = getNumberOfBuffers(field_table.scalar<uint8_t>(2, 0));
+  }
+  if (!number_of_buffers.has_value()) {
+    return std::nullopt;
+  }
+  std::pair<size_t, size_t> layout_size{1, number_of_buffers.value()};  // NOLINT
+  const auto [children_position, number_of_children] = field_table.vector(5, sizeof(uint32_t));
+  for (size_t idx = 0; idx < number_of_children; ++idx) {
+    const std::optional<std::pair<size_t, size_t>> child_layout_size =
+        getFieldLayoutSize(field_table.tableAt(children_position + idx * sizeof(uint32_t)));
+    if (!child_layout_size.has_value()) {
+      return std::nullopt;
+    }
+    layout_size.first += child_layout_size->first;
+    layout_size.second += child_layout_size->second;
+  }
+  return layout_size;
+}
+
+size_t getValueSize(ArrowType type) {
+  switch (type) {
+    case ArrowType::INT16:
+      return sizeof(int16_t);
+    case ArrowType::INT32:
+    case ArrowType::FLOAT32:
+      return sizeof(int32_t);
+    case ArrowType::INT64:
+    case ArrowType::FLOAT64:
+      return sizeof(int64_t);
+    default:
+      return 0;
+  }
+}
+
+// reads number_of_rows + 1 value offsets (int32, or int64 for large columns) and checks that they are ascending and
+// within the value buffer
+bool decodeValueOffsets(const std::vector<uint8_t>& offsets, size_t number_of_rows, bool has_large_offsets,
+                        size_t values_size, std::vector<int32_t>& value_offsets) {
+  const size_t offset_size = has_large_offsets ? sizeof(int64_t) : sizeof(int32_t);
+  if (offsets.size() < (number_of_rows + 1) * offset_size) {
+    // an empty column may omit its offsets
+    if (number_of_rows == 0) {
+      value_offsets.push_back(0);
+      return true;
+    }
+    return false;
+  }
+  value_offsets.resize(number_of_rows + 1);
+  int64_t previous_offset = 0;
+  for (size_t idx = 0; idx <= number_of_rows; ++idx) {
+    int64_t offset = 0;
+    if (has_large_offsets) {
+      std::memcpy(&offset, offsets.data() + idx * offset_size, sizeof(int64_t));
+    } else {
+      int32_t offset32 = 0;
+      std::memcpy(&offset32, offsets.data() + idx * offset_size, sizeof(int32_t));
+      offset = offset32;
+    }
+    if (offset < previous_offset || static_cast<uint64_t>(offset) > values_size ||
+        offset > std::numeric_limits<int32_t>::max()) {
+      return false;
+    }
+    value_offsets[idx] = static_cast<int32_t>(offset);
+    previous_offset = offset;
+  }
+  return true;
+}
+
+ArrowFileReader::ArrowFileReader(const std::filesystem::path& filepath) {
+  std::ifstream file(filepath, std::ios::binary);
+  if (!file) {
+    return;
+  }
+  data_.assign(std::istreambuf_iterator<char>(file), std::istreambuf_iterator<char>());
+
+  // the file ends with the footer, its length (int32) and the magic string
+  const size_t trailer_size = sizeof(int32_t) + ARROW_MAGIC.size();
+  if (data_.size() < ARROW_ALIGNMENT + trailer_size ||
+      std::memcmp(data_.data(), ARROW_MAGIC.data(), ARROW_MAGIC.size()) != 0 ||
+      std::memcmp(data_.data() + data_.size() - ARROW_MAGIC.size(), ARROW_MAGIC.data(), ARROW_MAGIC.size()) != 0) {
+    LOG(ERROR) << "invalid arrow file " << filepath;
+    return;
+  }
+  int32_t footer_length = 0;
+  std::memcpy(&footer_length, data_.data() + data_.size() - trailer_size, sizeof(int32_t));
+  if (footer_length <= 0 || static_cast<size_t>(footer_length) > data_.size() - trailer_size) {
+    LOG(ERROR) << "invalid arrow file " << filepath;
+    return;
+  }
+
+  bool is_valid = true;
+  const uint8_t* footer_data = data_.data() + data_.size() - trailer_size - footer_length;
+  const FlatBufferView footer_table = FlatBufferView::root(footer_data, footer_length, &is_valid);
+  const std::optional<FlatBufferView> schema_table = footer_table.table(1);
+  if (!schema_table.has_value() || schema_table->scalar<int16_t>(0, 0) != 0) {
+    LOG(ERROR) << "arrow file " << filepath << " has no schema or is not little-endian";
+    return;
+  }
+  const auto [fields_position, number_of_fields] = schema_table->vector(1, sizeof(uint32_t));
+  for (size_t idx = 0; idx < number_of_fields; ++idx) {
+    const FlatBufferView field_table = schema_table->tableAt(fields_position + idx * sizeof(uint32_t));
+    const std::string name = field_table.string(0);
+    const std::optional<std::pair<size_t, size_t>> layout_size = getFieldLayoutSize(field_table);
+    if (!layout_size.has_value()) {
+      LOG(ERROR) << "arrow file " << filepath << " contains column " << name << " with an unsupported layout";
+      return;
+    }
+    std::optional<ArrowType> type;
+    if (!field_table.has(4)) {
+      type = getArrowType(field_table);
+    }
+    if (type.has_value()) {
+      std::vector<std::pair<std::string, std::string>> metadata;
+      const auto [metadata_position, metadata_length] = field_table.vector(6, sizeof(uint32_t));
+      for (size_t metadata_idx = 0; metadata_idx < metadata_length; ++metadata_idx) {
+        const FlatBufferView key_value_table = field_table.tableAt(metadata_position + metadata_idx * sizeof(uint32_t));
+        metadata.emplace_back(key_value_table.string(0), key_value_table.string(1));
+      }
+      fields_.push_back({name, type.value(), std::move(metadata)});  // NOLINT
+    } else {
+      LOG(WARNING) << "column " << name << " in arrow file " << filepath << " has an unsupported type and is skipped";
+    }
+    const auto type_id = field_table.scalar<uint8_t>(2, 0);
+    const bool has_large_offsets = type_id == ARROW_TYPE_LARGE_UTF8 || type_id == ARROW_TYPE_LARGE_BINARY;
+    field_layouts_.push_back({type, layout_size->first, layout_size->second, has_large_offsets});
+  }
+
+  const auto [blocks_position, number_of_blocks] = footer_table.vector(3, ARROW_BLOCK_SIZE);
+  for (size_t idx = 0; idx < number_of_blocks; ++idx) {
+    const size_t block_position = blocks_position + idx * ARROW_BLOCK_SIZE;
+    record_batch_blocks_.emplace_back(footer_table.read<int64_t>(block_position),
+                                      footer_table.read<int32_t>(block_position + sizeof(int64_t)),
+                                      footer_table.read<int64_t>(block_position + 2 * sizeof(int64_t)));
+  }
+  if (!is_valid) {
+    LOG(ERROR) << "invalid arrow file " << filepath;
+    return;
+  }
+  is_valid_ = true;
+}
+
+bool ArrowFileReader::isValid() const { return is_valid_; }
+const std::vector<ArrowField>& ArrowFileReader::fields() const { return fields_; }
+size_t ArrowFileReader::numberOfRecordBatches() const { return record_batch_blocks_.size(); }
+
+std::optional<std::vector<ArrowColumn>> ArrowFileReader::readRecordBatch(size_t batch_idx) const {
+  const auto [offset, metadata_length, body_length] = record_batch_blocks_.at(batch_idx);
+  if (offset < 0 || metadata_length <= 0 || body_length < 0 || static_cast<size_t>(offset) > data_.size() ||
+      static_cast<size_t>(metadata_length) > data_.size() - offset ||
+      static_cast<size_t>(body_length) > data_.size() - offset - metadata_length) {
+    LOG(ERROR) << "invalid record batch block in arrow file";
+    return std::nullopt;
+  }
+  // the message metadata is prefixed by the continuation marker (omitted by old writers) and its length
+  const uint8_t* metadata = data_.data() + offset;
+  size_t prefix_size = sizeof(int32_t);
+  uint32_t marker = 0;
+  std::memcpy(&marker, metadata, sizeof(uint32_t));
+  if (marker == ARROW_CONTINUATION_MARKER) {
+    prefix_size += sizeof(uint32_t);
+  }
+  if (static_cast<size_t>(metadata_length) <= prefix_size) {
+    LOG(ERROR) << "invalid record batch message in arrow file";
+    return std::nullopt;
+  }
+  const uint8_t* body = metadata + metadata_length;
+
+  bool is_valid = true;
+  const FlatBufferView message_table =
+      FlatBufferView::root(metadata + prefix_size, metadata_length - prefix_size, &is_valid);
+  const std::optional<FlatBufferView> record_batch_table = message_table.table(2);
+  if (message_table.scalar<uint8_t>(1, 0) != ARROW_MESSAGE_HEADER_RECORD_BATCH || !record_batch_table.has_value()) {
+    LOG(ERROR) << "invalid record batch message in arrow file";
+    return std::nullopt;
+  }
+  if (record_batch_table->has(3)) {
+    LOG(ERROR) << "compressed arrow files are not supported. please write the file with compression='uncompressed'";
+    return std::nullopt;
+  }
+  // every column must hold the rows of the batch, which are read up to this length
+  const auto batch_length = record_batch_table->scalar<int64_t>(0, 0);
+  if (batch_length < 0) {
+    LOG(ERROR) << "invalid record batch message in arrow file";
+    return std::nullopt;
+  }
+  const auto [nodes_position, number_of_nodes] = record_batch_table->vector(1, ARROW_FIELD_NODE_SIZE);
+  const auto [buffers_position, number_of_buffers] = record_batch_table->vector(2, ARROW_BUFFER_SIZE);
+
+  size_t node_idx = 0;
+  size_t buffer_idx = 0;
+  // copies a buffer of the body, nullopt if it is out of range
+  auto read_buffer = [&](size_t idx) -> std::optional<std::vector<uint8_t>> {
+    const size_t buffer_position = buffers_position + idx * ARROW_BUFFER_SIZE;
+    const auto buffer_offset = record_batch_table->read<int64_t>(buffer_position);
+    const auto buffer_length = record_batch_table->read<int64_t>(buffer_position + sizeof(int64_t));
+    if (buffer_offset < 0 || buffer_length < 0 || buffer_offset > body_length ||
+        buffer_length > body_length - buffer_offset) {
+      return std::nullopt;
+    }
+    return std::vector<uint8_t>(body + buffer_offset, body + buffer_offset + buffer_length);
+  };
+
+  std::vector<ArrowColumn> columns;
+  columns.reserve(fields_.size());
+  for (const FieldLayout& field_layout : field_layouts_) {
+    if (node_idx + field_layout.number_of_nodes > number_of_nodes ||
+        buffer_idx + field_layout.number_of_buffers > number_of_buffers) {
+      LOG(ERROR) << "invalid record batch message in arrow file";
+      return std::nullopt;
+    }
+    if (!field_layout.type.has_value()) {
+      node_idx += field_layout.number_of_nodes;
+      buffer_idx += field_layout.number_of_buffers;
+      continue;
+    }
+    const ArrowType type = field_layout.type.value();  // NOLINT
+    const size_t node_position = nodes_position + node_idx * ARROW_FIELD_NODE_SIZE;
+    const auto length = record_batch_table->read<int64_t>(node_position);
+    const auto null_count = record_batch_table->read<int64_t>(node_position + sizeof(int64_t));
+    std::optional<std::vector<uint8_t>> validity_bitmap = read_buffer(buffer_idx);
+    std::optional<std::vector<uint8_t>> values = read_buffer(buffer_idx + field_layout.number_of_buffers - 1);
+    if (length != batch_length || null_count < 0 || null_count > length || !validity_bitmap.has_value() ||
+        !values.has_value()) {
+      LOG(ERROR) << "invalid record batch message in arrow file";
+      return std::nullopt;
+    }
+    const auto number_of_rows = static_cast<size_t>(length);
+    const size_t bitmap_size = (number_of_rows + BITS_PER_BYTE - 1) / BITS_PER_BYTE;
+    bool is_valid_column = null_count == 0 || validity_bitmap->size() >= bitmap_size;
+
+    std::vector<int32_t> value_offsets;
+    if (type == ArrowType::UTF8 || type == ArrowType::BINARY) {
+      std::optional<std::vector<uint8_t>> offsets = read_buffer(buffer_idx + 1);
+      is_valid_column = is_valid_column && offsets.has_value() &&
+                        decodeValueOffsets(offsets.value(), number_of_rows, field_layout.has_large_offsets,  // NOLINT
+                                           values->size(), value_offsets);
+    } else if (type == ArrowType::BOOL) {
+      is_valid_column = is_valid_column && values->size() >= bitmap_size;
+    } else {
+      is_valid_column = is_valid_column && values->size() >= number_of_rows * getValueSize(type);
+    }
+    if (!is_valid_column) {
+      LOG(ERROR) << "invalid record batch message in arrow file";
+      return std::nullopt;
+    }
+    if (null_count == 0) {
+      validity_bitmap->clear();
+    }
+    columns.emplace_back(type, number_of_rows, static_cast<size_t>(null_count), std::move(validity_bitmap.value()),
+                         std::move(values.value()), std::move(value_offsets));  // NOLINT
+    node_idx += field_layout.number_of_nodes;
+    buffer_idx += field_layout.number_of_buffers;
+  }
+  if (!is_valid) {
+    LOG(ERROR) << "invalid record batch message in arrow file";
+    return std::nullopt;
+  }
+  return columns;
+}
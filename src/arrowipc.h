@@ -0,0 +1,148 @@
+#ifndef OSM2GMNS_ARROWIPC_H
+#define OSM2GMNS_ARROWIPC_H
+
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <filesystem>
+#include <fstream>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <tuple>
+#include <utility>
+#include <vector>
+
+// A minimal reader and writer for the Arrow IPC file format (also known as Feather V2), so that networks can be
+// exported and loaded as typed columns without depending on the Arrow C++ library. Only the column types used by
+// osm2gmns are supported, files are written uncompressed in little-endian byte order. The files can be read by pyarrow
+// (pyarrow.ipc.open_file, pyarrow.feather.read_table), pandas (pandas.read_feather), polars (polars.read_ipc) and
+// any other Arrow implementation. The reader accepts uncompressed files written by any Arrow implementation. Columns
+// of other types are skipped.
+
+enum class ArrowType : uint8_t { BOOL, INT16, INT32, INT64, FLOAT32, FLOAT64, UTF8, BINARY };
+
+struct ArrowField {
+  std::string name;
+  ArrowType type;
+  std::vector<std::pair<std::string, std::string>> metadata;
+};
+
+class ArrowColumn {
+ public:
+  explicit ArrowColumn(ArrowType type);
+  explicit ArrowColumn(ArrowType type, size_t length, size_t null_count, std::vector<uint8_t> validity_bitmap,
+                       std::vector<uint8_t> values, std::vector<int32_t> value_offsets);
+
+  void appendNull();
+  void appendBool(bool value);
+  // T must match the column type, e.g. int64_t for an INT64 column
+  template <typename T>
+  void appendValue(T value) {
+    setValid();
+    const size_t offset = values_.size();
+    values_.resize(offset + sizeof(T));
+    std::memcpy(values_.data() + offset, &value, sizeof(T));
+  }
+  template <typename T>
+  void appendOptional(const std::optional<T>& value) {
+    if (value.has_value()) {
+      appendValue(value.value());  // NOLINT
+    } else {
+      appendNull();
+    }
+  }
+  // UTF8 and BINARY columns
+  void appendBytes(std::string_view value);
+
+  [[nodiscard]] bool isNull(size_t idx) const;
+  [[nodiscard]] bool boolValue(size_t idx) const;
+  template <typename T>
+  [[nodiscard]] T value(size_t idx) const {
+    T value{};
+    std::memcpy(&value, values_.data() + idx * sizeof(T), sizeof(T));
+    return value;
+  }
+  template <typename T>
+  [[nodiscard]] std::optional<T> optionalValue(size_t idx) const {
+    return isNull(idx) ? std::nullopt : std::optional<T>(value<T>(idx));
+  }
+  [[nodiscard]] std::string_view bytes(size_t idx) const;
+
+  [[nodiscard]] ArrowType type() const;
+  [[nodiscard]] size_t length() const;
+  [[nodiscard]] size_t nullCount() const;
+  [[nodiscard]] const std::vector<uint8_t>& validityBitmap() const;
+  [[nodiscard]] const std::vector<uint8_t>& values() const;
+  [[nodiscard]] const std::vector<int32_t>& valueOffsets() const;
+
+ private:
+  void setValid();
+
+  ArrowType type_;
+  size_t length_{0};
+  size_t null_count_{0};
+  std::vector<uint8_t> validity_bitmap_;
+  std::vector<uint8_t> values_;
+  std::vector<int32_t> value_offsets_;
+};
+
+// An encapsulated IPC message: flatbuffer metadata (with the continuation marker and length prefix) and body
+struct ArrowMessage {
+  std::vector<uint8_t> metadata;
+  std::vector<uint8_t> body;
+};
+
+class ArrowFileWriter {
+ public:
+  explicit ArrowFileWriter(const std::filesystem::path& filepath, std::vector<ArrowField> fields);
+
+  [[nodiscard]] bool isOpen() const;
+  [[nodiscard]] const std::vector<ArrowField>& fields() const;
+  [[nodiscard]] std::vector<ArrowColumn> makeRecordBatch() const;
+
+  // encoding does not touch the writer state and can run on several threads at once
+  [[nodiscard]] static ArrowMessage encodeRecordBatch(const std::vector<ArrowColumn>& columns);
+  void writeRecordBatch(const ArrowMessage& message);
+  void close();
+
+ private:
+  void writeMessage(const ArrowMessage& message);
+
+  std::ofstream file_;
+  std::vector<ArrowField> fields_;
+  size_t position_{0};
+  // offset, metadata length, body length of each record batch
+  std::vector<std::tuple<int64_t, int32_t, int64_t>> record_batch_blocks_;
+};
+
+class ArrowFileReader {
+ public:
+  explicit ArrowFileReader(const std::filesystem::path& filepath);
+
+  [[nodiscard]] bool isValid() const;
+  // supported fields only
+  [[nodiscard]] const std::vector<ArrowField>& fields() const;
+  [[nodiscard]] size_t numberOfRecordBatches() const;
+  // one column per supported field. nullopt if the record batch is invalid. can run on several threads at once
+  [[nodiscard]] std::optional<std::vector<ArrowColumn>> readRecordBatch(size_t batch_idx) const;
+
+ private:
+  // layout of a top-level field in record batches: number of field nodes (the field and all its descendants) and
+  // buffers. type is nullopt for unsupported fields, which are skipped. large string and binary columns use 64-bit
+  // value offsets
+  struct FieldLayout {
+    std::optional<ArrowType> type;
+    size_t number_of_nodes;
+    size_t number_of_buffers;
+    bool has_large_offsets;
+  };
+
+  std::vector<uint8_t> data_;
+  std::vector<ArrowField> fields_;
+  std::vector<FieldLayout> field_layouts_;
+  std::vector<std::tuple<int64_t, int32_t, int64_t>> record_batch_blocks_;
+  bool is_valid_{false};
+};
+
+#endif  // OSM2GMNS_ARROWIPC_H
@@ -3,21 +3,65 @@
 #include <absl/container/flat_hash_map.h>
 #include <absl/container/flat_hash_set.h>
 #include <absl/log/log.h>
+#include <geos/geom/Geometry.h>
+#include <geos/geom/GeometryFactory.h>
+#include <geos/io/WKTReader.h>
 
 #include <cstdint>
+#include <exception>
 #include <filesystem>
+#include <functional>
+#include <memory>
+#include <string>
+#include <utility>
 #include <vector>
 
 #include "config.h"
 #include "io.h"
 #include "networks.h"
+#include "osmcache.h"
 #include "osmconfig.h"
 #include "osmnetwork.h"
+#include "runcontrol.h"
+#include "stats.h"
+
+// nullptr if boundary is not the wkt of a valid polygon or multipolygon
+std::unique_ptr<geos::geom::Geometry> readClipGeometry(const std::string& boundary) {
+  const geos::geom::GeometryFactory::Ptr factory = geos::geom::GeometryFactory::create();
+  const geos::io::WKTReader reader(factory.get());
+  std::unique_ptr<geos::geom::Geometry> geometry;
+  try {
+    geometry = reader.read(boundary);
+  } catch (const std::exception& e) {
+    LOG(ERROR) << "failed to parse boundary. " << e.what();
+    return nullptr;
+  }
+  const geos::geom::GeometryTypeId geometry_type = geometry->getGeometryTypeId();
+  if ((geometry_type != geos::geom::GEOS_POLYGON && geometry_type != geos::geom::GEOS_MULTIPOLYGON) ||
+      geometry->isEmpty()) {
+    LOG(ERROR) << "boundary must be a non-empty POLYGON or MULTIPOLYGON";
+    return nullptr;
+  }
+  if (!geometry->isValid()) {
+    LOG(ERROR) << "boundary is not a valid polygon";
+    return nullptr;
+  }
+  return geometry;
+}
 
 Network* getNetFromFile(const std::filesystem::path& osm_filepath, const absl::flat_hash_set<ModeType>& mode_types,
                         const absl::flat_hash_set<HighWayLinkType>& link_types,
                         const absl::flat_hash_set<HighWayLinkType>& connector_link_types, bool POI,
-                        float POI_sampling_ratio, const OsmParsingConfig* osm_parsing_config, bool strict_boundary) {
+                        float POI_sampling_ratio, const OsmParsingConfig* osm_parsing_config, bool strict_boundary,
+                        const std::string& boundary, const std::filesystem::path& cache_dir,
+                        uintmax_t cache_size_limit) {
+  std::unique_ptr<geos::geom::Geometry> clip_geometry;
+  if (!boundary.empty()) {
+    clip_geometry = readClipGeometry(boundary);
+    if (clip_geometry == nullptr) {
+      return nullptr;
+    }
+  }
   absl::flat_hash_set<HighWayLinkType> connector_link_types_(connector_link_types);
   if (!connector_link_types_.empty()) {
     if (link_types.empty()) {
@@ -40,22 +84,80 @@ Network* getNetFromFile(const std::filesystem::path& osm_filepath, const absl::f
       }
     }
   }
+  std::unique_ptr<OsmCache> osm_cache;
+  if (!cache_dir.empty()) {
+    osm_cache = std::make_unique<OsmCache>(cache_dir, cache_size_limit);
+  }
+  // the recorder is owned by the network, and outlives the stage recorded here
+  auto stats = std::make_unique<StatsRecorder>();
+  StatsStage stage(stats.get(), "getNetFromFile");
   LOG(INFO) << "loading data from osm file";
   auto* osmnet = new OsmNetwork(osm_filepath, mode_types, link_types, connector_link_types_, POI, osm_parsing_config,
-                                strict_boundary);
+                                strict_boundary, std::move(clip_geometry), osm_cache.get(), stats.get());
+  // networks of cancelled runs are incomplete and discarded. the stage is ended before the recorder is released
+  if (isCancelled()) {
+    stage.end();
+    delete osmnet;
+    LOG(INFO) << "getNetFromFile cancelled";
+    return nullptr;
+  }
   LOG(INFO) << "start to build network";
-  auto* network = new Network(osmnet, link_types, connector_link_types_, POI, POI_sampling_ratio, osm_parsing_config);
+  auto* network = new Network(osmnet, link_types, connector_link_types_, POI, POI_sampling_ratio, osm_parsing_config,
+                              std::move(stats));
+  if (isCancelled()) {
+    stage.end();
+    delete network;
+    LOG(INFO) << "getNetFromFile cancelled";
+    return nullptr;
+  }
+  stage.addCount("nodes", static_cast<int64_t>(network->numberOfNodes()));
+  stage.addCount("links", static_cast<int64_t>(network->numberOfLinks()));
+  stage.addCount("pois", static_cast<int64_t>(network->poiVector().size()));
   LOG(INFO) << "build network done";
   return network;
 };
 
+// records reading a network from network files on a new recorder, which then replaces the one of the network
+Network* readNetworkWithStats(const std::string& stage_name,
+                              const std::function<Network*(const std::filesystem::path&)>& read_network,
+                              const std::filesystem::path& input_folder) {
+  auto stats = std::make_unique<StatsRecorder>();
+  StatsStage stage(stats.get(), stage_name);
+  Network* network = read_network(input_folder);
+  if (network == nullptr) {
+    return nullptr;
+  }
+  if (isCancelled()) {
+    delete network;
+    LOG(INFO) << stage_name << " cancelled";
+    return nullptr;
+  }
+  stage.addCount("nodes", static_cast<int64_t>(network->numberOfNodes()));
+  stage.addCount("links", static_cast<int64_t>(network->numberOfLinks()));
+  stage.end();
+  network->setStats(std::move(stats));
+  return network;
+}
+
+Network* getNetFromCSV(const std::filesystem::path& input_folder) {
+  return readNetworkWithStats("getNetFromCSV", readNetworkFromCSV, input_folder);
+}
+
+Network* getNetFromArrow(const std::filesystem::path& input_folder) {
+  return readNetworkWithStats("getNetFromArrow", readNetworkFromArrow, input_folder);
+}
+
 void consolidateComplexIntersections(Network* network, bool auto_identify,
                                      const std::filesystem::path& intersection_file, float int_buffer) {
+  if (isCancelled()) {
+    return;
+  }
   if (!intersection_file.empty() && !std::filesystem::exists(intersection_file)) {
     LOG(ERROR) << "intersection file " << intersection_file
                << " does not exist. consolidateComplexIntersections() skipped";
     return;
   }
+  const StatsStage stage(network->stats(), "consolidateComplexIntersections");
   if (intersection_file.empty()) {
     network->consolidateComplexIntersections(auto_identify, {}, int_buffer);
   } else {
@@ -64,11 +166,27 @@ void consolidateComplexIntersections(Network* network, bool auto_identify,
   }
 }
 
+bool applyOsmChange(Network* network, const std::filesystem::path& osc_filepath) {
+  if (isCancelled()) {
+    return false;
+  }
+  LOG(INFO) << "applying osm change file " << osc_filepath;
+  StatsStage stage(network->stats(), "applyOsmChange");
+  const bool applied = network->applyOsmChange(osc_filepath);
+  stage.addCount("nodes", static_cast<int64_t>(network->numberOfNodes()));
+  stage.addCount("links", static_cast<int64_t>(network->numberOfLinks()));
+  return applied;
+}
+
 void generateNodeActivityInfo(Network* network, const std::filesystem::path& zone_file) {
+  if (isCancelled()) {
+    return;
+  }
   if (!zone_file.empty() && !std::filesystem::exists(zone_file)) {
     LOG(ERROR) << "zone file " << zone_file << " does not exist. generateNodeActivityInfo() skipped";
     return;
   }
+  const StatsStage stage(network->stats(), "generateNodeActivityInfo");
   if (zone_file.empty()) {
     network->generateNodeActivityInfo();
   } else {
@@ -77,12 +195,27 @@ void generateNodeActivityInfo(Network* network, const std::filesystem::path& zon
   }
 }
 
+void generateNodePOIInfo(Network* network) {
+  if (isCancelled()) {
+    return;
+  }
+  StatsStage stage(network->stats(), "generateNodePOIInfo");
+  stage.addCount("nodes", static_cast<int64_t>(network->numberOfNodes()));
+  stage.addCount("pois", static_cast<int64_t>(network->poiVector().size()));
+  network->generateNodePOIInfo();
+}
+
 void fillLinkAttributesWithDefaultValues(Network* network, bool default_lanes,
                                          const absl::flat_hash_map<HighWayLinkType, int32_t>& default_lanes_dict,
                                          bool default_speed,
                                          const absl::flat_hash_map<HighWayLinkType, float>& default_speed_dict,
                                          bool default_capacity,
                                          const absl::flat_hash_map<HighWayLinkType, int32_t>& default_capacity_dict) {
+  if (isCancelled()) {
+    return;
+  }
+  StatsStage stage(network->stats(), "fillLinkAttributesWithDefaultValues");
+  stage.addCount("links", static_cast<int64_t>(network->numberOfLinks()));
   absl::flat_hash_map<HighWayLinkType, int32_t> default_lanes_dict_;
   if (default_lanes) {
     default_lanes_dict_ = getPresetDefaultLanesDict();
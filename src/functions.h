@@ -10,9 +10,11 @@
 
 #include <cstdint>
 #include <filesystem>
+#include <string>
 
 #include "config.h"
 #include "networks.h"
+#include "osmcache.h"
 #include "osmconfig.h"
 
 constexpr float DEFAULT_INT_BUFFER = 20.0;
@@ -22,14 +24,25 @@ Network* getNetFromFile(const std::filesystem::path& osm_filepath,
                         const absl::flat_hash_set<HighWayLinkType>& link_types = {},
                         const absl::flat_hash_set<HighWayLinkType>& connector_link_types = {}, bool POI = false,
                         float POI_sampling_ratio = 1.0, const OsmParsingConfig* osm_parsing_config = nullptr,
-                        bool strict_boundary = true);
+                        bool strict_boundary = true, const std::string& boundary = "",
+                        const std::filesystem::path& cache_dir = "",
+                        uintmax_t cache_size_limit = DEFAULT_OSM_CACHE_SIZE_LIMIT);
+
+Network* getNetFromCSV(const std::filesystem::path& input_folder = "");
+
+Network* getNetFromArrow(const std::filesystem::path& input_folder = "");
 
 void consolidateComplexIntersections(Network* network, bool auto_identify = false,
                                      const std::filesystem::path& intersection_file = "",
                                      float int_buffer = DEFAULT_INT_BUFFER);
 
+// false if the change could not be applied, see Network::applyOsmChange
+bool applyOsmChange(Network* network, const std::filesystem::path& osc_filepath);
+
 void generateNodeActivityInfo(Network* network, const std::filesystem::path& zone_file = "");
 
+void generateNodePOIInfo(Network* network);
+
 void fillLinkAttributesWithDefaultValues(
     Network* network, bool default_lanes = false,
     const absl::flat_hash_map<HighWayLinkType, int32_t>& default_lanes_dict = {}, bool default_speed = false,
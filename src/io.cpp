@@ -8,26 +8,47 @@
 #include <absl/container/flat_hash_set.h>
 #include <absl/log/log.h>
 #include <absl/strings/match.h>
+#include <absl/strings/numbers.h>
+#include <absl/strings/str_split.h>
+#include <absl/strings/string_view.h>
+#include <geos/geom/CoordinateSequence.h>
 #include <geos/geom/Geometry.h>
+#include <geos/geom/LineString.h>
 #include <geos/geom/Point.h>
+#include <geos/geom/Polygon.h>
+#include <geos/io/WKBReader.h>
 #include <geos/io/WKTReader.h>
+#include <geos/io/WKTWriter.h>
+#include <omp.h>
 
+#include <algorithm>
+#include <array>
+#include <charconv>
+#include <cmath>
 #include <cstddef>
 #include <cstdint>
+#include <cstring>
 #include <filesystem>
 #include <fstream>
-#include <iomanip>
 #include <ios>
 #include <iostream>
+#include <iterator>
+#include <limits>
 #include <memory>
-#include <sstream>
+#include <optional>
 #include <string>
+#include <string_view>
+#include <system_error>
 #include <utility>
 #include <vector>
 
+#include "arrowipc.h"
 #include "csv.h"
 #include "networks.h"
 #include "osmconfig.h"
+#include "runcontrol.h"
+#include "stats.h"
+#include "utils.h"
 
 constexpr int COORDINATE_OUTPUT_PRECISION = 7;
 constexpr int LENGTH_OUTPUT_PRECISION = 2;
@@ -77,6 +98,19 @@ int32_t getAerowayLinkTypeNo() {
   return aeroway_link_type_no;
 }
 
+int32_t getLinkTypeNo(const Link* link) {
+  switch (link->wayType()) {
+    case WayType::HIGHWAY:
+      return getHighWayLinkTypeNo(link->highwayLinkType());
+    case WayType::RAILWAY:
+      return getRailwayLinkTypeNo();
+    case WayType::AEROWAY:
+      return getAerowayLinkTypeNo();
+    default:
+      return -1;
+  }
+}
+
 std::string getModeTypeStr(const ModeType& mode_type) {
   static const absl::flat_hash_map<ModeType, std::string> mode_type_dict = {{ModeType::AUTO, "auto"},
                                                                             {ModeType::BIKE, "bike"},
@@ -87,8 +121,89 @@ std::string getModeTypeStr(const ModeType& mode_type) {
   return iter != mode_type_dict.end() ? iter->second : "";
 }
 
+// rows are formatted in parallel into one buffer per chunk of CSV_ROWS_PER_CHUNK rows. chunks are formatted in
+// batches of CSV_CHUNKS_PER_THREAD chunks per thread and each batch is written to the file in order, so the output does
+// not depend on the number of threads
+constexpr size_t CSV_ROWS_PER_CHUNK = 4096;
+constexpr size_t CSV_CHUNKS_PER_THREAD = 4;
+constexpr size_t NUMBER_BUFFER_SIZE = 64;
+
+void appendInteger(std::string& buffer, int64_t value) {
+  std::array<char, NUMBER_BUFFER_SIZE> chars{};
+  const std::to_chars_result result = std::to_chars(chars.data(), chars.data() + chars.size(), value);
+  buffer.append(chars.data(), result.ptr);
+}
+
+// same text as std::ostream << std::fixed << std::setprecision(precision) << value, independent of the locale
+void appendFixed(std::string& buffer, double value, int precision) {
+  std::array<char, NUMBER_BUFFER_SIZE> chars{};
+  std::to_chars_result result =
+      std::to_chars(chars.data(), chars.data() + chars.size(), value, std::chars_format::fixed, precision);
+  if (result.ec == std::errc()) {
+    buffer.append(chars.data(), result.ptr);
+    return;
+  }
+  // values with more integer digits than fit in chars: a sign, up to max_exponent10 + 1 digits and a decimal point
+  const size_t offset = buffer.size();
+  buffer.resize(offset + std::numeric_limits<double>::max_exponent10 + precision + 3);
+  result =
+      std::to_chars(buffer.data() + offset, buffer.data() + buffer.size(), value, std::chars_format::fixed, precision);
+  buffer.resize(result.ec == std::errc() ? static_cast<size_t>(result.ptr - buffer.data()) : offset);
+}
+
+void appendCSVField(std::string& buffer, const std::string& value) {
+  if (absl::StrContains(value, ',')) {
+    buffer += '"';
+    buffer += value;
+    buffer += '"';
+  } else {
+    buffer += value;
+  }
+}
+
+template <typename RowFormatter>
+void writeRowsInParallel(std::ofstream& file, size_t number_of_rows, const RowFormatter& format_row) {
+  const size_t number_of_chunks = (number_of_rows + CSV_ROWS_PER_CHUNK - 1) / CSV_ROWS_PER_CHUNK;
+  const size_t chunks_per_batch = CSV_CHUNKS_PER_THREAD * omp_get_max_threads();
+  std::vector<std::string> chunk_buffers(chunks_per_batch);
+  const RunControl* control = RunControl::current();
+  for (size_t first_chunk = 0; first_chunk < number_of_chunks; first_chunk += chunks_per_batch) {
+    // files of cancelled runs end after the last complete batch
+    if (isCancelled(control)) {
+      break;
+    }
+    const auto number_of_batch_chunks =
+        static_cast<int64_t>(std::min(chunks_per_batch, number_of_chunks - first_chunk));
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(number_of_rows, format_row, chunk_buffers, first_chunk, number_of_batch_chunks)
+    for (int64_t idx = 0; idx < number_of_batch_chunks; ++idx) {
+      std::string& buffer = chunk_buffers[idx];
+      buffer.clear();
+      // WKTWriter keeps state while writing, and geometries created for writing update the reference count of their
+      // factory, which is not thread-safe. each chunk uses its own
+      geos::io::WKTWriter wkt_writer;
+      const geos::geom::GeometryFactory::Ptr factory = geos::geom::GeometryFactory::create();
+      const size_t first_row = (first_chunk + idx) * CSV_ROWS_PER_CHUNK;
+      const size_t last_row = std::min(first_row + CSV_ROWS_PER_CHUNK, number_of_rows);
+      for (size_t row_idx = first_row; row_idx < last_row; ++row_idx) {
+        format_row(row_idx, buffer, wkt_writer, factory.get());
+      }
+    }
+    for (int64_t idx = 0; idx < number_of_batch_chunks; ++idx) {
+      file.write(chunk_buffers[idx].data(), static_cast<std::streamsize>(chunk_buffers[idx].size()));
+    }
+  }
+}
+
 void outputNetToCSV(const Network* network, const std::filesystem::path& output_folder) {
+  if (isCancelled()) {
+    return;
+  }
   LOG(INFO) << "writing network to csv files";
+  StatsStage stage(network->stats(), "outputNetToCSV");
+  stage.addCount("nodes", static_cast<int64_t>(network->numberOfNodes()));
+  stage.addCount("links", static_cast<int64_t>(network->numberOfLinks()));
+  stage.addCount("pois", static_cast<int64_t>(network->poiVector().size()));
 
   const std::filesystem::path node_filepath = output_folder / "node.csv";
   std::ofstream node_file(node_filepath);
@@ -102,22 +217,47 @@ void outputNetToCSV(const Network* network, const std::filesystem::path& output_
   }
   node_file << ",is_boundary,activity_type,poi_id,zone_id,notes\n";
 
-  for (const Node* node : network->nodeVector()) {
-    const std::string& name = absl::StrContains(node->name(), ',') ? "\"" + node->name() + "\"" : node->name();
-    const std::string& ctrl_type = node->isSignalized() ? "signal" : "";
-    const std::string& zone_id = node->zoneId().has_value() ? std::to_string(node->zoneId().value()) : "";  // NOLINT
-    const std::string& boundary =
-        node->boundary().has_value() ? std::to_string(node->boundary().value()) : "";  // NOLINT
-    const std::string& activity_type =
-        node->activityType().has_value() ? getHighWayLinkTypeStr(node->activityType().value()) : "";  // NOLINT
-    node_file << name << "," << node->nodeId() << "," << node->osmNodeId() << "," << ctrl_type << "," << std::fixed
-              << std::setprecision(COORDINATE_OUTPUT_PRECISION) << node->geometry()->getX() << ","
-              << node->geometry()->getY() << std::defaultfloat;
-    for (const std::string& attr_value : node->osmAttributes()) {
-      node_file << "," << (absl::StrContains(attr_value, ',') ? "\"" + attr_value + "\"" : attr_value);
-    }
-    node_file << "," << boundary << "," << activity_type << ",," << zone_id << ",\n";
-  }
+  // nodes without any of the requested osm attributes (and consolidated nodes) carry no attribute values
+  const std::vector<Node*>& node_vector = network->nodeVector();
+  const size_t number_of_node_attributes = network->osmParsingConfig()->osm_node_attributes.size();
+  const std::string empty_attr_value;
+  auto format_node_row = [&node_vector, number_of_node_attributes, &empty_attr_value](
+                             size_t row_idx, std::string& buffer, geos::io::WKTWriter& /*wkt_writer*/,
+                             const geos::geom::GeometryFactory* /*factory*/) {
+    const Node* node = node_vector[row_idx];
+    appendCSVField(buffer, node->name());
+    buffer += ',';
+    appendInteger(buffer, node->nodeId());
+    buffer += ',';
+    buffer += node->osmNodeId();
+    buffer += node->isSignalized() ? ",signal," : ",,";
+    appendFixed(buffer, node->x(), COORDINATE_OUTPUT_PRECISION);
+    buffer += ',';
+    appendFixed(buffer, node->y(), COORDINATE_OUTPUT_PRECISION);
+    const std::vector<std::string>& osm_attributes = node->osmAttributes();
+    for (size_t idx = 0; idx < number_of_node_attributes; ++idx) {
+      buffer += ',';
+      appendCSVField(buffer, idx < osm_attributes.size() ? osm_attributes[idx] : empty_attr_value);
+    }
+    buffer += ',';
+    if (node->boundary().has_value()) {
+      appendInteger(buffer, node->boundary().value());  // NOLINT
+    }
+    buffer += ',';
+    if (node->activityType().has_value()) {
+      buffer += getHighWayLinkTypeStr(node->activityType().value());  // NOLINT
+    }
+    buffer += ',';
+    if (node->poiId().has_value()) {
+      appendInteger(buffer, node->poiId().value());  // NOLINT
+    }
+    buffer += ',';
+    if (node->zoneId().has_value()) {
+      appendInteger(buffer, node->zoneId().value());  // NOLINT
+    }
+    buffer += ",\n";
+  };
+  writeRowsInParallel(node_file, node_vector.size(), format_node_row);
   node_file.close();
 
   const std::filesystem::path link_filepath = output_folder / "link.csv";
@@ -132,43 +272,64 @@ void outputNetToCSV(const Network* network, const std::filesystem::path& output_
     link_file << "," << attr_name;
   }
   link_file << ",notes\n";
-  for (const Link* link : network->linkVector()) {
-    const std::string& name = absl::StrContains(link->name(), ',') ? "\"" + link->name() + "\"" : link->name();
-    const std::string& facility_type =
-        link->wayType() == WayType::HIGHWAY
-            ? getHighWayLinkTypeStr(link->highwayLinkType())
-            : (link->wayType() == WayType::RAILWAY
-                   ? link->railwayLinkType()
-                   : (link->wayType() == WayType::AEROWAY ? link->aerowayLinkType() : ""));
-    const std::string& type_no =
-        link->wayType() == WayType::HIGHWAY
-            ? std::to_string(getHighWayLinkTypeNo(link->highwayLinkType()))
-            : (link->wayType() == WayType::RAILWAY
-                   ? std::to_string(getRailwayLinkTypeNo())
-                   : (link->wayType() == WayType::AEROWAY ? std::to_string(getAerowayLinkTypeNo()) : ""));
-    const std::string& lanes = link->lanes().has_value() ? std::to_string(link->lanes().value()) : "";  // NOLINT
-    std::string free_speed;
+  const std::vector<Link*>& link_vector = network->linkVector();
+  auto format_link_row = [&link_vector](size_t row_idx, std::string& buffer, geos::io::WKTWriter& wkt_writer,
+                                        const geos::geom::GeometryFactory* factory) {
+    const Link* link = link_vector[row_idx];
+    appendInteger(buffer, link->linkId());
+    buffer += ',';
+    appendCSVField(buffer, link->name());
+    buffer += ',';
+    appendInteger(buffer, link->osmWayId());
+    buffer += ',';
+    appendInteger(buffer, link->fromNode()->nodeId());
+    buffer += ',';
+    appendInteger(buffer, link->toNode()->nodeId());
+    buffer += ",1,\"";
+    buffer += wkt_writer.write(link->createGeometry(factory).get());
+    buffer += "\",1,";
+    appendFixed(buffer, link->length(), LENGTH_OUTPUT_PRECISION);
+    buffer += ',';
+    if (link->wayType() == WayType::HIGHWAY) {
+      buffer += getHighWayLinkTypeStr(link->highwayLinkType());
+      buffer += ',';
+      appendInteger(buffer, getHighWayLinkTypeNo(link->highwayLinkType()));
+    } else if (link->wayType() == WayType::RAILWAY) {
+      buffer += link->railwayLinkType();
+      buffer += ',';
+      appendInteger(buffer, getRailwayLinkTypeNo());
+    } else if (link->wayType() == WayType::AEROWAY) {
+      buffer += link->aerowayLinkType();
+      buffer += ',';
+      appendInteger(buffer, getAerowayLinkTypeNo());
+    } else {
+      buffer += ',';
+    }
+    buffer += ',';
     if (link->freeSpeed().has_value()) {
-      std::ostringstream oss;
-      oss << std::fixed << std::setprecision(0) << link->freeSpeed().value();  // NOLINT
-      free_speed = oss.str();
+      appendFixed(buffer, link->freeSpeed().value(), 0);  // NOLINT
     }
-    const std::string& capacity =
-        link->capacity().has_value() ? std::to_string(link->capacity().value()) : "";  // NOLINT
-    std::string allowed_uses = getModeTypeStr(link->allowedModeTypes().at(0));
+    buffer += ',';
+    if (link->lanes().has_value()) {
+      appendInteger(buffer, link->lanes().value());  // NOLINT
+    }
+    buffer += ',';
+    if (link->capacity().has_value()) {
+      appendInteger(buffer, link->capacity().value());  // NOLINT
+    }
+    buffer += ',';
+    buffer += getModeTypeStr(link->allowedModeTypes().at(0));
     for (size_t idx = 1; idx < link->allowedModeTypes().size(); ++idx) {
-      allowed_uses += ";" + getModeTypeStr(link->allowedModeTypes().at(idx));
+      buffer += ';';
+      buffer += getModeTypeStr(link->allowedModeTypes().at(idx));
     }
-
-    link_file << link->linkId() << "," << name << "," << link->osmWayId() << "," << link->fromNode()->nodeId() << ","
-              << link->toNode()->nodeId() << ",1,\"" << link->geometry()->toString() << "\",1," << std::fixed
-              << std::setprecision(LENGTH_OUTPUT_PRECISION) << link->length() << "," << facility_type << "," << type_no
-              << "," << free_speed << "," << lanes << "," << capacity << "," << allowed_uses;
     for (const std::string& attr_value : link->osmAttributes()) {
-      link_file << "," << (absl::StrContains(attr_value, ',') ? "\"" + attr_value + "\"" : attr_value);
+      buffer += ',';
+      appendCSVField(buffer, attr_value);
     }
-    link_file << ",\n";
-  }
+    buffer += ",\n";
+  };
+  writeRowsInParallel(link_file, link_vector.size(), format_link_row);
   link_file.close();
 
   if (!network->poi()) {
@@ -185,30 +346,361 @@ void outputNetToCSV(const Network* network, const std::filesystem::path& output_
     poi_file << "," << attr_name;
   }
   poi_file << "\n";
-  for (const POI* poi : network->poiVector()) {
-    const std::string& name = absl::StrContains(poi->name(), ',') ? "\"" + poi->name() + "\"" : poi->name();
-    const std::string osm_way_id =
-        poi->osmWayId().has_value() ? std::to_string(poi->osmWayId().value()) : "";  // NOLINT
-    const std::string osm_relation_id =
-        poi->osmRelationId().has_value() ? std::to_string(poi->osmRelationId().value()) : "";  // NOLINT
-    const std::string& building =
-        absl::StrContains(poi->building(), ',') ? "\"" + poi->building() + "\"" : poi->building();
-    const std::string& amenity = absl::StrContains(poi->amenity(), ',') ? "\"" + poi->amenity() + "\"" : poi->amenity();
-    const std::string& leisure = absl::StrContains(poi->leisure(), ',') ? "\"" + poi->leisure() + "\"" : poi->leisure();
-    poi_file << name << "," << poi->poiId() << "," << osm_way_id << "," << osm_relation_id << "," << building << ","
-             << amenity << "," << leisure << ",,\"" << poi->geometry()->toString() << "\",\""
-             << poi->centroidGeometry()->toString() << "\"," << std::fixed << std::setprecision(AREA_OUTPUT_PRECISION)
-             << poi->area() << ",";
+  const std::vector<POI*>& poi_vector = network->poiVector();
+  auto format_poi_row = [&poi_vector](size_t row_idx, std::string& buffer, geos::io::WKTWriter& wkt_writer,
+                                      const geos::geom::GeometryFactory* factory) {
+    const POI* poi = poi_vector[row_idx];
+    appendCSVField(buffer, poi->name());
+    buffer += ',';
+    appendInteger(buffer, poi->poiId());
+    buffer += ',';
+    if (poi->osmWayId().has_value()) {
+      appendInteger(buffer, poi->osmWayId().value());  // NOLINT
+    }
+    buffer += ',';
+    if (poi->osmRelationId().has_value()) {
+      appendInteger(buffer, poi->osmRelationId().value());  // NOLINT
+    }
+    buffer += ',';
+    appendCSVField(buffer, poi->building());
+    buffer += ',';
+    appendCSVField(buffer, poi->amenity());
+    buffer += ',';
+    appendCSVField(buffer, poi->leisure());
+    buffer += ",,\"";
+    buffer += wkt_writer.write(poi->geometry().get());
+    buffer += "\",\"";
+    buffer += wkt_writer.write(poi->createCentroidGeometry(factory).get());
+    buffer += "\",";
+    appendFixed(buffer, poi->area(), AREA_OUTPUT_PRECISION);
+    buffer += ',';
     for (const std::string& attr_value : poi->osmAttributes()) {
-      poi_file << "," << (absl::StrContains(attr_value, ',') ? "\"" + attr_value + "\"" : attr_value);
+      buffer += ',';
+      appendCSVField(buffer, attr_value);
     }
-    poi_file << "\n";
-  }
+    buffer += '\n';
+  };
+  writeRowsInParallel(poi_file, poi_vector.size(), format_poi_row);
   poi_file.close();
 
   LOG(INFO) << "write network done";
 }
 
+// network tables are written to arrow files in record batches of ARROW_ROWS_PER_BATCH rows. like csv chunks, batches
+// are filled and encoded in parallel and written in order
+constexpr size_t ARROW_ROWS_PER_BATCH = 65536;
+constexpr uint8_t WKB_LITTLE_ENDIAN = 1;
+constexpr uint32_t WKB_POINT = 1;
+constexpr uint32_t WKB_LINESTRING = 2;
+constexpr uint32_t WKB_POLYGON = 3;
+constexpr uint32_t WKB_MULTIPOINT = 4;
+constexpr uint32_t WKB_MULTILINESTRING = 5;
+constexpr uint32_t WKB_MULTIPOLYGON = 6;
+constexpr uint32_t WKB_GEOMETRYCOLLECTION = 7;
+
+template <typename T>
+void appendWKBScalar(std::string& buffer, T value) {
+  const size_t offset = buffer.size();
+  buffer.resize(offset + sizeof(T));
+  std::memcpy(buffer.data() + offset, &value, sizeof(T));
+}
+
+// coordinates are the x and y of each point, interleaved
+void appendWKBCoordinates(std::string& buffer, const double* coordinates, size_t number_of_coordinates) {
+  appendWKBScalar(buffer, static_cast<uint32_t>(number_of_coordinates));
+  const size_t offset = buffer.size();
+  buffer.resize(offset + 2 * number_of_coordinates * sizeof(double));
+  std::memcpy(buffer.data() + offset, coordinates, 2 * number_of_coordinates * sizeof(double));
+}
+
+void appendWKBCoordinates(std::string& buffer, const geos::geom::CoordinateSequence* coordinates) {
+  appendWKBScalar(buffer, static_cast<uint32_t>(coordinates->size()));
+  for (size_t idx = 0; idx < coordinates->size(); ++idx) {
+    appendWKBScalar(buffer, coordinates->getX(idx));
+    appendWKBScalar(buffer, coordinates->getY(idx));
+  }
+}
+
+// 2D ISO WKB in little-endian byte order (osm2gmns, like the arrow writer, assumes a little-endian host). empty points
+// are written as NaN coordinates
+void appendWKBPoint(std::string& buffer, double x, double y) {
+  buffer += static_cast<char>(WKB_LITTLE_ENDIAN);
+  appendWKBScalar(buffer, WKB_POINT);
+  appendWKBScalar(buffer, x);
+  appendWKBScalar(buffer, y);
+}
+
+void appendWKBLineString(std::string& buffer, const double* coordinates, size_t number_of_coordinates) {
+  buffer += static_cast<char>(WKB_LITTLE_ENDIAN);
+  appendWKBScalar(buffer, WKB_LINESTRING);
+  appendWKBCoordinates(buffer, coordinates, number_of_coordinates);
+}
+
+void appendWKB(std::string& buffer, const geos::geom::Geometry* geometry) {
+  if (geometry->getGeometryTypeId() == geos::geom::GEOS_POINT) {
+    const auto* point = dynamic_cast<const geos::geom::Point*>(geometry);
+    appendWKBPoint(buffer, point->isEmpty() ? std::numeric_limits<double>::quiet_NaN() : point->getX(),
+                   point->isEmpty() ? std::numeric_limits<double>::quiet_NaN() : point->getY());
+    return;
+  }
+  buffer += static_cast<char>(WKB_LITTLE_ENDIAN);
+  switch (geometry->getGeometryTypeId()) {
+    case geos::geom::GEOS_LINESTRING:
+    case geos::geom::GEOS_LINEARRING:
+      appendWKBScalar(buffer, WKB_LINESTRING);
+      appendWKBCoordinates(buffer, dynamic_cast<const geos::geom::LineString*>(geometry)->getCoordinatesRO());
+      break;
+    case geos::geom::GEOS_POLYGON: {
+      const auto* polygon = dynamic_cast<const geos::geom::Polygon*>(geometry);
+      appendWKBScalar(buffer, WKB_POLYGON);
+      if (polygon->isEmpty()) {
+        appendWKBScalar(buffer, static_cast<uint32_t>(0));
+        break;
+      }
+      appendWKBScalar(buffer, static_cast<uint32_t>(polygon->getNumInteriorRing() + 1));
+      appendWKBCoordinates(buffer, polygon->getExteriorRing()->getCoordinatesRO());
+      for (size_t idx = 0; idx < polygon->getNumInteriorRing(); ++idx) {
+        appendWKBCoordinates(buffer, polygon->getInteriorRingN(idx)->getCoordinatesRO());
+      }
+      break;
+    }
+    default: {
+      const geos::geom::GeometryTypeId type_id = geometry->getGeometryTypeId();
+      const uint32_t wkb_type = type_id == geos::geom::GEOS_MULTIPOINT        ? WKB_MULTIPOINT
+                                : type_id == geos::geom::GEOS_MULTILINESTRING ? WKB_MULTILINESTRING
+                                : type_id == geos::geom::GEOS_MULTIPOLYGON    ? WKB_MULTIPOLYGON
+                                                                              : WKB_GEOMETRYCOLLECTION;
+      appendWKBScalar(buffer, wkb_type);
+      appendWKBScalar(buffer, static_cast<uint32_t>(geometry->getNumGeometries()));
+      for (size_t idx = 0; idx < geometry->getNumGeometries(); ++idx) {
+        appendWKB(buffer, geometry->getGeometryN(idx));
+      }
+      break;
+    }
+  }
+}
+
+// empty strings are written as nulls
+void appendArrowText(ArrowColumn& column, const std::string& value) {
+  if (value.empty()) {
+    column.appendNull();
+  } else {
+    column.appendBytes(value);
+  }
+}
+
+void appendArrowGeometry(ArrowColumn& column, const geos::geom::Geometry* geometry, std::string& wkb_buffer) {
+  wkb_buffer.clear();
+  appendWKB(wkb_buffer, geometry);
+  column.appendBytes(wkb_buffer);
+}
+
+ArrowField makeArrowGeometryField(const std::string& name) {
+  return {name,
+          ArrowType::BINARY,
+          {{"ARROW:extension:name", "geoarrow.wkb"}, {"ARROW:extension:metadata", R"({"crs":"OGC:CRS84"})"}}};
+}
+
+template <typename RowAppender>
+void writeArrowFileInParallel(const std::filesystem::path& filepath, std::vector<ArrowField> fields,
+                              size_t number_of_rows, const RowAppender& append_row) {
+  ArrowFileWriter writer(filepath, std::move(fields));
+  if (!writer.isOpen()) {
+    LOG(ERROR) << "Cannot open file " << filepath;
+    return;
+  }
+  const size_t number_of_batches = (number_of_rows + ARROW_ROWS_PER_BATCH - 1) / ARROW_ROWS_PER_BATCH;
+  const size_t batches_per_group = omp_get_max_threads();
+  std::vector<ArrowMessage> messages(batches_per_group);
+  const RunControl* control = RunControl::current();
+  for (size_t first_batch = 0; first_batch < number_of_batches; first_batch += batches_per_group) {
+    // files of cancelled runs hold the complete batches written so far
+    if (isCancelled(control)) {
+      break;
+    }
+    const auto number_of_group_batches =
+        static_cast<int64_t>(std::min(batches_per_group, number_of_batches - first_batch));
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(writer, number_of_rows, append_row, messages, first_batch, number_of_group_batches)
+    for (int64_t idx = 0; idx < number_of_group_batches; ++idx) {
+      std::vector<ArrowColumn> columns = writer.makeRecordBatch();
+      std::string wkb_buffer;
+      const size_t first_row = (first_batch + idx) * ARROW_ROWS_PER_BATCH;
+      const size_t last_row = std::min(first_row + ARROW_ROWS_PER_BATCH, number_of_rows);
+      for (size_t row_idx = first_row; row_idx < last_row; ++row_idx) {
+        append_row(row_idx, columns, wkb_buffer);
+      }
+      messages[idx] = ArrowFileWriter::encodeRecordBatch(columns);
+    }
+    for (int64_t idx = 0; idx < number_of_group_batches; ++idx) {
+      writer.writeRecordBatch(messages[idx]);
+    }
+  }
+  writer.close();
+}
+
+void outputNetToArrow(const Network* network, const std::filesystem::path& output_folder) {
+  if (isCancelled()) {
+    return;
+  }
+  LOG(INFO) << "writing network to arrow files";
+  StatsStage stage(network->stats(), "outputNetToArrow");
+  stage.addCount("nodes", static_cast<int64_t>(network->numberOfNodes()));
+  stage.addCount("links", static_cast<int64_t>(network->numberOfLinks()));
+  stage.addCount("pois", static_cast<int64_t>(network->poiVector().size()));
+  const OsmParsingConfig* osm_parsing_config = network->osmParsingConfig();
+
+  std::vector<ArrowField> node_fields = {{"name", ArrowType::UTF8, {}},       {"node_id", ArrowType::INT64, {}},
+                                         {"osm_node_id", ArrowType::UTF8, {}}, {"ctrl_type", ArrowType::UTF8, {}},
+                                         {"x_coord", ArrowType::FLOAT64, {}},  {"y_coord", ArrowType::FLOAT64, {}}};
+  for (const std::string& attr_name : osm_parsing_config->osm_node_attributes) {
+    node_fields.push_back({attr_name, ArrowType::UTF8, {}});
+  }
+  node_fields.insert(node_fields.end(), {{"is_boundary", ArrowType::INT16, {}},
+                                         {"activity_type", ArrowType::UTF8, {}},
+                                         {"poi_id", ArrowType::INT64, {}},
+                                         {"zone_id", ArrowType::INT64, {}},
+                                         {"notes", ArrowType::UTF8, {}}});
+  const std::vector<Node*>& node_vector = network->nodeVector();
+  const size_t number_of_node_attributes = osm_parsing_config->osm_node_attributes.size();
+  auto append_node_row = [&node_vector, number_of_node_attributes](size_t row_idx, std::vector<ArrowColumn>& columns,
+                                                                   std::string& /*wkb_buffer*/) {
+    const Node* node = node_vector[row_idx];
+    auto column = columns.begin();
+    appendArrowText(*column++, node->name());
+    (column++)->appendValue<int64_t>(node->nodeId());
+    appendArrowText(*column++, node->osmNodeId());
+    appendArrowText(*column++, node->isSignalized() ? "signal" : "");
+    (column++)->appendValue<double>(node->x());
+    (column++)->appendValue<double>(node->y());
+    const std::vector<std::string>& osm_attributes = node->osmAttributes();
+    for (size_t idx = 0; idx < number_of_node_attributes; ++idx) {
+      if (idx < osm_attributes.size()) {
+        appendArrowText(*column++, osm_attributes[idx]);
+      } else {
+        (column++)->appendNull();
+      }
+    }
+    (column++)->appendOptional<int16_t>(node->boundary());
+    if (node->activityType().has_value()) {
+      (column++)->appendBytes(getHighWayLinkTypeStr(node->activityType().value()));  // NOLINT
+    } else {
+      (column++)->appendNull();
+    }
+    (column++)->appendOptional<int64_t>(node->poiId());
+    (column++)->appendOptional<int64_t>(node->zoneId());
+    (column++)->appendNull();
+  };
+  writeArrowFileInParallel(output_folder / "node.arrow", std::move(node_fields), node_vector.size(), append_node_row);
+
+  std::vector<ArrowField> link_fields = {{"link_id", ArrowType::INT64, {}},
+                                         {"name", ArrowType::UTF8, {}},
+                                         {"osm_way_id", ArrowType::INT64, {}},
+                                         {"from_node_id", ArrowType::INT64, {}},
+                                         {"to_node_id", ArrowType::INT64, {}},
+                                         {"directed", ArrowType::BOOL, {}},
+                                         makeArrowGeometryField("geometry"),
+                                         {"dir_flag", ArrowType::INT16, {}},
+                                         {"length", ArrowType::FLOAT64, {}},
+                                         {"facility_type", ArrowType::UTF8, {}},
+                                         {"link_type", ArrowType::INT32, {}},
+                                         {"free_speed", ArrowType::FLOAT32, {}},
+                                         {"lanes", ArrowType::INT32, {}},
+                                         {"capacity", ArrowType::INT32, {}},
+                                         {"allowed_uses", ArrowType::UTF8, {}}};
+  for (const std::string& attr_name : osm_parsing_config->osm_link_attributes) {
+    link_fields.push_back({attr_name, ArrowType::UTF8, {}});
+  }
+  link_fields.push_back({"notes", ArrowType::UTF8, {}});
+  const std::vector<Link*>& link_vector = network->linkVector();
+  auto append_link_row = [&link_vector](size_t row_idx, std::vector<ArrowColumn>& columns, std::string& wkb_buffer) {
+    const Link* link = link_vector[row_idx];
+    auto column = columns.begin();
+    (column++)->appendValue<int64_t>(link->linkId());
+    appendArrowText(*column++, link->name());
+    (column++)->appendValue<int64_t>(link->osmWayId());
+    (column++)->appendValue<int64_t>(link->fromNode()->nodeId());
+    (column++)->appendValue<int64_t>(link->toNode()->nodeId());
+    (column++)->appendBool(true);
+    wkb_buffer.clear();
+    appendWKBLineString(wkb_buffer, link->coordinates(), link->numberOfCoordinates());
+    (column++)->appendBytes(wkb_buffer);
+    (column++)->appendValue<int16_t>(1);
+    (column++)->appendValue<double>(link->length());
+    if (link->wayType() == WayType::HIGHWAY) {
+      appendArrowText(*column++, getHighWayLinkTypeStr(link->highwayLinkType()));
+      (column++)->appendValue<int32_t>(getHighWayLinkTypeNo(link->highwayLinkType()));
+    } else if (link->wayType() == WayType::RAILWAY) {
+      appendArrowText(*column++, link->railwayLinkType());
+      (column++)->appendValue<int32_t>(getRailwayLinkTypeNo());
+    } else if (link->wayType() == WayType::AEROWAY) {
+      appendArrowText(*column++, link->aerowayLinkType());
+      (column++)->appendValue<int32_t>(getAerowayLinkTypeNo());
+    } else {
+      (column++)->appendNull();
+      (column++)->appendNull();
+    }
+    (column++)->appendOptional<float>(link->freeSpeed());
+    (column++)->appendOptional<int32_t>(link->lanes());
+    (column++)->appendOptional<int32_t>(link->capacity());
+    std::string allowed_uses = getModeTypeStr(link->allowedModeTypes().at(0));
+    for (size_t idx = 1; idx < link->allowedModeTypes().size(); ++idx) {
+      allowed_uses += ";" + getModeTypeStr(link->allowedModeTypes().at(idx));
+    }
+    appendArrowText(*column++, allowed_uses);
+    for (const std::string& attr_value : link->osmAttributes()) {
+      appendArrowText(*column++, attr_value);
+    }
+    (column++)->appendNull();
+  };
+  writeArrowFileInParallel(output_folder / "link.arrow", std::move(link_fields), link_vector.size(), append_link_row);
+
+  if (!network->poi()) {
+    LOG(INFO) << "write network done";
+    return;
+  }
+  std::vector<ArrowField> poi_fields = {{"name", ArrowType::UTF8, {}},
+                                        {"poi_id", ArrowType::INT64, {}},
+                                        {"osm_way_id", ArrowType::INT64, {}},
+                                        {"osm_relation_id", ArrowType::INT64, {}},
+                                        {"building", ArrowType::UTF8, {}},
+                                        {"amenity", ArrowType::UTF8, {}},
+                                        {"leisure", ArrowType::UTF8, {}},
+                                        {"way", ArrowType::UTF8, {}},
+                                        makeArrowGeometryField("geometry"),
+                                        makeArrowGeometryField("centroid"),
+                                        {"area", ArrowType::FLOAT64, {}},
+                                        {"area_ft2", ArrowType::FLOAT64, {}}};
+  for (const std::string& attr_name : osm_parsing_config->osm_poi_attributes) {
+    poi_fields.push_back({attr_name, ArrowType::UTF8, {}});
+  }
+  const std::vector<POI*>& poi_vector = network->poiVector();
+  auto append_poi_row = [&poi_vector](size_t row_idx, std::vector<ArrowColumn>& columns, std::string& wkb_buffer) {
+    const POI* poi = poi_vector[row_idx];
+    auto column = columns.begin();
+    appendArrowText(*column++, poi->name());
+    (column++)->appendValue<int64_t>(poi->poiId());
+    (column++)->appendOptional<int64_t>(poi->osmWayId());
+    (column++)->appendOptional<int64_t>(poi->osmRelationId());
+    appendArrowText(*column++, poi->building());
+    appendArrowText(*column++, poi->amenity());
+    appendArrowText(*column++, poi->leisure());
+    (column++)->appendNull();
+    appendArrowGeometry(*column++, poi->geometry().get(), wkb_buffer);
+    wkb_buffer.clear();
+    appendWKBPoint(wkb_buffer, poi->centroidX(), poi->centroidY());
+    (column++)->appendBytes(wkb_buffer);
+    (column++)->appendValue<double>(poi->area());
+    (column++)->appendNull();
+    for (const std::string& attr_value : poi->osmAttributes()) {
+      appendArrowText(*column++, attr_value);
+    }
+  };
+  writeArrowFileInParallel(output_folder / "poi.arrow", std::move(poi_fields), poi_vector.size(), append_poi_row);
+
+  LOG(INFO) << "write network done";
+}
+
 std::vector<Zone*> readZoneFile(const std::filesystem::path& zone_file) {
   if (!std::filesystem::exists(zone_file)) {
     LOG(ERROR) << "zone file " << zone_file << " does not exist";
@@ -294,4 +786,661 @@ std::vector<Intersection*> readIntersectionFile(const std::filesystem::path& int
   }
   LOG(INFO) << "intersection file loaded. " << int_vector.size() << " intersections";
   return int_vector;
-}
\ No newline at end of file
+}
+// columns written by outputNetToCSV and outputNetToArrow. columns of network files that are not listed here are loaded
+// as osm attributes
+constexpr std::array<std::string_view, 12> NODE_FILE_COLUMNS = {
+    "name",    "node_id",     "osm_node_id", "ctrl_type", "x_coord", "y_coord", "is_boundary", "activity_type",
+    "poi_id",  "zone_id",     "notes",       "intersection_id"};
+constexpr std::array<std::string_view, 16> LINK_FILE_COLUMNS = {
+    "link_id",       "name",      "osm_way_id", "from_node_id", "to_node_id", "directed", "geometry",     "dir_flag",
+    "length",        "facility_type", "link_type", "free_speed", "lanes",  "capacity", "allowed_uses", "notes"};
+
+// column indices of a network file. nullopt for columns that are not in the file
+struct NetworkFileColumns {
+  absl::flat_hash_map<std::string, size_t> column_dict;
+  std::vector<std::string> attribute_names;
+  std::vector<size_t> attribute_columns;
+
+  [[nodiscard]] std::optional<size_t> find(const std::string& column_name) const {
+    auto iter = column_dict.find(column_name);
+    return iter != column_dict.end() ? std::optional<size_t>(iter->second) : std::nullopt;
+  }
+};
+
+template <size_t N>
+NetworkFileColumns getNetworkFileColumns(const std::vector<std::string>& column_names,
+                                         const std::array<std::string_view, N>& known_columns) {
+  NetworkFileColumns columns;
+  for (size_t idx = 0; idx < column_names.size(); ++idx) {
+    if (columns.column_dict.contains(column_names[idx])) {
+      LOG(WARNING) << "column " << column_names[idx] << " is duplicated. only the first one is loaded";
+      continue;
+    }
+    columns.column_dict[column_names[idx]] = idx;
+    if (std::find(known_columns.begin(), known_columns.end(), column_names[idx]) == known_columns.end()) {
+      columns.attribute_names.push_back(column_names[idx]);
+      columns.attribute_columns.push_back(idx);
+    }
+  }
+  return columns;
+}
+
+// link fields read from a link file. nodes are resolved after all nodes are loaded
+struct LoadedLink {
+  NetIdType link_id{-1};
+  OsmIdType osm_way_id{-1};
+  std::string name;
+  NetIdType from_node_id{-1};
+  NetIdType to_node_id{-1};
+  // x and y of each point of the geometry, interleaved. empty if the link has no valid line string geometry
+  std::vector<double> coordinates;
+  std::optional<double> length;
+  std::string facility_type;
+  std::optional<int64_t> link_type;
+  std::optional<double> free_speed;
+  std::optional<int64_t> lanes;
+  std::optional<int64_t> capacity;
+  std::string allowed_uses;
+  std::vector<std::string> osm_attributes;
+};
+
+// integer columns with missing values are often written as floating point numbers, e.g. 2.0
+std::optional<int64_t> toInteger(double number) {
+  if (std::isfinite(number) && std::trunc(number) == number &&
+      std::abs(number) < static_cast<double>(std::numeric_limits<int64_t>::max())) {
+    return static_cast<int64_t>(number);
+  }
+  return std::nullopt;
+}
+
+std::optional<int64_t> parseInteger(const std::string& value) {
+  int64_t integer = 0;
+  if (absl::SimpleAtoi(value, &integer)) {
+    return integer;
+  }
+  double number = 0.0;
+  return absl::SimpleAtod(value, &number) ? toInteger(number) : std::nullopt;
+}
+
+std::optional<double> parseNumber(const std::string& value) {
+  double number = 0.0;
+  return absl::SimpleAtod(value, &number) ? std::optional<double>(number) : std::nullopt;
+}
+
+std::vector<double> toLineStringCoordinates(const std::unique_ptr<geos::geom::Geometry>& geometry) {
+  if (geometry == nullptr || geometry->getGeometryTypeId() != geos::geom::GEOS_LINESTRING) {
+    return {};
+  }
+  const geos::geom::CoordinateSequence* coord_seq =
+      static_cast<const geos::geom::LineString*>(geometry.get())->getCoordinatesRO();  // NOLINT
+  std::vector<double> coordinates;
+  coordinates.reserve(2 * coord_seq->size());
+  for (size_t idx = 0; idx < coord_seq->size(); ++idx) {
+    coordinates.push_back(coord_seq->getX(idx));
+    coordinates.push_back(coord_seq->getY(idx));
+  }
+  return coordinates;
+}
+
+// a row of a csv file. fields are the unquoted values of the row
+class CSVRow {
+ public:
+  CSVRow(const std::vector<std::string>& fields, const geos::io::WKTReader& wkt_reader)
+      : fields_(fields), wkt_reader_(wkt_reader) {}
+
+  [[nodiscard]] std::string text(std::optional<size_t> column) const {
+    return column.has_value() && column.value() < fields_.size() ? fields_[column.value()] : "";  // NOLINT
+  }
+  [[nodiscard]] std::optional<int64_t> integer(std::optional<size_t> column) const {
+    return parseInteger(text(column));
+  }
+  [[nodiscard]] std::optional<double> number(std::optional<size_t> column) const { return parseNumber(text(column)); }
+  // nullptr if the field is empty or is not valid WKT
+  [[nodiscard]] std::unique_ptr<geos::geom::Geometry> geometry(std::optional<size_t> column) const {
+    const std::string wkt = text(column);
+    if (wkt.empty()) {
+      return nullptr;
+    }
+    try {
+      return wkt_reader_.read(wkt);
+    } catch (const std::exception& e) {
+      return nullptr;
+    }
+  }
+
+ private:
+  const std::vector<std::string>& fields_;
+  const geos::io::WKTReader& wkt_reader_;
+};
+
+// shortest text that reads back to the same value
+template <typename T>
+std::string formatShortest(T value) {
+  std::array<char, NUMBER_BUFFER_SIZE> chars{};
+  const std::to_chars_result result = std::to_chars(chars.data(), chars.data() + chars.size(), value);
+  return {chars.data(), result.ptr};
+}
+
+// a row of a record batch of an arrow file. geometries may be WKB (binary columns) or WKT (string columns)
+class ArrowRow {
+ public:
+  ArrowRow(const std::vector<ArrowColumn>& columns, size_t row_idx, geos::io::WKBReader& wkb_reader,
+           const geos::io::WKTReader& wkt_reader)
+      : columns_(columns), row_idx_(row_idx), wkb_reader_(wkb_reader), wkt_reader_(wkt_reader) {}
+
+  [[nodiscard]] std::string text(std::optional<size_t> column) const {
+    if (!column.has_value() || columns_[column.value()].isNull(row_idx_)) {  // NOLINT
+      return "";
+    }
+    const ArrowColumn& arrow_column = columns_[column.value()];  // NOLINT
+    switch (arrow_column.type()) {
+      case ArrowType::UTF8:
+      case ArrowType::BINARY:
+        return std::string(arrow_column.bytes(row_idx_));
+      case ArrowType::BOOL:
+        return arrow_column.boolValue(row_idx_) ? "1" : "0";
+      case ArrowType::FLOAT32:
+        return formatShortest(arrow_column.value<float>(row_idx_));
+      case ArrowType::FLOAT64:
+        return formatShortest(arrow_column.value<double>(row_idx_));
+      default:
+        return formatShortest(integer(column).value());  // NOLINT
+    }
+  }
+  [[nodiscard]] std::optional<int64_t> integer(std::optional<size_t> column) const {
+    if (!column.has_value() || columns_[column.value()].isNull(row_idx_)) {  // NOLINT
+      return std::nullopt;
+    }
+    const ArrowColumn& arrow_column = columns_[column.value()];  // NOLINT
+    switch (arrow_column.type()) {
+      case ArrowType::BOOL:
+        return arrow_column.boolValue(row_idx_) ? 1 : 0;
+      case ArrowType::INT16:
+        return arrow_column.value<int16_t>(row_idx_);
+      case ArrowType::INT32:
+        return arrow_column.value<int32_t>(row_idx_);
+      case ArrowType::INT64:
+        return arrow_column.value<int64_t>(row_idx_);
+      case ArrowType::FLOAT32:
+      case ArrowType::FLOAT64:
+        return toInteger(number(column).value());  // NOLINT
+      default:
+        return parseInteger(std::string(arrow_column.bytes(row_idx_)));
+    }
+  }
+  [[nodiscard]] std::optional<double> number(std::optional<size_t> column) const {
+    if (!column.has_value() || columns_[column.value()].isNull(row_idx_)) {  // NOLINT
+      return std::nullopt;
+    }
+    const ArrowColumn& arrow_column = columns_[column.value()];  // NOLINT
+    switch (arrow_column.type()) {
+      case ArrowType::FLOAT32:
+        return arrow_column.value<float>(row_idx_);
+      case ArrowType::FLOAT64:
+        return arrow_column.value<double>(row_idx_);
+      case ArrowType::UTF8:
+      case ArrowType::BINARY:
+        return parseNumber(std::string(arrow_column.bytes(row_idx_)));
+      default: {
+        const std::optional<int64_t> value = integer(column);
+        return value.has_value() ? std::optional<double>(static_cast<double>(value.value())) : std::nullopt;  // NOLINT
+      }
+    }
+  }
+  // nullptr if the value is null or is not a valid geometry
+  [[nodiscard]] std::unique_ptr<geos::geom::Geometry> geometry(std::optional<size_t> column) const {
+    if (!column.has_value() || columns_[column.value()].isNull(row_idx_)) {  // NOLINT
+      return nullptr;
+    }
+    const ArrowColumn& arrow_column = columns_[column.value()];  // NOLINT
+    const std::string_view value = arrow_column.bytes(row_idx_);
+    if (value.empty()) {
+      return nullptr;
+    }
+    try {
+      if (arrow_column.type() == ArrowType::BINARY) {
+        return wkb_reader_.read(reinterpret_cast<const unsigned char*>(value.data()), value.size());  // NOLINT
+      }
+      return wkt_reader_.read(std::string(value));
+    } catch (const std::exception& e) {
+      return nullptr;
+    }
+  }
+
+ private:
+  const std::vector<ArrowColumn>& columns_;
+  size_t row_idx_;
+  geos::io::WKBReader& wkb_reader_;
+  const geos::io::WKTReader& wkt_reader_;
+};
+
+// nullptr if the row has no valid node_id, x_coord or y_coord
+template <typename Row>
+Node* makeLoadedNode(const Row& row, const NetworkFileColumns& columns) {
+  const std::optional<int64_t> node_id = row.integer(columns.find("node_id"));
+  const std::optional<double> x_coord = row.number(columns.find("x_coord"));
+  const std::optional<double> y_coord = row.number(columns.find("y_coord"));
+  if (!node_id.has_value() || !x_coord.has_value() || !y_coord.has_value()) {
+    return nullptr;
+  }
+  std::vector<std::string> osm_attributes;
+  osm_attributes.reserve(columns.attribute_columns.size());
+  for (const size_t column : columns.attribute_columns) {
+    osm_attributes.push_back(row.text(column));
+  }
+  auto* node = new Node(node_id.value(), row.text(columns.find("osm_node_id")), row.text(columns.find("name")),
+                        row.text(columns.find("ctrl_type")) == "signal", x_coord.value(), y_coord.value(),  // NOLINT
+                        std::move(osm_attributes));
+  const std::optional<int64_t> boundary = row.integer(columns.find("is_boundary"));
+  if (boundary.has_value()) {
+    node->setBoundary(static_cast<int16_t>(boundary.value()));  // NOLINT
+  }
+  const std::string activity_type = row.text(columns.find("activity_type"));
+  if (!activity_type.empty()) {
+    node->setActivityType(highwayStringToHighWayLinkType(activity_type));
+  }
+  node->setPOIId(row.integer(columns.find("poi_id")));
+  const std::optional<int64_t> zone_id = row.integer(columns.find("zone_id"));
+  if (zone_id.has_value()) {
+    node->setZoneId(zone_id.value());  // NOLINT
+  }
+  const std::optional<int64_t> intersection_id = row.integer(columns.find("intersection_id"));
+  if (intersection_id.has_value()) {
+    node->setIntersectionId(intersection_id.value());  // NOLINT
+  }
+  return node;
+}
+
+// nullopt if the row has no valid link_id, from_node_id or to_node_id
+template <typename Row>
+std::optional<LoadedLink> makeLoadedLink(const Row& row, const NetworkFileColumns& columns) {
+  const std::optional<int64_t> link_id = row.integer(columns.find("link_id"));
+  const std::optional<int64_t> from_node_id = row.integer(columns.find("from_node_id"));
+  const std::optional<int64_t> to_node_id = row.integer(columns.find("to_node_id"));
+  if (!link_id.has_value() || !from_node_id.has_value() || !to_node_id.has_value()) {
+    return std::nullopt;
+  }
+  LoadedLink link;
+  link.link_id = link_id.value();            // NOLINT
+  link.from_node_id = from_node_id.value();  // NOLINT
+  link.to_node_id = to_node_id.value();      // NOLINT
+  link.osm_way_id = row.integer(columns.find("osm_way_id")).value_or(-1);
+  link.name = row.text(columns.find("name"));
+  link.coordinates = toLineStringCoordinates(row.geometry(columns.find("geometry")));
+  link.length = row.number(columns.find("length"));
+  link.facility_type = row.text(columns.find("facility_type"));
+  link.link_type = row.integer(columns.find("link_type"));
+  link.free_speed = row.number(columns.find("free_speed"));
+  link.lanes = row.integer(columns.find("lanes"));
+  link.capacity = row.integer(columns.find("capacity"));
+  link.allowed_uses = row.text(columns.find("allowed_uses"));
+  link.osm_attributes.reserve(columns.attribute_columns.size());
+  for (const size_t column : columns.attribute_columns) {
+    link.osm_attributes.push_back(row.text(column));
+  }
+  return link;
+}
+
+WayType getLoadedLinkWayType(const LoadedLink& loaded_link) {
+  if (loaded_link.link_type == getRailwayLinkTypeNo()) {
+    return WayType::RAILWAY;
+  }
+  if (loaded_link.link_type == getAerowayLinkTypeNo()) {
+    return WayType::AEROWAY;
+  }
+  if (loaded_link.link_type.has_value() || !loaded_link.facility_type.empty()) {
+    return WayType::HIGHWAY;
+  }
+  return WayType::OTHER;
+}
+
+// number of points of the link geometry. links without a geometry get a straight line between their end nodes
+size_t getLoadedLinkNumberOfCoordinates(const LoadedLink& loaded_link) {
+  return loaded_link.coordinates.empty() ? 2 : loaded_link.coordinates.size() / 2;
+}
+
+// nullptr if an end node of the link is not loaded. the coordinates of the link are written to coordinates, which has
+// room for getLoadedLinkNumberOfCoordinates() points
+Link* makeLink(LoadedLink& loaded_link, const absl::flat_hash_map<NetIdType, Node*>& node_dict, double* coordinates) {
+  auto from_node_iter = node_dict.find(loaded_link.from_node_id);
+  auto to_node_iter = node_dict.find(loaded_link.to_node_id);
+  if (from_node_iter == node_dict.end() || to_node_iter == node_dict.end()) {
+    return nullptr;
+  }
+  Node* from_node = from_node_iter->second;
+  Node* to_node = to_node_iter->second;
+  if (loaded_link.coordinates.empty()) {
+    loaded_link.coordinates = {from_node->x(), from_node->y(), to_node->x(), to_node->y()};
+  }
+  std::copy(loaded_link.coordinates.begin(), loaded_link.coordinates.end(), coordinates);
+  const size_t number_of_coordinates = loaded_link.coordinates.size() / 2;
+  std::vector<double>().swap(loaded_link.coordinates);
+  const double length = loaded_link.length.has_value() ? loaded_link.length.value()  // NOLINT
+                                                       : calculateLineStringLength(coordinates, number_of_coordinates);
+  std::vector<ModeType> allowed_mode_types;
+  for (const absl::string_view mode : absl::StrSplit(loaded_link.allowed_uses, ';', absl::SkipWhitespace())) {
+    allowed_mode_types.push_back(modeStringToModeType(std::string(mode)));
+  }
+  if (allowed_mode_types.empty()) {
+    allowed_mode_types.push_back(ModeType::OTHER);
+  }
+  auto* link =
+      new Link(loaded_link.link_id, loaded_link.osm_way_id, std::move(loaded_link.name), from_node, to_node,
+               getLoadedLinkWayType(loaded_link), loaded_link.facility_type, coordinates, number_of_coordinates, length,
+               std::move(allowed_mode_types), std::move(loaded_link.osm_attributes));
+  if (loaded_link.free_speed.has_value()) {
+    link->setFreeSpeed(static_cast<float>(loaded_link.free_speed.value()));  // NOLINT
+  }
+  if (loaded_link.lanes.has_value()) {
+    link->setLanes(static_cast<int32_t>(loaded_link.lanes.value()));  // NOLINT
+  }
+  if (loaded_link.capacity.has_value()) {
+    link->setCapacity(static_cast<int32_t>(loaded_link.capacity.value()));  // NOLINT
+  }
+  return link;
+}
+
+// resolves the end nodes of loaded links and creates the network. links without a geometry get a straight line
+// between their end nodes and links without a length get the geodesic length of their geometry. link coordinates are
+// moved to a single buffer kept by the network
+Network* buildLoadedNetwork(std::vector<Node*> node_vector, std::vector<LoadedLink>& loaded_links,
+                            const NetworkFileColumns& node_columns, const NetworkFileColumns& link_columns) {
+  absl::flat_hash_map<NetIdType, Node*> node_dict;
+  node_dict.reserve(node_vector.size());
+  size_t number_of_duplicated_nodes = 0;
+  std::vector<Node*> unique_node_vector;
+  unique_node_vector.reserve(node_vector.size());
+  for (Node* node : node_vector) {
+    if (!node_dict.try_emplace(node->nodeId(), node).second) {
+      ++number_of_duplicated_nodes;
+      delete node;
+      continue;
+    }
+    unique_node_vector.push_back(node);
+  }
+  if (number_of_duplicated_nodes > 0) {
+    LOG(WARNING) << number_of_duplicated_nodes << " nodes have duplicated node ids and are not loaded";
+  }
+
+  std::vector<size_t> coordinate_offsets(loaded_links.size() + 1, 0);
+  for (size_t idx = 0; idx < loaded_links.size(); ++idx) {
+    coordinate_offsets[idx + 1] = coordinate_offsets[idx] + 2 * getLoadedLinkNumberOfCoordinates(loaded_links[idx]);
+  }
+  std::vector<double> link_coordinates(coordinate_offsets.back());
+  std::vector<Link*> link_candidates(loaded_links.size(), nullptr);
+  const auto number_of_loaded_links = static_cast<int64_t>(loaded_links.size());
+#pragma omp parallel for schedule(dynamic, CSV_ROWS_PER_CHUNK) default(none) \
+    shared(loaded_links, link_candidates, node_dict, coordinate_offsets, link_coordinates, number_of_loaded_links)
+  for (int64_t idx = 0; idx < number_of_loaded_links; ++idx) {
+    link_candidates[idx] = makeLink(loaded_links[idx], node_dict, link_coordinates.data() + coordinate_offsets[idx]);
+  }
+  std::vector<Link*> link_vector;
+  link_vector.reserve(link_candidates.size());
+  for (Link* link : link_candidates) {
+    if (link != nullptr) {
+      link_vector.push_back(link);
+    }
+  }
+  if (link_vector.size() < loaded_links.size()) {
+    LOG(WARNING) << loaded_links.size() - link_vector.size()
+                 << " links refer to nodes that are not in the node file and are not loaded";
+  }
+
+  // the parsing config records the attribute columns so that they are written back by outputNetToCSV
+  auto osm_parsing_config = std::make_unique<const OsmParsingConfig>(
+      OsmParsingConfig{node_columns.attribute_names, link_columns.attribute_names, {}});
+  // moving link_coordinates keeps its data, which the links point to
+  auto* network = new Network(std::move(unique_node_vector), std::move(link_vector), std::move(link_coordinates),
+                              std::move(osm_parsing_config));
+  LOG(INFO) << "network loaded. " << network->numberOfNodes() << " nodes, " << network->numberOfLinks() << " links";
+  return network;
+}
+
+// splits a csv line into fields. fields may be enclosed in double quotes, with "" standing for a quote in the field.
+// spaces around unquoted fields are trimmed
+void splitCSVLine(std::string_view line, std::vector<std::string>& fields) {
+  fields.clear();
+  size_t position = 0;
+  while (true) {
+    std::string& field = fields.emplace_back();
+    while (position < line.size() && line[position] == ' ') {
+      ++position;
+    }
+    if (position < line.size() && line[position] == '"') {
+      ++position;
+      while (position < line.size()) {
+        if (line[position] == '"') {
+          if (position + 1 < line.size() && line[position + 1] == '"') {
+            field += '"';
+            position += 2;
+            continue;
+          }
+          ++position;
+          break;
+        }
+        field += line[position++];
+      }
+      position = std::min(line.find(',', position), line.size());
+    } else {
+      const size_t field_end = std::min(line.find(',', position), line.size());
+      size_t value_end = field_end;
+      while (value_end > position && line[value_end - 1] == ' ') {
+        --value_end;
+      }
+      field.assign(line.substr(position, value_end - position));
+      position = field_end;
+    }
+    if (position >= line.size()) {
+      return;
+    }
+    ++position;
+  }
+}
+
+// reads the header and the non-empty data lines of a csv file
+bool readCSVFile(const std::filesystem::path& filepath, std::vector<std::string>& column_names,
+                 std::vector<std::string>& lines) {
+  if (!std::filesystem::exists(filepath)) {
+    LOG(ERROR) << "file " << filepath << " does not exist";
+    return false;
+  }
+  io::LineReader line_reader(filepath.string());
+  const char* header = line_reader.next_line();
+  if (header == nullptr) {
+    LOG(ERROR) << "file " << filepath << " is empty";
+    return false;
+  }
+  std::string_view header_line(header);
+  constexpr std::string_view utf8_bom = "\xEF\xBB\xBF";
+  if (header_line.substr(0, utf8_bom.size()) == utf8_bom) {
+    header_line.remove_prefix(utf8_bom.size());
+  }
+  splitCSVLine(header_line, column_names);
+  while (const char* line = line_reader.next_line()) {
+    if (*line != '\0') {
+      lines.emplace_back(line);
+    }
+  }
+  return true;
+}
+
+// parses the data lines of a csv file in parallel. rows for which parse_row returns nullopt are dropped. geometries
+// read from a chunk are only used while the chunk is parsed, so each chunk uses its own geometry factory
+template <typename T, typename RowParser>
+std::vector<T> parseCSVLinesInParallel(const std::vector<std::string>& lines, const RowParser& parse_row) {
+  const size_t number_of_chunks = (lines.size() + CSV_ROWS_PER_CHUNK - 1) / CSV_ROWS_PER_CHUNK;
+  std::vector<std::vector<T>> chunk_results(number_of_chunks);
+  const auto number_of_chunks_ = static_cast<int64_t>(number_of_chunks);
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(lines, parse_row, chunk_results, number_of_chunks_)
+  for (int64_t idx = 0; idx < number_of_chunks_; ++idx) {
+    const geos::geom::GeometryFactory::Ptr factory = geos::geom::GeometryFactory::create();
+    const geos::io::WKTReader wkt_reader(factory.get());
+    std::vector<std::string> fields;
+    const size_t first_line = idx * CSV_ROWS_PER_CHUNK;
+    const size_t last_line = std::min(first_line + CSV_ROWS_PER_CHUNK, lines.size());
+    for (size_t line_idx = first_line; line_idx < last_line; ++line_idx) {
+      splitCSVLine(lines[line_idx], fields);
+      std::optional<T> result = parse_row(CSVRow(fields, wkt_reader));
+      if (result.has_value()) {
+        chunk_results[idx].push_back(std::move(result.value()));  // NOLINT
+      }
+    }
+  }
+  std::vector<T> results;
+  for (std::vector<T>& chunk_result : chunk_results) {
+    std::move(chunk_result.begin(), chunk_result.end(), std::back_inserter(results));
+  }
+  return results;
+}
+
+Network* readNetworkFromCSV(const std::filesystem::path& input_folder) {
+  LOG(INFO) << "loading network from csv files";
+  std::vector<std::string> node_column_names;
+  std::vector<std::string> node_lines;
+  std::vector<std::string> link_column_names;
+  std::vector<std::string> link_lines;
+  if (!readCSVFile(input_folder / "node.csv", node_column_names, node_lines) ||
+      !readCSVFile(input_folder / "link.csv", link_column_names, link_lines)) {
+    return nullptr;
+  }
+  const NetworkFileColumns node_columns = getNetworkFileColumns(node_column_names, NODE_FILE_COLUMNS);
+  const NetworkFileColumns link_columns = getNetworkFileColumns(link_column_names, LINK_FILE_COLUMNS);
+  if (!node_columns.find("node_id").has_value() || !node_columns.find("x_coord").has_value() ||
+      !node_columns.find("y_coord").has_value()) {
+    LOG(ERROR) << "node file should have node_id, x_coord and y_coord columns. the network will not be loaded";
+    return nullptr;
+  }
+  if (!link_columns.find("link_id").has_value() || !link_columns.find("from_node_id").has_value() ||
+      !link_columns.find("to_node_id").has_value()) {
+    LOG(ERROR) << "link file should have link_id, from_node_id and to_node_id columns. the network will not be loaded";
+    return nullptr;
+  }
+
+  auto parse_node_row = [&node_columns](const CSVRow& row) {
+    Node* node = makeLoadedNode(row, node_columns);
+    return node != nullptr ? std::optional<Node*>(node) : std::nullopt;
+  };
+  std::vector<Node*> node_vector = parseCSVLinesInParallel<Node*>(node_lines, parse_node_row);
+  if (node_vector.size() < node_lines.size()) {
+    LOG(WARNING) << node_lines.size() - node_vector.size()
+                 << " rows in the node file have no valid node_id, x_coord or y_coord and are not loaded";
+  }
+  auto parse_link_row = [&link_columns](const CSVRow& row) { return makeLoadedLink(row, link_columns); };
+  std::vector<LoadedLink> loaded_links = parseCSVLinesInParallel<LoadedLink>(link_lines, parse_link_row);
+  if (loaded_links.size() < link_lines.size()) {
+    LOG(WARNING) << link_lines.size() - loaded_links.size()
+                 << " rows in the link file have no valid link_id, from_node_id or to_node_id and are not loaded";
+  }
+
+  return buildLoadedNetwork(std::move(node_vector), loaded_links, node_columns, link_columns);
+}
+
+// parses the record batches of an arrow file in parallel. rows for which parse_row returns nullopt are dropped. like
+// csv chunks, each record batch uses its own geometry factory
+template <typename T, typename RowParser>
+std::optional<std::vector<T>> parseArrowFileInParallel(const ArrowFileReader& reader, size_t& number_of_rows,
+                                                       const RowParser& parse_row) {
+  const size_t number_of_batches = reader.numberOfRecordBatches();
+  std::vector<std::vector<T>> batch_results(number_of_batches);
+  std::vector<size_t> batch_rows(number_of_batches, 0);
+  bool is_valid = true;
+  const auto number_of_batches_ = static_cast<int64_t>(number_of_batches);
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(reader, parse_row, batch_results, batch_rows, is_valid, number_of_batches_)
+  for (int64_t idx = 0; idx < number_of_batches_; ++idx) {
+    const std::optional<std::vector<ArrowColumn>> columns = reader.readRecordBatch(idx);
+    if (!columns.has_value()) {
+#pragma omp atomic write
+      is_valid = false;
+      continue;
+    }
+    const geos::geom::GeometryFactory::Ptr factory = geos::geom::GeometryFactory::create();
+    geos::io::WKBReader wkb_reader(*factory);
+    const geos::io::WKTReader wkt_reader(factory.get());
+    batch_rows[idx] = columns->empty() ? 0 : columns->front().length();
+    for (size_t row_idx = 0; row_idx < batch_rows[idx]; ++row_idx) {
+      std::optional<T> result = parse_row(ArrowRow(columns.value(), row_idx, wkb_reader, wkt_reader));  // NOLINT
+      if (result.has_value()) {
+        batch_results[idx].push_back(std::move(result.value()));  // NOLINT
+      }
+    }
+  }
+  std::vector<T> results;
+  for (size_t idx = 0; idx < number_of_batches; ++idx) {
+    number_of_rows += batch_rows[idx];
+    std::move(batch_results[idx].begin(), batch_results[idx].end(), std::back_inserter(results));
+  }
+  if (!is_valid) {
+    return std::nullopt;
+  }
+  return results;
+}
+
+std::vector<std::string> getArrowFieldNames(const ArrowFileReader& reader) {
+  std::vector<std::string> field_names;
+  field_names.reserve(reader.fields().size());
+  for (const ArrowField& field : reader.fields()) {
+    field_names.push_back(field.name);
+  }
+  return field_names;
+}
+
+Network* readNetworkFromArrow(const std::filesystem::path& input_folder) {
+  LOG(INFO) << "loading network from arrow files";
+  const std::filesystem::path node_filepath = input_folder / "node.arrow";
+  const std::filesystem::path link_filepath = input_folder / "link.arrow";
+  for (const std::filesystem::path& filepath : {node_filepath, link_filepath}) {
+    if (!std::filesystem::exists(filepath)) {
+      LOG(ERROR) << "file " << filepath << " does not exist";
+      return nullptr;
+    }
+  }
+  const ArrowFileReader node_reader(node_filepath);
+  const ArrowFileReader link_reader(link_filepath);
+  if (!node_reader.isValid() || !link_reader.isValid()) {
+    return nullptr;
+  }
+  const NetworkFileColumns node_columns = getNetworkFileColumns(getArrowFieldNames(node_reader), NODE_FILE_COLUMNS);
+  const NetworkFileColumns link_columns = getNetworkFileColumns(getArrowFieldNames(link_reader), LINK_FILE_COLUMNS);
+  if (!node_columns.find("node_id").has_value() || !node_columns.find("x_coord").has_value() ||
+      !node_columns.find("y_coord").has_value()) {
+    LOG(ERROR) << "node file should have node_id, x_coord and y_coord columns. the network will not be loaded";
+    return nullptr;
+  }
+  if (!link_columns.find("link_id").has_value() || !link_columns.find("from_node_id").has_value() ||
+      !link_columns.find("to_node_id").has_value()) {
+    LOG(ERROR) << "link file should have link_id, from_node_id and to_node_id columns. the network will not be loaded";
+    return nullptr;
+  }
+
+  auto parse_node_row = [&node_columns](const ArrowRow& row) {
+    Node* node = makeLoadedNode(row, node_columns);
+    return node != nullptr ? std::optional<Node*>(node) : std::nullopt;
+  };
+  size_t number_of_node_rows = 0;
+  std::optional<std::vector<Node*>> node_vector =
+      parseArrowFileInParallel<Node*>(node_reader, number_of_node_rows, parse_node_row);
+  auto parse_link_row = [&link_columns](const ArrowRow& row) { return makeLoadedLink(row, link_columns); };
+  size_t number_of_link_rows = 0;
+  std::optional<std::vector<LoadedLink>> loaded_links =
+      parseArrowFileInParallel<LoadedLink>(link_reader, number_of_link_rows, parse_link_row);
+  if (!node_vector.has_value() || !loaded_links.has_value()) {
+    for (Node* node : node_vector.value_or(std::vector<Node*>{})) {
+      delete node;
+    }
+    return nullptr;
+  }
+  if (node_vector->size() < number_of_node_rows) {
+    LOG(WARNING) << number_of_node_rows - node_vector->size()
+                 << " rows in the node file have no valid node_id, x_coord or y_coord and are not loaded";
+  }
+  if (loaded_links->size() < number_of_link_rows) {
+    LOG(WARNING) << number_of_link_rows - loaded_links->size()
+                 << " rows in the link file have no valid link_id, from_node_id or to_node_id and are not loaded";
+  }
+
+  return buildLoadedNetwork(std::move(node_vector.value()), loaded_links.value(), node_columns,  // NOLINT
+                            link_columns);
+}
@@ -5,13 +5,26 @@
 #ifndef OSM2GMNS_IO_H
 #define OSM2GMNS_IO_H
 
+#include <cstdint>
 #include <filesystem>
 #include <vector>
 
 #include "networks.h"
 
+// link_type number written to the link file, e.g. 1 for motorway links, 30 for railway links. -1 if unknown
+int32_t getLinkTypeNo(const Link* link);
+
 void outputNetToCSV(const Network* network, const std::filesystem::path& output_folder);
 
+// writes node.arrow, link.arrow and poi.arrow (Arrow IPC files) with the same columns as the csv files
+void outputNetToArrow(const Network* network, const std::filesystem::path& output_folder);
+
+// load a network from node.csv and link.csv (or node.arrow and link.arrow) written by outputNetToCSV (outputNetToArrow)
+// or by other GMNS tools. columns that are not written by osm2gmns are loaded as node and link attributes. returns
+// nullptr if the files cannot be loaded
+Network* readNetworkFromCSV(const std::filesystem::path& input_folder);
+Network* readNetworkFromArrow(const std::filesystem::path& input_folder);
+
 std::vector<Zone*> readZoneFile(const std::filesystem::path& zone_file);
 
 std::vector<Intersection*> readIntersectionFile(const std::filesystem::path& intersection_file);
@@ -7,20 +7,31 @@
 #include <absl/container/flat_hash_map.h>
 #include <absl/container/flat_hash_set.h>
 #include <absl/log/log.h>
+#include <absl/strings/str_join.h>
 #include <geos/geom/Coordinate.h>
 #include <geos/geom/CoordinateSequence.h>
+#include <geos/geom/Envelope.h>
 #include <geos/geom/Geometry.h>
 #include <geos/geom/GeometryFactory.h>
 #include <geos/geom/MultiPolygon.h>
 #include <geos/geom/Point.h>
 #include <geos/geom/Polygon.h>
+#include <geos/geom/prep/PreparedGeometry.h>
+#include <geos/geom/prep/PreparedGeometryFactory.h>
+#include <geos/index/strtree/GeometryItemDistance.h>
+#include <geos/index/strtree/STRtree.h>
+#include <geos/index/strtree/TemplateSTRtree.h>
 #include <omp.h>
 
 #include <algorithm>
+#include <array>
 #include <cassert>
+#include <chrono>
 #include <cmath>
 #include <cstddef>
 #include <cstdint>
+#include <deque>
+#include <filesystem>
 #include <iterator>
 #include <limits>
 #include <memory>
@@ -31,20 +42,32 @@
 #include <utility>
 #include <vector>
 
+#include "constants.h"
 #include "osmconfig.h"
 #include "osmnetwork.h"
+#include "runcontrol.h"
+#include "stats.h"
 #include "utils.h"
 
-Node::Node(const OsmNode* osm_node, const geos::geom::GeometryFactory* factory)
+Node::Node(const OsmNode* osm_node)
     : osm_nodes_({osm_node}),
       name_(osm_node->name()),
       is_signalized_(osm_node->isSignalized()),
-      osm_attributes_(osm_node->osmAttributes()) {
-  geometry_ = factory->createPoint(geos::geom::Coordinate(osm_node->getX(), osm_node->getY()));
-}
+      x_(osm_node->getX()),
+      y_(osm_node->getY()),
+      osm_attributes_(osm_node->osmAttributes()) {}
+
+Node::Node(NetIdType node_id, std::string osm_node_id, std::string name, bool is_signalized, double x, double y,
+           std::vector<std::string> osm_attributes)
+    : node_id_(node_id),
+      osm_node_id_(std::move(osm_node_id)),
+      name_(std::move(name)),
+      is_signalized_(is_signalized),
+      x_(x),
+      y_(y),
+      osm_attributes_(std::move(osm_attributes)) {}
 
-Node::Node(NetIdType node_id, const std::vector<Node*>& nodes, NetIdType intersection_id,
-           const geos::geom::GeometryFactory* factory)
+Node::Node(NetIdType node_id, const std::vector<Node*>& nodes, NetIdType intersection_id)
     : node_id_(node_id), intersection_id_(intersection_id) {
   if (nodes.empty()) {
     return;
@@ -52,34 +75,58 @@ Node::Node(NetIdType node_id, const std::vector<Node*>& nodes, NetIdType interse
 
   double sum_x = 0.0;
   double sum_y = 0.0;
+  std::vector<std::string> loaded_osm_node_ids;
   for (Node* node : nodes) {
     osm_nodes_.insert(osm_nodes_.end(), node->osmNodes().begin(), node->osmNodes().end());
+    if (node->osmNodes().empty() && !node->osmNodeId().empty()) {
+      loaded_osm_node_ids.push_back(node->osmNodeId());
+    }
     if (node->isSignalized()) {
       is_signalized_ = true;
     }
-    const geos::geom::CoordinateXY* coord = node->geometry()->getCoordinate();
-    sum_x += coord->x;
-    sum_y += coord->y;
+    sum_x += node->x();
+    sum_y += node->y();
   }
-  const double avg_x = sum_x / static_cast<double>(osm_nodes_.size());
-  const double avg_y = sum_y / static_cast<double>(osm_nodes_.size());
-  geometry_ = factory->createPoint(geos::geom::Coordinate(avg_x, avg_y));
+  osm_node_id_ = absl::StrJoin(loaded_osm_node_ids, ";");
+  x_ = sum_x / static_cast<double>(nodes.size());
+  y_ = sum_y / static_cast<double>(nodes.size());
 }
 
 void Node::setNodeId(NetIdType node_id) { node_id_ = node_id; }
 void Node::setZoneId(NetIdType zone_id) { zone_id_ = zone_id; }
+void Node::setPOIId(std::optional<NetIdType> poi_id) { poi_id_ = poi_id; }
 void Node::setBoundary(int16_t boundary) { boundary_ = boundary; }
 void Node::setActivityType(HighWayLinkType activity_type) { activity_type_ = activity_type; }
 void Node::setIntersectionId(NetIdType intersection_id) { intersection_id_ = intersection_id; }
-// void Node::setIsValid(bool is_valid) { is_valid_ = is_valid; }
+void Node::setIsValid(bool is_valid) { is_valid_ = is_valid; }
 void Node::addIncomingLink(Link* link) { incoming_link_vector_.push_back(link); }
 void Node::addOutgoingLink(Link* link) { outgoing_link_vector_.push_back(link); }
+void Node::removeIncomingLink(const Link* link) {
+  incoming_link_vector_.erase(std::remove(incoming_link_vector_.begin(), incoming_link_vector_.end(), link),
+                              incoming_link_vector_.end());
+}
+void Node::removeOutgoingLink(const Link* link) {
+  outgoing_link_vector_.erase(std::remove(outgoing_link_vector_.begin(), outgoing_link_vector_.end(), link),
+                              outgoing_link_vector_.end());
+}
+void Node::updateFromOsmNode() {
+  if (osm_nodes_.size() != 1) {
+    return;
+  }
+  const OsmNode* osm_node = osm_nodes_.at(0);
+  name_ = osm_node->name();
+  is_signalized_ = osm_node->isSignalized();
+  x_ = osm_node->getX();
+  y_ = osm_node->getY();
+  osm_attributes_ = osm_node->osmAttributes();
+}
 
 NetIdType Node::nodeId() const { return node_id_; };
 const std::vector<const OsmNode*>& Node::osmNodes() const { return osm_nodes_; }
 std::string Node::osmNodeId() const {
+  // nodes loaded from network files keep the osm node id text of the file
   if (osm_nodes_.empty()) {
-    return "";
+    return osm_node_id_;
   }
   std::string osm_node_id = std::to_string(osm_nodes_.at(0)->osmNodeId());
   for (size_t idx = 1; idx < osm_nodes_.size(); ++idx) {
@@ -89,19 +136,45 @@ std::string Node::osmNodeId() const {
 }
 const std::string& Node::name() const { return name_; }
 bool Node::isSignalized() const { return is_signalized_; }
-const std::unique_ptr<geos::geom::Point>& Node::geometry() const { return geometry_; }
+double Node::x() const { return x_; }
+double Node::y() const { return y_; }
+std::unique_ptr<geos::geom::Point> Node::createGeometry(const geos::geom::GeometryFactory* factory) const {
+  return factory->createPoint(geos::geom::CoordinateXY(x_, y_));
+}
 const std::vector<std::string>& Node::osmAttributes() const { return osm_attributes_; };
 std::optional<NetIdType> Node::zoneId() const { return zone_id_; }
+std::optional<NetIdType> Node::poiId() const { return poi_id_; }
 std::optional<int16_t> Node::boundary() const { return boundary_; }
 std::optional<HighWayLinkType> Node::activityType() const { return activity_type_; }
 std::optional<NetIdType> Node::intersectionId() const { return intersection_id_; }
-// bool Node::isValid() const { return is_valid_; }
+bool Node::isValid() const { return is_valid_; }
 const std::vector<Link*>& Node::incomingLinkVector() const { return incoming_link_vector_; }
 const std::vector<Link*>& Node::outgoingLinkVector() const { return outgoing_link_vector_; }
 
 Link::Link(Node* from_node, Node* to_node) : from_node_(from_node), to_node_(to_node) {}
-Link::Link(const OsmWay* osm_way, const std::vector<OsmNode*>& osm_nodes, bool forward_direction, size_t osm_way_seq_,
-           const geos::geom::GeometryFactory* factory)
+Link::Link(NetIdType link_id, OsmIdType osm_way_id, std::string name, Node* from_node, Node* to_node, WayType way_type,
+           const std::string& facility_type, const double* coordinates, size_t number_of_coordinates, double length,
+           std::vector<ModeType> allowed_mode_types, std::vector<std::string> osm_attributes)
+    : link_id_(link_id),
+      osm_way_id_(osm_way_id),
+      name_(std::move(name)),
+      from_node_(from_node),
+      to_node_(to_node),
+      way_type_(way_type),
+      coordinates_(coordinates),
+      number_of_coordinates_(number_of_coordinates),
+      length_(length),
+      allowed_mode_types_(std::move(allowed_mode_types)),
+      osm_attributes_(std::move(osm_attributes)) {
+  if (way_type_ == WayType::HIGHWAY) {
+    highway_link_type_ = highwayStringToHighWayLinkType(facility_type);
+  } else if (way_type_ == WayType::RAILWAY) {
+    railway_link_type_ = facility_type;
+  } else if (way_type_ == WayType::AEROWAY) {
+    aeroway_link_type_ = facility_type;
+  }
+}
+Link::Link(const OsmWay* osm_way, const std::vector<OsmNode*>& osm_nodes, bool forward_direction, size_t osm_way_seq_)
     : osm_way_id_(osm_way->osmWayId()),
       osm_way_seq_(osm_way_seq_),
       name_(osm_way->name()),
@@ -113,20 +186,14 @@ Link::Link(const OsmWay* osm_way, const std::vector<OsmNode*>& osm_nodes, bool f
   }
   from_osm_node_ = forward_direction ? osm_nodes.at(0) : osm_nodes.back();
   to_osm_node_ = forward_direction ? osm_nodes.back() : osm_nodes.at(0);
-  geos::geom::CoordinateSequence coord_seq;
-  if (forward_direction) {
-    for (const OsmNode* osm_node : osm_nodes) {
-      // coord_seq.add(*(osm_node->geometry()->getCoordinate()));
-      coord_seq.add(osm_node->getX(), osm_node->getY());
-    }
-  } else {
-    for (auto rit = osm_nodes.rbegin(); rit != osm_nodes.rend(); ++rit) {
-      // coord_seq.add(*((*rit)->geometry()->getCoordinate()));
-      coord_seq.add((*rit)->getX(), (*rit)->getY());
-    }
+  number_of_coordinates_ = osm_nodes.size();
+  length_ = 0.0;
+  const size_t number_of_osm_nodes = osm_nodes.size();
+  for (size_t idx = 1; idx < number_of_osm_nodes; ++idx) {
+    const OsmNode* osm_node_1 = forward_direction ? osm_nodes[idx - 1] : osm_nodes[number_of_osm_nodes - idx];
+    const OsmNode* osm_node_2 = forward_direction ? osm_nodes[idx] : osm_nodes[number_of_osm_nodes - idx - 1];
+    length_ += haversineDistance(osm_node_1->getX(), osm_node_1->getY(), osm_node_2->getX(), osm_node_2->getY());
   }
-  geometry_ = factory->createLineString(coord_seq);
-  length_ = calculateLineStringLength(geometry_.get());
   way_type_ = osm_way->wayType();
   if (way_type_ == WayType::HIGHWAY) {
     highway_link_type_ = osm_way->highwayLinkType();
@@ -171,22 +238,35 @@ WayType Link::wayType() const { return way_type_; }
 HighWayLinkType Link::highwayLinkType() const { return highway_link_type_; }
 const std::string& Link::railwayLinkType() const { return railway_link_type_; }
 const std::string& Link::aerowayLinkType() const { return aeroway_link_type_; }
-const std::unique_ptr<geos::geom::LineString>& Link::geometry() const { return geometry_; }
+const double* Link::coordinates() const { return coordinates_; }
+size_t Link::numberOfCoordinates() const { return number_of_coordinates_; }
+std::unique_ptr<geos::geom::LineString> Link::createGeometry(const geos::geom::GeometryFactory* factory) const {
+  geos::geom::CoordinateSequence coord_seq;
+  coord_seq.reserve(number_of_coordinates_);
+  for (size_t idx = 0; idx < number_of_coordinates_; ++idx) {
+    coord_seq.add(coordinates_[2 * idx], coordinates_[2 * idx + 1]);  // NOLINT
+  }
+  return factory->createLineString(std::move(coord_seq));
+}
 double Link::length() const { return length_; }
-// bool Link::isValid() const { return is_valid_; }
 std::optional<int32_t> Link::lanes() const { return lanes_; }
 std::optional<float> Link::freeSpeed() const { return free_speed_; }
 std::optional<int32_t> Link::capacity() const { return capacity_; }
 const std::vector<ModeType>& Link::allowedModeTypes() const { return allowed_mode_types_; }
 const std::vector<std::string>& Link::osmAttributes() const { return osm_attributes_; }
+bool Link::isValid() const { return is_valid_; }
 
 void Link::setLinkId(NetIdType link_id) { link_id_ = link_id; }
 void Link::setFromNode(Node* from_node) { from_node_ = from_node; }
 void Link::setToNode(Node* to_node) { to_node_ = to_node; }
+void Link::setCoordinates(const double* coordinates, size_t number_of_coordinates) {
+  coordinates_ = coordinates;
+  number_of_coordinates_ = number_of_coordinates;
+}
 void Link::setLanes(int32_t lanes) { lanes_ = lanes; }
 void Link::setFreeSpeed(float free_speed) { free_speed_ = free_speed; }
 void Link::setCapacity(int32_t capacity) { capacity_ = capacity; }
-// void Link::setIsValid(bool is_valid) { is_valid_ = is_valid; }
+void Link::setIsValid(bool is_valid) { is_valid_ = is_valid; }
 
 POI::POI(const OsmWay* osm_way, std::unique_ptr<geos::geom::Polygon> geometry)
     : name_(osm_way->name()),
@@ -195,9 +275,9 @@ POI::POI(const OsmWay* osm_way, std::unique_ptr<geos::geom::Polygon> geometry)
       amenity_(osm_way->amenity()),
       leisure_(osm_way->leisure()),
       osm_attributes_(osm_way->osmPoiAttributes()),
-      geometry_(std::move(geometry)),
-      centroid_geometry_(std::move(geometry_->getCentroid())),
-      geometry_utm_(std::move(projectGeometryToUTM(geometry_.get(), geometry_->getFactory()))) {}
+      geometry_(std::move(geometry)) {
+  calculateCentroidAndArea();
+}
 
 POI::POI(const OsmRelation* osm_relation, std::unique_ptr<geos::geom::MultiPolygon> geometry)
     : name_(osm_relation->name()),
@@ -206,9 +286,75 @@ POI::POI(const OsmRelation* osm_relation, std::unique_ptr<geos::geom::MultiPolyg
       amenity_(osm_relation->amenity()),
       leisure_(osm_relation->leisure()),
       osm_attributes_(osm_relation->osmAttributes()),
-      geometry_(std::move(geometry)),
-      centroid_geometry_(std::move(geometry_->getCentroid())),
-      geometry_utm_(std::move(projectGeometryToUTM(geometry_.get(), geometry_->getFactory()))) {}
+      geometry_(std::move(geometry)) {
+  calculateCentroidAndArea();
+}
+
+void POI::calculateCentroidAndArea() {
+  // one pass over the exterior rings (pois have no holes). the centroid is the area weighted centroid of triangles
+  // from a base point, as computed by GEOS, and the area is the shoelace area of the rings projected to utm
+  UTMProjector projector;
+  std::optional<geos::geom::CoordinateXY> base_point;
+  double centroid_area2 = 0.0;
+  double centroid_x3 = 0.0;
+  double centroid_y3 = 0.0;
+  double utm_area2 = 0.0;
+  const size_t number_of_polygons = geometry_->getNumGeometries();
+  for (size_t polygon_idx = 0; polygon_idx < number_of_polygons; ++polygon_idx) {
+    const auto* polygon = dynamic_cast<const geos::geom::Polygon*>(geometry_->getGeometryN(polygon_idx));
+    if (polygon == nullptr || polygon->isEmpty()) {
+      continue;
+    }
+    const geos::geom::CoordinateSequence* coord_seq = polygon->getExteriorRing()->getCoordinatesRO();
+    const size_t number_of_points = coord_seq->size();
+    if (!base_point.has_value()) {
+      base_point = geos::geom::CoordinateXY(coord_seq->getX(0), coord_seq->getY(0));
+    }
+    const double base_x = base_point->x;
+    const double base_y = base_point->y;
+    double ring_area2 = 0.0;
+    double ring_x3 = 0.0;
+    double ring_y3 = 0.0;
+    double ring_utm_area2 = 0.0;
+    double prev_utm_x = 0.0;
+    double prev_utm_y = 0.0;
+    projector.project(coord_seq->getX(0), coord_seq->getY(0), prev_utm_x, prev_utm_y);
+    for (size_t pnt_idx = 1; pnt_idx < number_of_points; ++pnt_idx) {
+      const double prev_x = coord_seq->getX(pnt_idx - 1);
+      const double prev_y = coord_seq->getY(pnt_idx - 1);
+      const double x = coord_seq->getX(pnt_idx);
+      const double y = coord_seq->getY(pnt_idx);
+      const double triangle_area2 = (prev_x - base_x) * (y - base_y) - (x - base_x) * (prev_y - base_y);
+      ring_area2 += triangle_area2;
+      ring_x3 += triangle_area2 * (base_x + prev_x + x);
+      ring_y3 += triangle_area2 * (base_y + prev_y + y);
+
+      double utm_x = 0.0;
+      double utm_y = 0.0;
+      projector.project(x, y, utm_x, utm_y);
+      ring_utm_area2 += prev_utm_x * utm_y - utm_x * prev_utm_y;
+      prev_utm_x = utm_x;
+      prev_utm_y = utm_y;
+    }
+    // rings count positively whatever their orientation
+    const double sign = ring_area2 < 0 ? -1.0 : 1.0;
+    centroid_area2 += sign * ring_area2;
+    centroid_x3 += sign * ring_x3;
+    centroid_y3 += sign * ring_y3;
+    utm_area2 += std::abs(ring_utm_area2);
+  }
+  area_ = utm_area2 / 2.0;
+
+  if (centroid_area2 > 0.0) {
+    centroid_x_ = centroid_x3 / (3.0 * centroid_area2);
+    centroid_y_ = centroid_y3 / (3.0 * centroid_area2);
+    return;
+  }
+  // geometries without area fall back to the centroid of their lines or points
+  const std::unique_ptr<geos::geom::Point> centroid = geometry_->getCentroid();
+  centroid_x_ = centroid->isEmpty() ? std::numeric_limits<double>::quiet_NaN() : centroid->getX();
+  centroid_y_ = centroid->isEmpty() ? std::numeric_limits<double>::quiet_NaN() : centroid->getY();
+}
 
 NetIdType POI::poiId() const { return poi_id_; }
 const std::string& POI::name() const { return name_; }
@@ -219,8 +365,15 @@ const std::string& POI::amenity() const { return amenity_; }
 const std::string& POI::leisure() const { return leisure_; }
 const std::vector<std::string>& POI::osmAttributes() const { return osm_attributes_; }
 const std::unique_ptr<geos::geom::Geometry>& POI::geometry() const { return geometry_; }
-const std::unique_ptr<geos::geom::Point>& POI::centroidGeometry() const { return centroid_geometry_; }
-double POI::area() const { return geometry_utm_ != nullptr ? geometry_utm_->getArea() : 0.0; }
+double POI::centroidX() const { return centroid_x_; }
+double POI::centroidY() const { return centroid_y_; }
+std::unique_ptr<geos::geom::Point> POI::createCentroidGeometry(const geos::geom::GeometryFactory* factory) const {
+  if (std::isnan(centroid_x_)) {
+    return factory->createPoint();
+  }
+  return factory->createPoint(geos::geom::CoordinateXY(centroid_x_, centroid_y_));
+}
+double POI::area() const { return area_; }
 
 void POI::setPOIId(NetIdType poi_id) { poi_id_ = poi_id; }
 
@@ -241,19 +394,53 @@ std::optional<float> Intersection::intBuffer() const { return int_buffer_; }
 
 Network::Network(OsmNetwork* osmnet, absl::flat_hash_set<HighWayLinkType> link_types,
                  absl::flat_hash_set<HighWayLinkType> connector_link_types, bool POI, float POI_sampling_ratio,
-                 const OsmParsingConfig* osm_parsing_config)
+                 const OsmParsingConfig* osm_parsing_config, std::unique_ptr<StatsRecorder> stats)
     : osmnet_(osmnet),
       link_types_(std::move(link_types)),
       connector_link_types_(std::move(connector_link_types)),
       POI_(POI),
       POI_sampling_ratio_(POI_sampling_ratio),
-      osm_parsing_config_(osm_parsing_config) {
+      osm_parsing_config_(osm_parsing_config),
+      stats_(stats != nullptr ? std::move(stats) : std::make_unique<StatsRecorder>()) {
   factory_ = geos::geom::GeometryFactory::create();
   if (osmnet_->boundary().has_value()) {
-    boundary_ = static_cast<std::unique_ptr<geos::geom::Polygon>>(osmnet_->boundary().value()->clone());  // NOLINT
+    boundary_ = osmnet_->boundary().value()->clone();  // NOLINT
   }
+  StatsStage link_stage(stats_.get(), "create nodes and links");
   createNodesAndLinksFromOsmNetwork();
-  createPOIsFromOsmNetwork();
+  link_stage.addCount("nodes", static_cast<int64_t>(node_vector_.size()));
+  link_stage.addCount("links", static_cast<int64_t>(link_vector_.size()));
+  link_stage.end();
+  if (POI_ && !isCancelled()) {
+    StatsStage poi_stage(stats_.get(), "create pois");
+    createPOIsFromOsmNetwork(RunControl::current());
+    poi_stage.addCount("pois", static_cast<int64_t>(poi_vector_.size()));
+  }
+}
+
+Network::Network(std::vector<Node*> node_vector, std::vector<Link*> link_vector, std::vector<double> link_coordinates,
+                 std::unique_ptr<const OsmParsingConfig> osm_parsing_config)
+    : osmnet_(nullptr),
+      POI_(false),
+      POI_sampling_ratio_(1.0),
+      osm_parsing_config_(osm_parsing_config.get()),
+      owned_osm_parsing_config_(std::move(osm_parsing_config)),
+      stats_(std::make_unique<StatsRecorder>()),
+      node_vector_(std::move(node_vector)),
+      link_vector_(std::move(link_vector)),
+      link_coordinates_(std::move(link_coordinates)) {
+  factory_ = geos::geom::GeometryFactory::create();
+  for (Link* link : link_vector_) {
+    link->fromNode()->addOutgoingLink(link);
+    link->toNode()->addIncomingLink(link);
+    max_link_id_ = std::max(max_link_id_, link->linkId() + 1);
+  }
+  for (const Node* node : node_vector_) {
+    max_node_id_ = std::max(max_node_id_, node->nodeId() + 1);
+    if (node->intersectionId().has_value()) {
+      max_intersection_id_ = std::max(max_intersection_id_, node->intersectionId().value() + 1);  // NOLINT
+    }
+  }
 }
 
 Network::~Network() {
@@ -290,35 +477,41 @@ size_t Network::numberOfLinks() const { return link_vector_.size(); }
 const std::vector<Node*>& Network::nodeVector() const { return node_vector_; }
 const std::vector<Link*>& Network::linkVector() const { return link_vector_; }
 const std::vector<POI*>& Network::poiVector() const { return poi_vector_; }
+StatsRecorder* Network::stats() const { return stats_.get(); }
+
+void Network::setStats(std::unique_ptr<StatsRecorder> stats) {
+  if (osmnet_ == nullptr && stats != nullptr) {
+    stats_ = std::move(stats);
+  }
+}
 
 void Network::generateNodeActivityInfo(const std::vector<Zone*>& zone_vector) {
-  // ========== Acitvity_info ========== //
-  std::map<HighWayLinkType, int> count_map;
-  for (Node* node : node_vector_) {
-    for (int idx = 0; idx <= static_cast<int>(HighWayLinkType::OTHER); ++idx) {
-      count_map[static_cast<HighWayLinkType>(idx)] = 0;
-    }
+  const auto time1 = std::chrono::high_resolution_clock::now();
+
+  // ========== Acitvity_info and Boundary ========== //
+  StatsStage activity_stage(stats_.get(), "activity type and boundary");
+  activity_stage.addCount("nodes", static_cast<int64_t>(node_vector_.size()));
+  const auto number_of_nodes = static_cast<int64_t>(node_vector_.size());
+#pragma omp parallel for schedule(dynamic, 1024) default(none) shared(number_of_nodes)
+  for (int64_t idx = 0; idx < number_of_nodes; ++idx) {
+    Node* node = node_vector_[idx];
+    std::array<int32_t, NUMBER_OF_HIGHWAY_LINK_TYPES> link_type_counts{};
     for (Link* link : node->outgoingLinkVector()) {
       if (link->wayType() == WayType::HIGHWAY) {
-        ++count_map.at(link->highwayLinkType());  // ToDo: check way_type
+        ++link_type_counts[static_cast<size_t>(link->highwayLinkType())];  // ToDo: check way_type
       }
     }
     for (Link* link : node->incomingLinkVector()) {
       if (link->wayType() == WayType::HIGHWAY) {
-        ++count_map.at(link->highwayLinkType());  // ToDo: check way_type
+        ++link_type_counts[static_cast<size_t>(link->highwayLinkType())];  // ToDo: check way_type
       }
     }
-
-    auto max_element = std::max_element(count_map.begin(), count_map.end(), [](const auto& pair1, const auto& pair2) {
-      return pair1.second < pair2.second;
-    });
-    if (max_element->second > 0) {
-      node->setActivityType(max_element->first);
+    // ties go to the link type that comes first in HighWayLinkType
+    auto max_element = std::max_element(link_type_counts.begin(), link_type_counts.end());
+    if (*max_element > 0) {
+      node->setActivityType(static_cast<HighWayLinkType>(std::distance(link_type_counts.begin(), max_element)));
     }
-  }
 
-  // ========== Boundary ========== //
-  for (Node* node : node_vector_) {
     if (node->outgoingLinkVector().empty() && !node->incomingLinkVector().empty()) {
       node->setBoundary(-1);
     } else if (node->incomingLinkVector().empty() && !node->outgoingLinkVector().empty()) {
@@ -330,54 +523,187 @@ void Network::generateNodeActivityInfo(const std::vector<Zone*>& zone_vector) {
       node->setBoundary(0);
     }
   }
+  activity_stage.end();
+  const auto time2 = std::chrono::high_resolution_clock::now();
 
   // ========== Zone_id ========== //
-  absl::flat_hash_map<geos::geom::Geometry*, NetIdType> point_zone_dict;
-  absl::flat_hash_map<geos::geom::Geometry*, NetIdType> polygon_zone_dict;
+  StatsStage zone_stage(stats_.get(), "zone id");
+  zone_stage.addCount("zones", static_cast<int64_t>(zone_vector.size()));
+  generateNodeZoneInfo(zone_vector);
+  zone_stage.end();
+  const auto time3 = std::chrono::high_resolution_clock::now();
+
+  LOG(INFO) << "Node activity info generated. activity type and boundary "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time2 - time1) * MICROSECONDS_TO_SECOND).count()
+            << " seconds, zone id "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time3 - time2) * MICROSECONDS_TO_SECOND).count()
+            << " seconds";
+}
+
+void Network::generateNodeZoneInfo(const std::vector<Zone*>& zone_vector) {
+  const auto number_of_nodes = static_cast<int64_t>(node_vector_.size());
+  if (zone_vector.empty()) {
+#pragma omp parallel for schedule(static) default(none) shared(number_of_nodes)
+    for (int64_t idx = 0; idx < number_of_nodes; ++idx) {
+      Node* node = node_vector_[idx];
+      if (node->boundary() != 0) {
+        node->setZoneId(node->nodeId());
+      }
+    }
+    return;
+  }
+
+  // polygon zones are indexed by their position in zone_vector so that a node covered by several polygons is always
+  // assigned to the first one in the zone file
+  std::vector<const Zone*> polygon_zone_vector;
+  std::vector<std::unique_ptr<geos::geom::prep::PreparedGeometry>> prepared_polygon_vector;
+  geos::index::strtree::TemplateSTRtree<size_t> polygon_zone_tree;
+  geos::index::strtree::STRtree point_zone_tree;
+  absl::flat_hash_map<const geos::geom::Geometry*, NetIdType> point_zone_dict;
   for (const Zone* zone : zone_vector) {
-    if (zone->geometry()->getGeometryTypeId() == geos::geom::GEOS_POINT) {
-      point_zone_dict[zone->geometry().get()] = zone->zoneId();
-    } else if (zone->geometry()->getGeometryTypeId() == geos::geom::GEOS_POLYGON ||
-               zone->geometry()->getGeometryTypeId() == geos::geom::GEOS_MULTIPOLYGON) {
-      polygon_zone_dict[zone->geometry().get()] = zone->zoneId();
+    geos::geom::Geometry* zone_geometry = zone->geometry().get();
+    if (zone_geometry->getGeometryTypeId() == geos::geom::GEOS_POINT) {
+      point_zone_tree.insert(zone_geometry->getEnvelopeInternal(), zone_geometry);
+      point_zone_dict[zone_geometry] = zone->zoneId();
+    } else if (zone_geometry->getGeometryTypeId() == geos::geom::GEOS_POLYGON ||
+               zone_geometry->getGeometryTypeId() == geos::geom::GEOS_MULTIPOLYGON) {
+      polygon_zone_tree.insert(*zone_geometry->getEnvelopeInternal(), polygon_zone_vector.size());
+      polygon_zone_vector.push_back(zone);
+      prepared_polygon_vector.push_back(geos::geom::prep::PreparedGeometryFactory::prepare(zone_geometry));
     } else {
       LOG(WARNING) << "unsupported geometry type";
     }
   }
+  // indexes and prepared geometries are built lazily by GEOS. build them here before they are shared by threads
+  polygon_zone_tree.build();
+  if (!point_zone_dict.empty()) {
+    point_zone_tree.build();
+  }
+  for (const auto& prepared_polygon : prepared_polygon_vector) {
+    const geos::geom::Envelope* envelope = prepared_polygon->getGeometry().getEnvelopeInternal();
+    const std::unique_ptr<geos::geom::Point> probe_point = factory_->createPoint(geos::geom::CoordinateXY(
+        (envelope->getMinX() + envelope->getMaxX()) / 2.0, (envelope->getMinY() + envelope->getMaxY()) / 2.0));
+    prepared_polygon->covers(probe_point.get());
+  }
 
-  for (Node* node : node_vector_) {
+#pragma omp parallel for schedule(dynamic, 1024) default(none) \
+    shared(number_of_nodes, polygon_zone_vector, prepared_polygon_vector, polygon_zone_tree, point_zone_tree, \
+               point_zone_dict)
+  for (int64_t idx = 0; idx < number_of_nodes; ++idx) {
+    Node* node = node_vector_[idx];
     if (node->boundary() == 0) {
       continue;
     }
-    if (zone_vector.empty()) {
-      node->setZoneId(node->nodeId());
+    const std::unique_ptr<geos::geom::Point> node_geometry = node->createGeometry(factory_.get());
+    std::optional<size_t> polygon_zone_idx;
+    polygon_zone_tree.query(*node_geometry->getEnvelopeInternal(), [&](size_t zone_idx) {
+      if ((!polygon_zone_idx.has_value() || zone_idx < polygon_zone_idx.value()) &&  // NOLINT
+          prepared_polygon_vector[zone_idx]->covers(node_geometry.get())) {
+        polygon_zone_idx = zone_idx;
+      }
+    });
+    if (polygon_zone_idx.has_value()) {
+      node->setZoneId(polygon_zone_vector[polygon_zone_idx.value()]->zoneId());  // NOLINT
+      continue;
+    }
+    if (point_zone_dict.empty()) {
       continue;
     }
-    bool polygon_zone_found = false;
-    for (const auto& [polygon_geometry, zone_id] : polygon_zone_dict) {
-      if (polygon_geometry->covers(node->geometry().get())) {
-        polygon_zone_found = true;
-        node->setZoneId(zone_id);
-        break;
+    geos::index::strtree::GeometryItemDistance item_distance;
+    const auto* nearest_zone_geometry = static_cast<const geos::geom::Geometry*>(
+        point_zone_tree.nearestNeighbour(node_geometry->getEnvelopeInternal(), node_geometry.get(), &item_distance));
+    auto iter = point_zone_dict.find(nearest_zone_geometry);
+    if (iter != point_zone_dict.end()) {
+      node->setZoneId(iter->second);
+    }
+  }
+}
+
+void Network::generateNodePOIInfo() {
+  if (poi_vector_.empty()) {
+    return;
+  }
+  const auto number_of_nodes = static_cast<int64_t>(node_vector_.size());
+  const auto number_of_pois = static_cast<int64_t>(poi_vector_.size());
+  std::vector<std::unique_ptr<geos::geom::Point>> node_geometry_vector(number_of_nodes);
+#pragma omp parallel for schedule(static) default(none) shared(number_of_nodes, node_geometry_vector)
+  for (int64_t idx = 0; idx < number_of_nodes; ++idx) {
+    node_geometry_vector[idx] = node_vector_[idx]->createGeometry(factory_.get());
+  }
+  geos::index::strtree::STRtree node_tree;
+  absl::flat_hash_map<const geos::geom::Geometry*, size_t> node_idx_dict;
+  node_idx_dict.reserve(number_of_nodes);
+  for (int64_t idx = 0; idx < number_of_nodes; ++idx) {
+    geos::geom::Point* node_geometry = node_geometry_vector[idx].get();
+    node_tree.insert(node_geometry->getEnvelopeInternal(), node_geometry);
+    node_idx_dict[node_geometry] = idx;
+  }
+  if (number_of_nodes > 0) {
+    node_tree.build();
+  }
+
+  // for each poi, the nodes inside it, or else the node nearest to its centroid
+  std::vector<std::vector<size_t>> covered_node_idx_vector(number_of_pois);
+  std::vector<std::optional<size_t>> nearest_node_idx_vector(number_of_pois);
+  const RunControl* control = RunControl::current();
+#pragma omp parallel for schedule(dynamic, 256) default(none) \
+    shared(number_of_nodes, number_of_pois, node_tree, node_idx_dict, covered_node_idx_vector, \
+               nearest_node_idx_vector, control)
+  for (int64_t idx = 0; idx < number_of_pois; ++idx) {
+    if (number_of_nodes == 0 || isCancelled(control)) {
+      continue;
+    }
+    const POI* poi = poi_vector_[idx];
+    const geos::geom::Geometry* poi_geometry = poi->geometry().get();
+    std::vector<void*> candidate_node_geometries;
+    node_tree.query(poi_geometry->getEnvelopeInternal(), candidate_node_geometries);
+    std::vector<size_t>& covered_node_idx = covered_node_idx_vector[idx];
+    if (!candidate_node_geometries.empty()) {
+      const std::unique_ptr<geos::geom::prep::PreparedGeometry> prepared_poi_geometry =
+          geos::geom::prep::PreparedGeometryFactory::prepare(poi_geometry);
+      for (void* candidate : candidate_node_geometries) {
+        const auto* node_geometry = static_cast<const geos::geom::Geometry*>(candidate);
+        if (prepared_poi_geometry->covers(node_geometry)) {
+          covered_node_idx.push_back(node_idx_dict.at(node_geometry));
+        }
       }
     }
-    if (polygon_zone_found) {
+    if (!covered_node_idx.empty() || std::isnan(poi->centroidX())) {
       continue;
     }
-    double min_distance = std::numeric_limits<double>::max();
-    std::optional<NetIdType> nearest_zone_id;
-    for (const auto& [point_geometry, zone_id] : point_zone_dict) {
-      const double distance = point_geometry->distance(node->geometry().get());
-      if (distance < min_distance) {
-        min_distance = distance;
-        nearest_zone_id = zone_id;
+    const std::unique_ptr<geos::geom::Point> centroid = poi->createCentroidGeometry(factory_.get());
+    geos::index::strtree::GeometryItemDistance item_distance;
+    const auto* nearest_node_geometry = static_cast<const geos::geom::Geometry*>(
+        node_tree.nearestNeighbour(centroid->getEnvelopeInternal(), centroid.get(), &item_distance));
+    auto iter = node_idx_dict.find(nearest_node_geometry);
+    if (iter != node_idx_dict.end()) {
+      nearest_node_idx_vector[idx] = iter->second;
+    }
+  }
+
+  if (isCancelled(control)) {
+    return;
+  }
+  // pois are visited in the order of their ids, so that the first poi matching a node is kept
+  for (Node* node : node_vector_) {
+    node->setPOIId(std::nullopt);
+  }
+  for (int64_t idx = 0; idx < number_of_pois; ++idx) {
+    for (const size_t node_idx : covered_node_idx_vector[idx]) {
+      Node* node = node_vector_[node_idx];
+      if (!node->poiId().has_value()) {
+        node->setPOIId(poi_vector_[idx]->poiId());
       }
     }
-    if (nearest_zone_id.has_value()) {
-      node->setZoneId(nearest_zone_id.value());
+  }
+  for (int64_t idx = 0; idx < number_of_pois; ++idx) {
+    if (nearest_node_idx_vector[idx].has_value()) {
+      Node* node = node_vector_[nearest_node_idx_vector[idx].value()];  // NOLINT
+      if (!node->poiId().has_value()) {
+        node->setPOIId(poi_vector_[idx]->poiId());
+      }
     }
   }
-  LOG(INFO) << "Node activity info generated";
 }
 
 void Network::fillLinkAttributesWithDefaultValues(
@@ -415,50 +741,50 @@ void Network::fillLinkAttributesWithDefaultValues(
 
 void Network::consolidateComplexIntersections(bool auto_identify, const std::vector<Intersection*>& intersection_vector,
                                               float int_buffer) {
+  const auto time1 = std::chrono::high_resolution_clock::now();
   if (!intersection_vector.empty()) {
+    StatsStage designate_stage(stats_.get(), "designate from file");
+    designate_stage.addCount("intersections", static_cast<int64_t>(intersection_vector.size()));
     designateComplexIntersectionsFromIntFile(intersection_vector, int_buffer);
   }
+  const auto time2 = std::chrono::high_resolution_clock::now();
   if (auto_identify) {
+    const StatsStage identify_stage(stats_.get(), "auto identify");
     identifyComplexIntersections(int_buffer);
   }
+  const auto time3 = std::chrono::high_resolution_clock::now();
+
+  StatsStage merge_stage(stats_.get(), "merge");
 
   absl::flat_hash_map<NetIdType, std::vector<Node*>> node_group_dict;
   for (Node* node : node_vector_) {
     if (!node->intersectionId().has_value()) {
       continue;
     }
-    auto iter = node_group_dict.find(node->intersectionId().value());  // NOLINT
-    if (iter != node_group_dict.end()) {
-      iter->second.push_back(node);
-    } else {
-      node_group_dict[node->intersectionId().value()] = {node};  // NOLINT
-    }
+    node_group_dict[node->intersectionId().value()].push_back(node);  // NOLINT
   }
 
+  // nodes and links inside a complex intersection are flagged invalid and removed from node_vector_ and link_vector_
+  // in one pass at the end. a node belongs to the group being consolidated iff it carries its intersection id
   size_t number_of_intersections_consolidated = 0;
-  absl::flat_hash_set<Node*> nodes_to_remove;
-  absl::flat_hash_set<Link*> links_to_remove;
   for (auto& [intersection_id, node_group] : node_group_dict) {
     if (node_group.size() < 2) {
       continue;
     }
-    Node* new_node = new Node(max_node_id_++, node_group, intersection_id, factory_.get());
+    Node* new_node = new Node(max_node_id_++, node_group, intersection_id);
     for (Node* node : node_group) {
-      nodes_to_remove.insert(node);
-      // node->setIsValid(false);
+      node->setIsValid(false);
       for (Link* link : node->incomingLinkVector()) {
-        if (std::find(node_group.begin(), node_group.end(), link->fromNode()) != node_group.end()) {
-          links_to_remove.insert(link);
-          // link->setIsValid(false);
+        if (link->fromNode()->intersectionId() == intersection_id) {
+          link->setIsValid(false);
         } else {
           link->setToNode(new_node);
           new_node->addIncomingLink(link);
         }
       }
       for (Link* link : node->outgoingLinkVector()) {
-        if (std::find(node_group.begin(), node_group.end(), link->toNode()) != node_group.end()) {
-          links_to_remove.insert(link);
-          // link->setIsValid(false);
+        if (link->toNode()->intersectionId() == intersection_id) {
+          link->setIsValid(false);
         } else {
           link->setFromNode(new_node);
           new_node->addOutgoingLink(link);
@@ -468,118 +794,399 @@ void Network::consolidateComplexIntersections(bool auto_identify, const std::vec
     node_vector_.push_back(new_node);
     ++number_of_intersections_consolidated;
   }
-  LOG(INFO) << number_of_intersections_consolidated << " intersections consolidated";
+  merge_stage.addCount("intersections", static_cast<int64_t>(number_of_intersections_consolidated));
+  merge_stage.end();
+  const auto time4 = std::chrono::high_resolution_clock::now();
 
-  for (Node* node : nodes_to_remove) {
-    delete node;
+  StatsStage compact_stage(stats_.get(), "compact");
+
+  size_t number_of_valid_nodes = 0;
+  for (Node* node : node_vector_) {
+    if (node->isValid()) {
+      node_vector_[number_of_valid_nodes++] = node;
+    } else {
+      delete node;
+    }
   }
-  for (Link* link : links_to_remove) {
+  node_vector_.resize(number_of_valid_nodes);
+  size_t number_of_valid_links = 0;
+  for (Link* link : link_vector_) {
+    if (link->isValid()) {
+      link_vector_[number_of_valid_links++] = link;
+    } else {
+      delete link;
+    }
+  }
+  link_vector_.resize(number_of_valid_links);
+  compact_stage.addCount("nodes", static_cast<int64_t>(node_vector_.size()));
+  compact_stage.addCount("links", static_cast<int64_t>(link_vector_.size()));
+  compact_stage.end();
+  const auto time5 = std::chrono::high_resolution_clock::now();
+
+  LOG(INFO) << number_of_intersections_consolidated << " intersections consolidated. designate from file "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time2 - time1) * MICROSECONDS_TO_SECOND).count()
+            << " seconds, auto identify "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time3 - time2) * MICROSECONDS_TO_SECOND).count()
+            << " seconds, merge "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time4 - time3) * MICROSECONDS_TO_SECOND).count()
+            << " seconds, compact "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time5 - time4) * MICROSECONDS_TO_SECOND).count()
+            << " seconds";
+}
+
+// links are created from highway ways with a target link type and connector ways, and from all railway and aeroway
+// ways
+bool isLinkWay(const OsmWay* osm_way) {
+  if (osm_way->wayType() == WayType::HIGHWAY) {
+    return osm_way->isTargetLinkType() || osm_way->isTargetConnector();
+  }
+  return osm_way->wayType() == WayType::RAILWAY || osm_way->wayType() == WayType::AEROWAY;
+}
+
+bool Network::applyOsmChange(const std::filesystem::path& osc_filepath) {
+  if (osmnet_ == nullptr) {
+    LOG(ERROR) << "osm change files can only be applied to networks built from osm files";
+    return false;
+  }
+  if (std::any_of(node_vector_.begin(), node_vector_.end(),
+                  [](const Node* node) { return node->osmNodes().size() > 1; })) {
+    LOG(ERROR) << "osm change files cannot be applied to networks with consolidated intersections";
+    return false;
+  }
+  const std::optional<OsmChange> osm_change = osmnet_->applyChange(osc_filepath);
+  if (!osm_change.has_value()) {
+    return false;
+  }
+  StatsStage update_stage(stats_.get(), "update network");
+  const auto time1 = std::chrono::high_resolution_clock::now();
+  const absl::flat_hash_set<OsmIdType>& updated_osm_way_ids = osm_change->updated_osm_way_ids;
+
+  size_t number_of_kept_links = 0;
+  for (Link* link : link_vector_) {
+    if (updated_osm_way_ids.find(link->osmWayId()) == updated_osm_way_ids.end()) {
+      link_vector_[number_of_kept_links++] = link;
+      continue;
+    }
+    link->fromNode()->removeOutgoingLink(link);
+    link->toNode()->removeIncomingLink(link);
     delete link;
   }
-  node_vector_.erase(
-      remove_if(node_vector_.begin(), node_vector_.end(),
-                [nodes_to_remove](Node* node) { return nodes_to_remove.find(node) != nodes_to_remove.end(); }),
-      node_vector_.end());
-  link_vector_.erase(
-      remove_if(link_vector_.begin(), link_vector_.end(),
-                [links_to_remove](Link* link) { return links_to_remove.find(link) != links_to_remove.end(); }),
-      link_vector_.end());
+  const size_t number_of_removed_links = link_vector_.size() - number_of_kept_links;
+  link_vector_.resize(number_of_kept_links);
+
+  absl::flat_hash_map<const OsmNode*, Node*> osm_node_dict;
+  osm_node_dict.reserve(node_vector_.size());
+  for (Node* node : node_vector_) {
+    if (!node->osmNodes().empty()) {
+      osm_node_dict.emplace(node->osmNodes().at(0), node);
+    }
+  }
+  for (const OsmNode* osm_node : osm_change->updated_osm_nodes) {
+    auto iter = osm_node_dict.find(osm_node);
+    if (iter != osm_node_dict.end()) {
+      iter->second->updateFromOsmNode();
+    }
+  }
+
+  // ways are sorted by osm way id, so new links are ordered like the links of a full build
+  std::vector<Link*> new_link_vector;
+  std::vector<double> new_link_coordinates;
+  for (const OsmWay* osm_way : osmnet_->osmWayVector()) {
+    if (updated_osm_way_ids.find(osm_way->osmWayId()) != updated_osm_way_ids.end() && isLinkWay(osm_way)) {
+      createLinksFromWay(osm_way, new_link_vector, new_link_coordinates);
+    }
+  }
+  size_t coordinate_offset = 0;
+  for (Link* link : new_link_vector) {
+    link->setCoordinates(new_link_coordinates.data() + coordinate_offset, link->numberOfCoordinates());
+    coordinate_offset += 2 * link->numberOfCoordinates();
+    link->setLinkId(max_link_id_++);
+    for (const bool from_endpoint : {true, false}) {
+      const OsmNode* osm_node = from_endpoint ? link->fromOsmNode() : link->toOsmNode();
+      Node*& node = osm_node_dict[osm_node];
+      if (node == nullptr) {
+        node = new Node(osm_node);
+        node->setNodeId(max_node_id_++);
+        node_vector_.push_back(node);
+      }
+      if (from_endpoint) {
+        link->setFromNode(node);
+        node->addOutgoingLink(link);
+      } else {
+        link->setToNode(node);
+        node->addIncomingLink(link);
+      }
+    }
+  }
+
+  // nodes only used by removed links are removed
+  size_t number_of_kept_nodes = 0;
+  for (Node* node : node_vector_) {
+    if (!node->incomingLinkVector().empty() || !node->outgoingLinkVector().empty()) {
+      node_vector_[number_of_kept_nodes++] = node;
+    } else {
+      delete node;
+    }
+  }
+  const size_t number_of_removed_nodes = node_vector_.size() - number_of_kept_nodes;
+  node_vector_.resize(number_of_kept_nodes);
+
+  std::vector<Link*> link_vector;
+  link_vector.reserve(link_vector_.size() + new_link_vector.size());
+  std::merge(link_vector_.begin(), link_vector_.end(), new_link_vector.begin(), new_link_vector.end(),
+             std::back_inserter(link_vector),
+             [](const Link* link_a, const Link* link_b) { return link_a->osmWayId() < link_b->osmWayId(); });
+  link_vector_ = std::move(link_vector);
+
+  // coordinates are copied to a new buffer in link order, as in a full build
+  size_t number_of_coordinates = 0;
+  for (const Link* link : link_vector_) {
+    number_of_coordinates += 2 * link->numberOfCoordinates();
+  }
+  std::vector<double> link_coordinates(number_of_coordinates);
+  double* coordinates = link_coordinates.data();
+  for (Link* link : link_vector_) {
+    std::copy(link->coordinates(), link->coordinates() + 2 * link->numberOfCoordinates(), coordinates);
+    link->setCoordinates(coordinates, link->numberOfCoordinates());
+    coordinates += 2 * link->numberOfCoordinates();
+  }
+  link_coordinates_ = std::move(link_coordinates);
+
+  if (POI_ && osm_change->pois_changed) {
+    for (const POI* poi : poi_vector_) {
+      delete poi;
+    }
+    poi_vector_.clear();
+    // the network is already updated, so POIs are created even if the call is cancelled meanwhile
+    createPOIsFromOsmNetwork(nullptr);
+  }
+
+  update_stage.addCount("removed_links", static_cast<int64_t>(number_of_removed_links));
+  update_stage.addCount("removed_nodes", static_cast<int64_t>(number_of_removed_nodes));
+  update_stage.addCount("created_links", static_cast<int64_t>(new_link_vector.size()));
+  update_stage.end();
+  const auto time2 = std::chrono::high_resolution_clock::now();
+  LOG(INFO) << number_of_removed_links << " links and " << number_of_removed_nodes << " nodes removed, "
+            << new_link_vector.size() << " links created. update network "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time2 - time1) * MICROSECONDS_TO_SECOND).count()
+            << " seconds";
+  return true;
 }
 
 void Network::createNodesAndLinksFromOsmNetwork() {
-  const size_t num_threads = omp_get_max_threads();
-  std::vector<std::vector<Link*>> m_link_vector{num_threads};
-
   const std::vector<OsmWay*>& osm_way_vector = osmnet_->osmWayVector();
   const size_t number_of_osm_ways = osm_way_vector.size();
-#pragma omp parallel for schedule(dynamic) default(none) shared(osm_way_vector, number_of_osm_ways, m_link_vector)
+  std::vector<std::vector<Link*>> way_link_vectors(number_of_osm_ways);
+  std::vector<std::vector<double>> way_link_coordinates(number_of_osm_ways);
+  const RunControl* control = RunControl::current();
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(osm_way_vector, number_of_osm_ways, way_link_vectors, way_link_coordinates, control)
   for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
     OsmWay* osm_way = osm_way_vector[idx];
-    if (osm_way->wayType() == WayType::HIGHWAY) {
-      if (osm_way->isTargetLinkType() || osm_way->isTargetConnector()) {
-        createLinksFromWay(osm_way, m_link_vector);
-      }
-    } else if (osm_way->wayType() == WayType::RAILWAY || osm_way->wayType() == WayType::AEROWAY) {
-      createLinksFromWay(osm_way, m_link_vector);
+    if (!isCancelled(control) && isLinkWay(osm_way)) {
+      createLinksFromWay(osm_way, way_link_vectors[idx], way_link_coordinates[idx]);
     }
   }
-  const size_t total_links =
-      std::accumulate(m_link_vector.begin(), m_link_vector.end(), 0,
-                      [](size_t sum, const std::vector<Link*>& vec) { return sum + vec.size(); });
-  link_vector_.reserve(total_links);
-  for (auto& links : m_link_vector) {
-    link_vector_.insert(link_vector_.end(), std::make_move_iterator(links.begin()),
-                        std::make_move_iterator(links.end()));
-    links.clear();
-  }
 
-  // We need sort here to ensure a fixed link sequence in the link_vector_
-  std::sort(link_vector_.begin(), link_vector_.end(), [](const Link* link_a, const Link* link_b) {
-    if (link_a->osmWayId() != link_b->osmWayId()) {
-      return link_a->osmWayId() < link_b->osmWayId();
+  // links are ordered by osm way id and osm way seq, so that link and node ids do not depend on the number of threads
+  std::vector<size_t> way_order(number_of_osm_ways);
+  std::iota(way_order.begin(), way_order.end(), 0);
+  auto osm_way_id_less = [&osm_way_vector](size_t way_idx_a, size_t way_idx_b) {
+    return osm_way_vector[way_idx_a]->osmWayId() < osm_way_vector[way_idx_b]->osmWayId();
+  };
+  if (!std::is_sorted(way_order.begin(), way_order.end(), osm_way_id_less)) {
+    std::stable_sort(way_order.begin(), way_order.end(), osm_way_id_less);
+  }
+  std::vector<size_t> way_link_offsets(number_of_osm_ways + 1, 0);
+  std::vector<size_t> way_coordinate_offsets(number_of_osm_ways + 1, 0);
+  for (size_t idx = 0; idx < number_of_osm_ways; ++idx) {
+    way_link_offsets[idx + 1] = way_link_offsets[idx] + way_link_vectors[way_order[idx]].size();
+    way_coordinate_offsets[idx + 1] = way_coordinate_offsets[idx] + way_link_coordinates[way_order[idx]].size();
+  }
+  link_vector_.resize(way_link_offsets.back());
+  link_coordinates_.resize(way_coordinate_offsets.back());
+#pragma omp parallel for schedule(dynamic, 1024) default(none) \
+    shared(number_of_osm_ways, way_link_vectors, way_link_coordinates, way_order, way_link_offsets, \
+               way_coordinate_offsets)
+  for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
+    const std::vector<Link*>& way_links = way_link_vectors[way_order[idx]];
+    std::copy(way_links.begin(), way_links.end(), link_vector_.begin() + static_cast<int64_t>(way_link_offsets[idx]));
+    // the coordinates of the links of a way are stored one link after another, in the order of the links
+    std::vector<double>& way_coordinates = way_link_coordinates[way_order[idx]];
+    double* coordinates = link_coordinates_.data() + way_coordinate_offsets[idx];
+    std::copy(way_coordinates.begin(), way_coordinates.end(), coordinates);
+    for (Link* link : way_links) {
+      link->setCoordinates(coordinates, link->numberOfCoordinates());
+      coordinates += 2 * link->numberOfCoordinates();
     }
-    return link_a->osmWaySeq() < link_b->osmWaySeq();
-  });
+    std::vector<double>().swap(way_coordinates);
+  }
 
-  absl::flat_hash_map<OsmNode*, Node*> osm_node_to_node_dict;
-  for (Link* link : link_vector_) {
-    Node* from_node = nullptr;
-    auto iter_from = osm_node_to_node_dict.find(link->fromOsmNode());
-    if (iter_from == osm_node_to_node_dict.end()) {
-      from_node = new Node(link->fromOsmNode(), factory_.get());
-      node_vector_.push_back(from_node);
-      osm_node_to_node_dict[link->fromOsmNode()] = from_node;
-    } else {
-      from_node = iter_from->second;
+  createNodesFromLinkEndpoints();
+
+  const size_t number_of_links = link_vector_.size();
+#pragma omp parallel for schedule(static) default(none) shared(number_of_links)
+  for (int64_t idx = 0; idx < number_of_links; ++idx) {
+    link_vector_[idx]->setLinkId(max_link_id_ + idx);
+  }
+  max_link_id_ += static_cast<NetIdType>(number_of_links);
+}
+
+void Network::createNodesFromLinkEndpoints() {
+  // endpoint 2 * link_idx is the from node of link link_idx and endpoint 2 * link_idx + 1 its to node. a node is
+  // created for each distinct osm node and nodes are numbered in the order of their first endpoint, as if endpoints
+  // were visited one by one
+  const OsmNode* osm_node_data = osmnet_->osmNodeVector().data();
+  const size_t number_of_osm_nodes = osmnet_->osmNodeVector().size();
+  const size_t number_of_endpoints = 2 * link_vector_.size();
+  std::vector<size_t> endpoint_osm_node_indices(number_of_endpoints);
+#pragma omp parallel for schedule(static) default(none) \
+    shared(osm_node_data, number_of_endpoints, endpoint_osm_node_indices)
+  for (int64_t idx = 0; idx < number_of_endpoints; ++idx) {
+    const Link* link = link_vector_[idx / 2];
+    endpoint_osm_node_indices[idx] = (idx % 2 == 0 ? link->fromOsmNode() : link->toOsmNode()) - osm_node_data;
+  }
+
+  // osm nodes are partitioned into ranges of indices. each partition groups the endpoints of its osm nodes, so that
+  // every node is created and connected to its links by a single thread. endpoints are bucketed by partition in one
+  // pass: endpoints are split into chunks, and the counts of endpoints of each chunk in each partition give the
+  // position of the chunk in the partition
+  const size_t number_of_partitions = omp_get_max_threads();
+  const size_t number_of_chunks = number_of_partitions;
+  std::vector<size_t> chunk_partition_offsets(number_of_chunks * number_of_partitions, 0);
+#pragma omp parallel for schedule(static, 1) default(none) \
+    shared(number_of_osm_nodes, number_of_endpoints, endpoint_osm_node_indices, number_of_partitions, \
+               number_of_chunks, chunk_partition_offsets)
+  for (int64_t chunk = 0; chunk < number_of_chunks; ++chunk) {
+    size_t* partition_counts = chunk_partition_offsets.data() + chunk * number_of_partitions;
+    for (size_t endpoint = chunk * number_of_endpoints / number_of_chunks;
+         endpoint < (chunk + 1) * number_of_endpoints / number_of_chunks; ++endpoint) {
+      ++partition_counts[endpoint_osm_node_indices[endpoint] * number_of_partitions / number_of_osm_nodes];
+    }
+  }
+  std::vector<std::vector<std::pair<size_t, size_t>>> partition_endpoints(number_of_partitions);
+  for (size_t partition = 0; partition < number_of_partitions; ++partition) {
+    size_t partition_size = 0;
+    for (size_t chunk = 0; chunk < number_of_chunks; ++chunk) {
+      const size_t chunk_count = chunk_partition_offsets[chunk * number_of_partitions + partition];
+      chunk_partition_offsets[chunk * number_of_partitions + partition] = partition_size;
+      partition_size += chunk_count;
+    }
+    partition_endpoints[partition].resize(partition_size);
+  }
+#pragma omp parallel for schedule(static, 1) default(none) \
+    shared(number_of_osm_nodes, number_of_endpoints, endpoint_osm_node_indices, number_of_partitions, \
+               number_of_chunks, chunk_partition_offsets, partition_endpoints)
+  for (int64_t chunk = 0; chunk < number_of_chunks; ++chunk) {
+    size_t* partition_offsets = chunk_partition_offsets.data() + chunk * number_of_partitions;
+    for (size_t endpoint = chunk * number_of_endpoints / number_of_chunks;
+         endpoint < (chunk + 1) * number_of_endpoints / number_of_chunks; ++endpoint) {
+      const size_t osm_node_idx = endpoint_osm_node_indices[endpoint];
+      const size_t partition = osm_node_idx * number_of_partitions / number_of_osm_nodes;
+      partition_endpoints[partition][partition_offsets[partition]++] = {osm_node_idx, endpoint};
     }
-    link->setFromNode(from_node);
-    from_node->addOutgoingLink(link);
+  }
 
-    Node* to_node = nullptr;
-    auto iter_to = osm_node_to_node_dict.find(link->toOsmNode());
-    if (iter_to == osm_node_to_node_dict.end()) {
-      to_node = new Node(link->toOsmNode(), factory_.get());
-      node_vector_.push_back(to_node);
-      osm_node_to_node_dict[link->toOsmNode()] = to_node;
-    } else {
-      to_node = iter_to->second;
+  std::vector<uint8_t> is_first_endpoint(number_of_endpoints, 0);
+#pragma omp parallel for schedule(dynamic, 1) default(none) \
+    shared(number_of_partitions, partition_endpoints, is_first_endpoint)
+  for (int64_t partition = 0; partition < number_of_partitions; ++partition) {
+    std::vector<std::pair<size_t, size_t>>& endpoints = partition_endpoints[partition];
+    std::sort(endpoints.begin(), endpoints.end());
+    for (size_t idx = 0; idx < endpoints.size(); ++idx) {
+      if (idx == 0 || endpoints[idx].first != endpoints[idx - 1].first) {
+        is_first_endpoint[endpoints[idx].second] = 1;
+      }
     }
-    link->setToNode(to_node);
-    to_node->addIncomingLink(link);
   }
 
-  for (Node* node : node_vector_) {
-    node->setNodeId(max_node_id_++);
+  std::vector<size_t> endpoint_node_indices(number_of_endpoints, 0);
+  size_t number_of_nodes = 0;
+  for (size_t endpoint = 0; endpoint < number_of_endpoints; ++endpoint) {
+    if (is_first_endpoint[endpoint] != 0) {
+      endpoint_node_indices[endpoint] = number_of_nodes++;
+    }
   }
-  for (Link* link : link_vector_) {
-    link->setLinkId(max_link_id_++);
+  node_vector_.resize(number_of_nodes, nullptr);
+
+  // endpoints of a node are sorted, so links are added to the adjacency vectors of the node in link order
+#pragma omp parallel for schedule(static, 1) default(none) \
+    shared(osm_node_data, number_of_partitions, partition_endpoints, endpoint_node_indices)
+  for (int64_t partition = 0; partition < number_of_partitions; ++partition) {
+    Node* node = nullptr;
+    const std::vector<std::pair<size_t, size_t>>& endpoints = partition_endpoints[partition];
+    for (size_t idx = 0; idx < endpoints.size(); ++idx) {
+      const auto [osm_node_idx, endpoint] = endpoints[idx];
+      if (idx == 0 || osm_node_idx != endpoints[idx - 1].first) {
+        const size_t node_idx = endpoint_node_indices[endpoint];
+        node = new Node(osm_node_data + osm_node_idx);
+        node->setNodeId(max_node_id_ + static_cast<NetIdType>(node_idx));
+        node_vector_[node_idx] = node;
+      }
+      Link* link = link_vector_[endpoint / 2];
+      if (endpoint % 2 == 0) {
+        link->setFromNode(node);
+        node->addOutgoingLink(link);
+      } else {
+        link->setToNode(node);
+        node->addIncomingLink(link);
+      }
+    }
   }
+  max_node_id_ += static_cast<NetIdType>(number_of_nodes);
 }
 
-void Network::createLinksFromWay(const OsmWay* osm_way, std::vector<std::vector<Link*>>& m_link_vector) {
-  for (const std::vector<OsmNode*>& segment_nodes : osm_way->segmentNodesVector()) {
-    if (segment_nodes.size() < 2) {
-      continue;
-    }
-    assert(osm_way->isOneway().has_value());
-    size_t osm_way_seq = 0;
-    Link* link = new Link(osm_way, segment_nodes, true, osm_way_seq++, factory_.get());
-    m_link_vector[omp_get_thread_num()].push_back(link);
-    if (!osm_way->isOneway().value()) {  // NOLINT
-      link = new Link(osm_way, segment_nodes, false, osm_way_seq++, factory_.get());
-      m_link_vector[omp_get_thread_num()].push_back(link);
+void Network::createLinksFromWay(const OsmWay* osm_way, std::vector<Link*>& way_link_vector,
+                                 std::vector<double>& way_link_coordinates) {
+  // links are created in the order of osm way seq: the forward links of all segments, then the backward links. the
+  // coordinates of each link are appended to way_link_coordinates and bound to the link once they are moved to
+  // link_coordinates_
+  for (const bool forward_direction : {true, false}) {
+    const size_t osm_way_seq = forward_direction ? 0 : 1;
+    for (const std::vector<OsmNode*>& segment_nodes : osm_way->segmentNodesVector()) {
+      if (segment_nodes.size() < 2) {
+        continue;
+      }
+      assert(osm_way->isOneway().has_value());
+      if (!forward_direction && osm_way->isOneway().value()) {  // NOLINT
+        continue;
+      }
+      if (forward_direction) {
+        for (const OsmNode* osm_node : segment_nodes) {
+          way_link_coordinates.push_back(osm_node->getX());
+          way_link_coordinates.push_back(osm_node->getY());
+        }
+      } else {
+        for (auto rit = segment_nodes.rbegin(); rit != segment_nodes.rend(); ++rit) {
+          way_link_coordinates.push_back((*rit)->getX());
+          way_link_coordinates.push_back((*rit)->getY());
+        }
+      }
+      way_link_vector.push_back(new Link(osm_way, segment_nodes, forward_direction, osm_way_seq));
     }
   }
 }
 
-void Network::createPOIsFromOsmNetwork() {
+void Network::createPOIsFromOsmNetwork(const RunControl* control) {
   if (!POI_) {
     return;
   }
+  std::unique_ptr<geos::geom::prep::PreparedGeometry> prepared_boundary;
+  if (boundary_.has_value()) {
+    const geos::geom::Geometry* boundary = boundary_.value().get();  // NOLINT
+    prepared_boundary = geos::geom::prep::PreparedGeometryFactory::prepare(boundary);
+    // the point locator and segment index of a prepared geometry are built lazily by GEOS. build them here before the
+    // prepared boundary is shared by threads. the corners of a rectangle around the boundary are outside of it, so the
+    // test does not stop before the segment index is used
+    geos::geom::Envelope probe_envelope(*boundary->getEnvelopeInternal());
+    probe_envelope.expandBy(1.0, 1.0);
+    prepared_boundary->intersects(factory_->toGeometry(&probe_envelope).get());
+  }
+
   const size_t num_threads = omp_get_max_threads();
   std::vector<std::vector<POI*>> m_poi_vector{num_threads};
-  createPOIsFromOsmWays(m_poi_vector);
-  createPOIsFromOsmRelations(m_poi_vector);
+  createPOIsFromOsmWays(prepared_boundary.get(), m_poi_vector, control);
+  createPOIsFromOsmRelations(prepared_boundary.get(), m_poi_vector, control);
 
   const size_t total_pois = std::accumulate(m_poi_vector.begin(), m_poi_vector.end(), 0,
                                             [](size_t sum, const std::vector<POI*>& vec) { return sum + vec.size(); });
@@ -595,16 +1202,18 @@ void Network::createPOIsFromOsmNetwork() {
   }
 }
 
-void Network::createPOIsFromOsmWays(std::vector<std::vector<POI*>>& m_poi_vector) {
+void Network::createPOIsFromOsmWays(const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                                    std::vector<std::vector<POI*>>& m_poi_vector, const RunControl* control) {
   const std::vector<OsmWay*>& osm_way_vector = osmnet_->osmWayVector();
   const size_t number_of_osm_ways = osm_way_vector.size();
   const int freq = std::max(static_cast<int>(std::round(1.0 / POI_sampling_ratio_)), 1);
-#pragma omp parallel for schedule(dynamic) default(none) shared(osm_way_vector, number_of_osm_ways, freq, m_poi_vector)
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(osm_way_vector, number_of_osm_ways, freq, prepared_boundary, m_poi_vector, control)
   for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
-    if (idx % freq != 0) {
+    if (idx % freq != 0 || isCancelled(control)) {
       continue;
     }
-    createPOIsFromOneOsmWay(osm_way_vector[idx], m_poi_vector);
+    createPOIsFromOneOsmWay(osm_way_vector[idx], prepared_boundary, m_poi_vector);
   }
 }
 
@@ -614,6 +1223,7 @@ std::unique_ptr<geos::geom::Polygon> getPolygonFromOsmNodes(const std::vector<Os
   if (osm_nodes.size() < 3) {
     return nullptr;
   }
+  coord_seq.reserve(osm_nodes.size() + 1);
   for (const OsmNode* osm_node : osm_nodes) {
     // coord_seq.add(*(osm_node->geometry()->getCoordinate()));
     coord_seq.add(osm_node->getX(), osm_node->getY());
@@ -625,127 +1235,201 @@ std::unique_ptr<geos::geom::Polygon> getPolygonFromOsmNodes(const std::vector<Os
   return factory->createPolygon(std::move(coord_seq));
 }
 
-void Network::createPOIsFromOneOsmWay(const OsmWay* osm_way, std::vector<std::vector<POI*>>& m_poi_vector) {
+// A ring of a multipolygon being joined from member ways. The ring refers to the node vectors of its ways, and nodes
+// are only copied into a coordinate sequence once, when the polygon is created. Joining a way at the start of the ring
+// reverses the ring, as if the nodes were copied in reverse order.
+class OsmWayRing {
+ public:
+  [[nodiscard]] bool empty() const { return parts_.empty(); }
+
+  void assign(const std::vector<OsmNode*>& osm_nodes) {
+    parts_.clear();
+    parts_.push_back({&osm_nodes, false});
+    reversed_ = false;
+    number_of_nodes_ = osm_nodes.size();
+  }
+  void clear() {
+    parts_.clear();
+    reversed_ = false;
+    number_of_nodes_ = 0;
+  }
+
+  // joins osm_nodes to the ring if they share an end node with it. false if they do not
+  bool join(const std::vector<OsmNode*>& osm_nodes) {
+    if (back() == osm_nodes.front()) {
+      append(osm_nodes, false);
+    } else if (back() == osm_nodes.back()) {
+      append(osm_nodes, true);
+    } else if (front() == osm_nodes.front()) {
+      reversed_ = !reversed_;
+      append(osm_nodes, false);
+    } else if (front() == osm_nodes.back()) {
+      reversed_ = !reversed_;
+      append(osm_nodes, true);
+    } else {
+      return false;
+    }
+    return true;
+  }
+
+  [[nodiscard]] bool isClosed() const { return front()->osmNodeId() == back()->osmNodeId(); }
+
+  // same as getPolygonFromOsmNodes on the nodes of the ring
+  [[nodiscard]] std::unique_ptr<geos::geom::Polygon> createPolygon(const geos::geom::GeometryFactory* factory) const {
+    if (number_of_nodes_ < 3) {
+      return nullptr;
+    }
+    geos::geom::CoordinateSequence coord_seq;
+    coord_seq.reserve(number_of_nodes_ + 1);
+    auto add_part = [&coord_seq](const Part& part, bool reversed) {
+      if (part.reversed != reversed) {
+        for (auto iter = part.osm_nodes->rbegin(); iter != part.osm_nodes->rend(); ++iter) {
+          coord_seq.add((*iter)->getX(), (*iter)->getY());
+        }
+      } else {
+        for (const OsmNode* osm_node : *part.osm_nodes) {
+          coord_seq.add(osm_node->getX(), osm_node->getY());
+        }
+      }
+    };
+    if (reversed_) {
+      for (auto iter = parts_.rbegin(); iter != parts_.rend(); ++iter) {
+        add_part(*iter, true);
+      }
+    } else {
+      for (const Part& part : parts_) {
+        add_part(part, false);
+      }
+    }
+    if (!isClosed()) {
+      coord_seq.add(front()->getX(), front()->getY());
+    }
+    return factory->createPolygon(std::move(coord_seq));
+  }
+
+ private:
+  struct Part {
+    const std::vector<OsmNode*>* osm_nodes;
+    bool reversed;
+  };
+
+  [[nodiscard]] const OsmNode* front() const {
+    const Part& part = reversed_ ? parts_.back() : parts_.front();
+    return part.reversed != reversed_ ? part.osm_nodes->back() : part.osm_nodes->front();
+  }
+  [[nodiscard]] const OsmNode* back() const {
+    const Part& part = reversed_ ? parts_.front() : parts_.back();
+    return part.reversed != reversed_ ? part.osm_nodes->front() : part.osm_nodes->back();
+  }
+  // adds osm_nodes at the end of the ring as it is read, taking the reversal of the ring into account
+  void append(const std::vector<OsmNode*>& osm_nodes, bool reversed) {
+    if (reversed_) {
+      parts_.push_front({&osm_nodes, !reversed});
+    } else {
+      parts_.push_back({&osm_nodes, reversed});
+    }
+    number_of_nodes_ += osm_nodes.size();
+  }
+
+  std::deque<Part> parts_;
+  // whether the ring is read from the last part to the first one, each part in the opposite direction
+  bool reversed_{false};
+  size_t number_of_nodes_{0};
+};
+
+bool isOutsideBoundary(const geos::geom::Geometry* geometry,
+                       const geos::geom::prep::PreparedGeometry* prepared_boundary) {
+  return prepared_boundary != nullptr && !prepared_boundary->intersects(geometry);
+}
+
+void Network::createPOIsFromOneOsmWay(const OsmWay* osm_way,
+                                      const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                                      std::vector<std::vector<POI*>>& m_poi_vector) {
   if (osm_way->wayType() != WayType::POI || osm_way->refNodeVector().size() < 3) {
     return;
   }
   std::unique_ptr<geos::geom::Polygon> geometry = getPolygonFromOsmNodes(osm_way->refNodeVector(), factory_.get());
-  if (geometry == nullptr) {
-    return;
-  }
-  if (boundary_.has_value() && geometry->disjoint(boundary_.value().get())) {  // NOLINT
+  if (geometry == nullptr || isOutsideBoundary(geometry.get(), prepared_boundary)) {
     return;
   }
   m_poi_vector[omp_get_thread_num()].push_back(new POI(osm_way, std::move(geometry)));
 }
 
-void Network::createPOIsFromOsmRelations(std::vector<std::vector<POI*>>& m_poi_vector) {
+void Network::createPOIsFromOsmRelations(const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                                         std::vector<std::vector<POI*>>& m_poi_vector, const RunControl* control) {
   const std::vector<OsmRelation*>& osm_relation_vector = osmnet_->osmRelationVector();
   const size_t number_of_osm_relations = osm_relation_vector.size();
   const int freq = std::max(static_cast<int>(std::round(1.0 / POI_sampling_ratio_)), 1);
 #pragma omp parallel for schedule(dynamic) default(none) \
-    shared(osm_relation_vector, number_of_osm_relations, freq, m_poi_vector)
+    shared(osm_relation_vector, number_of_osm_relations, freq, prepared_boundary, m_poi_vector, control)
   for (int64_t idx = 0; idx < number_of_osm_relations; ++idx) {
-    if (idx % freq != 0) {
+    if (idx % freq != 0 || isCancelled(control)) {
       continue;
     }
-    createPOIsFromOneOsmRelation(osm_relation_vector[idx], m_poi_vector);
+    createPOIsFromOneOsmRelation(osm_relation_vector[idx], prepared_boundary, m_poi_vector);
   }
 }
 
 void Network::createPOIsFromOneOsmRelation(const OsmRelation* osm_relation,
+                                           const geos::geom::prep::PreparedGeometry* prepared_boundary,
                                            std::vector<std::vector<POI*>>& m_poi_vector) {
   const size_t number_of_way_members = osm_relation->memberWayVector().size();
   if (number_of_way_members < 1) {
     return;
   }
 
-  std::vector<OsmNode*> partial_node_sequence;
+  // outer ways are joined into rings in the order of the members. a way that does not share an end node with the
+  // open ring closes it as it is
+  OsmWayRing ring;
   std::vector<std::unique_ptr<geos::geom::Polygon>> polygon_vector;
+  auto add_polygon = [&polygon_vector](std::unique_ptr<geos::geom::Polygon> geometry) {
+    if (geometry != nullptr) {
+      polygon_vector.push_back(std::move(geometry));
+    }
+  };
   for (size_t idx = 0; idx < number_of_way_members; ++idx) {
     if (osm_relation->memberWayRoleVector().at(idx) != "outer") {
       continue;
     }
-    const OsmWay* member = osm_relation->memberWayVector().at(idx);
-    if (member->refNodeVector().size() < 2) {
+    const std::vector<OsmNode*>& member_nodes = osm_relation->memberWayVector().at(idx)->refNodeVector();
+    if (member_nodes.size() < 2) {
       continue;
     }
-    if (partial_node_sequence.empty()) {
-      if (member->refNodeVector().at(0)->osmNodeId() == member->refNodeVector().back()->osmNodeId()) {
-        std::unique_ptr<geos::geom::Polygon> geometry = getPolygonFromOsmNodes(member->refNodeVector(), factory_.get());
-        if (geometry != nullptr) {
-          polygon_vector.push_back(std::move(geometry));
-        }
+    const bool member_closed = member_nodes.front()->osmNodeId() == member_nodes.back()->osmNodeId();
+    if (ring.empty()) {
+      if (member_closed) {
+        add_polygon(getPolygonFromOsmNodes(member_nodes, factory_.get()));
       } else {
-        partial_node_sequence.insert(partial_node_sequence.end(), member->refNodeVector().begin(),
-                                     member->refNodeVector().end());
+        ring.assign(member_nodes);
       }
-    } else {
-      std::vector<OsmNode*> m_node_sequence;
-      m_node_sequence.reserve(partial_node_sequence.size() + member->refNodeVector().size());
-      if (partial_node_sequence.back() == member->refNodeVector().at(0)) {
-        m_node_sequence.insert(m_node_sequence.end(), partial_node_sequence.begin(), partial_node_sequence.end());
-        m_node_sequence.insert(m_node_sequence.end(), member->refNodeVector().begin(), member->refNodeVector().end());
-      } else if (partial_node_sequence.back() == member->refNodeVector().back()) {
-        m_node_sequence.insert(m_node_sequence.end(), partial_node_sequence.begin(), partial_node_sequence.end());
-        m_node_sequence.insert(m_node_sequence.end(), member->refNodeVector().rbegin(), member->refNodeVector().rend());
-      } else if (partial_node_sequence.at(0) == member->refNodeVector().at(0)) {
-        m_node_sequence.insert(m_node_sequence.end(), partial_node_sequence.rbegin(), partial_node_sequence.rend());
-        m_node_sequence.insert(m_node_sequence.end(), member->refNodeVector().begin(), member->refNodeVector().end());
-      } else if (partial_node_sequence.at(0) == member->refNodeVector().back()) {
-        m_node_sequence.insert(m_node_sequence.end(), partial_node_sequence.rbegin(), partial_node_sequence.rend());
-        m_node_sequence.insert(m_node_sequence.end(), member->refNodeVector().rbegin(), member->refNodeVector().rend());
+    } else if (ring.join(member_nodes)) {
+      if (ring.isClosed()) {
+        add_polygon(ring.createPolygon(factory_.get()));
+        ring.clear();
       }
-      if (m_node_sequence.empty()) {
-        std::unique_ptr<geos::geom::Polygon> geometry = getPolygonFromOsmNodes(partial_node_sequence, factory_.get());
-        if (geometry != nullptr) {
-          polygon_vector.push_back(std::move(geometry));
-        }
-        if (member->refNodeVector().at(0)->osmNodeId() == member->refNodeVector().back()->osmNodeId()) {
-          geometry = getPolygonFromOsmNodes(member->refNodeVector(), factory_.get());
-          if (geometry != nullptr) {
-            polygon_vector.push_back(std::move(geometry));
-          }
-          partial_node_sequence.clear();
-        } else {
-          partial_node_sequence.assign(member->refNodeVector().begin(), member->refNodeVector().end());
-        }
+    } else {
+      add_polygon(ring.createPolygon(factory_.get()));
+      if (member_closed) {
+        add_polygon(getPolygonFromOsmNodes(member_nodes, factory_.get()));
+        ring.clear();
       } else {
-        if (m_node_sequence.at(0)->osmNodeId() == m_node_sequence.back()->osmNodeId()) {
-          std::unique_ptr<geos::geom::Polygon> geometry = getPolygonFromOsmNodes(m_node_sequence, factory_.get());
-          if (geometry != nullptr) {
-            polygon_vector.push_back(std::move(geometry));
-          }
-          partial_node_sequence.clear();
-        } else {
-          partial_node_sequence.assign(m_node_sequence.begin(), m_node_sequence.end());
-        }
+        ring.assign(member_nodes);
       }
     }
   }
-
-  if (!partial_node_sequence.empty()) {
-    std::unique_ptr<geos::geom::Polygon> geometry = getPolygonFromOsmNodes(partial_node_sequence, factory_.get());
-    if (geometry != nullptr) {
-      polygon_vector.push_back(std::move(geometry));
-    }
+  if (!ring.empty()) {
+    add_polygon(ring.createPolygon(factory_.get()));
   }
 
   if (polygon_vector.empty()) {
     return;
   }
-  if (boundary_.has_value()) {
-    const geos::geom::Polygon* boundary = boundary_.value().get();  // NOLINT
-    bool disjoint = true;
-    for (const auto& polygon : polygon_vector) {
-      if (!polygon->disjoint(boundary)) {
-        disjoint = false;
-        break;
-      }
-    }
-    if (disjoint) {
-      return;
-    }
+  if (prepared_boundary != nullptr &&
+      std::all_of(polygon_vector.begin(), polygon_vector.end(),
+                  [prepared_boundary](const std::unique_ptr<geos::geom::Polygon>& polygon) {
+                    return isOutsideBoundary(polygon.get(), prepared_boundary);
+                  })) {
+    return;
   }
   std::unique_ptr<geos::geom::MultiPolygon> poi_geometry = factory_->createMultiPolygon(std::move(polygon_vector));
   m_poi_vector[omp_get_thread_num()].push_back(new POI(osm_relation, std::move(poi_geometry)));
@@ -753,14 +1437,45 @@ void Network::createPOIsFromOneOsmRelation(const OsmRelation* osm_relation,
 
 void Network::designateComplexIntersectionsFromIntFile(const std::vector<Intersection*>& intersection_vector,
                                                        float int_buffer) {
-  for (const Intersection* intersection : intersection_vector) {
+  // a node within the buffer of several intersections is assigned to the first one in the intersection file. nodes
+  // are indexed by coordinates, each intersection only checks the geodesic distance of nodes inside a bounding box
+  // that is guaranteed to contain its buffer.
+  const auto number_of_nodes = static_cast<int64_t>(node_vector_.size());
+  const auto number_of_intersections = static_cast<int64_t>(intersection_vector.size());
+  geos::index::strtree::TemplateSTRtree<size_t> node_tree;
+  for (int64_t idx = 0; idx < number_of_nodes; ++idx) {
+    if (!node_vector_[idx]->intersectionId().has_value()) {
+      const Node* node = node_vector_[idx];
+      node_tree.insert(geos::geom::Envelope(node->x(), node->x(), node->y(), node->y()), static_cast<size_t>(idx));
+    }
+  }
+  node_tree.build();
+
+  std::vector<std::vector<size_t>> matched_node_idx_vector(number_of_intersections);
+#pragma omp parallel for schedule(dynamic) default(none) \
+    shared(number_of_intersections, intersection_vector, int_buffer, node_tree, matched_node_idx_vector)
+  for (int64_t idx = 0; idx < number_of_intersections; ++idx) {
+    const Intersection* intersection = intersection_vector[idx];
     const float buffer_ = intersection->intBuffer().has_value() ? intersection->intBuffer().value() : int_buffer;
-    const NetIdType& intersection_id = intersection->intersectionId();
-    for (Node* node : node_vector_) {
-      if (node->intersectionId().has_value()) {
-        continue;
+    const geos::geom::Point* intersection_geometry = intersection->geometry().get();
+    std::vector<size_t>& matched_node_idx = matched_node_idx_vector[idx];
+    auto check_node = [&](size_t node_idx) {
+      const Node* node = node_vector_[node_idx];
+      if (calculateDistanceBetweenTwoPoints(intersection_geometry->getX(), intersection_geometry->getY(), node->x(),
+                                            node->y()) <= buffer_) {
+        matched_node_idx.push_back(node_idx);
       }
-      if (calculateDistanceBetweenTwoPoints(intersection->geometry().get(), node->geometry().get()) <= buffer_) {
+    };
+    for (const geos::geom::Envelope& envelope : getGeodesicBufferEnvelopes(intersection_geometry, buffer_)) {
+      node_tree.query(envelope, check_node);
+    }
+  }
+
+  for (int64_t idx = 0; idx < number_of_intersections; ++idx) {
+    const NetIdType& intersection_id = intersection_vector[idx]->intersectionId();
+    for (const size_t node_idx : matched_node_idx_vector[idx]) {
+      Node* node = node_vector_[node_idx];
+      if (!node->intersectionId().has_value()) {
         node->setIntersectionId(intersection_id);
       }
     }
@@ -771,8 +1486,19 @@ void Network::designateComplexIntersectionsFromIntFile(const std::vector<Interse
 }
 
 void Network::identifyComplexIntersections(float int_buffer) {
-  std::vector<absl::flat_hash_set<Node*>> group_vector;
-  for (Link* link : link_vector_) {
+  // short links connecting two signalized nodes are the edges of a graph. each connected component of the graph is a
+  // complex intersection. components are found with a disjoint-set forest with path halving and union by size.
+  absl::flat_hash_map<Node*, size_t> node_index_dict;
+  std::vector<Node*> candidate_node_vector;
+  std::vector<std::pair<size_t, size_t>> candidate_link_vector;
+  auto get_node_index = [&node_index_dict, &candidate_node_vector](Node* node) {
+    auto [iter, inserted] = node_index_dict.try_emplace(node, candidate_node_vector.size());
+    if (inserted) {
+      candidate_node_vector.push_back(node);
+    }
+    return iter->second;
+  };
+  for (const Link* link : link_vector_) {
     if (link->length() > int_buffer) {
       continue;
     }
@@ -782,40 +1508,44 @@ void Network::identifyComplexIntersections(float int_buffer) {
     if (!(link->fromNode()->isSignalized() && link->toNode()->isSignalized())) {
       continue;
     }
-    group_vector.push_back({link->fromNode(), link->toNode()});
+    candidate_link_vector.emplace_back(get_node_index(link->fromNode()), get_node_index(link->toNode()));
   }
-  bool updated = false;
-  while (true) {
-    updated = false;
-    for (size_t idx1 = 0; idx1 < group_vector.size(); ++idx1) {
-      absl::flat_hash_set<Node*>& group1 = group_vector[idx1];
-      if (group1.empty()) {
-        continue;
-      }
-      for (size_t idx2 = idx1 + 1; idx2 < group_vector.size(); ++idx2) {
-        absl::flat_hash_set<Node*>& group2 = group_vector[idx2];
-        if (group2.empty()) {
-          continue;
-        }
-        if (std::find_first_of(group1.begin(), group1.end(), group2.begin(), group2.end()) != group1.end()) {
-          group1.merge(group2);
-          group2.clear();
-          updated = true;
-        }
-      }
+
+  const size_t number_of_candidate_nodes = candidate_node_vector.size();
+  std::vector<size_t> parent_vector(number_of_candidate_nodes);
+  std::iota(parent_vector.begin(), parent_vector.end(), 0);
+  std::vector<size_t> size_vector(number_of_candidate_nodes, 1);
+  auto find_root = [&parent_vector](size_t node_idx) {
+    while (parent_vector[node_idx] != node_idx) {
+      parent_vector[node_idx] = parent_vector[parent_vector[node_idx]];
+      node_idx = parent_vector[node_idx];
+    }
+    return node_idx;
+  };
+  for (const auto& [from_node_idx, to_node_idx] : candidate_link_vector) {
+    size_t from_root = find_root(from_node_idx);
+    size_t to_root = find_root(to_node_idx);
+    if (from_root == to_root) {
+      continue;
     }
-    if (!updated) {
-      break;
+    if (size_vector[from_root] < size_vector[to_root]) {
+      std::swap(from_root, to_root);
     }
+    parent_vector[to_root] = from_root;
+    size_vector[from_root] += size_vector[to_root];
   }
 
-  for (const absl::flat_hash_set<Node*>& group : group_vector) {
-    if (group.empty()) {
-      continue;
-    }
-    for (Node* node : group) {
-      node->setIntersectionId(max_intersection_id_);
+  // intersection ids are assigned in the order of the first candidate link of each group, which is the order the
+  // previous pairwise group merging produced
+  constexpr NetIdType unassigned_intersection_id = -1;
+  std::vector<NetIdType> root_intersection_id_vector(number_of_candidate_nodes, unassigned_intersection_id);
+  for (const auto& candidate_link : candidate_link_vector) {
+    const size_t root = find_root(candidate_link.first);
+    if (root_intersection_id_vector[root] == unassigned_intersection_id) {
+      root_intersection_id_vector[root] = max_intersection_id_++;
     }
-    ++max_intersection_id_;
   }
-}
\ No newline at end of file
+  for (size_t node_idx = 0; node_idx < number_of_candidate_nodes; ++node_idx) {
+    candidate_node_vector[node_idx]->setIntersectionId(root_intersection_id_vector[find_root(node_idx)]);
+  }
+}
@@ -12,9 +12,11 @@
 #include <geos/geom/MultiPolygon.h>
 #include <geos/geom/Point.h>
 #include <geos/geom/Polygon.h>
+#include <geos/geom/prep/PreparedGeometry.h>
 
 #include <cstddef>
 #include <cstdint>
+#include <filesystem>
 #include <memory>
 #include <optional>
 #include <string>
@@ -23,56 +25,70 @@
 #include "config.h"
 #include "osmconfig.h"
 #include "osmnetwork.h"
+#include "stats.h"
 
 using NetIdType = int64_t;
 
 class Node;
 class Link;
+class RunControl;
 
 class Node {
  public:
-  explicit Node(const OsmNode* osm_node, const geos::geom::GeometryFactory* factory);
-  explicit Node(NetIdType node_id, const std::vector<Node*>& nodes, NetIdType intersection_id,
-                const geos::geom::GeometryFactory* factory);
+  explicit Node(const OsmNode* osm_node);
+  explicit Node(NetIdType node_id, std::string osm_node_id, std::string name, bool is_signalized, double x, double y,
+                std::vector<std::string> osm_attributes);
+  explicit Node(NetIdType node_id, const std::vector<Node*>& nodes, NetIdType intersection_id);
 
   void setNodeId(NetIdType node_id);
   void setZoneId(NetIdType zone_id);
+  void setPOIId(std::optional<NetIdType> poi_id);
   void setBoundary(int16_t boundary);
   void setActivityType(HighWayLinkType activity_type);
   void setIntersectionId(NetIdType intersection_id);
-  // void setIsValid(bool is_valid);
+  void setIsValid(bool is_valid);
   void addIncomingLink(Link* link);
   void addOutgoingLink(Link* link);
+  void removeIncomingLink(const Link* link);
+  void removeOutgoingLink(const Link* link);
+  // reads the name, signal, location and attributes of the osm node again after it is changed
+  void updateFromOsmNode();
 
   [[nodiscard]] NetIdType nodeId() const;
   [[nodiscard]] const std::vector<const OsmNode*>& osmNodes() const;
   [[nodiscard]] std::string osmNodeId() const;
   [[nodiscard]] const std::string& name() const;
   [[nodiscard]] bool isSignalized() const;
-  [[nodiscard]] const std::unique_ptr<geos::geom::Point>& geometry() const;
+  [[nodiscard]] double x() const;
+  [[nodiscard]] double y() const;
+  [[nodiscard]] std::unique_ptr<geos::geom::Point> createGeometry(const geos::geom::GeometryFactory* factory) const;
   [[nodiscard]] const std::vector<std::string>& osmAttributes() const;
   [[nodiscard]] std::optional<NetIdType> zoneId() const;
+  [[nodiscard]] std::optional<NetIdType> poiId() const;
   [[nodiscard]] std::optional<int16_t> boundary() const;
   [[nodiscard]] std::optional<HighWayLinkType> activityType() const;
   [[nodiscard]] std::optional<NetIdType> intersectionId() const;
-  // [[nodiscard]] bool isValid() const;
+  [[nodiscard]] bool isValid() const;
   [[nodiscard]] const std::vector<Link*>& incomingLinkVector() const;
   [[nodiscard]] const std::vector<Link*>& outgoingLinkVector() const;
 
  private:
   NetIdType node_id_{-1};
   std::vector<const OsmNode*> osm_nodes_;
+  std::string osm_node_id_;
   std::string name_;
   bool is_signalized_{false};
-  std::unique_ptr<geos::geom::Point> geometry_;
+  double x_{0.0};
+  double y_{0.0};
   std::vector<std::string> osm_attributes_;
 
   std::optional<NetIdType> zone_id_;
+  std::optional<NetIdType> poi_id_;
   // boundary: 0 - not a boundary node; -1 - incoming only; 1 - outgoing only; 2 - both incoming and outgoing
   std::optional<int16_t> boundary_;
   std::optional<HighWayLinkType> activity_type_;
   std::optional<NetIdType> intersection_id_;
-  // bool is_valid_{true};
+  bool is_valid_{true};
   //  unsigned long osm_node_id{};
   //  std::string osm_highway{};
   //  std::string ctrl_type{};
@@ -87,8 +103,15 @@ class Node {
 class Link {
  public:
   explicit Link(Node* from_node, Node* to_node);
+  // facility_type is the highway, railway or aeroway type, depending on way_type. coordinates are kept by the caller,
+  // see setCoordinates
+  explicit Link(NetIdType link_id, OsmIdType osm_way_id, std::string name, Node* from_node, Node* to_node,
+                WayType way_type, const std::string& facility_type, const double* coordinates,
+                size_t number_of_coordinates, double length, std::vector<ModeType> allowed_mode_types,
+                std::vector<std::string> osm_attributes);
+  // the link has numberOfCoordinates() points but no coordinates until the network sets them with setCoordinates
   explicit Link(const OsmWay* osm_way, const std::vector<OsmNode*>& osm_nodes, bool forward_direction,
-                size_t osm_way_seq_, const geos::geom::GeometryFactory* factory);
+                size_t osm_way_seq_);
 
   [[nodiscard]] NetIdType linkId() const;
   [[nodiscard]] OsmIdType osmWayId() const;
@@ -102,21 +125,28 @@ class Link {
   [[nodiscard]] HighWayLinkType highwayLinkType() const;
   [[nodiscard]] const std::string& railwayLinkType() const;
   [[nodiscard]] const std::string& aerowayLinkType() const;
-  [[nodiscard]] const std::unique_ptr<geos::geom::LineString>& geometry() const;
+  // x and y of each point of the link geometry, interleaved
+  [[nodiscard]] const double* coordinates() const;
+  [[nodiscard]] size_t numberOfCoordinates() const;
+  [[nodiscard]] std::unique_ptr<geos::geom::LineString> createGeometry(
+      const geos::geom::GeometryFactory* factory) const;
   [[nodiscard]] double length() const;
   [[nodiscard]] std::optional<int32_t> lanes() const;
   [[nodiscard]] std::optional<float> freeSpeed() const;
   [[nodiscard]] std::optional<int32_t> capacity() const;
   [[nodiscard]] const std::vector<ModeType>& allowedModeTypes() const;
   [[nodiscard]] const std::vector<std::string>& osmAttributes() const;
+  [[nodiscard]] bool isValid() const;
 
   void setLinkId(NetIdType link_id);
   void setFromNode(Node* from_node);
   void setToNode(Node* to_node);
+  // coordinates are not copied. they must outlive the link
+  void setCoordinates(const double* coordinates, size_t number_of_coordinates);
   void setLanes(int32_t lanes);
   void setFreeSpeed(float free_speed);
   void setCapacity(int32_t capacity);
-  // void setIsValid(bool is_valid);
+  void setIsValid(bool is_valid);
 
  private:
   NetIdType link_id_{-1};
@@ -132,9 +162,10 @@ class Link {
   HighWayLinkType highway_link_type_{HighWayLinkType::OTHER};
   std::string railway_link_type_;
   std::string aeroway_link_type_;
-  std::unique_ptr<geos::geom::LineString> geometry_;
+  const double* coordinates_{nullptr};
+  size_t number_of_coordinates_{0};
   double length_{-1.0};
-  // bool is_valid_{true};
+  bool is_valid_{true};
   std::optional<int32_t> lanes_;
   std::optional<float> free_speed_;
   std::optional<int32_t> capacity_;
@@ -156,12 +187,18 @@ class POI {
   [[nodiscard]] const std::string& leisure() const;
   [[nodiscard]] const std::vector<std::string>& osmAttributes() const;
   [[nodiscard]] const std::unique_ptr<geos::geom::Geometry>& geometry() const;
-  [[nodiscard]] const std::unique_ptr<geos::geom::Point>& centroidGeometry() const;
+  // NaN if the geometry is empty
+  [[nodiscard]] double centroidX() const;
+  [[nodiscard]] double centroidY() const;
+  [[nodiscard]] std::unique_ptr<geos::geom::Point> createCentroidGeometry(
+      const geos::geom::GeometryFactory* factory) const;
   [[nodiscard]] double area() const;
 
   void setPOIId(NetIdType poi_id);
 
  private:
+  void calculateCentroidAndArea();
+
   NetIdType poi_id_{-1};
   std::string name_;
   std::optional<OsmIdType> osm_way_id_;
@@ -172,8 +209,10 @@ class POI {
   std::vector<std::string> osm_attributes_;
 
   std::unique_ptr<geos::geom::Geometry> geometry_;
-  std::unique_ptr<geos::geom::Point> centroid_geometry_;
-  std::unique_ptr<geos::geom::Geometry> geometry_utm_;
+  double centroid_x_{0.0};
+  double centroid_y_{0.0};
+  // square meters, in the utm zone of the first point of the geometry
+  double area_{0.0};
 };
 
 class Zone {
@@ -207,7 +246,11 @@ class Network {
  public:
   explicit Network(OsmNetwork* osmnet, absl::flat_hash_set<HighWayLinkType> link_types,
                    absl::flat_hash_set<HighWayLinkType> connector_link_types, bool POI, float POI_sampling_ratio,
-                   const OsmParsingConfig* osm_parsing_config);
+                   const OsmParsingConfig* osm_parsing_config, std::unique_ptr<StatsRecorder> stats = nullptr);
+  // builds a network from nodes and links loaded from network files. links are added to the adjacency vectors of
+  // their nodes in the order of link_vector. link_coordinates is the buffer the coordinates of the links point to
+  explicit Network(std::vector<Node*> node_vector, std::vector<Link*> link_vector, std::vector<double> link_coordinates,
+                   std::unique_ptr<const OsmParsingConfig> osm_parsing_config);
   ~Network();
   Network(const Network&) = delete;
   Network& operator=(const Network&) = delete;
@@ -221,42 +264,70 @@ class Network {
   [[nodiscard]] const std::vector<Node*>& nodeVector() const;
   [[nodiscard]] const std::vector<Link*>& linkVector() const;
   [[nodiscard]] const std::vector<POI*>& poiVector() const;
+  // stages of building and processing the network, never nullptr
+  [[nodiscard]] StatsRecorder* stats() const;
+  // replaces the recorder of a network built from network files. networks built from osm files keep their recorder,
+  // since their osm network refers to it
+  void setStats(std::unique_ptr<StatsRecorder> stats);
 
   void generateNodeActivityInfo(const std::vector<Zone*>& zone_vector = {});
+  // sets the poi id of nodes inside a poi, or else nearest to the centroid of a poi without nodes inside. a node
+  // matching several pois gets the first one, and nodes inside a poi take precedence
+  void generateNodePOIInfo();
   void fillLinkAttributesWithDefaultValues(const absl::flat_hash_map<HighWayLinkType, int32_t>& default_lanes_dict,
                                            const absl::flat_hash_map<HighWayLinkType, float>& default_speed_dict,
                                            const absl::flat_hash_map<HighWayLinkType, int32_t>& default_capacity_dict);
   void consolidateComplexIntersections(bool auto_identify, const std::vector<Intersection*>& intersection_vector,
                                        float int_buffer);
+  // Updates a network built from an osm file with an osm change file. Links of the ways affected by the change are
+  // created again and get new ids, and so do nodes first used by them. Other nodes and links keep their ids. false if
+  // the network was not built from an osm file, has consolidated intersections, or the file cannot be read
+  bool applyOsmChange(const std::filesystem::path& osc_filepath);
 
  private:
   void createNodesAndLinksFromOsmNetwork();
-  void createLinksFromWay(const OsmWay* osm_way, std::vector<std::vector<Link*>>& m_link_vector);
+  void createNodesFromLinkEndpoints();
+  void createLinksFromWay(const OsmWay* osm_way, std::vector<Link*>& way_link_vector,
+                          std::vector<double>& way_link_coordinates);
   [[nodiscard]] std::vector<OsmWay*> identifyConnectorWays() const;
-  void createPOIsFromOsmNetwork();
-  void createPOIsFromOsmWays(std::vector<std::vector<POI*>>& m_poi_vector);
-  void createPOIsFromOneOsmWay(const OsmWay* osm_way, std::vector<std::vector<POI*>>& m_poi_vector);
-  void createPOIsFromOsmRelations(std::vector<std::vector<POI*>>& m_poi_vector);
-  void createPOIsFromOneOsmRelation(const OsmRelation* osm_relation, std::vector<std::vector<POI*>>& m_poi_vector);
+  void generateNodeZoneInfo(const std::vector<Zone*>& zone_vector);
+  // POIs are not created after control is cancelled. control is nullptr for updates that must complete
+  void createPOIsFromOsmNetwork(const RunControl* control);
+  // pois outside prepared_boundary are skipped. prepared_boundary is nullptr if the network has no boundary
+  void createPOIsFromOsmWays(const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                             std::vector<std::vector<POI*>>& m_poi_vector, const RunControl* control);
+  void createPOIsFromOneOsmWay(const OsmWay* osm_way, const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                               std::vector<std::vector<POI*>>& m_poi_vector);
+  void createPOIsFromOsmRelations(const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                                  std::vector<std::vector<POI*>>& m_poi_vector, const RunControl* control);
+  void createPOIsFromOneOsmRelation(const OsmRelation* osm_relation,
+                                    const geos::geom::prep::PreparedGeometry* prepared_boundary,
+                                    std::vector<std::vector<POI*>>& m_poi_vector);
 
   void designateComplexIntersectionsFromIntFile(const std::vector<Intersection*>& intersection_vector,
                                                 float int_buffer);
   void identifyComplexIntersections(float int_buffer);
 
   OsmNetwork* osmnet_;
-  std::optional<std::unique_ptr<geos::geom::Polygon>> boundary_;
+  std::optional<std::unique_ptr<geos::geom::Geometry>> boundary_;
   geos::geom::GeometryFactory::Ptr factory_;
   absl::flat_hash_set<HighWayLinkType> link_types_;
   absl::flat_hash_set<HighWayLinkType> connector_link_types_;
   bool POI_;
   float POI_sampling_ratio_;
   const OsmParsingConfig* osm_parsing_config_;
+  // set if the network owns its parsing config, i.e., for networks loaded from network files
+  std::unique_ptr<const OsmParsingConfig> owned_osm_parsing_config_;
+  std::unique_ptr<StatsRecorder> stats_;
 
   // absl::flat_hash_map<NetIdType, Node*> node_dict_;
   // absl::flat_hash_map<NetIdType, Link*> link_dict_;
   std::vector<Node*> node_vector_;
   std::vector<Link*> link_vector_;
   std::vector<POI*> poi_vector_;
+  // x and y of the points of all link geometries, interleaved. each link points to its own range. geos geometries of
+  // nodes and links are only created when a spatial operation needs them
+  std::vector<double> link_coordinates_;
 
   NetIdType max_node_id_{1};
   NetIdType max_link_id_{1};
@@ -0,0 +1,217 @@
+#include "osmcache.h"
+
+#include <absl/log/log.h>
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <filesystem>
+#include <fstream>
+#include <ios>
+#include <optional>
+#include <random>
+#include <string>
+#include <string_view>
+#include <system_error>
+#include <tuple>
+#include <utility>
+#include <vector>
+
+constexpr std::string_view OSM_CACHE_MAGIC = "OSM2GMNS_OSM_CACHE";
+// bump when the layout of cached elements changes
+constexpr uint32_t OSM_CACHE_VERSION = 3;
+constexpr std::string_view OSM_CACHE_EXTENSION = ".osmcache";
+
+void appendBinaryString(std::string& buffer, std::string_view value) {
+  appendBinary<uint64_t>(buffer, value.size());
+  buffer.append(value);
+}
+
+void appendBinaryStringVector(std::string& buffer, const std::vector<std::string>& values) {
+  appendBinary<uint64_t>(buffer, values.size());
+  for (const std::string& value : values) {
+    appendBinaryString(buffer, value);
+  }
+}
+
+BinaryReader::BinaryReader(std::string_view data) : data_(data) {}
+
+std::string BinaryReader::readString() { return std::string(readStringView()); }
+
+std::string_view BinaryReader::readStringView() {
+  const auto size = read<uint64_t>();
+  if (failed_ || !reserve(size)) {
+    return {};
+  }
+  return data_.substr(position_ - size, size);
+}
+
+std::vector<std::string> BinaryReader::readStringVector() {
+  const auto size = read<uint64_t>();
+  // every string takes at least the bytes of its size
+  if (failed_ || size > (data_.size() - position_) / sizeof(uint64_t)) {
+    failed_ = true;
+    return {};
+  }
+  std::vector<std::string> values;
+  values.reserve(size);
+  for (uint64_t idx = 0; idx < size; ++idx) {
+    values.push_back(readString());
+  }
+  return values;
+}
+
+bool BinaryReader::failed() const { return failed_; }
+bool BinaryReader::atEnd() const { return position_ == data_.size(); }
+
+bool BinaryReader::reserve(size_t size) {
+  if (failed_ || size > data_.size() - position_) {
+    failed_ = true;
+    return false;
+  }
+  position_ += size;
+  return true;
+}
+
+OsmCache::OsmCache(std::filesystem::path cache_dir, uintmax_t size_limit)
+    : cache_dir_(std::move(cache_dir)), size_limit_(size_limit) {}
+
+std::optional<std::string> OsmCache::read(const std::filesystem::path& osm_filepath, const std::string& options) {
+  const std::optional<std::string> header = makeHeader(osm_filepath, options);
+  if (!header.has_value()) {
+    return std::nullopt;
+  }
+  const std::filesystem::path entry_path = entryPath(header.value());  // NOLINT
+  std::error_code error_code;
+  const uintmax_t entry_size = std::filesystem::file_size(entry_path, error_code);
+  if (error_code || entry_size < header->size()) {
+    return std::nullopt;
+  }
+  std::ifstream entry_file(entry_path, std::ios::binary);
+  std::string data(entry_size, '\0');
+  if (!entry_file.read(data.data(), static_cast<std::streamsize>(entry_size))) {
+    return std::nullopt;
+  }
+  // file names are hashes of the headers, compare the full header
+  if (std::string_view(data).substr(0, header->size()) != header.value()) {  // NOLINT
+    return std::nullopt;
+  }
+  std::filesystem::last_write_time(entry_path, std::filesystem::file_time_type::clock::now(), error_code);
+  data.erase(0, header->size());
+  return data;
+}
+
+void OsmCache::write(const std::filesystem::path& osm_filepath, const std::string& options, const std::string& data) {
+  const std::optional<std::string> header = makeHeader(osm_filepath, options);
+  if (!header.has_value()) {
+    return;
+  }
+  if (header->size() + data.size() > size_limit_) {
+    LOG(WARNING) << "parsed osm data exceeds the cache size limit and is not cached";
+    return;
+  }
+  std::error_code error_code;
+  std::filesystem::create_directories(cache_dir_, error_code);
+  if (error_code) {
+    LOG(WARNING) << "failed to create cache directory " << cache_dir_ << ". " << error_code.message();
+    return;
+  }
+  // write to a temporary file first so that other processes never read a partially written entry
+  const std::filesystem::path entry_path = entryPath(header.value());  // NOLINT
+  std::filesystem::path temporary_path = entry_path;
+  temporary_path += "." + std::to_string(std::random_device{}()) + ".tmp";
+  {
+    std::ofstream entry_file(temporary_path, std::ios::binary);
+    entry_file.write(header->data(), static_cast<std::streamsize>(header->size()));
+    entry_file.write(data.data(), static_cast<std::streamsize>(data.size()));
+    if (!entry_file) {
+      LOG(WARNING) << "failed to write cache entry " << temporary_path;
+      entry_file.close();
+      std::filesystem::remove(temporary_path, error_code);
+      return;
+    }
+  }
+  std::filesystem::rename(temporary_path, entry_path, error_code);
+  if (error_code) {
+    LOG(WARNING) << "failed to write cache entry " << entry_path << ". " << error_code.message();
+    std::filesystem::remove(temporary_path, error_code);
+    return;
+  }
+  evictEntries(entry_path);
+}
+
+std::optional<std::string> OsmCache::makeHeader(const std::filesystem::path& osm_filepath, const std::string& options) {
+  std::error_code error_code;
+  const std::filesystem::path canonical_path = std::filesystem::canonical(osm_filepath, error_code);
+  if (error_code) {
+    return std::nullopt;
+  }
+  const uintmax_t file_size = std::filesystem::file_size(canonical_path, error_code);
+  if (error_code) {
+    return std::nullopt;
+  }
+  const std::filesystem::file_time_type modification_time =
+      std::filesystem::last_write_time(canonical_path, error_code);
+  if (error_code) {
+    return std::nullopt;
+  }
+  std::string header(OSM_CACHE_MAGIC);
+  appendBinary<uint32_t>(header, OSM_CACHE_VERSION);
+  appendBinaryString(header, canonical_path.string());
+  appendBinary<uint64_t>(header, file_size);
+  appendBinary<int64_t>(header, modification_time.time_since_epoch().count());
+  appendBinaryString(header, options);
+  return header;
+}
+
+std::filesystem::path OsmCache::entryPath(const std::string& header) const {
+  // 64-bit FNV-1a, which unlike std::hash is the same across builds and runs
+  uint64_t hash = 14695981039346656037ULL;
+  for (const char byte : header) {
+    hash ^= static_cast<uint8_t>(byte);
+    hash *= 1099511628211ULL;
+  }
+  constexpr std::string_view hex_digits = "0123456789abcdef";
+  std::string filename(16, '0');
+  for (size_t idx = filename.size(); idx > 0; --idx) {
+    filename[idx - 1] = hex_digits[hash & 0xFU];
+    hash >>= 4U;
+  }
+  filename += OSM_CACHE_EXTENSION;
+  return cache_dir_ / filename;
+}
+
+void OsmCache::evictEntries(const std::filesystem::path& new_entry_path) {
+  std::error_code error_code;
+  // last write time, size, path
+  std::vector<std::tuple<std::filesystem::file_time_type, uintmax_t, std::filesystem::path>> entries;
+  uintmax_t total_size = 0;
+  for (const std::filesystem::directory_entry& entry : std::filesystem::directory_iterator(cache_dir_, error_code)) {
+    if (!entry.is_regular_file(error_code) || entry.path().extension() != OSM_CACHE_EXTENSION) {
+      continue;
+    }
+    const uintmax_t entry_size = entry.file_size(error_code);
+    const std::filesystem::file_time_type last_write_time = entry.last_write_time(error_code);
+    if (error_code) {
+      continue;
+    }
+    entries.emplace_back(last_write_time, entry_size, entry.path());
+    total_size += entry_size;
+  }
+  if (total_size <= size_limit_) {
+    return;
+  }
+  std::sort(entries.begin(), entries.end());
+  for (const auto& [last_write_time, entry_size, entry_path] : entries) {
+    if (total_size <= size_limit_) {
+      break;
+    }
+    if (entry_path == new_entry_path) {
+      continue;
+    }
+    if (std::filesystem::remove(entry_path, error_code)) {
+      total_size -= entry_size;
+      LOG(INFO) << "removed least recently used cache entry " << entry_path;
+    }
+  }
+}
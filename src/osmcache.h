@@ -0,0 +1,114 @@
+#ifndef OSM2GMNS_OSMCACHE_H
+#define OSM2GMNS_OSMCACHE_H
+
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <filesystem>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <vector>
+
+// An on-disk cache of parsed osm elements, so that networks can be built from the same osm file several times without
+// decoding the file again. Each entry is one file in the cache directory holding a header that identifies the osm file
+// (canonical path, size and modification time) and the parse options, followed by the elements in a flat binary layout
+// written in native byte order. Entries whose osm file changed are not found any more and age out. Reading an entry
+// marks it as recently used, and the least recently used entries are removed when the total size of the cache exceeds
+// its limit.
+
+constexpr uintmax_t DEFAULT_OSM_CACHE_SIZE_LIMIT = uintmax_t{4} * 1024 * 1024 * 1024;
+
+template <typename T>
+void appendBinary(std::string& buffer, T value) {
+  const size_t offset = buffer.size();
+  buffer.resize(offset + sizeof(T));
+  std::memcpy(buffer.data() + offset, &value, sizeof(T));
+}
+template <typename T>
+void appendBinaryVector(std::string& buffer, const std::vector<T>& values) {
+  appendBinary<uint64_t>(buffer, values.size());
+  const size_t offset = buffer.size();
+  buffer.resize(offset + values.size() * sizeof(T));
+  std::memcpy(buffer.data() + offset, values.data(), values.size() * sizeof(T));
+}
+template <typename T>
+void appendBinaryOptional(std::string& buffer, const std::optional<T>& value) {
+  appendBinary<uint8_t>(buffer, value.has_value() ? 1 : 0);
+  if (value.has_value()) {
+    appendBinary<T>(buffer, value.value());  // NOLINT
+  }
+}
+void appendBinaryString(std::string& buffer, std::string_view value);
+void appendBinaryStringVector(std::string& buffer, const std::vector<std::string>& values);
+
+// Reads values written by the append functions above. Reading past the end of the data marks the reader as failed and
+// returns default values, so callers check failed() once after reading a group of values.
+class BinaryReader {
+ public:
+  explicit BinaryReader(std::string_view data);
+
+  template <typename T>
+  [[nodiscard]] T read() {
+    T value{};
+    if (reserve(sizeof(T))) {
+      std::memcpy(&value, data_.data() + position_ - sizeof(T), sizeof(T));
+    }
+    return value;
+  }
+  template <typename T>
+  [[nodiscard]] std::vector<T> readVector() {
+    const auto size = read<uint64_t>();
+    if (failed_ || size > (data_.size() - position_) / sizeof(T)) {
+      failed_ = true;
+      return {};
+    }
+    std::vector<T> values(size);
+    std::memcpy(values.data(), data_.data() + position_, size * sizeof(T));
+    position_ += size * sizeof(T);
+    return values;
+  }
+  template <typename T>
+  [[nodiscard]] std::optional<T> readOptional() {
+    if (read<uint8_t>() == 0) {
+      return std::nullopt;
+    }
+    return read<T>();
+  }
+  [[nodiscard]] std::string readString();
+  // the view refers to the data of the reader
+  [[nodiscard]] std::string_view readStringView();
+  [[nodiscard]] std::vector<std::string> readStringVector();
+
+  [[nodiscard]] bool failed() const;
+  [[nodiscard]] bool atEnd() const;
+
+ private:
+  // advances the position by size bytes if they are available
+  bool reserve(size_t size);
+
+  std::string_view data_;
+  size_t position_{0};
+  bool failed_{false};
+};
+
+class OsmCache {
+ public:
+  explicit OsmCache(std::filesystem::path cache_dir, uintmax_t size_limit = DEFAULT_OSM_CACHE_SIZE_LIMIT);
+
+  // options describes everything other than the osm file that changes the cached elements. nullopt if there is no
+  // entry for the osm file and options
+  [[nodiscard]] std::optional<std::string> read(const std::filesystem::path& osm_filepath, const std::string& options);
+  void write(const std::filesystem::path& osm_filepath, const std::string& options, const std::string& data);
+
+ private:
+  [[nodiscard]] static std::optional<std::string> makeHeader(const std::filesystem::path& osm_filepath,
+                                                             const std::string& options);
+  [[nodiscard]] std::filesystem::path entryPath(const std::string& header) const;
+  void evictEntries(const std::filesystem::path& new_entry_path);
+
+  std::filesystem::path cache_dir_;
+  uintmax_t size_limit_;
+};
+
+#endif  // OSM2GMNS_OSMCACHE_H
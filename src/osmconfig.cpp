@@ -9,8 +9,9 @@
 
 #include <cstdint>
 #include <string>
+#include <string_view>
 
-ModeType modeStringToModeType(const std::string& mode_type_str) {
+ModeType modeStringToModeType(std::string_view mode_type_str) {
   static const absl::flat_hash_map<std::string, ModeType> mode_type_map = {{"auto", ModeType::AUTO},
                                                                            {"bike", ModeType::BIKE},
                                                                            {"walk", ModeType::WALK},
@@ -23,7 +24,7 @@ ModeType modeStringToModeType(const std::string& mode_type_str) {
   return ModeType::OTHER;
 }
 
-HighWayLinkType highwayStringToHighWayLinkType(const std::string& highway_type_str) {
+HighWayLinkType highwayStringToHighWayLinkType(std::string_view highway_type_str) {
   static const absl::flat_hash_map<std::string, HighWayLinkType> link_type_map = {
       {"motorway", HighWayLinkType::MOTORWAY},
       {"motorway_link", HighWayLinkType::MOTORWAY},
@@ -54,76 +55,76 @@ HighWayLinkType highwayStringToHighWayLinkType(const std::string& highway_type_s
   return HighWayLinkType::OTHER;
 }
 
-bool checkAllowedUsedAutoInMotor_Vehicle(const std::string& motor_vehicle) {
+bool checkAllowedUsedAutoInMotor_Vehicle(std::string_view motor_vehicle) {
   static const absl::flat_hash_set<std::string> value_set = {"yes"};
   return value_set.find(motor_vehicle) != value_set.end();
 }
-bool checkAllowedUsedAutoInMotorCar(const std::string& motorcar) {
+bool checkAllowedUsedAutoInMotorCar(std::string_view motorcar) {
   static const absl::flat_hash_set<std::string> value_set = {"yes"};
   return value_set.find(motorcar) != value_set.end();
 }
-bool checkAllowedUsedBikeInBicycle(const std::string& bicycle) {
+bool checkAllowedUsedBikeInBicycle(std::string_view bicycle) {
   static const absl::flat_hash_set<std::string> value_set = {"yes"};
   return value_set.find(bicycle) != value_set.end();
 }
-bool checkAllowedUsedWalkInFoot(const std::string& foot) {
+bool checkAllowedUsedWalkInFoot(std::string_view foot) {
   static const absl::flat_hash_set<std::string> value_set = {"yes"};
   return value_set.find(foot) != value_set.end();
 }
 
-bool checkAllowedUsedAutoExHighway(const std::string& highway) {
+bool checkAllowedUsedAutoExHighway(std::string_view highway) {
   static const absl::flat_hash_set<std::string> value_set = {"cycleway", "footway",      "pedestrian", "steps",
                                                              "track",    "corridor",     "elevator",   "escalator",
                                                              "service",  "living_street"};
   return value_set.find(highway) != value_set.end();
 }
-bool checkAllowedUsedAutoExMotor_Vehicle(const std::string& motor_vehicle) {
+bool checkAllowedUsedAutoExMotor_Vehicle(std::string_view motor_vehicle) {
   static const absl::flat_hash_set<std::string> value_set = {"no"};
   return value_set.find(motor_vehicle) != value_set.end();
 }
-bool checkAllowedUsedAutoExMotorCar(const std::string& motorcar) {
+bool checkAllowedUsedAutoExMotorCar(std::string_view motorcar) {
   static const absl::flat_hash_set<std::string> value_set = {"no"};
   return value_set.find(motorcar) != value_set.end();
 }
-bool checkAllowedUsedAutoExAccess(const std::string& access) {
+bool checkAllowedUsedAutoExAccess(std::string_view access) {
   static const absl::flat_hash_set<std::string> value_set = {"private"};
   return value_set.find(access) != value_set.end();
 }
-bool checkAllowedUsedAutoExService(const std::string& service) {
+bool checkAllowedUsedAutoExService(std::string_view service) {
   static const absl::flat_hash_set<std::string> value_set = {"parking", "parking_aisle", "driveway", "private",
                                                              "emergency_access"};
   return value_set.find(service) != value_set.end();
 }
-bool checkAllowedUsedBikeExHighway(const std::string& highway) {
+bool checkAllowedUsedBikeExHighway(std::string_view highway) {
   static const absl::flat_hash_set<std::string> value_set = {"footway",   "steps", "corridor", "elevator",
                                                              "escalator", "motor", "motorway", "motorway_link"};
   return value_set.find(highway) != value_set.end();
 }
-bool checkAllowedUsedBikeExBicycle(const std::string& bicycle) {
+bool checkAllowedUsedBikeExBicycle(std::string_view bicycle) {
   static const absl::flat_hash_set<std::string> value_set = {"no"};
   return value_set.find(bicycle) != value_set.end();
 }
-bool checkAllowedUsedBikeExService(const std::string& service) {
+bool checkAllowedUsedBikeExService(std::string_view service) {
   static const absl::flat_hash_set<std::string> value_set = {"private"};
   return value_set.find(service) != value_set.end();
 }
-bool checkAllowedUsedBikeExAccess(const std::string& access) {
+bool checkAllowedUsedBikeExAccess(std::string_view access) {
   static const absl::flat_hash_set<std::string> value_set = {"private"};
   return value_set.find(access) != value_set.end();
 }
-bool checkAllowedUsedWalkExHighway(const std::string& highway) {
+bool checkAllowedUsedWalkExHighway(std::string_view highway) {
   static const absl::flat_hash_set<std::string> value_set = {"cycleway", "motor", "motorway", "motorway_link"};
   return value_set.find(highway) != value_set.end();
 }
-bool checkAllowedUsedWalkExFoot(const std::string& foot) {
+bool checkAllowedUsedWalkExFoot(std::string_view foot) {
   static const absl::flat_hash_set<std::string> value_set = {"no"};
   return value_set.find(foot) != value_set.end();
 }
-bool checkAllowedUsedWalkExService(const std::string& service) {
+bool checkAllowedUsedWalkExService(std::string_view service) {
   static const absl::flat_hash_set<std::string> value_set = {"private"};
   return value_set.find(service) != value_set.end();
 }
-bool checkAllowedUsedWalkExAccess(const std::string& access) {
+bool checkAllowedUsedWalkExAccess(std::string_view access) {
   static const absl::flat_hash_set<std::string> value_set = {"private"};
   return value_set.find(access) != value_set.end();
 }
@@ -168,33 +169,33 @@ const absl::flat_hash_map<HighWayLinkType, int32_t>& getPresetDefaultCapacityDic
   return default_capacity_dict;
 }
 
-bool isHighwayPoiType(const std::string& highway) {
+bool isHighwayPoiType(std::string_view highway) {
   static const absl::flat_hash_set<std::string> highway_poi_set = {"bus_stop", "platform"};
   return highway_poi_set.find(highway) != highway_poi_set.end();
 }
-bool isRailwayPoiType(const std::string& railway) {
+bool isRailwayPoiType(std::string_view railway) {
   static const absl::flat_hash_set<std::string> railway_poi_set = {
       "depot", "station", "workshop", "halt", "interlocking", "junction", "spur_junction", "terminal", "platform"};
   return railway_poi_set.find(railway) != railway_poi_set.end();
 }
-bool isAerowayPoiType(const std::string& aeroway) {
+bool isAerowayPoiType(std::string_view aeroway) {
   static const absl::flat_hash_set<std::string> aeroway_poi_set = {};
   return aeroway_poi_set.find(aeroway) != aeroway_poi_set.end();
 }
 
-bool isNegligibleHighwayType(const std::string& highway) {
+bool isNegligibleHighwayType(std::string_view highway) {
   static const absl::flat_hash_set<std::string> negligible_highway_type_set = {
       "path",  "construction", "proposed", "raceway",   "bridleway", "rest_area",  "su",
       "road",  "abandoned",    "planned",  "trailhead", "stairs",    "dismantled", "disused",
       "razed", "access",       "corridor", "stop",      "elevator",  "escape",     "busway"};
   return negligible_highway_type_set.find(highway) != negligible_highway_type_set.end();
 }
-bool isNegligibleRailwayType(const std::string& railway) {
+bool isNegligibleRailwayType(std::string_view railway) {
   static const absl::flat_hash_set<std::string> negligible_railway_type_set = {
       "construction", "abandoned", "disused", "proposed", "planned", "dismantled", "razed", "ventilation_shaft"};
   return negligible_railway_type_set.find(railway) != negligible_railway_type_set.end();
 }
-bool isNegligibleAerowayType(const std::string& aeroway) {
+bool isNegligibleAerowayType(std::string_view aeroway) {
   static const absl::flat_hash_set<std::string> negligible_aeroway_type_set = {};
   return negligible_aeroway_type_set.find(aeroway) != negligible_aeroway_type_set.end();
 }
\ No newline at end of file
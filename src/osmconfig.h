@@ -7,8 +7,10 @@
 
 #include <absl/container/flat_hash_map.h>
 
+#include <cstddef>
 #include <cstdint>
 #include <string>
+#include <string_view>
 
 using OsmIdType = int64_t;
 
@@ -31,28 +33,29 @@ enum class HighWayLinkType : uint8_t {
   UNCLASSIFIED,
   OTHER
 };
+constexpr size_t NUMBER_OF_HIGHWAY_LINK_TYPES = static_cast<size_t>(HighWayLinkType::OTHER) + 1;
 
-ModeType modeStringToModeType(const std::string& mode_type_str);
-HighWayLinkType highwayStringToHighWayLinkType(const std::string& highway_type_str);
+ModeType modeStringToModeType(std::string_view mode_type_str);
+HighWayLinkType highwayStringToHighWayLinkType(std::string_view highway_type_str);
 
-bool checkAllowedUsedAutoInMotor_Vehicle(const std::string& motor_vehicle);
-bool checkAllowedUsedAutoInMotorCar(const std::string& motorcar);
-bool checkAllowedUsedBikeInBicycle(const std::string& bicycle);
-bool checkAllowedUsedWalkInFoot(const std::string& foot);
+bool checkAllowedUsedAutoInMotor_Vehicle(std::string_view motor_vehicle);
+bool checkAllowedUsedAutoInMotorCar(std::string_view motorcar);
+bool checkAllowedUsedBikeInBicycle(std::string_view bicycle);
+bool checkAllowedUsedWalkInFoot(std::string_view foot);
 
-bool checkAllowedUsedAutoExHighway(const std::string& highway);
-bool checkAllowedUsedAutoExMotor_Vehicle(const std::string& motor_vehicle);
-bool checkAllowedUsedAutoExMotorCar(const std::string& motorcar);
-bool checkAllowedUsedAutoExAccess(const std::string& access);
-bool checkAllowedUsedAutoExService(const std::string& service);
-bool checkAllowedUsedBikeExHighway(const std::string& highway);
-bool checkAllowedUsedBikeExBicycle(const std::string& bicycle);
-bool checkAllowedUsedBikeExService(const std::string& service);
-bool checkAllowedUsedBikeExAccess(const std::string& access);
-bool checkAllowedUsedWalkExHighway(const std::string& highway);
-bool checkAllowedUsedWalkExFoot(const std::string& foot);
-bool checkAllowedUsedWalkExService(const std::string& service);
-bool checkAllowedUsedWalkExAccess(const std::string& access);
+bool checkAllowedUsedAutoExHighway(std::string_view highway);
+bool checkAllowedUsedAutoExMotor_Vehicle(std::string_view motor_vehicle);
+bool checkAllowedUsedAutoExMotorCar(std::string_view motorcar);
+bool checkAllowedUsedAutoExAccess(std::string_view access);
+bool checkAllowedUsedAutoExService(std::string_view service);
+bool checkAllowedUsedBikeExHighway(std::string_view highway);
+bool checkAllowedUsedBikeExBicycle(std::string_view bicycle);
+bool checkAllowedUsedBikeExService(std::string_view service);
+bool checkAllowedUsedBikeExAccess(std::string_view access);
+bool checkAllowedUsedWalkExHighway(std::string_view highway);
+bool checkAllowedUsedWalkExFoot(std::string_view foot);
+bool checkAllowedUsedWalkExService(std::string_view service);
+bool checkAllowedUsedWalkExAccess(std::string_view access);
 
 bool getDefaultOneWayFlag(HighWayLinkType highway_link_type);
 
@@ -60,12 +63,12 @@ const absl::flat_hash_map<HighWayLinkType, int32_t>& getPresetDefaultLanesDict()
 const absl::flat_hash_map<HighWayLinkType, float>& getPresetDefaultSpeedDict();
 const absl::flat_hash_map<HighWayLinkType, int32_t>& getPresetDefaultCapacityDict();
 
-bool isHighwayPoiType(const std::string& highway);
-bool isRailwayPoiType(const std::string& railway);
-bool isAerowayPoiType(const std::string& aeroway);
+bool isHighwayPoiType(std::string_view highway);
+bool isRailwayPoiType(std::string_view railway);
+bool isAerowayPoiType(std::string_view aeroway);
 
-bool isNegligibleHighwayType(const std::string& highway);
-bool isNegligibleRailwayType(const std::string& railway);
-bool isNegligibleAerowayType(const std::string& aeroway);
+bool isNegligibleHighwayType(std::string_view highway);
+bool isNegligibleRailwayType(std::string_view railway);
+bool isNegligibleAerowayType(std::string_view aeroway);
 
 #endif  // OSM2GMNS_OSMCONFIG_H
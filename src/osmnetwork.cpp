@@ -7,11 +7,17 @@
 #include <absl/container/flat_hash_map.h>
 #include <absl/container/flat_hash_set.h>
 #include <absl/log/log.h>
+#include <absl/strings/ascii.h>
 #include <absl/strings/match.h>
+#include <geos/algorithm/locate/IndexedPointInAreaLocator.h>
 #include <geos/geom/Coordinate.h>
+#include <geos/geom/Envelope.h>
+#include <geos/geom/Geometry.h>
 #include <geos/geom/GeometryFactory.h>
+#include <geos/geom/Location.h>
 #include <geos/geom/Point.h>
 #include <geos/geom/Polygon.h>
+#include <geos/io/WKTReader.h>
 
 #include <algorithm>
 #include <chrono>
@@ -20,42 +26,120 @@
 #include <cstdint>
 #include <exception>
 #include <filesystem>
+#include <functional>
 #include <iostream>
 #include <memory>
 #include <optional>
 #include <osmium/io/any_input.hpp>  // NOLINT
 #include <osmium/io/file.hpp>       // NOLINT
 #include <osmium/io/reader.hpp>     // NOLINT
+#include <osmium/memory/buffer.hpp>
 #include <osmium/osm/box.hpp>
 #include <osmium/osm/entity_bits.hpp>
 #include <osmium/osm/item_type.hpp>
+#include <osmium/osm/location.hpp>
 #include <osmium/osm/node.hpp>
 #include <osmium/osm/relation.hpp>
 #include <osmium/osm/tag.hpp>
 #include <osmium/osm/way.hpp>
 #include <osmium/thread/pool.hpp>
 #include <osmium/visitor.hpp>  // NOLINT
-#include <regex>
 #include <string>
+#include <string_view>
 #include <utility>
 #include <vector>
 
 #include "config.h"
 #include "constants.h"
+#include "osmcache.h"
 #include "osmconfig.h"
+#include "runcontrol.h"
+#include "stats.h"
 
 const char* getOSMTagValue(const osmium::TagList& tag_list, const char* tag_key) {
   const char* tag_value = tag_list[tag_key];
   return tag_value != nullptr ? tag_value : "";
 }
 
+const std::string* StringPool::intern(std::string_view value) {
+  if (value.empty()) {
+    return emptyValue();
+  }
+  auto iter = values_.find(value);
+  if (iter == values_.end()) {
+    iter = values_.emplace(value).first;
+  }
+  return &*iter;
+}
+
+const std::string* StringPool::emptyValue() {
+  static const std::string empty_value;
+  return &empty_value;
+}
+
+OsmWayTagValues::OsmWayTagValues(const osmium::TagList& tag_list) {
+  static const absl::flat_hash_map<std::string_view, std::string_view OsmWayTagValues::*> tag_value_members = {
+      {"highway", &OsmWayTagValues::highway},
+      {"railway", &OsmWayTagValues::railway},
+      {"aeroway", &OsmWayTagValues::aeroway},
+      {"name", &OsmWayTagValues::name},
+      {"lanes", &OsmWayTagValues::lanes},
+      {"lanes:forward", &OsmWayTagValues::forward_lanes},
+      {"lanes:backward", &OsmWayTagValues::backward_lanes},
+      {"oneway", &OsmWayTagValues::oneway},
+      {"maxspeed", &OsmWayTagValues::max_speed},
+      {"building", &OsmWayTagValues::building},
+      {"amenity", &OsmWayTagValues::amenity},
+      {"leisure", &OsmWayTagValues::leisure},
+      {"junction", &OsmWayTagValues::junction},
+      {"area", &OsmWayTagValues::area},
+      {"motor_vehicle", &OsmWayTagValues::motor_vehicle},
+      {"motorcar", &OsmWayTagValues::motorcar},
+      {"service", &OsmWayTagValues::service},
+      {"access", &OsmWayTagValues::access},
+      {"foot", &OsmWayTagValues::foot},
+      {"bicycle", &OsmWayTagValues::bicycle}};
+  for (const osmium::Tag& tag : tag_list) {
+    auto iter = tag_value_members.find(tag.key());
+    if (iter != tag_value_members.end()) {
+      this->*(iter->second) = tag.value();
+    }
+  }
+}
+
+ClipRegion::ClipRegion(std::unique_ptr<geos::geom::Geometry> geometry)
+    : geometry_(std::move(geometry)), is_rectangle_(geometry_->isRectangle()) {
+  if (!is_rectangle_) {
+    locator_ = std::make_unique<geos::algorithm::locate::IndexedPointInAreaLocator>(*geometry_);
+  }
+}
+
+const geos::geom::Geometry* ClipRegion::geometry() const { return geometry_.get(); }
+
+bool ClipRegion::covers(const osmium::Location& location) {
+  if (!location.valid()) {
+    return false;
+  }
+  const double x = location.lon_without_check();
+  const double y = location.lat_without_check();
+  if (!geometry_->getEnvelopeInternal()->covers(x, y)) {
+    return false;
+  }
+  if (is_rectangle_) {
+    return true;
+  }
+  const geos::geom::CoordinateXY coordinate(x, y);
+  return locator_->locate(&coordinate) != geos::geom::Location::EXTERIOR;
+}
+
 OsmHandler::OsmHandler(const absl::flat_hash_set<ModeType>& mode_types, absl::flat_hash_set<HighWayLinkType> link_types,
                        absl::flat_hash_set<HighWayLinkType> connector_link_types, bool POI,
-                       const OsmParsingConfig* osm_parsing_config)
+                       const OsmParsingConfig* osm_parsing_config, StringPool* string_pool)
     : link_types_(std::move(link_types)),
       connector_link_types_(std::move(connector_link_types)),
       POI_(POI),
-      osm_parsing_config_(osm_parsing_config) {
+      osm_parsing_config_(osm_parsing_config),
+      string_pool_(string_pool) {
   for (const ModeType mode_type : mode_types) {
     if (mode_type == ModeType::RAILWAY) {
       include_railway_ = true;
@@ -66,36 +150,108 @@ OsmHandler::OsmHandler(const absl::flat_hash_set<ModeType>& mode_types, absl::fl
     }
   }
 }
+OsmHandler::~OsmHandler() {
+  for (auto& [osm_way_id, osm_way] : member_ways_outside_region_) {
+    delete osm_way;
+  }
+}
 void OsmHandler::node(const osmium::Node& node) {
+  if (locate_region_nodes_) {
+    if (clip_region_->covers(node.location())) {
+      region_osm_node_vector_.emplace_back(node, osm_parsing_config_->osm_node_attributes);
+    }
+    return;
+  }
   if (parse_node_ && nodes_used_in_ways_.find(node.id()) != nodes_used_in_ways_.end()) {
-    osm_node_vector_.push_back(new OsmNode(node, osm_parsing_config_->osm_node_attributes));
+    osm_node_vector_.emplace_back(node, osm_parsing_config_->osm_node_attributes);
   }
 }
 void OsmHandler::way(const osmium::Way& way) {
   if (!parse_way_) {
     return;
   }
-  auto* osm_way = new OsmWay(way);
-  osm_way->identifyWayType(highway_mode_types_, include_railway_, include_aeroway_, link_types_, connector_link_types_,
-                           POI_, ways_used_in_relations_);
-  if (!osm_way->includeTheWay()) {
+  // ways without any node in the clip region are skipped before they are decoded, unless they are used by POI
+  // relations, which may be partly in the region
+  bool in_region = true;
+  if (clip_region_ != nullptr) {
+    in_region = std::any_of(way.nodes().begin(), way.nodes().end(),
+                            [this](const osmium::NodeRef& node_ref) { return isInRegion(node_ref.ref()); });
+    const bool used_in_relations = POI_ && ways_used_in_relations_.find(way.id()) != ways_used_in_relations_.end();
+    if (!used_in_relations && !in_region) {
+      return;
+    }
+    if (used_in_relations && in_region) {
+      member_ways_in_region_.insert(way.id());
+    }
+  }
+  // the way type is identified from the decoded type tags first, other tags are only decoded for ways that are kept
+  const OsmWayTagValues tag_values(way.tags());
+  OsmWay candidate_way(way.id(), tag_values);
+  if (in_region) {
+    candidate_way.identifyWayType(highway_mode_types_, include_railway_, include_aeroway_, link_types_,
+                                  connector_link_types_, POI_, ways_used_in_relations_);
+  } else {
+    candidate_way.setPoiComponent();
+  }
+  if (!candidate_way.includeTheWay()) {
+    return;
+  }
+  auto* osm_way = new OsmWay(std::move(candidate_way));
+  osm_way->readWay(way, tag_values, *string_pool_);
+  osm_way->updateOsmAttributes(way, osm_parsing_config_->osm_link_attributes, osm_parsing_config_->osm_poi_attributes);
+  if (!in_region) {
+    member_ways_outside_region_.emplace(way.id(), osm_way);
+    return;
+  }
+
+  const WayType way_type = osm_way->wayType();
+  if (clip_region_ == nullptr || !strict_boundary_ ||
+      (way_type != WayType::HIGHWAY && way_type != WayType::RAILWAY && way_type != WayType::AEROWAY)) {
+    addWay(osm_way);
+    return;
+  }
+  // strict boundary: links are cut where they leave the clip region. every run of nodes in the region becomes a way
+  std::vector<std::vector<OsmIdType>> region_runs = regionRuns(osm_way->refNodeIdVector());
+  if (region_runs.empty()) {
     delete osm_way;
     return;
   }
+  if (region_runs.size() == 1 && region_runs.front().size() == osm_way->refNodeIdVector().size()) {
+    addWay(osm_way);
+    return;
+  }
+  std::vector<OsmWay*> osm_way_parts;
+  osm_way_parts.reserve(region_runs.size() - 1);
+  for (size_t run_idx = 1; run_idx < region_runs.size(); ++run_idx) {
+    auto* osm_way_part = new OsmWay(*osm_way);
+    osm_way_part->setRefNodeIdVector(std::move(region_runs[run_idx]));
+    osm_way_parts.push_back(osm_way_part);
+  }
+  osm_way->setRefNodeIdVector(std::move(region_runs.front()));
+  addWay(osm_way);
+  for (OsmWay* osm_way_part : osm_way_parts) {
+    addWay(osm_way_part);
+  }
+}
+void OsmHandler::addWay(OsmWay* osm_way) {
   osm_way_vector_.push_back(osm_way);
   nodes_used_in_ways_.insert(osm_way->refNodeIdVector().begin(), osm_way->refNodeIdVector().end());
-  osm_way->updateOsmAttributes(way, osm_parsing_config_->osm_link_attributes, osm_parsing_config_->osm_poi_attributes);
 }
 void OsmHandler::relation(const osmium::Relation& relation) {
   if (!parse_relation_) {
     return;
   }
-  auto* osm_relation = new OsmRelation(relation, osm_parsing_config_->osm_poi_attributes);
+  addRelation(new OsmRelation(relation, osm_parsing_config_->osm_poi_attributes));
+}
+void OsmHandler::addRelation(OsmRelation* osm_relation) {
   if (osm_relation->building().empty() && osm_relation->amenity().empty() && osm_relation->leisure().empty()) {
     delete osm_relation;
     return;
   }
   osm_relation_vector_.push_back(osm_relation);
+  registerRelationMemberWays(osm_relation);
+}
+void OsmHandler::registerRelationMemberWays(const OsmRelation* osm_relation) {
   const std::vector<OsmIdType>& member_id_vector = osm_relation->memberIdVector();
   const std::vector<osmium::item_type>& member_type_vector = osm_relation->memberTypeVector();
   for (size_t idx = 0; idx < member_id_vector.size(); ++idx) {
@@ -111,81 +267,339 @@ void OsmHandler::updateParseTargets(bool parse_node, bool parse_way, bool parse_
   parse_relation_ = parse_relation;
 }
 
-std::vector<OsmNode*>& OsmHandler::osmNodeVector() { return osm_node_vector_; }
+void OsmHandler::setClipRegion(ClipRegion* clip_region, bool strict_boundary) {
+  clip_region_ = clip_region;
+  strict_boundary_ = strict_boundary;
+}
+
+void OsmHandler::updateRegionParseTarget(bool locate_region_nodes) {
+  locate_region_nodes_ = locate_region_nodes;
+  auto osm_node_id_less = [](const OsmNode& node_a, const OsmNode& node_b) {
+    return node_a.osmNodeId() < node_b.osmNodeId();
+  };
+  if (!locate_region_nodes_ &&
+      !std::is_sorted(region_osm_node_vector_.begin(), region_osm_node_vector_.end(), osm_node_id_less)) {
+    std::sort(region_osm_node_vector_.begin(), region_osm_node_vector_.end(), osm_node_id_less);
+  }
+}
+
+void OsmHandler::locateRegionNode(OsmIdType osm_node_id, const osmium::Location& location) {
+  if (clip_region_->covers(location)) {
+    nodes_in_region_.insert(osm_node_id);
+  }
+}
+
+void OsmHandler::markMemberWayInRegion(OsmIdType osm_way_id) { member_ways_in_region_.insert(osm_way_id); }
+
+void OsmHandler::resolveRegionRelations(const std::vector<const OsmRelation*>& kept_osm_relations) {
+  bool new_way_added = false;
+  auto add_member_ways_outside_region = [this, &new_way_added](const OsmRelation* osm_relation) {
+    const std::vector<OsmIdType>& member_id_vector = osm_relation->memberIdVector();
+    const std::vector<osmium::item_type>& member_type_vector = osm_relation->memberTypeVector();
+    for (size_t idx = 0; idx < member_id_vector.size(); ++idx) {
+      if (member_type_vector[idx] != osmium::item_type::way) {
+        continue;
+      }
+      auto iter = member_ways_outside_region_.find(member_id_vector[idx]);
+      if (iter != member_ways_outside_region_.end()) {
+        addWay(iter->second);
+        member_ways_outside_region_.erase(iter);
+        new_way_added = true;
+      }
+    }
+  };
+  size_t number_of_kept_osm_relations = 0;
+  for (OsmRelation* osm_relation : osm_relation_vector_) {
+    const std::vector<OsmIdType>& member_id_vector = osm_relation->memberIdVector();
+    const std::vector<osmium::item_type>& member_type_vector = osm_relation->memberTypeVector();
+    bool has_member_way_in_region = false;
+    for (size_t idx = 0; idx < member_id_vector.size() && !has_member_way_in_region; ++idx) {
+      has_member_way_in_region = member_type_vector[idx] == osmium::item_type::way &&
+                                 member_ways_in_region_.find(member_id_vector[idx]) != member_ways_in_region_.end();
+    }
+    if (!has_member_way_in_region) {
+      delete osm_relation;
+      continue;
+    }
+    osm_relation_vector_[number_of_kept_osm_relations++] = osm_relation;
+    add_member_ways_outside_region(osm_relation);
+  }
+  osm_relation_vector_.resize(number_of_kept_osm_relations);
+  for (const OsmRelation* osm_relation : kept_osm_relations) {
+    add_member_ways_outside_region(osm_relation);
+  }
+  for (auto& [osm_way_id, osm_way] : member_ways_outside_region_) {
+    delete osm_way;
+  }
+  member_ways_outside_region_.clear();
+  absl::flat_hash_set<OsmIdType>().swap(member_ways_in_region_);
+  if (new_way_added) {
+    // keep the sequence of ways consistent with the osm file
+    std::stable_sort(osm_way_vector_.begin(), osm_way_vector_.end(),
+                     [](const OsmWay* way_a, const OsmWay* way_b) { return way_a->osmWayId() < way_b->osmWayId(); });
+  }
+}
+
+size_t OsmHandler::takeUsedRegionNodes() {
+  for (OsmNode& osm_node : region_osm_node_vector_) {
+    auto iter = nodes_used_in_ways_.find(osm_node.osmNodeId());
+    if (iter != nodes_used_in_ways_.end()) {
+      nodes_used_in_ways_.erase(iter);
+      osm_node_vector_.push_back(std::move(osm_node));
+    }
+  }
+  std::vector<OsmNode>().swap(region_osm_node_vector_);
+  return nodes_used_in_ways_.size();
+}
+
+void OsmHandler::releaseRegionNodes() {
+  std::vector<OsmNode>().swap(region_osm_node_vector_);
+  absl::flat_hash_set<OsmIdType>().swap(nodes_in_region_);
+}
+
+bool OsmHandler::isInRegion(OsmIdType osm_node_id) const {
+  auto iter =
+      std::lower_bound(region_osm_node_vector_.begin(), region_osm_node_vector_.end(), osm_node_id,
+                       [](const OsmNode& osm_node, OsmIdType node_id) { return osm_node.osmNodeId() < node_id; });
+  return (iter != region_osm_node_vector_.end() && iter->osmNodeId() == osm_node_id) ||
+         nodes_in_region_.find(osm_node_id) != nodes_in_region_.end();
+}
+
+std::vector<std::vector<OsmIdType>> OsmHandler::regionRuns(const std::vector<OsmIdType>& ref_node_id_vector) const {
+  std::vector<std::vector<OsmIdType>> region_runs;
+  bool in_run = false;
+  for (const OsmIdType ref_node_id : ref_node_id_vector) {
+    if (!isInRegion(ref_node_id)) {
+      in_run = false;
+      continue;
+    }
+    if (!in_run) {
+      region_runs.emplace_back();
+      in_run = true;
+    }
+    region_runs.back().push_back(ref_node_id);
+  }
+  // for closed ways starting in the region, the last run continues with the first one
+  if (region_runs.size() >= 2 && ref_node_id_vector.front() == ref_node_id_vector.back() &&
+      isInRegion(ref_node_id_vector.front())) {
+    region_runs.back().insert(region_runs.back().end(), region_runs.front().begin() + 1, region_runs.front().end());
+    region_runs.erase(region_runs.begin());
+  }
+  region_runs.erase(std::remove_if(region_runs.begin(), region_runs.end(),
+                                   [](const std::vector<OsmIdType>& region_run) { return region_run.size() < 2; }),
+                    region_runs.end());
+  return region_runs;
+}
+
+void OsmHandler::addCachedWay(OsmWay* osm_way) {
+  osm_way->identifyWayType(highway_mode_types_, include_railway_, include_aeroway_, link_types_, connector_link_types_,
+                           POI_, ways_used_in_relations_);
+  if (osm_way->includeTheWay()) {
+    addWay(osm_way);
+    return;
+  }
+  delete osm_way;
+}
+void OsmHandler::addCachedRelation(OsmRelation* osm_relation) {
+  if (!POI_) {
+    delete osm_relation;
+    return;
+  }
+  addRelation(osm_relation);
+}
+void OsmHandler::addCachedNode(OsmNode osm_node) {
+  if (nodes_used_in_ways_.find(osm_node.osmNodeId()) != nodes_used_in_ways_.end()) {
+    osm_node_vector_.push_back(std::move(osm_node));
+  }
+}
+
+std::vector<OsmNode>& OsmHandler::osmNodeVector() { return osm_node_vector_; }
 std::vector<OsmWay*>& OsmHandler::osmWayVector() { return osm_way_vector_; }
 std::vector<OsmRelation*>& OsmHandler::osmRelationVector() { return osm_relation_vector_; }
 
 OsmNode::OsmNode(const osmium::Node& node, const std::vector<std::string>& osm_node_attributes)
-    : osm_node_id_(node.id()),
-      x(node.location().lon()),
-      y(node.location().lat()),
-      name_(getOSMTagValue(node.tags(), "name")),
-      highway_(getOSMTagValue(node.tags(), "highway")) {
-  if (absl::StrContains(highway_, "signal")) {
+    : osm_node_id_(node.id()), location_(node.location()) {
+  if (node.tags().empty()) {
+    return;
+  }
+  if (absl::StrContains(getOSMTagValue(node.tags(), "highway"), "signal")) {
     is_signalized_ = true;
   }
-  osm_attributes_.reserve(osm_node_attributes.size());
+  std::string name = getOSMTagValue(node.tags(), "name");
+  std::vector<std::string> osm_attributes;
+  osm_attributes.reserve(osm_node_attributes.size());
+  bool has_attribute_value = false;
   for (const std::string& attr : osm_node_attributes) {
-    osm_attributes_.push_back(getOSMTagValue(node.tags(), attr.data()));
+    osm_attributes.emplace_back(getOSMTagValue(node.tags(), attr.data()));
+    has_attribute_value = has_attribute_value || !osm_attributes.back().empty();
+  }
+  if (!name.empty() || has_attribute_value) {
+    tags_ = std::make_unique<OsmNodeTags>(OsmNodeTags{std::move(name), std::move(osm_attributes)});
+  }
+}
+
+OsmNode::OsmNode(BinaryReader& reader) : osm_node_id_(reader.read<OsmIdType>()) {
+  const auto x = reader.read<int32_t>();
+  const auto y = reader.read<int32_t>();
+  location_ = osmium::Location(x, y);
+  is_signalized_ = reader.read<uint8_t>() != 0;
+  if (reader.read<uint8_t>() != 0) {
+    std::string name = reader.readString();
+    std::vector<std::string> osm_attributes = reader.readStringVector();
+    tags_ = std::make_unique<OsmNodeTags>(OsmNodeTags{std::move(name), std::move(osm_attributes)});
+  }
+}
+
+void OsmNode::serialize(std::string& buffer) const {
+  appendBinary<OsmIdType>(buffer, osm_node_id_);
+  appendBinary<int32_t>(buffer, location_.x());
+  appendBinary<int32_t>(buffer, location_.y());
+  appendBinary<uint8_t>(buffer, is_signalized_ ? 1 : 0);
+  appendBinary<uint8_t>(buffer, tags_ != nullptr ? 1 : 0);
+  if (tags_ != nullptr) {
+    appendBinaryString(buffer, tags_->name);
+    appendBinaryStringVector(buffer, tags_->osm_attributes);
   }
 }
 
 OsmIdType OsmNode::osmNodeId() const { return osm_node_id_; }
-const std::string& OsmNode::name() const { return name_; }
-double OsmNode::getX() const { return x; }
-double OsmNode::getY() const { return y; }
-// const std::unique_ptr<geos::geom::Point>& OsmNode::geometry() const { return geometry_; }
-const std::vector<std::string>& OsmNode::osmAttributes() const { return osm_attributes_; };
+const std::string& OsmNode::name() const {
+  static const std::string empty_name;
+  return tags_ != nullptr ? tags_->name : empty_name;
+}
+double OsmNode::getX() const { return location_.lon_without_check(); }
+double OsmNode::getY() const { return location_.lat_without_check(); }
+const osmium::Location& OsmNode::location() const { return location_; }
+const std::vector<std::string>& OsmNode::osmAttributes() const {
+  static const std::vector<std::string> empty_attributes;
+  return tags_ != nullptr ? tags_->osm_attributes : empty_attributes;
+};
 bool OsmNode::isSignalized() const { return is_signalized_; }
 int32_t OsmNode::usageCount() const { return usage_count_; }
 bool OsmNode::isTypologyNode() const { return is_typology_node_; }
-std::vector<OsmWay*> OsmNode::incomingWayVector() const { return incoming_way_vector_; }
-std::vector<OsmWay*> OsmNode::outgoingWayVector() const { return outgoing_way_vector_; }
-
-// void OsmNode::initOsmNode(const geos::geom::GeometryFactory* factory, const geos::geom::Polygon* boundary,
-//                           bool strict_boundary) {
-//   geometry_ = factory->createPoint(geos::geom::Coordinate(x, y));
-//   if (strict_boundary && !boundary->covers(geometry_.get())) {
-//     in_region_ = false;
-//   }
-// }
-void OsmNode::changeUsageCount(int32_t usage_count_changes = 1) { usage_count_ += usage_count_changes; }
-void OsmNode::setIsEndingNode(bool is_ending_node) { is_ending_node_ = is_ending_node; }
+bool OsmNode::connectsTargetLinkWay() const { return connects_target_link_way_; }
+
+// ways sharing a node update it from different threads in createWaySegments
+void OsmNode::changeUsageCount(int32_t usage_count_changes = 1) {
+#pragma omp atomic update
+  usage_count_ += usage_count_changes;
+}
+void OsmNode::setIsEndingNode(bool is_ending_node) {
+#pragma omp atomic write
+  is_ending_node_ = is_ending_node;
+}
 void OsmNode::setIsTypologyNode() { is_typology_node_ = is_ending_node_ || usage_count_ >= 2 || is_signalized_; }
-void OsmNode::addIncomingWay(OsmWay* osm_way) { incoming_way_vector_.push_back(osm_way); }
-void OsmNode::addOutgoingWay(OsmWay* osm_way) { outgoing_way_vector_.push_back(osm_way); }
-
-OsmWay::OsmWay(const osmium::Way& way)
-    : osm_way_id_(way.id()),
-      highway_(getOSMTagValue(way.tags(), "highway")),
-      railway_(getOSMTagValue(way.tags(), "railway")),
-      aeroway_(getOSMTagValue(way.tags(), "aeroway")),
-      name_(getOSMTagValue(way.tags(), "name")),
-      lanes_raw_(getOSMTagValue(way.tags(), "lanes")),
-      forward_lanes_raw_(getOSMTagValue(way.tags(), "lanes:forward")),
-      backward_lanes_raw_(getOSMTagValue(way.tags(), "lanes:backward")),
-      oneway_raw_(getOSMTagValue(way.tags(), "oneway")),
-      max_speed_raw_(getOSMTagValue(way.tags(), "maxspeed")),
-      building_(getOSMTagValue(way.tags(), "building")),
-      amenity_(getOSMTagValue(way.tags(), "amenity")),
-      leisure_(getOSMTagValue(way.tags(), "leisure")),
-      junction_(getOSMTagValue(way.tags(), "junction")),
-      area_(getOSMTagValue(way.tags(), "area")),
-      motor_vehicle_(getOSMTagValue(way.tags(), "motor_vehicle")),
-      motorcar_(getOSMTagValue(way.tags(), "motorcar")),
-      service_(getOSMTagValue(way.tags(), "service")),
-      access_(getOSMTagValue(way.tags(), "access")),
-      foot_(getOSMTagValue(way.tags(), "foot")),
-      bicycle_(getOSMTagValue(way.tags(), "bicycle")) {
-  for (const auto& way_node : way.nodes()) {
-    ref_node_id_vector_.push_back(way_node.ref());
+void OsmNode::setConnectsTargetLinkWay() { connects_target_link_way_ = true; }
+void OsmNode::resetTopology() {
+  usage_count_ = 0;
+  is_ending_node_ = false;
+  is_typology_node_ = false;
+  connects_target_link_way_ = false;
+}
+
+OsmWay::OsmWay(OsmIdType osm_way_id, const OsmWayTagValues& tag_values) : osm_way_id_(osm_way_id) {
+  if (!tag_values.highway.empty()) {
+    tag_flags_ |= HAS_HIGHWAY;
+  }
+  if (!tag_values.railway.empty()) {
+    tag_flags_ |= HAS_RAILWAY;
+  }
+  if (!tag_values.aeroway.empty()) {
+    tag_flags_ |= HAS_AEROWAY;
+  }
+  if (!(tag_values.building.empty() && tag_values.amenity.empty() && tag_values.leisure.empty()) ||
+      (hasTagFlag(HAS_HIGHWAY) && isHighwayPoiType(tag_values.highway)) ||
+      (hasTagFlag(HAS_RAILWAY) && isRailwayPoiType(tag_values.railway)) ||
+      (hasTagFlag(HAS_AEROWAY) && isAerowayPoiType(tag_values.aeroway))) {
+    tag_flags_ |= POI_TAGS;
+  }
+  if (!tag_values.area.empty() && tag_values.area != "no") {
+    tag_flags_ |= AREA;
+  }
+  if (hasTagFlag(HAS_HIGHWAY)) {
+    highway_link_type_ = highwayStringToHighWayLinkType(tag_values.highway);
+    if (isNegligibleHighwayType(tag_values.highway)) {
+      tag_flags_ |= NEGLIGIBLE_HIGHWAY;
+    }
+    // ways with POI tags or areas are not identified as highways
+    if (highway_link_type_ == HighWayLinkType::OTHER && !hasTagFlag(POI_TAGS) && !hasTagFlag(AREA) &&
+        !hasTagFlag(NEGLIGIBLE_HIGHWAY)) {
+      LOG(WARNING) << "way " << osm_way_id_ << " has a new highway value " << tag_values.highway;
+    }
+    if (checkAllowedUsedAutoInMotor_Vehicle(tag_values.motor_vehicle) ||
+        checkAllowedUsedAutoInMotorCar(tag_values.motorcar) ||
+        (!checkAllowedUsedAutoExHighway(tag_values.highway) &&
+         !checkAllowedUsedAutoExMotor_Vehicle(tag_values.motor_vehicle) &&
+         !checkAllowedUsedAutoExMotorCar(tag_values.motorcar) && !checkAllowedUsedAutoExAccess(tag_values.access) &&
+         !checkAllowedUsedAutoExService(tag_values.service))) {
+      tag_flags_ |= AUTO_ALLOWED;
+    }
+    if (checkAllowedUsedBikeInBicycle(tag_values.bicycle) ||
+        (!checkAllowedUsedBikeExHighway(tag_values.highway) && !checkAllowedUsedBikeExBicycle(tag_values.bicycle) &&
+         !checkAllowedUsedBikeExService(tag_values.service) && !checkAllowedUsedBikeExAccess(tag_values.access))) {
+      tag_flags_ |= BIKE_ALLOWED;
+    }
+    if (checkAllowedUsedWalkInFoot(tag_values.foot) ||
+        (!checkAllowedUsedWalkExHighway(tag_values.highway) && !checkAllowedUsedWalkExFoot(tag_values.foot) &&
+         !checkAllowedUsedWalkExService(tag_values.service) && !checkAllowedUsedWalkExAccess(tag_values.access))) {
+      tag_flags_ |= WALK_ALLOWED;
+    }
+  }
+  if (hasTagFlag(HAS_RAILWAY) && isNegligibleRailwayType(tag_values.railway)) {
+    tag_flags_ |= NEGLIGIBLE_RAILWAY;
+  }
+  if (hasTagFlag(HAS_AEROWAY) && isNegligibleAerowayType(tag_values.aeroway)) {
+    tag_flags_ |= NEGLIGIBLE_AEROWAY;
+  }
+}
+
+OsmWay::OsmWay(BinaryReader& reader, StringPool& string_pool) : osm_way_id_(reader.read<OsmIdType>()) {
+  for (const std::string** tag_value : {&highway_, &railway_, &aeroway_, &name_, &building_, &amenity_, &leisure_}) {
+    *tag_value = string_pool.intern(reader.readStringView());
+  }
+  tag_flags_ = reader.read<uint16_t>();
+  if (!highway_->empty()) {
+    tag_flags_ |= HAS_HIGHWAY;
   }
+  if (!railway_->empty()) {
+    tag_flags_ |= HAS_RAILWAY;
+  }
+  if (!aeroway_->empty()) {
+    tag_flags_ |= HAS_AEROWAY;
+  }
+  highway_link_type_ = highwayStringToHighWayLinkType(*highway_);
+  lanes_ = reader.readOptional<int32_t>();
+  forward_lanes_ = reader.readOptional<int32_t>();
+  backward_lanes_ = reader.readOptional<int32_t>();
+  max_speed_ = reader.readOptional<float>();
+  osm_link_attributes_ = reader.readStringVector();
+  osm_poi_attributes_ = reader.readStringVector();
+  ref_node_id_vector_ = reader.readVector<OsmIdType>();
+}
+
+void OsmWay::serialize(std::string& buffer) const {
+  appendBinary<OsmIdType>(buffer, osm_way_id_);
+  for (const std::string* tag_value : {highway_, railway_, aeroway_, name_, building_, amenity_, leisure_}) {
+    appendBinaryString(buffer, *tag_value);
+  }
+  appendBinary<uint16_t>(buffer, tag_flags_);
+  appendBinaryOptional(buffer, lanes_);
+  appendBinaryOptional(buffer, forward_lanes_);
+  appendBinaryOptional(buffer, backward_lanes_);
+  appendBinaryOptional(buffer, max_speed_);
+  appendBinaryStringVector(buffer, osm_link_attributes_);
+  appendBinaryStringVector(buffer, osm_poi_attributes_);
+  appendBinaryVector(buffer, ref_node_id_vector_);
+}
+
+void OsmWay::setRefNodeIdVector(std::vector<OsmIdType> ref_node_id_vector) {
+  ref_node_id_vector_ = std::move(ref_node_id_vector);
 }
 
 OsmIdType OsmWay::osmWayId() const { return osm_way_id_; }
-const std::string& OsmWay::railway() const { return railway_; }
-const std::string& OsmWay::aeroway() const { return aeroway_; }
-const std::string& OsmWay::name() const { return name_; }
+const std::string& OsmWay::railway() const { return *railway_; }
+const std::string& OsmWay::aeroway() const { return *aeroway_; }
+const std::string& OsmWay::name() const { return *name_; }
 std::optional<int32_t> OsmWay::lanes() const { return lanes_; }
 std::optional<int32_t> OsmWay::forward_lanes() const { return forward_lanes_; }
 std::optional<int32_t> OsmWay::backward_lanes() const { return backward_lanes_; }
@@ -200,9 +614,9 @@ bool OsmWay::isTargetConnector() const { return is_target_connector_; }
 std::optional<bool> OsmWay::isOneway() const { return is_oneway_; }
 bool OsmWay::isReversed() const { return is_reversed_; }
 std::optional<float> OsmWay::maxSpeed() const { return max_speed_; }
-const std::string& OsmWay::building() const { return building_; }
-const std::string& OsmWay::amenity() const { return amenity_; }
-const std::string& OsmWay::leisure() const { return leisure_; }
+const std::string& OsmWay::building() const { return *building_; }
+const std::string& OsmWay::amenity() const { return *amenity_; }
+const std::string& OsmWay::leisure() const { return *leisure_; }
 const std::vector<std::string>& OsmWay::osmLinkAttributes() const { return osm_link_attributes_; }
 const std::vector<std::string>& OsmWay::osmPoiAttributes() const { return osm_poi_attributes_; }
 
@@ -215,9 +629,7 @@ void OsmWay::identifyWayType(const absl::flat_hash_set<ModeType>& highway_mode_t
                              bool include_aeroway, const absl::flat_hash_set<HighWayLinkType>& link_types,
                              const absl::flat_hash_set<HighWayLinkType>& connector_link_types, bool POI,
                              const absl::flat_hash_set<OsmIdType>& ways_used_in_relations) {
-  if ((!(building_.empty() && amenity_.empty() && leisure_.empty())) ||
-      (!highway_.empty() && isHighwayPoiType(highway_)) || (!railway_.empty() && isRailwayPoiType(railway_)) ||
-      (!aeroway_.empty() && isAerowayPoiType(aeroway_))) {
+  if (hasTagFlag(POI_TAGS)) {
     if (POI) {
       way_type_ = WayType::POI;
       include_the_way_ = true;
@@ -225,12 +637,12 @@ void OsmWay::identifyWayType(const absl::flat_hash_set<ModeType>& highway_mode_t
     return;
   }
 
-  if (area_.empty() || area_ == "no") {
-    if (!highway_.empty()) {
+  if (!hasTagFlag(AREA)) {
+    if (hasTagFlag(HAS_HIGHWAY)) {
       identifyHighwayType(highway_mode_types, link_types, connector_link_types);
-    } else if (include_railway && !railway_.empty()) {
+    } else if (include_railway && hasTagFlag(HAS_RAILWAY)) {
       identifyRailwayType();
-    } else if (include_aeroway && !aeroway_.empty()) {
+    } else if (include_aeroway && hasTagFlag(HAS_AEROWAY)) {
       identifyAerowayType();
     }
   }
@@ -244,14 +656,15 @@ void OsmWay::identifyWayType(const absl::flat_hash_set<ModeType>& highway_mode_t
   }
 }
 
+void OsmWay::setPoiComponent() {
+  way_type_ = WayType::POI_COMPONENT;
+  include_the_way_ = true;
+}
+
 void OsmWay::identifyHighwayType(const absl::flat_hash_set<ModeType>& highway_mode_types,
                                  const absl::flat_hash_set<HighWayLinkType>& link_types,
                                  const absl::flat_hash_set<HighWayLinkType>& connector_link_types) {
-  highway_link_type_ = highwayStringToHighWayLinkType(highway_);
   if (highway_link_type_ == HighWayLinkType::OTHER) {
-    if (!isNegligibleHighwayType(highway_)) {
-      LOG(WARNING) << "way " << osm_way_id_ << " has a new highway value " << highway_;
-    }
     return;
   }
   if (link_types.empty() || link_types.find(highway_link_type_) != link_types.end()) {
@@ -271,7 +684,7 @@ void OsmWay::identifyHighwayType(const absl::flat_hash_set<ModeType>& highway_mo
 }
 
 void OsmWay::identifyRailwayType() {
-  if (isNegligibleRailwayType(railway_)) {
+  if (hasTagFlag(NEGLIGIBLE_RAILWAY)) {
     return;
   }
   way_type_ = WayType::RAILWAY;
@@ -280,7 +693,7 @@ void OsmWay::identifyRailwayType() {
 }
 
 void OsmWay::identifyAerowayType() {
-  if (isNegligibleAerowayType(aeroway_)) {
+  if (hasTagFlag(NEGLIGIBLE_AEROWAY)) {
     return;
   }
   way_type_ = WayType::AEROWAY;
@@ -288,6 +701,73 @@ void OsmWay::identifyAerowayType() {
   include_the_way_ = true;
 }
 
+// the first number in value, like the regular expression \d+\.?\d*
+std::optional<float> parseNumber(std::string_view value) {
+  const size_t start = value.find_first_of("0123456789");
+  if (start == std::string_view::npos) {
+    return std::nullopt;
+  }
+  size_t end = start;
+  while (end < value.size() && absl::ascii_isdigit(static_cast<unsigned char>(value[end]))) {
+    ++end;
+  }
+  if (end < value.size() && value[end] == '.') {
+    ++end;
+    while (end < value.size() && absl::ascii_isdigit(static_cast<unsigned char>(value[end]))) {
+      ++end;
+    }
+  }
+  return std::stof(std::string(value.substr(start, end - start)));
+}
+
+std::optional<int32_t> parseLanes(std::string_view value) {
+  const std::optional<float> number = parseNumber(value);
+  if (!number.has_value()) {
+    return std::nullopt;
+  }
+  return static_cast<int32_t>(std::round(number.value()));  // NOLINT
+}
+
+void OsmWay::readWay(const osmium::Way& way, const OsmWayTagValues& tag_values, StringPool& string_pool) {
+  highway_ = string_pool.intern(tag_values.highway);
+  railway_ = string_pool.intern(tag_values.railway);
+  aeroway_ = string_pool.intern(tag_values.aeroway);
+  name_ = string_pool.intern(tag_values.name);
+  building_ = string_pool.intern(tag_values.building);
+  amenity_ = string_pool.intern(tag_values.amenity);
+  leisure_ = string_pool.intern(tag_values.leisure);
+  lanes_ = parseLanes(tag_values.lanes);
+  forward_lanes_ = parseLanes(tag_values.forward_lanes);
+  backward_lanes_ = parseLanes(tag_values.backward_lanes);
+  const std::optional<float> max_speed = parseNumber(tag_values.max_speed);
+  if (max_speed.has_value()) {
+    max_speed_ = absl::StrContains(tag_values.max_speed, "mph") ? std::round(max_speed.value() * MPH_TO_KPH)  // NOLINT
+                                                                : max_speed.value();                          // NOLINT
+  }
+
+  const std::string_view oneway = tag_values.oneway;
+  if (oneway == "yes" || oneway == "1") {
+    tag_flags_ |= ONEWAY_YES;
+  } else if (oneway == "no" || oneway == "0") {
+    tag_flags_ |= ONEWAY_NO;
+  } else if (oneway == "-1") {
+    tag_flags_ |= ONEWAY_REVERSED;
+  } else if (oneway == "reversible" || oneway == "alternating") {
+    // todo: reversible, alternating: https://wiki.openstreetmap.org/wiki/Tag:oneway%3Dreversible
+    tag_flags_ |= ONEWAY_NO;
+  } else if (!oneway.empty()) {
+    DLOG(WARNING) << "new oneway type detected at way " << osm_way_id_ << " " << oneway;
+  }
+  if (tag_values.junction == "circular" || tag_values.junction == "roundabout") {
+    tag_flags_ |= ROUNDABOUT;
+  }
+
+  ref_node_id_vector_.reserve(way.nodes().size());
+  for (const osmium::NodeRef& node_ref : way.nodes()) {
+    ref_node_id_vector_.push_back(node_ref.ref());
+  }
+}
+
 void OsmWay::updateOsmAttributes(const osmium::Way& way, const std::vector<std::string>& osm_link_attributes,
                                  const std::vector<std::string>& osm_poi_attributes) {
   if (way_type_ == WayType::HIGHWAY || way_type_ == WayType::RAILWAY || way_type_ == WayType::AEROWAY) {
@@ -314,30 +794,22 @@ void OsmWay::updateOsmPoiAttributes(const osmium::Way& way, const std::vector<st
   }
 }
 
-void OsmWay::initOsmWay(const absl::flat_hash_map<OsmIdType, OsmNode*>& osm_node_dict) {
-  mapRefNodes(osm_node_dict);
+void OsmWay::initOsmWay(std::vector<OsmNode>& osm_node_vector,
+                        const absl::flat_hash_map<OsmIdType, OsmNode*>* extra_osm_node_dict) {
+  mapRefNodes(osm_node_vector, extra_osm_node_dict);
   if (way_type_ == WayType::HIGHWAY || way_type_ == WayType::RAILWAY || way_type_ == WayType::AEROWAY) {
     configAttributes();
   }
 }
 
-bool checkNodeConnecting(const std::vector<OsmWay*>& connecting_osm_ways) {
-  return std::any_of(connecting_osm_ways.begin(), connecting_osm_ways.end(), [](const OsmWay* osm_way) {
-    return osm_way->wayType() == WayType::HIGHWAY && osm_way->isTargetLinkType();
-  });
-}
-bool checkConnectorNode(OsmNode* osm_node) {
-  return checkNodeConnecting(osm_node->incomingWayVector()) || checkNodeConnecting(osm_node->outgoingWayVector());
-}
-
 void OsmWay::identifyTargetConnector() {
   if (way_type_ != WayType::HIGHWAY || is_target_link_type_ || !is_target_connector_link_type_ ||
       ref_node_vector_.empty()) {
     is_target_connector_ = false;
     return;
   }
-  const bool from_node_connection = checkConnectorNode(from_node_);
-  const bool to_node_connection = checkConnectorNode(to_node_);
+  const bool from_node_connection = from_node_->connectsTargetLinkWay();
+  const bool to_node_connection = to_node_->connectsTargetLinkWay();
   if (!(from_node_connection || to_node_connection) || (from_node_connection && to_node_connection)) {
     is_target_connector_ = false;
     return;
@@ -345,10 +817,13 @@ void OsmWay::identifyTargetConnector() {
   is_target_connector_ = true;
 }
 
-void OsmWay::splitIntoSegments() {
+bool OsmWay::splitIntoSegments() {
+  std::vector<std::vector<OsmNode*>> previous_segment_nodes_vector;
+  previous_segment_nodes_vector.swap(segment_nodes_vector_);
+  number_of_segments_ = 0;
   const size_t number_of_ref_nodes = ref_node_vector_.size();
   if (number_of_ref_nodes < 2) {
-    return;
+    return !previous_segment_nodes_vector.empty();
   }
   int last_idx = 0;
   int idx = 0;
@@ -372,116 +847,70 @@ void OsmWay::splitIntoSegments() {
       break;
     }
   }
+  return segment_nodes_vector_ != previous_segment_nodes_vector;
 }
 
 // void OsmWay::setUsedByRelation(bool used_by_relation) { used_by_relation_ = used_by_relation; }
 
 void OsmWay::generateHighwayAllowedModeTypes(const absl::flat_hash_set<ModeType>& highway_mode_types) {
-  if (highway_mode_types.find(ModeType::AUTO) != highway_mode_types.end()) {
-    if (checkAllowedUsedAutoInMotor_Vehicle(motor_vehicle_) || checkAllowedUsedAutoInMotorCar(motorcar_) ||
-        (!checkAllowedUsedAutoExHighway(highway_) && !checkAllowedUsedAutoExMotor_Vehicle(motor_vehicle_) &&
-         !checkAllowedUsedAutoExMotorCar(motorcar_) && !checkAllowedUsedAutoExAccess(access_) &&
-         !checkAllowedUsedAutoExService(service_))) {
-      allowed_mode_types_.push_back(ModeType::AUTO);
-    }
-  }
-  if (highway_mode_types.find(ModeType::BIKE) != highway_mode_types.end()) {
-    if (checkAllowedUsedBikeInBicycle(bicycle_) ||
-        (!checkAllowedUsedBikeExHighway(highway_) && !checkAllowedUsedBikeExBicycle(bicycle_) &&
-         !checkAllowedUsedBikeExService(service_) && !checkAllowedUsedBikeExAccess(access_))) {
-      allowed_mode_types_.push_back(ModeType::BIKE);
-    }
-  }
-  if (highway_mode_types.find(ModeType::WALK) != highway_mode_types.end()) {
-    if (checkAllowedUsedWalkInFoot(foot_) ||
-        (!checkAllowedUsedWalkExHighway(highway_) && !checkAllowedUsedWalkExFoot(foot_) &&
-         !checkAllowedUsedWalkExService(service_) && !checkAllowedUsedWalkExAccess(access_))) {
-      allowed_mode_types_.push_back(ModeType::WALK);
+  for (const auto& [mode_type, tag_flag] :
+       {std::pair{ModeType::AUTO, AUTO_ALLOWED}, {ModeType::BIKE, BIKE_ALLOWED}, {ModeType::WALK, WALK_ALLOWED}}) {
+    if (hasTagFlag(tag_flag) && highway_mode_types.find(mode_type) != highway_mode_types.end()) {
+      allowed_mode_types_.push_back(mode_type);
     }
   }
 }
 
-void OsmWay::mapRefNodes(const absl::flat_hash_map<OsmIdType, OsmNode*>& osm_node_dict) {
+OsmNode* findOsmNode(std::vector<OsmNode>& osm_node_vector, OsmIdType osm_node_id) {
+  auto iter = std::lower_bound(
+      osm_node_vector.begin(), osm_node_vector.end(), osm_node_id,
+      [](const OsmNode& osm_node, OsmIdType target_osm_node_id) { return osm_node.osmNodeId() < target_osm_node_id; });
+  return iter != osm_node_vector.end() && iter->osmNodeId() == osm_node_id ? &(*iter) : nullptr;
+}
+
+void OsmWay::mapRefNodes(std::vector<OsmNode>& osm_node_vector,
+                         const absl::flat_hash_map<OsmIdType, OsmNode*>* extra_osm_node_dict) {
   if (ref_node_id_vector_.empty()) {
     return;
   }
   const size_t number_of_ref_nodes = ref_node_id_vector_.size();
   ref_node_vector_.reserve(number_of_ref_nodes);
   for (const OsmIdType ref_node_id : ref_node_id_vector_) {
-    auto iter = osm_node_dict.find(ref_node_id);
-    if (iter == osm_node_dict.end()) {
+    OsmNode* osm_node = findOsmNode(osm_node_vector, ref_node_id);
+    if (osm_node == nullptr && extra_osm_node_dict != nullptr) {
+      auto iter = extra_osm_node_dict->find(ref_node_id);
+      osm_node = iter != extra_osm_node_dict->end() ? iter->second : nullptr;
+    }
+    if (osm_node == nullptr) {
       LOG(WARNING) << "unkown ref node " << ref_node_id << " in way " << osm_way_id_
                    << ", the way will not be imported";
       ref_node_vector_.clear();
       return;
     }
-    ref_node_vector_.push_back(iter->second);
+    ref_node_vector_.push_back(osm_node);
   }
   from_node_ = ref_node_vector_.at(0);
   to_node_ = ref_node_vector_.back();
 }
 
-const std::regex& getFloatNumMatchingPattern() {
-  static const std::regex pattern(R"(\d+\.?\d*)");
-  return pattern;
-}
+bool OsmWay::hasTagFlag(uint16_t tag_flag) const { return (tag_flags_ & tag_flag) != 0; }
 
 void OsmWay::configAttributes() {
-  // lane info
-  if (!lanes_raw_.empty()) {
-    std::smatch match;
-    if (std::regex_search(lanes_raw_, match, getFloatNumMatchingPattern())) {
-      lanes_ = static_cast<int32_t>(std::round(std::stof(match.str())));
-    }
-  }
-  if (!forward_lanes_raw_.empty()) {
-    std::smatch match;
-    if (std::regex_search(forward_lanes_raw_, match, getFloatNumMatchingPattern())) {
-      forward_lanes_ = static_cast<int32_t>(std::round(std::stof(match.str())));
-    }
-  }
-  if (!backward_lanes_raw_.empty()) {
-    std::smatch match;
-    if (std::regex_search(backward_lanes_raw_, match, getFloatNumMatchingPattern())) {
-      backward_lanes_ = static_cast<int32_t>(std::round(std::stof(match.str())));
-    }
-  }
-
-  // speed info
-  if (!max_speed_raw_.empty()) {
-    std::smatch match;
-    if (std::regex_search(max_speed_raw_, match, getFloatNumMatchingPattern())) {
-      max_speed_ = absl::StrContains(max_speed_raw_, "mph") ? std::round(std::stof(match.str()) * MPH_TO_KPH)
-                                                            : std::stof(match.str());
-    }
+  if (way_type_ != WayType::HIGHWAY) {
+    is_oneway_ = true;
+    return;
   }
-
-  // oneway info
-  if (way_type_ == WayType::HIGHWAY) {
-    if (!oneway_raw_.empty()) {
-      if (oneway_raw_ == "yes" || oneway_raw_ == "1") {
-        is_oneway_ = true;
-      } else if (oneway_raw_ == "no" || oneway_raw_ == "0") {
-        is_oneway_ = false;
-      } else if (oneway_raw_ == "-1") {
-        is_oneway_ = true;
-        is_reversed_ = true;
-      } else if (oneway_raw_ == "reversible" || oneway_raw_ == "alternating") {
-        // todo: reversible, alternating: https://wiki.openstreetmap.org/wiki/Tag:oneway%3Dreversible
-        is_oneway_ = false;
-      } else {
-        DLOG(WARNING) << "new oneway type detected at way " << osm_way_id_ << " " << oneway_raw_;
-      }
-    }
-    if (!is_oneway_.has_value()) {
-      if (junction_ == "circular" || junction_ == "roundabout") {
-        is_oneway_ = true;
-      } else {
-        is_oneway_ = getDefaultOneWayFlag(highway_link_type_);
-      }
-    }
-  } else {
+  if (hasTagFlag(ONEWAY_YES)) {
+    is_oneway_ = true;
+  } else if (hasTagFlag(ONEWAY_NO)) {
+    is_oneway_ = false;
+  } else if (hasTagFlag(ONEWAY_REVERSED)) {
     is_oneway_ = true;
+    is_reversed_ = true;
+  } else if (hasTagFlag(ROUNDABOUT)) {
+    is_oneway_ = true;
+  } else {
+    is_oneway_ = getDefaultOneWayFlag(highway_link_type_);
   }
 }
 
@@ -501,7 +930,32 @@ OsmRelation::OsmRelation(const osmium::Relation& relation, const std::vector<std
   }
 }
 
+OsmRelation::OsmRelation(BinaryReader& reader)
+    : osm_relation_id_(reader.read<OsmIdType>()),
+      name_(reader.readString()),
+      member_id_vector_(reader.readVector<OsmIdType>()),
+      member_type_vector_(reader.readVector<osmium::item_type>()),
+      member_role_vector_(reader.readStringVector()),
+      building_(reader.readString()),
+      amenity_(reader.readString()),
+      leisure_(reader.readString()),
+      osm_attributes_(reader.readStringVector()) {}
+
+void OsmRelation::serialize(std::string& buffer) const {
+  appendBinary<OsmIdType>(buffer, osm_relation_id_);
+  appendBinaryString(buffer, name_);
+  appendBinaryVector(buffer, member_id_vector_);
+  appendBinaryVector(buffer, member_type_vector_);
+  appendBinaryStringVector(buffer, member_role_vector_);
+  appendBinaryString(buffer, building_);
+  appendBinaryString(buffer, amenity_);
+  appendBinaryString(buffer, leisure_);
+  appendBinaryStringVector(buffer, osm_attributes_);
+}
+
 void OsmRelation::initOsmRelation(const absl::flat_hash_map<OsmIdType, OsmWay*>& osm_way_dict) {
+  member_way_vector_.clear();
+  member_way_role_vector_.clear();
   if (member_id_vector_.empty()) {
     return;
   }
@@ -538,90 +992,273 @@ const std::vector<std::string>& OsmRelation::osmAttributes() const { return osm_
 OsmNetwork::OsmNetwork(const std::filesystem::path& osm_filepath, absl::flat_hash_set<ModeType> mode_types,
                        absl::flat_hash_set<HighWayLinkType> link_types,
                        absl::flat_hash_set<HighWayLinkType> connector_link_types, bool POI,
-                       const OsmParsingConfig* osm_parsing_config, bool strict_boundary)
+                       const OsmParsingConfig* osm_parsing_config, bool strict_boundary,
+                       std::unique_ptr<geos::geom::Geometry> clip_geometry, OsmCache* osm_cache, StatsRecorder* stats)
     : mode_types_(std::move(mode_types)),
       link_types_(std::move(link_types)),
       connector_link_types_(std::move(connector_link_types)),
       POI_(POI),
       osm_parsing_config_(osm_parsing_config),
-      strict_boundary_(strict_boundary) {
+      strict_boundary_(strict_boundary),
+      stats_(stats) {
   if (!std::filesystem::exists(osm_filepath)) {
     LOG(FATAL) << "osm file " << osm_filepath << " does not exist";
     return;
   }
 
   factory_ = geos::geom::GeometryFactory::create();
+  // the clip region is kept to select the elements of osm change files
+  if (clip_geometry != nullptr) {
+    clip_region_ = std::make_unique<ClipRegion>(std::move(clip_geometry));
+  }
 
   const auto time1 = std::chrono::high_resolution_clock::now();
-  OsmHandler handler(mode_types_, link_types_, connector_link_types_, POI_, osm_parsing_config_);
-  osmium::thread::Pool pool{};
+  // cache entries hold the elements selected for all modes, link types and POIs, so that they can be reused with
+  // different mode_types, link_types, connector_link_types and POI. other options change the elements and are part of
+  // the entry key
+  std::string cache_options;
+  bool loaded_from_cache = false;
+  if (osm_cache != nullptr) {
+    appendBinaryStringVector(cache_options, osm_parsing_config_->osm_node_attributes);
+    appendBinaryStringVector(cache_options, osm_parsing_config_->osm_link_attributes);
+    appendBinaryStringVector(cache_options, osm_parsing_config_->osm_poi_attributes);
+    appendBinary<uint8_t>(cache_options, strict_boundary_ ? 1 : 0);
+    appendBinaryString(cache_options, clip_region_ != nullptr ? clip_region_->geometry()->toText() : "");
+    StatsStage read_cache_stage(stats_, "read osm cache");
+    const std::optional<std::string> cache_data = osm_cache->read(osm_filepath, cache_options);
+    if (cache_data.has_value()) {
+      loaded_from_cache = loadOsmElements(cache_data.value());  // NOLINT
+      if (!loaded_from_cache) {
+        LOG(WARNING) << "invalid osm cache entry for " << osm_filepath << ", parsing the osm file";
+      }
+      read_cache_stage.addCount("bytes", static_cast<int64_t>(cache_data->size()));
+    }
+    read_cache_stage.addCount("hit", loaded_from_cache ? 1 : 0);
+  }
+  if (loaded_from_cache) {
+    LOG(INFO) << "osm data loaded from cache";
+  } else {
+    const bool parsed = parseOsmFile(osm_filepath, osm_cache != nullptr);
+    // elements of failed or cancelled runs are incomplete
+    if (osm_cache != nullptr && parsed && !isCancelled()) {
+      StatsStage write_cache_stage(stats_, "write osm cache");
+      const std::string cache_data = serializeOsmElements();
+      osm_cache->write(osm_filepath, cache_options, cache_data);
+      releaseOsmElements();
+      loadOsmElements(cache_data);
+      write_cache_stage.addCount("bytes", static_cast<int64_t>(cache_data.size()));
+    }
+  }
+  LOG(INFO) << "nodes: " << osm_node_vector_.size() << " ways: " << osm_way_vector_.size()
+            << " relations: " << osm_relation_vector_.size();
+
+  const auto time3 = std::chrono::high_resolution_clock::now();
+  DLOG(INFO) << "pass osm "
+             << (std::chrono::duration_cast<std::chrono::microseconds>(time3 - time1) * MICROSECONDS_TO_SECOND).count()
+             << "seconds";
+
+  if (isCancelled()) {
+    return;
+  }
+  processOsmData();
+
+  const auto time4 = std::chrono::high_resolution_clock::now();
+  DLOG(INFO) << "process osm "
+             << (std::chrono::duration_cast<std::chrono::microseconds>(time4 - time3) * MICROSECONDS_TO_SECOND).count()
+             << "seconds";
+}
+
+OsmNetwork::~OsmNetwork() { releaseOsmElements(); }
+
+// osmium::apply buffer by buffer, reporting the bytes read to the current RunControl. stops reading when the control is
+// cancelled
+void applyWithProgress(osmium::io::Reader& reader, OsmHandler& handler, const std::string& stage) {
+  RunControl* control = RunControl::current();
+  while (!isCancelled(control)) {
+    osmium::memory::Buffer buffer = reader.read();
+    if (!buffer) {
+      break;
+    }
+    osmium::apply(buffer, handler);
+    if (control != nullptr) {
+      control->reportProgress(stage, {{"bytes_read", static_cast<int64_t>(reader.offset())},
+                                      {"file_size", static_cast<int64_t>(reader.file_size())}});
+    }
+  }
+}
+
+bool OsmNetwork::parseOsmFile(const std::filesystem::path& osm_filepath, bool all_elements) {
+  StatsStage parse_stage(stats_, "parse osm file");
+  const auto time1 = std::chrono::high_resolution_clock::now();
+  const bool parse_poi = all_elements || POI_;
+  OsmHandler handler(all_elements ? absl::flat_hash_set<ModeType>{ModeType::AUTO, ModeType::BIKE, ModeType::WALK,
+                                                                  ModeType::RAILWAY, ModeType::AEROWAY}
+                                  : mode_types_,
+                     all_elements ? absl::flat_hash_set<HighWayLinkType>{} : link_types_,
+                     all_elements ? absl::flat_hash_set<HighWayLinkType>{} : connector_link_types_, parse_poi,
+                     osm_parsing_config_, &string_pool_);
+  if (clip_region_ != nullptr) {
+    boundary_ = clip_region_->geometry()->clone();
+    handler.setClipRegion(clip_region_.get(), strict_boundary_);
+  }
+  // 0 is the osmium default
+  osmium::thread::Pool pool{currentNumThreads()};
+  bool parsed = true;
   try {
     const osmium::io::File input_file{osm_filepath.string()};
 
-    osmium::io::Reader reader{input_file, pool};
-    const osmium::Box& box = reader.header().box();
-    if (reader.header().box().valid()) {
-      boundary_ = factory_->createPolygon({geos::geom::Coordinate(box.bottom_left().lon(), box.bottom_left().lat()),
-                                           geos::geom::Coordinate(box.top_right().lon(), box.bottom_left().lat()),
-                                           geos::geom::Coordinate(box.top_right().lon(), box.top_right().lat()),
-                                           geos::geom::Coordinate(box.bottom_left().lon(), box.top_right().lat()),
-                                           geos::geom::Coordinate(box.bottom_left().lon(), box.bottom_left().lat())});
-    } else {
-      LOG(INFO) << "no valid boundary information in the osm file";
-    }
-    reader.close();
+    // Relations are parsed before ways when POIs are needed, so that ways used by POI relations are known when ways
+    // are parsed. Nodes are stored before ways in osm files, but only nodes referenced by the selected ways are needed,
+    // so nodes are read after ways. With a clip region, ways are selected by the locations of their nodes, so nodes in
+    // the region are read first, in the same pass as relations. They are kept, and nodes are only read again if the
+    // ways use nodes outside the region.
+    auto time_pass1 = time1;
+    if (clip_region_ != nullptr || parse_poi) {
+      const std::string pass1_name = clip_region_ == nullptr ? "pass 1 (relations)"
+                                     : parse_poi             ? "pass 1 (nodes in the clip region and relations)"
+                                                             : "pass 1 (nodes in the clip region)";
+      StatsStage pass1_stage(stats_, pass1_name);
+      const osmium::osm_entity_bits::type pass1_bits =
+          (clip_region_ != nullptr ? osmium::osm_entity_bits::node : osmium::osm_entity_bits::nothing) |
+          (parse_poi ? osmium::osm_entity_bits::relation : osmium::osm_entity_bits::nothing);
+      osmium::io::Reader reader_pass1{input_file, pass1_bits, pool};
+      handler.updateParseTargets(false, false, parse_poi);
+      handler.updateRegionParseTarget(clip_region_ != nullptr);
+      applyWithProgress(reader_pass1, handler, pass1_name);
+      reader_pass1.close();
+      handler.updateRegionParseTarget(false);
+      pass1_stage.addCount("osm_relations", static_cast<int64_t>(handler.osmRelationVector().size()));
+      pass1_stage.end();
 
-    if (POI_) {
-      osmium::io::Reader reader_relation{input_file, osmium::osm_entity_bits::relation, pool};
-      handler.updateParseTargets(false, false, true);
-      osmium::apply(reader_relation, handler);
-      reader_relation.close();
+      time_pass1 = std::chrono::high_resolution_clock::now();
+      LOG(INFO) << "osm parsing " << pass1_name << " "
+                << (std::chrono::duration_cast<std::chrono::microseconds>(time_pass1 - time1) * MICROSECONDS_TO_SECOND)
+                       .count()
+                << " seconds";
     }
 
+    StatsStage pass2_stage(stats_, "pass 2 (ways)");
     osmium::io::Reader reader_way{input_file, osmium::osm_entity_bits::way, pool};
+    if (!boundary_.has_value()) {
+      const osmium::Box box = reader_way.header().box();
+      if (box.valid()) {
+        boundary_ = factory_->createPolygon({geos::geom::Coordinate(box.bottom_left().lon(), box.bottom_left().lat()),
+                                             geos::geom::Coordinate(box.top_right().lon(), box.bottom_left().lat()),
+                                             geos::geom::Coordinate(box.top_right().lon(), box.top_right().lat()),
+                                             geos::geom::Coordinate(box.bottom_left().lon(), box.top_right().lat()),
+                                             geos::geom::Coordinate(box.bottom_left().lon(), box.bottom_left().lat())});
+      } else {
+        LOG(INFO) << "no valid boundary information in the osm file";
+      }
+    }
     handler.updateParseTargets(false, true, false);
-    osmium::apply(reader_way, handler);
+    applyWithProgress(reader_way, handler, "pass 2 (ways)");
     reader_way.close();
+    size_t number_of_nodes_to_read = 0;
+    if (clip_region_ != nullptr) {
+      handler.resolveRegionRelations();
+      number_of_nodes_to_read = handler.takeUsedRegionNodes();
+    }
+    handler.releaseRegionNodes();
+    pass2_stage.addCount("osm_ways", static_cast<int64_t>(handler.osmWayVector().size()));
+    pass2_stage.end();
 
-    osmium::io::Reader reader_node{input_file, osmium::osm_entity_bits::node, pool};
-    handler.updateParseTargets(true, false, false);
-    osmium::apply(reader_node, handler);
-    reader_node.close();
+    const auto time_pass2 = std::chrono::high_resolution_clock::now();
+    LOG(INFO) << "osm parsing pass 2 (ways) "
+              << (std::chrono::duration_cast<std::chrono::microseconds>(time_pass2 - time_pass1) *
+                  MICROSECONDS_TO_SECOND)
+                     .count()
+              << " seconds";
+
+    if (clip_region_ == nullptr || number_of_nodes_to_read > 0) {
+      StatsStage pass3_stage(stats_, "pass 3 (nodes)");
+      osmium::io::Reader reader_node{input_file, osmium::osm_entity_bits::node, pool};
+      handler.updateParseTargets(true, false, false);
+      applyWithProgress(reader_node, handler, "pass 3 (nodes)");
+      reader_node.close();
+      pass3_stage.end();
+
+      const auto time_pass3 = std::chrono::high_resolution_clock::now();
+      LOG(INFO) << "osm parsing pass 3 (nodes) "
+                << (std::chrono::duration_cast<std::chrono::microseconds>(time_pass3 - time_pass2) *
+                    MICROSECONDS_TO_SECOND)
+                       .count()
+                << " seconds";
+    }
+    parse_stage.addCount("osm_nodes", static_cast<int64_t>(handler.osmNodeVector().size()));
   } catch (const std::exception& e) {
     std::cerr << e.what() << '\n';
+    parsed = false;
   }
-  const auto time2 = std::chrono::high_resolution_clock::now();
-  DLOG(INFO) << "parse osm "
-             << (std::chrono::duration_cast<std::chrono::microseconds>(time2 - time1) * MICROSECONDS_TO_SECOND).count()
-             << "seconds";
 
   osm_node_vector_ = std::move(handler.osmNodeVector());
   osm_way_vector_ = std::move(handler.osmWayVector());
   osm_relation_vector_ = std::move(handler.osmRelationVector());
-  LOG(INFO) << "nodes: " << osm_node_vector_.size() << " ways: " << osm_way_vector_.size()
-            << " relations: " << osm_relation_vector_.size();
-
-  const auto time3 = std::chrono::high_resolution_clock::now();
-  DLOG(INFO) << "pass osm "
-             << (std::chrono::duration_cast<std::chrono::microseconds>(time3 - time2) * MICROSECONDS_TO_SECOND).count()
-             << "seconds";
-
-  processOsmData();
+  return parsed;
+}
 
-  const auto time4 = std::chrono::high_resolution_clock::now();
-  DLOG(INFO) << "process osm "
-             << (std::chrono::duration_cast<std::chrono::microseconds>(time4 - time3) * MICROSECONDS_TO_SECOND).count()
-             << "seconds";
+// boundary, relations, ways, nodes. relations come first since ways are selected by the relations using them, and
+// nodes by the ways in use
+std::string OsmNetwork::serializeOsmElements() const {
+  std::string buffer;
+  appendBinaryString(buffer, boundary_.has_value() ? boundary_.value()->toText() : "");  // NOLINT
+  appendBinary<uint64_t>(buffer, osm_relation_vector_.size());
+  for (const OsmRelation* osm_relation : osm_relation_vector_) {
+    osm_relation->serialize(buffer);
+  }
+  appendBinary<uint64_t>(buffer, osm_way_vector_.size());
+  for (const OsmWay* osm_way : osm_way_vector_) {
+    osm_way->serialize(buffer);
+  }
+  appendBinary<uint64_t>(buffer, osm_node_vector_.size());
+  for (const OsmNode& osm_node : osm_node_vector_) {
+    osm_node.serialize(buffer);
+  }
+  return buffer;
 }
 
-OsmNetwork::~OsmNetwork() {
-  if (!osm_node_vector_.empty()) {
-    const size_t number_of_osm_nodes = osm_node_vector_.size();
-#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_nodes)
-    for (int64_t idx = 0; idx < number_of_osm_nodes; ++idx) {
-      delete osm_node_vector_[idx];
+bool OsmNetwork::loadOsmElements(std::string_view data) {
+  OsmHandler handler(mode_types_, link_types_, connector_link_types_, POI_, osm_parsing_config_, &string_pool_);
+  BinaryReader reader(data);
+  const std::string boundary_wkt = reader.readString();
+  const auto number_of_osm_relations = reader.read<uint64_t>();
+  for (uint64_t idx = 0; idx < number_of_osm_relations && !reader.failed(); ++idx) {
+    handler.addCachedRelation(new OsmRelation(reader));
+  }
+  const auto number_of_osm_ways = reader.read<uint64_t>();
+  for (uint64_t idx = 0; idx < number_of_osm_ways && !reader.failed(); ++idx) {
+    handler.addCachedWay(new OsmWay(reader, string_pool_));
+  }
+  const auto number_of_osm_nodes = reader.read<uint64_t>();
+  for (uint64_t idx = 0; idx < number_of_osm_nodes && !reader.failed(); ++idx) {
+    handler.addCachedNode(OsmNode(reader));
+  }
+
+  std::optional<std::unique_ptr<geos::geom::Geometry>> boundary;
+  if (!reader.failed() && !boundary_wkt.empty()) {
+    try {
+      boundary = geos::io::WKTReader(factory_.get()).read(boundary_wkt);
+    } catch (const std::exception& e) {
+      LOG(WARNING) << "invalid boundary in osm cache entry. " << e.what();
     }
   }
+  if (reader.failed() || !reader.atEnd() || (!boundary_wkt.empty() && !boundary.has_value())) {
+    for (const OsmWay* osm_way : handler.osmWayVector()) {
+      delete osm_way;
+    }
+    for (const OsmRelation* osm_relation : handler.osmRelationVector()) {
+      delete osm_relation;
+    }
+    return false;
+  }
+  boundary_ = std::move(boundary);
+  osm_node_vector_ = std::move(handler.osmNodeVector());
+  osm_way_vector_ = std::move(handler.osmWayVector());
+  osm_relation_vector_ = std::move(handler.osmRelationVector());
+  return true;
+}
+
+void OsmNetwork::releaseOsmElements() {
   if (!osm_way_vector_.empty()) {
     const size_t number_of_osm_ways = osm_way_vector_.size();
 #pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_ways)
@@ -636,22 +1273,36 @@ OsmNetwork::~OsmNetwork() {
       delete osm_relation_vector_[idx];
     }
   }
+  osm_node_vector_.clear();
+  osm_way_vector_.clear();
+  osm_relation_vector_.clear();
 }
 
-const std::optional<std::unique_ptr<geos::geom::Polygon>>& OsmNetwork::boundary() const { return boundary_; }
+const std::optional<std::unique_ptr<geos::geom::Geometry>>& OsmNetwork::boundary() const { return boundary_; }
+const std::vector<OsmNode>& OsmNetwork::osmNodeVector() const { return osm_node_vector_; }
 const std::vector<OsmWay*>& OsmNetwork::osmWayVector() const { return osm_way_vector_; }
 const std::vector<OsmRelation*>& OsmNetwork::osmRelationVector() const { return osm_relation_vector_; }
 
 void OsmNetwork::processOsmData() {
-  initializeElements();
+  StatsStage process_stage(stats_, "process osm data");
+  process_stage.addCount("osm_nodes", static_cast<int64_t>(osm_node_vector_.size()));
+  process_stage.addCount("osm_ways", static_cast<int64_t>(osm_way_vector_.size()));
+  process_stage.addCount("osm_relations", static_cast<int64_t>(osm_relation_vector_.size()));
+  {
+    const StatsStage initialize_stage(stats_, "initialize elements");
+    initializeElements();
+  }
+  const StatsStage segment_stage(stats_, "create way segments");
   createWaySegments();
 }
 
 void OsmNetwork::initializeElements() {
-  absl::flat_hash_map<OsmIdType, OsmNode*> osm_node_dict;
-  osm_node_dict.reserve(osm_node_vector_.size());
-  for (OsmNode* osm_node : osm_node_vector_) {
-    osm_node_dict.emplace(osm_node->osmNodeId(), osm_node);
+  // nodes are usually stored in ascending id order in osm files, in which case no sorting is needed
+  auto osm_node_id_less = [](const OsmNode& node_a, const OsmNode& node_b) {
+    return node_a.osmNodeId() < node_b.osmNodeId();
+  };
+  if (!std::is_sorted(osm_node_vector_.begin(), osm_node_vector_.end(), osm_node_id_less)) {
+    std::sort(osm_node_vector_.begin(), osm_node_vector_.end(), osm_node_id_less);
   }
 
   absl::flat_hash_map<OsmIdType, OsmWay*> osm_way_dict;
@@ -669,37 +1320,58 @@ void OsmNetwork::initializeElements() {
 
   /*================= OsmWay =================*/
   const size_t number_of_osm_ways = osm_way_vector_.size();
-#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_ways, osm_node_dict)
+#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_ways)
   for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
-    osm_way_vector_[idx]->initOsmWay(osm_node_dict);
+    osm_way_vector_[idx]->initOsmWay(osm_node_vector_);
   }
 
-  for (OsmWay* osm_way : osm_way_vector_) {
+  identifyTargetConnectors();
+
+  /*================= OsmRelation =================*/
+  const size_t number_of_osm_relations = osm_relation_vector_.size();
+#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_relations, osm_way_dict)
+  for (int64_t idx = 0; idx < number_of_osm_relations; ++idx) {
+    osm_relation_vector_[idx]->initOsmRelation(osm_way_dict);
+  }
+}
+
+void OsmNetwork::createWaySegments() {
+  identifyTypologyNodes();
+
+  const size_t number_of_osm_ways = osm_way_vector_.size();
+#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_ways)
+  for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
+    osm_way_vector_[idx]->splitIntoSegments();
+  }
+}
+
+void OsmNetwork::identifyTargetConnectors() {
+  for (const OsmWay* osm_way : osm_way_vector_) {
+    if (osm_way->wayType() != WayType::HIGHWAY || !osm_way->isTargetLinkType()) {
+      continue;
+    }
     if (osm_way->fromNode() != nullptr) {
-      osm_way->fromNode()->addOutgoingWay(osm_way);
+      osm_way->fromNode()->setConnectsTargetLinkWay();
     }
     if (osm_way->toNode() != nullptr) {
-      osm_way->toNode()->addIncomingWay(osm_way);
+      osm_way->toNode()->setConnectsTargetLinkWay();
     }
   }
 
+  const size_t number_of_osm_ways = osm_way_vector_.size();
 #pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_ways)
   for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
     osm_way_vector_[idx]->identifyTargetConnector();
   }
-
-  /*================= OsmRelation =================*/
-  const size_t number_of_osm_relations = osm_relation_vector_.size();
-#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_relations, osm_way_dict)
-  for (int64_t idx = 0; idx < number_of_osm_relations; ++idx) {
-    osm_relation_vector_[idx]->initOsmRelation(osm_way_dict);
-  }
 }
 
-void OsmNetwork::createWaySegments() {
-  // ToDo: run in parallel
-  for (const OsmWay* osm_way : osm_way_vector_) {
-    const std::vector<OsmNode*>& ref_node_vector = osm_way->refNodeVector();
+void OsmNetwork::identifyTypologyNodes() {
+  // usage counts are sums over ways and ending flags are only ever set, so the result does not depend on the order in
+  // which ways are processed
+  const size_t number_of_osm_ways = osm_way_vector_.size();
+#pragma omp parallel for schedule(dynamic, 1024) default(none) shared(number_of_osm_ways)
+  for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
+    const std::vector<OsmNode*>& ref_node_vector = osm_way_vector_[idx]->refNodeVector();
     if (ref_node_vector.empty()) {
       continue;
     }
@@ -712,12 +1384,362 @@ void OsmNetwork::createWaySegments() {
   const size_t number_of_osm_nodes = osm_node_vector_.size();
 #pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_nodes)
   for (int64_t idx = 0; idx < number_of_osm_nodes; ++idx) {
-    osm_node_vector_[idx]->setIsTypologyNode();
+    osm_node_vector_[idx].setIsTypologyNode();
+  }
+  for (OsmNode& osm_node : added_osm_node_deque_) {
+    osm_node.setIsTypologyNode();
+  }
+}
+
+OsmNode* OsmNetwork::lookupOsmNode(OsmIdType osm_node_id) {
+  OsmNode* osm_node = findOsmNode(osm_node_vector_, osm_node_id);
+  if (osm_node != nullptr) {
+    return osm_node;
+  }
+  auto iter = added_osm_node_dict_.find(osm_node_id);
+  return iter != added_osm_node_dict_.end() ? iter->second : nullptr;
+}
+
+// Collects the nodes of an osm change file. Deleted nodes are dropped from the collection but stay stored in the
+// network, since ways using them are changed by the same file.
+class OsmChangeNodeHandler : public osmium::handler::Handler {
+ public:
+  explicit OsmChangeNodeHandler(const std::vector<std::string>& osm_node_attributes)
+      : osm_node_attributes_(osm_node_attributes) {}
+
+  void node(const osmium::Node& node) {
+    if (node.visible()) {
+      osm_node_dict_.insert_or_assign(node.id(), OsmNode(node, osm_node_attributes_));
+    } else {
+      osm_node_dict_.erase(node.id());
+    }
+  }
+
+  absl::flat_hash_map<OsmIdType, OsmNode>& osmNodeDict() { return osm_node_dict_; }
+
+ private:
+  const std::vector<std::string>& osm_node_attributes_;
+  absl::flat_hash_map<OsmIdType, OsmNode> osm_node_dict_;
+};
+
+// Records the ids of the ways and relations in an osm change file, including deleted ones, and passes the others to
+// an OsmHandler. With a clip region, the ref nodes of each way are located before the way is passed on.
+class OsmChangeHandler : public osmium::handler::Handler {
+ public:
+  explicit OsmChangeHandler(OsmHandler& handler, std::function<void(OsmIdType)> locate_ref_node)
+      : handler_(handler), locate_ref_node_(std::move(locate_ref_node)) {}
+
+  void way(const osmium::Way& way) {
+    changed_osm_way_ids_.insert(way.id());
+    if (!way.visible()) {
+      return;
+    }
+    if (locate_ref_node_) {
+      for (const osmium::NodeRef& node_ref : way.nodes()) {
+        locate_ref_node_(node_ref.ref());
+      }
+    }
+    handler_.way(way);
+  }
+  void relation(const osmium::Relation& relation) {
+    changed_osm_relation_ids_.insert(relation.id());
+    if (relation.visible()) {
+      handler_.relation(relation);
+    }
+  }
+
+  [[nodiscard]] const absl::flat_hash_set<OsmIdType>& changedOsmWayIds() const { return changed_osm_way_ids_; }
+  [[nodiscard]] const absl::flat_hash_set<OsmIdType>& changedOsmRelationIds() const {
+    return changed_osm_relation_ids_;
+  }
+
+ private:
+  OsmHandler& handler_;
+  std::function<void(OsmIdType)> locate_ref_node_;
+  absl::flat_hash_set<OsmIdType> changed_osm_way_ids_;
+  absl::flat_hash_set<OsmIdType> changed_osm_relation_ids_;
+};
+
+bool isPoiWayType(WayType way_type) { return way_type == WayType::POI || way_type == WayType::POI_COMPONENT; }
+
+std::optional<OsmChange> OsmNetwork::applyChange(const std::filesystem::path& osc_filepath) {
+  if (!std::filesystem::exists(osc_filepath)) {
+    LOG(ERROR) << "osm change file " << osc_filepath << " does not exist";
+    return std::nullopt;
+  }
+  StatsStage change_stage(stats_, "apply osm change to osm elements");
+  const auto time1 = std::chrono::high_resolution_clock::now();
+
+  // the file is read completely before the network is modified
+  OsmChangeNodeHandler node_handler(osm_parsing_config_->osm_node_attributes);
+  OsmHandler handler(mode_types_, link_types_, connector_link_types_, POI_, osm_parsing_config_, &string_pool_);
+  std::function<void(OsmIdType)> locate_ref_node;
+  if (clip_region_ != nullptr) {
+    handler.setClipRegion(clip_region_.get(), strict_boundary_);
+    locate_ref_node = [this, &node_handler, &handler](OsmIdType osm_node_id) {
+      auto iter = node_handler.osmNodeDict().find(osm_node_id);
+      const OsmNode* osm_node = iter != node_handler.osmNodeDict().end() ? &iter->second : lookupOsmNode(osm_node_id);
+      if (osm_node != nullptr) {
+        handler.locateRegionNode(osm_node_id, osm_node->location());
+      }
+    };
+  }
+  OsmChangeHandler change_handler(handler, std::move(locate_ref_node));
+  auto discard_parsed_elements = [&handler]() {
+    for (const OsmWay* osm_way : handler.osmWayVector()) {
+      delete osm_way;
+    }
+    for (const OsmRelation* osm_relation : handler.osmRelationVector()) {
+      delete osm_relation;
+    }
+  };
+  try {
+    const osmium::io::File input_file{osc_filepath.string()};
+    osmium::io::Reader reader_node{input_file, osmium::osm_entity_bits::node};
+    osmium::apply(reader_node, node_handler);
+    reader_node.close();
+
+    // relations are read before ways, like in parseOsmFile
+    if (POI_) {
+      osmium::io::Reader reader_relation{input_file, osmium::osm_entity_bits::relation};
+      handler.updateParseTargets(false, false, true);
+      osmium::apply(reader_relation, change_handler);
+      reader_relation.close();
+      // ways in the file may be members of relations that are not changed
+      const absl::flat_hash_set<OsmIdType>& changed_osm_relation_ids = change_handler.changedOsmRelationIds();
+      for (const OsmRelation* osm_relation : osm_relation_vector_) {
+        if (changed_osm_relation_ids.find(osm_relation->osmRelationId()) == changed_osm_relation_ids.end()) {
+          handler.registerRelationMemberWays(osm_relation);
+        }
+      }
+    }
+    osmium::io::Reader reader_way{input_file, osmium::osm_entity_bits::way};
+    handler.updateParseTargets(false, true, false);
+    osmium::apply(reader_way, change_handler);
+    reader_way.close();
+  } catch (const std::exception& e) {
+    LOG(ERROR) << "failed to read osm change file " << osc_filepath << ". " << e.what();
+    discard_parsed_elements();
+    return std::nullopt;
+  }
+  // cancellation is only checked before the network is modified. once modified, the change is applied completely
+  if (isCancelled()) {
+    discard_parsed_elements();
+    return std::nullopt;
+  }
+  const absl::flat_hash_set<OsmIdType>& changed_osm_way_ids = change_handler.changedOsmWayIds();
+  const absl::flat_hash_set<OsmIdType>& changed_osm_relation_ids = change_handler.changedOsmRelationIds();
+  handler.releaseRegionNodes();
+  if (clip_region_ != nullptr) {
+    // relations in the file may use kept ways in the clip region that are not in the file. relations that are not
+    // changed keep their member ways outside the region
+    for (const OsmRelation* osm_relation : handler.osmRelationVector()) {
+      const std::vector<OsmIdType>& member_id_vector = osm_relation->memberIdVector();
+      const std::vector<osmium::item_type>& member_type_vector = osm_relation->memberTypeVector();
+      for (size_t idx = 0; idx < member_id_vector.size(); ++idx) {
+        const OsmIdType member_id = member_id_vector[idx];
+        if (member_type_vector[idx] != osmium::item_type::way ||
+            changed_osm_way_ids.find(member_id) != changed_osm_way_ids.end()) {
+          continue;
+        }
+        auto iter = std::lower_bound(
+            osm_way_vector_.begin(), osm_way_vector_.end(), member_id,
+            [](const OsmWay* osm_way, OsmIdType osm_way_id) { return osm_way->osmWayId() < osm_way_id; });
+        if (iter != osm_way_vector_.end() && (*iter)->osmWayId() == member_id &&
+            std::any_of((*iter)->refNodeVector().begin(), (*iter)->refNodeVector().end(),
+                        [this](const OsmNode* osm_node) { return clip_region_->covers(osm_node->location()); })) {
+          handler.markMemberWayInRegion(member_id);
+        }
+      }
+    }
+    std::vector<const OsmRelation*> kept_osm_relations;
+    for (const OsmRelation* osm_relation : osm_relation_vector_) {
+      if (changed_osm_relation_ids.find(osm_relation->osmRelationId()) == changed_osm_relation_ids.end()) {
+        kept_osm_relations.push_back(osm_relation);
+      }
+    }
+    handler.resolveRegionRelations(kept_osm_relations);
   }
 
+  // only nodes used by selected ways are stored, so ways newly selected by the file, e.g. after a change of their
+  // highway tag, may use nodes that are neither stored nor in the file. such changes need the full osm file
+  for (const OsmWay* osm_way : handler.osmWayVector()) {
+    for (const OsmIdType ref_node_id : osm_way->refNodeIdVector()) {
+      if (node_handler.osmNodeDict().find(ref_node_id) == node_handler.osmNodeDict().end() &&
+          lookupOsmNode(ref_node_id) == nullptr) {
+        LOG(ERROR) << "way " << osm_way->osmWayId() << " in osm change file " << osc_filepath << " uses node "
+                   << ref_node_id << ", which is neither in the file nor in the network. parse the updated osm file "
+                   << "instead";
+        discard_parsed_elements();
+        return std::nullopt;
+      }
+    }
+  }
+
+  OsmChange osm_change;
+  osm_change.updated_osm_way_ids = changed_osm_way_ids;
+  osm_change.pois_changed = !changed_osm_relation_ids.empty();
+  auto osm_way_id_less = [](const OsmWay* way_a, const OsmWay* way_b) { return way_a->osmWayId() < way_b->osmWayId(); };
+
+  // nodes whose topology may change: nodes of changed ways, before and after the change, and changed nodes
+  absl::flat_hash_set<OsmNode*> affected_osm_nodes;
+
+  /*================= OsmWay =================*/
+  size_t number_of_kept_osm_ways = 0;
+  for (OsmWay* osm_way : osm_way_vector_) {
+    if (changed_osm_way_ids.find(osm_way->osmWayId()) == changed_osm_way_ids.end()) {
+      osm_way_vector_[number_of_kept_osm_ways++] = osm_way;
+      continue;
+    }
+    osm_change.pois_changed = osm_change.pois_changed || isPoiWayType(osm_way->wayType());
+    affected_osm_nodes.insert(osm_way->refNodeVector().begin(), osm_way->refNodeVector().end());
+    delete osm_way;
+  }
+  osm_way_vector_.resize(number_of_kept_osm_ways);
+  std::vector<OsmWay*>& new_osm_way_vector = handler.osmWayVector();
+  absl::flat_hash_set<OsmIdType> new_ref_node_ids;
+  for (const OsmWay* osm_way : new_osm_way_vector) {
+    osm_change.pois_changed = osm_change.pois_changed || isPoiWayType(osm_way->wayType());
+    new_ref_node_ids.insert(osm_way->refNodeIdVector().begin(), osm_way->refNodeIdVector().end());
+  }
+  std::stable_sort(new_osm_way_vector.begin(), new_osm_way_vector.end(), osm_way_id_less);
+  osm_way_vector_.insert(osm_way_vector_.end(), new_osm_way_vector.begin(), new_osm_way_vector.end());
+  std::inplace_merge(osm_way_vector_.begin(), osm_way_vector_.begin() + static_cast<int64_t>(number_of_kept_osm_ways),
+                     osm_way_vector_.end(), osm_way_id_less);
+
+  /*================= OsmRelation =================*/
+  size_t number_of_kept_osm_relations = 0;
+  for (OsmRelation* osm_relation : osm_relation_vector_) {
+    if (changed_osm_relation_ids.find(osm_relation->osmRelationId()) == changed_osm_relation_ids.end()) {
+      osm_relation_vector_[number_of_kept_osm_relations++] = osm_relation;
+    } else {
+      delete osm_relation;
+    }
+  }
+  osm_relation_vector_.resize(number_of_kept_osm_relations);
+  std::vector<OsmRelation*>& new_osm_relation_vector = handler.osmRelationVector();
+  auto osm_relation_id_less = [](const OsmRelation* relation_a, const OsmRelation* relation_b) {
+    return relation_a->osmRelationId() < relation_b->osmRelationId();
+  };
+  std::sort(new_osm_relation_vector.begin(), new_osm_relation_vector.end(), osm_relation_id_less);
+  osm_relation_vector_.insert(osm_relation_vector_.end(), new_osm_relation_vector.begin(),
+                              new_osm_relation_vector.end());
+  std::inplace_merge(osm_relation_vector_.begin(),
+                     osm_relation_vector_.begin() + static_cast<int64_t>(number_of_kept_osm_relations),
+                     osm_relation_vector_.end(), osm_relation_id_less);
+
+  /*================= OsmNode =================*/
+  // stored nodes are updated in place, so that ways and network nodes using them stay valid
+  for (auto& [osm_node_id, osm_node] : node_handler.osmNodeDict()) {
+    OsmNode* stored_osm_node = lookupOsmNode(osm_node_id);
+    if (stored_osm_node != nullptr) {
+      *stored_osm_node = std::move(osm_node);
+      osm_change.updated_osm_nodes.push_back(stored_osm_node);
+      affected_osm_nodes.insert(stored_osm_node);
+    } else if (new_ref_node_ids.find(osm_node_id) != new_ref_node_ids.end()) {
+      added_osm_node_deque_.push_back(std::move(osm_node));
+      added_osm_node_dict_.emplace(osm_node_id, &added_osm_node_deque_.back());
+    }
+  }
+  for (OsmWay* osm_way : new_osm_way_vector) {
+    osm_way->initOsmWay(osm_node_vector_, &added_osm_node_dict_);
+    affected_osm_nodes.insert(osm_way->refNodeVector().begin(), osm_way->refNodeVector().end());
+  }
+
+  absl::flat_hash_map<OsmIdType, OsmWay*> osm_way_dict;
+  osm_way_dict.reserve(osm_way_vector_.size());
+  for (OsmWay* osm_way : osm_way_vector_) {
+    osm_way_dict.emplace(osm_way->osmWayId(), osm_way);
+  }
+  for (OsmRelation* osm_relation : osm_relation_vector_) {
+    osm_relation->initOsmRelation(osm_way_dict);
+  }
+
+  /*================= topology =================*/
+  // connector and typology flags of a node depend on all ways using it. they are identified again for affected nodes
+  // from the ways using them, and only these ways are split again
+  for (OsmNode* osm_node : affected_osm_nodes) {
+    osm_node->resetTopology();
+  }
   const size_t number_of_osm_ways = osm_way_vector_.size();
-#pragma omp parallel for schedule(dynamic) default(none) shared(number_of_osm_ways)
+  std::vector<uint8_t> uses_affected_node(number_of_osm_ways, 0);
+#pragma omp parallel for schedule(dynamic, 1024) default(none) \
+    shared(number_of_osm_ways, affected_osm_nodes, uses_affected_node)
   for (int64_t idx = 0; idx < number_of_osm_ways; ++idx) {
-    osm_way_vector_[idx]->splitIntoSegments();
+    const std::vector<OsmNode*>& ref_node_vector = osm_way_vector_[idx]->refNodeVector();
+    uses_affected_node[idx] = std::any_of(ref_node_vector.begin(), ref_node_vector.end(),
+                                          [&affected_osm_nodes](OsmNode* osm_node) {
+                                            return affected_osm_nodes.find(osm_node) != affected_osm_nodes.end();
+                                          })
+                                  ? 1
+                                  : 0;
   }
+  std::vector<OsmWay*> affected_osm_ways;
+  for (size_t idx = 0; idx < number_of_osm_ways; ++idx) {
+    if (uses_affected_node[idx] != 0) {
+      affected_osm_ways.push_back(osm_way_vector_[idx]);
+    }
+  }
+  // like identifyTargetConnectors and identifyTypologyNodes, restricted to affected nodes
+  for (const OsmWay* osm_way : affected_osm_ways) {
+    const std::vector<OsmNode*>& ref_node_vector = osm_way->refNodeVector();
+    for (OsmNode* ref_node : ref_node_vector) {
+      if (affected_osm_nodes.find(ref_node) != affected_osm_nodes.end()) {
+        ref_node->changeUsageCount();
+      }
+    }
+    const bool connects_target_link_way = osm_way->wayType() == WayType::HIGHWAY && osm_way->isTargetLinkType();
+    for (OsmNode* ending_node : {ref_node_vector.at(0), ref_node_vector.back()}) {
+      if (affected_osm_nodes.find(ending_node) == affected_osm_nodes.end()) {
+        continue;
+      }
+      ending_node->setIsEndingNode(true);
+      if (connects_target_link_way) {
+        ending_node->setConnectsTargetLinkWay();
+      }
+    }
+  }
+  for (OsmNode* osm_node : affected_osm_nodes) {
+    osm_node->setIsTypologyNode();
+  }
+
+  const absl::flat_hash_set<const OsmNode*> updated_osm_node_set(osm_change.updated_osm_nodes.begin(),
+                                                                 osm_change.updated_osm_nodes.end());
+  const size_t number_of_affected_osm_ways = affected_osm_ways.size();
+  std::vector<uint8_t> is_updated_way(number_of_affected_osm_ways, 0);
+#pragma omp parallel for schedule(dynamic, 64) default(none) \
+    shared(number_of_affected_osm_ways, affected_osm_ways, updated_osm_node_set, is_updated_way)
+  for (int64_t idx = 0; idx < number_of_affected_osm_ways; ++idx) {
+    OsmWay* osm_way = affected_osm_ways[idx];
+    const bool was_target_connector = osm_way->isTargetConnector();
+    osm_way->identifyTargetConnector();
+    const bool segments_changed = osm_way->splitIntoSegments();
+    const bool connector_changed = osm_way->isTargetConnector() != was_target_connector;
+    const std::vector<OsmNode*>& ref_node_vector = osm_way->refNodeVector();
+    const bool uses_updated_node =
+        !updated_osm_node_set.empty() &&
+        std::any_of(ref_node_vector.begin(), ref_node_vector.end(), [&updated_osm_node_set](const OsmNode* osm_node) {
+          return updated_osm_node_set.find(osm_node) != updated_osm_node_set.end();
+        });
+    is_updated_way[idx] = segments_changed || connector_changed || uses_updated_node ? 1 : 0;
+  }
+  for (size_t idx = 0; idx < number_of_affected_osm_ways; ++idx) {
+    if (is_updated_way[idx] == 0) {
+      continue;
+    }
+    const OsmWay* osm_way = affected_osm_ways[idx];
+    osm_change.updated_osm_way_ids.insert(osm_way->osmWayId());
+    osm_change.pois_changed = osm_change.pois_changed || isPoiWayType(osm_way->wayType());
+  }
+
+  change_stage.addCount("changed_osm_ways", static_cast<int64_t>(changed_osm_way_ids.size()));
+  change_stage.addCount("changed_osm_nodes", static_cast<int64_t>(node_handler.osmNodeDict().size()));
+  change_stage.addCount("split_osm_ways", static_cast<int64_t>(number_of_affected_osm_ways));
+  change_stage.addCount("updated_osm_ways", static_cast<int64_t>(osm_change.updated_osm_way_ids.size()));
+  const auto time2 = std::chrono::high_resolution_clock::now();
+  LOG(INFO) << "osm change applied. " << changed_osm_way_ids.size() << " ways and " << node_handler.osmNodeDict().size()
+            << " nodes in the file, " << osm_change.updated_osm_way_ids.size() << " ways updated, "
+            << (std::chrono::duration_cast<std::chrono::microseconds>(time2 - time1) * MICROSECONDS_TO_SECOND).count()
+            << " seconds";
+  return osm_change;
 }
\ No newline at end of file
@@ -7,51 +7,160 @@
 
 #include <absl/container/flat_hash_map.h>
 #include <absl/container/flat_hash_set.h>
+#include <absl/container/node_hash_set.h>
+#include <geos/algorithm/locate/IndexedPointInAreaLocator.h>
 #include <geos/geom/Geometry.h>
 #include <geos/geom/GeometryFactory.h>
 
+#include <cstddef>
 #include <cstdint>
+#include <deque>
 #include <filesystem>
 #include <memory>
 #include <optional>
 #include <osmium/handler.hpp>
 #include <osmium/osm/item_type.hpp>
+#include <osmium/osm/location.hpp>
 #include <osmium/osm/node.hpp>
 #include <osmium/osm/relation.hpp>
 #include <osmium/osm/way.hpp>
 #include <string>
+#include <string_view>
 #include <vector>
 
 #include "config.h"
+#include "osmcache.h"
 #include "osmconfig.h"
+#include "stats.h"
 
 class OsmNode;
 class OsmWay;
 class OsmRelation;
 
+// A polygonal region osm data is clipped to while parsing. Points are tested against the envelope of the region first,
+// then against the indexed rings of the region. The second test is skipped for rectangular regions (bounding boxes).
+class ClipRegion {
+ public:
+  explicit ClipRegion(std::unique_ptr<geos::geom::Geometry> geometry);
+
+  [[nodiscard]] const geos::geom::Geometry* geometry() const;
+  // points on the boundary of the region are covered. the locator builds its index on first use, so the method is not
+  // thread-safe
+  [[nodiscard]] bool covers(const osmium::Location& location);
+
+ private:
+  std::unique_ptr<geos::geom::Geometry> geometry_;
+  bool is_rectangle_;
+  std::unique_ptr<geos::algorithm::locate::IndexedPointInAreaLocator> locator_;
+};
+
+// Stores one copy of each distinct tag value, so that ways sharing a value (highway types, street names split into
+// several ways) do not hold copies of it. Pointers to stored values stay valid as long as the pool. Values are added
+// by the thread running the OsmHandler, the pool is not thread-safe.
+class StringPool {
+ public:
+  [[nodiscard]] const std::string* intern(std::string_view value);
+  [[nodiscard]] static const std::string* emptyValue();
+
+ private:
+  absl::node_hash_set<std::string> values_;
+};
+
+// Values of the way tags used by osm2gmns, collected in one pass over the tags of a way. Values are views into the
+// buffer of the osmium way and are empty for missing tags.
+struct OsmWayTagValues {
+  explicit OsmWayTagValues(const osmium::TagList& tag_list);
+
+  std::string_view highway;
+  std::string_view railway;
+  std::string_view aeroway;
+  std::string_view name;
+  std::string_view lanes;
+  std::string_view forward_lanes;
+  std::string_view backward_lanes;
+  std::string_view oneway;
+  std::string_view max_speed;
+  std::string_view building;
+  std::string_view amenity;
+  std::string_view leisure;
+  std::string_view junction;
+  std::string_view area;
+  std::string_view motor_vehicle;
+  std::string_view motorcar;
+  std::string_view service;
+  std::string_view access;
+  std::string_view foot;
+  std::string_view bicycle;
+};
+
 class OsmHandler : public osmium::handler::Handler {
  public:
   explicit OsmHandler(const absl::flat_hash_set<ModeType>& mode_types, absl::flat_hash_set<HighWayLinkType> link_types,
                       absl::flat_hash_set<HighWayLinkType> connector_link_types, bool POI,
-                      const OsmParsingConfig* osm_parsing_config);
+                      const OsmParsingConfig* osm_parsing_config, StringPool* string_pool);
+
+  ~OsmHandler();
+  OsmHandler(const OsmHandler&) = delete;
+  OsmHandler& operator=(const OsmHandler&) = delete;
+  OsmHandler(OsmHandler&&) = delete;
+  OsmHandler& operator=(OsmHandler&&) = delete;
 
   void node(const osmium::Node& node);
   void way(const osmium::Way& way);
   void relation(const osmium::Relation& relation);
 
   void updateParseTargets(bool parse_node, bool parse_way, bool parse_relation);
-
-  std::vector<OsmNode*>& osmNodeVector();
+  // with a clip region, a pass over nodes locating nodes in the region is needed before ways can be parsed. the nodes
+  // in the region are kept sorted by id, so that they are not read again once ways are parsed
+  void setClipRegion(ClipRegion* clip_region, bool strict_boundary);
+  void updateRegionParseTarget(bool locate_region_nodes);
+  // locates a node without keeping it, used for osm change files
+  void locateRegionNode(OsmIdType osm_node_id, const osmium::Location& location);
+  // nodes in the region used by the parsed ways become parsed nodes. returns the number of used nodes outside the
+  // region, which are still to be parsed
+  size_t takeUsedRegionNodes();
+  void releaseRegionNodes();
+  // with a clip region, ways used by POI relations are read even if none of their nodes is in the region. after ways
+  // are parsed, relations without member ways in the region are dropped, and the member ways outside the region of
+  // the other relations and of kept_osm_relations, which are kept from an earlier parse, are added as POI components
+  void markMemberWayInRegion(OsmIdType osm_way_id);
+  void resolveRegionRelations(const std::vector<const OsmRelation*>& kept_osm_relations = {});
+  // ways that are members of relations kept from an earlier parse, so that their poi components are selected
+  void registerRelationMemberWays(const OsmRelation* osm_relation);
+
+  // elements read from an osm cache entry, which holds the elements selected for all modes, link types and POIs.
+  // they are selected for the options of the handler like parsed elements. relations are added before ways, and ways
+  // before nodes
+  void addCachedWay(OsmWay* osm_way);
+  void addCachedRelation(OsmRelation* osm_relation);
+  void addCachedNode(OsmNode osm_node);
+
+  std::vector<OsmNode>& osmNodeVector();
   std::vector<OsmWay*>& osmWayVector();
   std::vector<OsmRelation*>& osmRelationVector();
 
  private:
+  [[nodiscard]] bool isInRegion(OsmIdType osm_node_id) const;
+  // ref node ids split into runs of consecutive nodes in the clip region. runs with less than two nodes are dropped
+  [[nodiscard]] std::vector<std::vector<OsmIdType>> regionRuns(const std::vector<OsmIdType>& ref_node_id_vector) const;
+  void addWay(OsmWay* osm_way);
+  void addRelation(OsmRelation* osm_relation);
+
   bool parse_node_{false};
   bool parse_way_{false};
   bool parse_relation_{false};
   absl::flat_hash_set<OsmIdType> nodes_used_in_ways_;
+  // relations are parsed before ways, so that ways used by POI relations are known when ways are parsed
   absl::flat_hash_set<OsmIdType> ways_used_in_relations_;
 
+  ClipRegion* clip_region_{nullptr};
+  bool strict_boundary_{false};
+  bool locate_region_nodes_{false};
+  std::vector<OsmNode> region_osm_node_vector_;
+  absl::flat_hash_set<OsmIdType> nodes_in_region_;
+  absl::flat_hash_set<OsmIdType> member_ways_in_region_;
+  absl::flat_hash_map<OsmIdType, OsmWay*> member_ways_outside_region_;
+
   absl::flat_hash_set<ModeType> highway_mode_types_;
   bool include_railway_{false};
   bool include_aeroway_{false};
@@ -59,59 +168,69 @@ class OsmHandler : public osmium::handler::Handler {
   absl::flat_hash_set<HighWayLinkType> connector_link_types_;
   bool POI_{false};
   const OsmParsingConfig* osm_parsing_config_;
+  StringPool* string_pool_;
 
-  std::vector<OsmNode*> osm_node_vector_;
+  std::vector<OsmNode> osm_node_vector_;
   std::vector<OsmWay*> osm_way_vector_;
   std::vector<OsmRelation*> osm_relation_vector_;
 };
 
+// Tags of an OsmNode that are only stored for the small share of nodes that carry them
+struct OsmNodeTags {
+  std::string name;
+  std::vector<std::string> osm_attributes;
+};
+
+// OsmNodes are stored by value in one vector sorted by osm node id. Keep the class compact, since large extracts
+// reference tens of millions of nodes.
 class OsmNode {
  public:
   explicit OsmNode(const osmium::Node& node, const std::vector<std::string>& osm_node_attributes);
+  explicit OsmNode(BinaryReader& reader);
+
+  void serialize(std::string& buffer) const;
 
   [[nodiscard]] OsmIdType osmNodeId() const;
   [[nodiscard]] const std::string& name() const;
   [[nodiscard]] double getX() const;
   [[nodiscard]] double getY() const;
-  // [[nodiscard]] const std::unique_ptr<geos::geom::Point>& geometry() const;
+  [[nodiscard]] const osmium::Location& location() const;
   [[nodiscard]] const std::vector<std::string>& osmAttributes() const;
   [[nodiscard]] bool isSignalized() const;
   [[nodiscard]] int32_t usageCount() const;
   [[nodiscard]] bool isTypologyNode() const;
-  [[nodiscard]] std::vector<OsmWay*> incomingWayVector() const;
-  [[nodiscard]] std::vector<OsmWay*> outgoingWayVector() const;
+  [[nodiscard]] bool connectsTargetLinkWay() const;
 
-  // void initOsmNode(const geos::geom::GeometryFactory* factory, const geos::geom::Polygon* boundary,
-  //                  bool strict_boundary);
   void changeUsageCount(int32_t usage_count_changes);
   void setIsEndingNode(bool is_ending_node);
   void setIsTypologyNode();
-  void addIncomingWay(OsmWay* osm_way);
-  void addOutgoingWay(OsmWay* osm_way);
+  void setConnectsTargetLinkWay();
+  // clears the usage count and the flags set from the ways using the node
+  void resetTopology();
 
  private:
   OsmIdType osm_node_id_;
-  std::string name_;
-  // std::unique_ptr<geos::geom::Point> geometry_;
-  double x, y;
-  std::string highway_;
-  std::vector<std::string> osm_attributes_;
-
-  bool is_signalized_{false};
-  bool in_region_{true};
-
+  osmium::Location location_;
   int32_t usage_count_{0};
+  bool is_signalized_{false};
   bool is_ending_node_{false};
   bool is_typology_node_{false};
-  std::vector<OsmWay*> incoming_way_vector_;
-  std::vector<OsmWay*> outgoing_way_vector_;
-
-  std::string notes_;
+  // the node is the starting or ending node of a highway way with a target link type
+  bool connects_target_link_way_{false};
+  std::unique_ptr<OsmNodeTags> tags_;
 };
 
+// Tags are decoded when a way is read: values used to identify the way type and allowed modes are turned into
+// HighWayLinkType and flags, numeric values are parsed, and strings are interned in a StringPool. Ways are read in two
+// steps, so that ways neither used for links nor for POIs are discarded before any string is copied.
 class OsmWay {
  public:
-  explicit OsmWay(const osmium::Way& way);
+  // decodes the flags needed by identifyWayType(). no string is interned
+  explicit OsmWay(OsmIdType osm_way_id, const OsmWayTagValues& tag_values);
+  // decoded tags and ref node ids only. the way type is identified again after loading
+  explicit OsmWay(BinaryReader& reader, StringPool& string_pool);
+
+  void serialize(std::string& buffer) const;
 
   [[nodiscard]] OsmIdType osmWayId() const;
   [[nodiscard]] const std::string& railway() const;
@@ -146,11 +265,20 @@ class OsmWay {
                        bool include_aeroway, const absl::flat_hash_set<HighWayLinkType>& link_types,
                        const absl::flat_hash_set<HighWayLinkType>& connector_link_types, bool POI,
                        const absl::flat_hash_set<OsmIdType>& ways_used_in_relations);
+  // used for ways of POI relations outside the clip region, which are kept as POI components only
+  void setPoiComponent();
+  // interns the tag values and decodes the remaining tags and ref node ids of a way to keep
+  void readWay(const osmium::Way& way, const OsmWayTagValues& tag_values, StringPool& string_pool);
   void updateOsmAttributes(const osmium::Way& way, const std::vector<std::string>& osm_link_attributes,
                            const std::vector<std::string>& osm_poi_attributes);
-  void initOsmWay(const absl::flat_hash_map<OsmIdType, OsmNode*>& osm_node_dict);
+  // used to cut ways at the clip region
+  void setRefNodeIdVector(std::vector<OsmIdType> ref_node_id_vector);
+  // ref nodes are looked up in osm_node_vector first, then in extra_osm_node_dict if given
+  void initOsmWay(std::vector<OsmNode>& osm_node_vector,
+                  const absl::flat_hash_map<OsmIdType, OsmNode*>* extra_osm_node_dict = nullptr);
   void identifyTargetConnector();
-  void splitIntoSegments();
+  // true if the segments differ from the previous ones
+  bool splitIntoSegments();
 
   // void setUsedByRelation(bool used_by_relation);
 
@@ -163,19 +291,39 @@ class OsmWay {
   void generateHighwayAllowedModeTypes(const absl::flat_hash_set<ModeType>& highway_mode_types);
   void updateOsmLinkAttributes(const osmium::Way& way, const std::vector<std::string>& osm_link_attributes);
   void updateOsmPoiAttributes(const osmium::Way& way, const std::vector<std::string>& osm_poi_attributes);
-  void mapRefNodes(const absl::flat_hash_map<OsmIdType, OsmNode*>& osm_node_dict);
+  void mapRefNodes(std::vector<OsmNode>& osm_node_vector,
+                   const absl::flat_hash_map<OsmIdType, OsmNode*>* extra_osm_node_dict);
   void configAttributes();
+  [[nodiscard]] bool hasTagFlag(uint16_t tag_flag) const;
+
+  // flags decoded from the tags of the way
+  static constexpr uint16_t POI_TAGS = 1U << 0U;  // building, amenity, leisure or a POI highway, railway or aeroway
+  static constexpr uint16_t AREA = 1U << 1U;
+  static constexpr uint16_t NEGLIGIBLE_HIGHWAY = 1U << 2U;
+  static constexpr uint16_t NEGLIGIBLE_RAILWAY = 1U << 3U;
+  static constexpr uint16_t NEGLIGIBLE_AEROWAY = 1U << 4U;
+  // modes allowed on highways by the access tags, before the mode types of the network are applied
+  static constexpr uint16_t AUTO_ALLOWED = 1U << 5U;
+  static constexpr uint16_t BIKE_ALLOWED = 1U << 6U;
+  static constexpr uint16_t WALK_ALLOWED = 1U << 7U;
+  static constexpr uint16_t ONEWAY_YES = 1U << 8U;
+  static constexpr uint16_t ONEWAY_NO = 1U << 9U;
+  static constexpr uint16_t ONEWAY_REVERSED = 1U << 10U;
+  static constexpr uint16_t ROUNDABOUT = 1U << 11U;
+  static constexpr uint16_t HAS_HIGHWAY = 1U << 12U;
+  static constexpr uint16_t HAS_RAILWAY = 1U << 13U;
+  static constexpr uint16_t HAS_AEROWAY = 1U << 14U;
 
   OsmIdType osm_way_id_;
-  std::string highway_;
-  std::string railway_;
-  std::string aeroway_;
-  std::string name_;
-  std::string lanes_raw_;
-  std::string forward_lanes_raw_;
-  std::string backward_lanes_raw_;
-  std::string oneway_raw_;
-  std::string max_speed_raw_;
+  // interned tag values
+  const std::string* highway_{StringPool::emptyValue()};
+  const std::string* railway_{StringPool::emptyValue()};
+  const std::string* aeroway_{StringPool::emptyValue()};
+  const std::string* name_{StringPool::emptyValue()};
+  const std::string* building_{StringPool::emptyValue()};
+  const std::string* amenity_{StringPool::emptyValue()};
+  const std::string* leisure_{StringPool::emptyValue()};
+  uint16_t tag_flags_{0};
   std::optional<int32_t> lanes_;
   std::optional<int32_t> forward_lanes_;
   std::optional<int32_t> backward_lanes_;
@@ -183,18 +331,6 @@ class OsmWay {
   bool is_reversed_{false};  // ToDo: use when generating segments
   std::optional<float> max_speed_;
 
-  std::string building_;
-  std::string amenity_;
-  std::string leisure_;
-  std::string junction_;
-  std::string area_;
-  std::string motor_vehicle_;
-  std::string motorcar_;
-  std::string service_;
-  std::string access_;
-  std::string foot_;
-  std::string bicycle_;
-
   std::vector<std::string> osm_link_attributes_;
   std::vector<std::string> osm_poi_attributes_;
 
@@ -206,6 +342,7 @@ class OsmWay {
 
   WayType way_type_{WayType::OTHER};
   std::vector<ModeType> allowed_mode_types_;
+  // decoded from the highway tag
   HighWayLinkType highway_link_type_{HighWayLinkType::OTHER};
   bool is_target_link_type_{false};
   bool is_target_connector_link_type_{false};
@@ -220,6 +357,9 @@ class OsmWay {
 class OsmRelation {
  public:
   explicit OsmRelation(const osmium::Relation& relation, const std::vector<std::string>& osm_poi_attributes);
+  explicit OsmRelation(BinaryReader& reader);
+
+  void serialize(std::string& buffer) const;
 
   void initOsmRelation(const absl::flat_hash_map<OsmIdType, OsmWay*>& osm_way_dict);
 
@@ -249,26 +389,57 @@ class OsmRelation {
   std::vector<std::string> osm_attributes_;
 };
 
+// Elements of an OsmNetwork affected by an osm change file, see OsmNetwork::applyChange
+struct OsmChange {
+  // ways whose links are created again: ways changed or deleted by the file, and ways that are split differently, use
+  // a changed node, or are no longer (or newly) connectors
+  absl::flat_hash_set<OsmIdType> updated_osm_way_ids;
+  // existing nodes whose location or tags changed. they keep their address
+  std::vector<const OsmNode*> updated_osm_nodes;
+  bool pois_changed{false};
+};
+
 class OsmNetwork {
  public:
   explicit OsmNetwork(const std::filesystem::path& osm_filepath, absl::flat_hash_set<ModeType> mode_types,
                       absl::flat_hash_set<HighWayLinkType> link_types,
                       absl::flat_hash_set<HighWayLinkType> connector_link_types, bool POI,
-                      const OsmParsingConfig* osm_parsing_config, bool strict_boundary);
+                      const OsmParsingConfig* osm_parsing_config, bool strict_boundary,
+                      std::unique_ptr<geos::geom::Geometry> clip_geometry = nullptr, OsmCache* osm_cache = nullptr,
+                      StatsRecorder* stats = nullptr);
   ~OsmNetwork();
   OsmNetwork(const OsmNetwork&) = delete;
   OsmNetwork& operator=(const OsmNetwork&) = delete;
   OsmNetwork(OsmNetwork&&) = delete;
   OsmNetwork& operator=(OsmNetwork&&) = delete;
 
-  [[nodiscard]] const std::optional<std::unique_ptr<geos::geom::Polygon>>& boundary() const;
+  // the clip region if one is given, otherwise the bounding box in the file header
+  [[nodiscard]] const std::optional<std::unique_ptr<geos::geom::Geometry>>& boundary() const;
+  [[nodiscard]] const std::vector<OsmNode>& osmNodeVector() const;
   [[nodiscard]] const std::vector<OsmWay*>& osmWayVector() const;
   [[nodiscard]] const std::vector<OsmRelation*>& osmRelationVector() const;
 
+  // Updates the network with an osm change file (.osc), selecting elements with the options the network was built
+  // with. Every element is expected once in the file, as in the diffs published by osm mirrors. Nodes are stored only
+  // if a way uses them, so ways using nodes that are neither stored nor in the file are skipped with a warning. nullopt
+  // if the file cannot be read, in which case the network is unchanged
+  std::optional<OsmChange> applyChange(const std::filesystem::path& osc_filepath);
+
  private:
+  // all_elements: select elements for all modes, link types and POIs, as stored in osm cache entries. false if the file
+  // cannot be read completely, in which case the elements read so far are kept
+  bool parseOsmFile(const std::filesystem::path& osm_filepath, bool all_elements);
+  [[nodiscard]] std::string serializeOsmElements() const;
+  // false if the data is invalid
+  bool loadOsmElements(std::string_view data);
+  void releaseOsmElements();
   void processOsmData();
   void initializeElements();
   void createWaySegments();
+  void identifyTargetConnectors();
+  void identifyTypologyNodes();
+  // nullptr if the node is not stored
+  [[nodiscard]] OsmNode* lookupOsmNode(OsmIdType osm_node_id);
 
   absl::flat_hash_set<ModeType> mode_types_;
   absl::flat_hash_set<HighWayLinkType> link_types_;
@@ -276,13 +447,22 @@ class OsmNetwork {
   bool POI_;
   const OsmParsingConfig* osm_parsing_config_;
   bool strict_boundary_;
+  std::unique_ptr<ClipRegion> clip_region_;
+  // tag values of osm ways, declared before the elements that refer to them
+  StringPool string_pool_;
+  // stages of parsing and processing are recorded if not nullptr
+  StatsRecorder* stats_;
 
   geos::geom::GeometryFactory::Ptr factory_;
-  std::optional<std::unique_ptr<geos::geom::Polygon>> boundary_;
+  std::optional<std::unique_ptr<geos::geom::Geometry>> boundary_;
 
-  std::vector<OsmNode*> osm_node_vector_;
+  // sorted by osm node id. the vector is not resized after parsing, so pointers to its elements stay valid
+  std::vector<OsmNode> osm_node_vector_;
   std::vector<OsmWay*> osm_way_vector_;
   std::vector<OsmRelation*> osm_relation_vector_;
+  // nodes first used by ways of osm change files. a deque keeps pointers to its elements valid as it grows
+  std::deque<OsmNode> added_osm_node_deque_;
+  absl::flat_hash_map<OsmIdType, OsmNode*> added_osm_node_dict_;
 
   // std::vector<OsmWay*> link_way_vector{};
 
@@ -0,0 +1,81 @@
+#include "runcontrol.h"
+
+#include <omp.h>
+
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "stats.h"
+
+constexpr std::chrono::milliseconds PROGRESS_INTERVAL{200};
+
+thread_local RunControl* current_control = nullptr;
+thread_local int32_t current_num_threads = 0;
+std::atomic<int32_t> default_num_threads{0};
+
+RunControl::RunControl(int32_t num_threads, ProgressCallback progress_callback)
+    : num_threads_(num_threads > 0 ? num_threads : 0), progress_callback_(progress_callback) {}
+
+void RunControl::cancel() { cancelled_.store(true, std::memory_order_relaxed); }
+bool RunControl::cancelled() const { return cancelled_.load(std::memory_order_relaxed); }
+int32_t RunControl::numThreads() const { return num_threads_; }
+
+void RunControl::reportStage(const std::string& stage, bool finished,
+                             const std::vector<std::pair<std::string, int64_t>>& counts) {
+  if (progress_callback_ == nullptr) {
+    return;
+  }
+  std::string counts_json;
+  appendJsonCounts(counts_json, counts);
+  progress_callback_(stage.c_str(), finished, counts_json.c_str());
+}
+
+void RunControl::reportProgress(const std::string& stage, const std::vector<std::pair<std::string, int64_t>>& counts) {
+  if (progress_callback_ == nullptr) {
+    return;
+  }
+  const int64_t now =
+      std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now().time_since_epoch()).count();
+  int64_t last_progress_time = last_progress_time_.load(std::memory_order_relaxed);
+  if (now - last_progress_time < std::chrono::nanoseconds(PROGRESS_INTERVAL).count() ||
+      !last_progress_time_.compare_exchange_strong(last_progress_time, now, std::memory_order_relaxed)) {
+    return;
+  }
+  reportStage(stage, false, counts);
+}
+
+RunControl* RunControl::current() { return omp_in_parallel() != 0 ? nullptr : current_control; }
+
+void setDefaultNumThreads(int32_t num_threads) {
+  default_num_threads.store(num_threads > 0 ? num_threads : 0, std::memory_order_relaxed);
+}
+
+int32_t currentNumThreads() { return current_num_threads; }
+
+RunControlScope::RunControlScope(RunControl* control)
+    : previous_control_(current_control), previous_num_threads_(current_num_threads) {
+  current_control = control;
+  const int32_t num_threads = control != nullptr && control->numThreads() > 0
+                                  ? control->numThreads()
+                                  : default_num_threads.load(std::memory_order_relaxed);
+  if (num_threads > 0) {
+    previous_omp_num_threads_ = omp_get_max_threads();
+    omp_set_num_threads(num_threads);
+    current_num_threads = num_threads;
+  }
+}
+
+RunControlScope::~RunControlScope() {
+  current_control = previous_control_;
+  current_num_threads = previous_num_threads_;
+  if (previous_omp_num_threads_.has_value()) {
+    omp_set_num_threads(previous_omp_num_threads_.value());  // NOLINT
+  }
+}
+
+bool isCancelled(const RunControl* control) { return control != nullptr && control->cancelled(); }
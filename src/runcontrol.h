@@ -0,0 +1,73 @@
+#ifndef OSM2GMNS_RUNCONTROL_H
+#define OSM2GMNS_RUNCONTROL_H
+
+#include <atomic>
+#include <cstdint>
+#include <optional>
+#include <string>
+#include <utility>
+#include <vector>
+
+// stage is the name of a stage as recorded in the network stats. finished is false when the stage begins or reports
+// progress, and true when it ends. counts is a json object of the numbers of elements processed so far
+using ProgressCallback = void (*)(const char* stage, bool finished, const char* counts);
+
+// Settings of the calls made on a thread while a RunControlScope of the control exists: the number of threads, a
+// progress callback and a cancel flag. Calls check the flag at stage, buffer and batch boundaries and stop early once
+// it is set, so that conversions running side by side can be scheduled and cancelled by the caller. One control can be
+// shared by calls on several threads.
+class RunControl {
+ public:
+  // num_threads is the number of OpenMP threads and osm file reader threads. 0 uses the default number of threads, see
+  // setDefaultNumThreads. progress_callback may be nullptr, and is called on the threads making the calls
+  explicit RunControl(int32_t num_threads = 0, ProgressCallback progress_callback = nullptr);
+
+  // calls stop at their next check. cannot be undone
+  void cancel();
+  [[nodiscard]] bool cancelled() const;
+  [[nodiscard]] int32_t numThreads() const;
+
+  void reportStage(const std::string& stage, bool finished, const std::vector<std::pair<std::string, int64_t>>& counts);
+  // reports counts of an unfinished stage. calls within PROGRESS_INTERVAL of the previous report are skipped
+  void reportProgress(const std::string& stage, const std::vector<std::pair<std::string, int64_t>>& counts);
+
+  // the control of the innermost RunControlScope on the calling thread, nullptr if none. always nullptr on the worker
+  // threads of parallel regions, so loops get the control before the region begins
+  [[nodiscard]] static RunControl* current();
+
+ private:
+  std::atomic<bool> cancelled_{false};
+  int32_t num_threads_;
+  ProgressCallback progress_callback_;
+  // steady clock time of the last progress report, in nanoseconds
+  std::atomic<int64_t> last_progress_time_{0};
+};
+
+// number of threads of calls whose control does not set one. 0 restores the OpenMP default (OMP_NUM_THREADS or the
+// number of cores)
+void setDefaultNumThreads(int32_t num_threads);
+// number of threads of the calls on the calling thread, 0 if not set by the control or the default
+[[nodiscard]] int32_t currentNumThreads();
+
+// Makes control the current control of the calling thread and applies its number of threads to the parallel regions
+// started on the thread, until destroyed. control may be nullptr, in which case only the default number of threads is
+// applied. The number of OpenMP threads is a setting of each thread, so scopes on different threads do not interfere.
+class RunControlScope {
+ public:
+  explicit RunControlScope(RunControl* control);
+  ~RunControlScope();
+  RunControlScope(const RunControlScope&) = delete;
+  RunControlScope& operator=(const RunControlScope&) = delete;
+  RunControlScope(RunControlScope&&) = delete;
+  RunControlScope& operator=(RunControlScope&&) = delete;
+
+ private:
+  RunControl* previous_control_;
+  int32_t previous_num_threads_;
+  std::optional<int> previous_omp_num_threads_;
+};
+
+// true if control is not nullptr and cancelled
+[[nodiscard]] bool isCancelled(const RunControl* control = RunControl::current());
+
+#endif  // OSM2GMNS_RUNCONTROL_H
@@ -0,0 +1,262 @@
+#include "stats.h"
+
+#include <absl/log/log.h>
+#include <omp.h>
+
+#ifdef _WIN32
+// clang-format off
+#include <windows.h>
+#include <psapi.h>
+// clang-format on
+#else
+#include <sys/resource.h>
+#endif
+
+#include <array>
+#include <charconv>
+#include <chrono>
+#include <cstddef>
+#include <cstdint>
+#include <filesystem>
+#include <fstream>
+#include <string>
+#include <string_view>
+#include <system_error>
+#include <utility>
+#include <vector>
+
+constexpr double SECOND_TO_MICROSECONDS = 1e6;
+constexpr int JSON_NUMBER_PRECISION = 6;
+constexpr size_t JSON_NUMBER_BUFFER_SIZE = 64;
+
+double processCpuTime() {
+#ifdef _WIN32
+  FILETIME creation_time;
+  FILETIME exit_time;
+  FILETIME kernel_time;
+  FILETIME user_time;
+  if (GetProcessTimes(GetCurrentProcess(), &creation_time, &exit_time, &kernel_time, &user_time) == 0) {
+    return 0.0;
+  }
+  // in units of 100 nanoseconds
+  auto to_seconds = [](const FILETIME& file_time) {
+    return static_cast<double>((static_cast<uint64_t>(file_time.dwHighDateTime) << 32U) | file_time.dwLowDateTime) *
+           1e-7;
+  };
+  return to_seconds(kernel_time) + to_seconds(user_time);
+#else
+  rusage usage{};
+  if (getrusage(RUSAGE_SELF, &usage) != 0) {
+    return 0.0;
+  }
+  return static_cast<double>(usage.ru_utime.tv_sec + usage.ru_stime.tv_sec) +
+         static_cast<double>(usage.ru_utime.tv_usec + usage.ru_stime.tv_usec) * 1e-6;
+#endif
+}
+
+// in bytes
+int64_t processPeakRss() {
+#ifdef _WIN32
+  PROCESS_MEMORY_COUNTERS counters;
+  if (GetProcessMemoryInfo(GetCurrentProcess(), &counters, sizeof(counters)) == 0) {
+    return 0;
+  }
+  return static_cast<int64_t>(counters.PeakWorkingSetSize);
+#else
+  rusage usage{};
+  if (getrusage(RUSAGE_SELF, &usage) != 0) {
+    return 0;
+  }
+#ifdef __APPLE__
+  return static_cast<int64_t>(usage.ru_maxrss);
+#else
+  // kilobytes on linux
+  return static_cast<int64_t>(usage.ru_maxrss) * 1024;
+#endif
+#endif
+}
+
+// control characters are written as \u00XX
+void appendJsonControlCharacter(std::string& buffer, unsigned char character) {
+  constexpr std::string_view HEX_DIGITS = "0123456789abcdef";
+  buffer += "\\u00";
+  buffer += HEX_DIGITS[character >> 4U];
+  buffer += HEX_DIGITS[character & 0x0FU];
+}
+
+void appendJsonString(std::string& buffer, std::string_view value) {
+  buffer += '"';
+  for (const char character : value) {
+    switch (character) {
+      case '"':
+        buffer += "\\\"";
+        break;
+      case '\\':
+        buffer += "\\\\";
+        break;
+      case '\n':
+        buffer += "\\n";
+        break;
+      default:
+        if (static_cast<unsigned char>(character) < 0x20) {
+          appendJsonControlCharacter(buffer, static_cast<unsigned char>(character));
+        } else {
+          buffer += character;
+        }
+    }
+  }
+  buffer += '"';
+}
+
+void appendJsonNumber(std::string& buffer, double value) {
+  std::array<char, JSON_NUMBER_BUFFER_SIZE> chars{};
+  const std::to_chars_result result =
+      std::to_chars(chars.data(), chars.data() + chars.size(), value, std::chars_format::fixed, JSON_NUMBER_PRECISION);
+  if (result.ec != std::errc()) {
+    buffer += '0';
+    return;
+  }
+  buffer.append(chars.data(), result.ptr);
+}
+
+void appendJsonCounts(std::string& buffer, const std::vector<std::pair<std::string, int64_t>>& counts) {
+  buffer += '{';
+  for (size_t idx = 0; idx < counts.size(); ++idx) {
+    if (idx > 0) {
+      buffer += ", ";
+    }
+    appendJsonString(buffer, counts[idx].first);
+    buffer += ": ";
+    buffer += std::to_string(counts[idx].second);
+  }
+  buffer += '}';
+}
+
+StatsRecorder::StatsRecorder() : start_time_(std::chrono::steady_clock::now()) {}
+
+const std::vector<StageStats>& StatsRecorder::stages() const { return stages_; }
+
+std::string StatsRecorder::toJson() const {
+  std::string buffer = "{\"stages\": [";
+  for (size_t idx = 0; idx < stages_.size(); ++idx) {
+    const StageStats& stage = stages_[idx];
+    buffer += idx > 0 ? ", {\"name\": " : "{\"name\": ";
+    appendJsonString(buffer, stage.name);
+    buffer += ", \"depth\": " + std::to_string(stage.depth);
+    buffer += ", \"start_time\": ";
+    appendJsonNumber(buffer, stage.start_time);
+    buffer += ", \"wall_time\": ";
+    appendJsonNumber(buffer, stage.wall_time);
+    buffer += ", \"cpu_time\": ";
+    appendJsonNumber(buffer, stage.cpu_time);
+    buffer += ", \"peak_rss_delta\": " + std::to_string(stage.peak_rss_delta);
+    buffer += ", \"threads\": " + std::to_string(stage.threads);
+    buffer += ", \"counts\": ";
+    appendJsonCounts(buffer, stage.counts);
+    buffer += '}';
+  }
+  buffer += "]}";
+  return buffer;
+}
+
+bool StatsRecorder::writeChromeTrace(const std::filesystem::path& trace_filepath) const {
+  // all stages run on the calling thread, nesting is given by the start times and durations of the events
+  std::string buffer = "{\"displayTimeUnit\": \"ms\", \"traceEvents\": [";
+  for (size_t idx = 0; idx < stages_.size(); ++idx) {
+    const StageStats& stage = stages_[idx];
+    buffer += idx > 0 ? ",\n{\"name\": " : "\n{\"name\": ";
+    appendJsonString(buffer, stage.name);
+    buffer += ", \"cat\": \"osm2gmns\", \"ph\": \"X\", \"pid\": 1, \"tid\": 1, \"ts\": ";
+    appendJsonNumber(buffer, stage.start_time * SECOND_TO_MICROSECONDS);
+    buffer += ", \"dur\": ";
+    appendJsonNumber(buffer, stage.wall_time * SECOND_TO_MICROSECONDS);
+    buffer += ", \"args\": {\"cpu_time\": ";
+    appendJsonNumber(buffer, stage.cpu_time);
+    buffer += ", \"peak_rss_delta\": " + std::to_string(stage.peak_rss_delta);
+    buffer += ", \"threads\": " + std::to_string(stage.threads);
+    buffer += ", \"counts\": ";
+    appendJsonCounts(buffer, stage.counts);
+    buffer += "}}";
+  }
+  buffer += "\n]}\n";
+
+  std::ofstream trace_file(trace_filepath);
+  if (!trace_file) {
+    LOG(ERROR) << "Cannot open file " << trace_filepath;
+    return false;
+  }
+  trace_file << buffer;
+  return static_cast<bool>(trace_file);
+}
+
+void StatsRecorder::clear() {
+  stages_.clear();
+  depth_ = 0;
+  start_time_ = std::chrono::steady_clock::now();
+}
+
+size_t StatsRecorder::beginStage(std::string name) {
+  StageStats stage;
+  stage.name = std::move(name);
+  stage.depth = depth_++;
+  stage.start_time = secondsSinceStart();
+  stage.threads = omp_get_max_threads();
+  stages_.push_back(std::move(stage));
+  return stages_.size() - 1;
+}
+
+void StatsRecorder::endStage(size_t stage_idx, double start_cpu_time, int64_t start_peak_rss,
+                             std::vector<std::pair<std::string, int64_t>> counts) {
+  if (stage_idx >= stages_.size()) {
+    return;
+  }
+  StageStats& stage = stages_[stage_idx];
+  stage.wall_time = secondsSinceStart() - stage.start_time;
+  stage.cpu_time = processCpuTime() - start_cpu_time;
+  stage.peak_rss_delta = processPeakRss() - start_peak_rss;
+  stage.counts = std::move(counts);
+  if (depth_ > 0) {
+    --depth_;
+  }
+}
+
+double StatsRecorder::secondsSinceStart() const {
+  return std::chrono::duration<double>(std::chrono::steady_clock::now() - start_time_).count();
+}
+
+StatsStage::StatsStage(StatsRecorder* recorder, std::string name)
+    : recorder_(recorder), control_(RunControl::current()) {
+  if (recorder_ == nullptr && control_ == nullptr) {
+    return;
+  }
+  name_ = std::move(name);
+  if (control_ != nullptr) {
+    control_->reportStage(name_, false, {});
+  }
+  if (recorder_ != nullptr) {
+    start_cpu_time_ = processCpuTime();
+    start_peak_rss_ = processPeakRss();
+    stage_idx_ = recorder_->beginStage(name_);
+  }
+}
+
+StatsStage::~StatsStage() { end(); }
+
+void StatsStage::addCount(std::string name, int64_t value) {
+  if (recorder_ != nullptr || control_ != nullptr) {
+    counts_.emplace_back(std::move(name), value);
+  }
+}
+
+void StatsStage::end() {
+  if (ended_) {
+    return;
+  }
+  ended_ = true;
+  if (control_ != nullptr) {
+    control_->reportStage(name_, true, counts_);
+  }
+  if (recorder_ != nullptr) {
+    recorder_->endStage(stage_idx_, start_cpu_time_, start_peak_rss_, std::move(counts_));
+  }
+}
@@ -0,0 +1,87 @@
+#ifndef OSM2GMNS_STATS_H
+#define OSM2GMNS_STATS_H
+
+#include <chrono>
+#include <cstddef>
+#include <cstdint>
+#include <filesystem>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "runcontrol.h"
+
+// Timing and memory statistics of the stages of network building and processing. Stages nest, and are stored in the
+// order they begin, each with the depth of its nesting.
+struct StageStats {
+  std::string name;
+  size_t depth{0};
+  // seconds since the recorder was created
+  double start_time{0.0};
+  double wall_time{0.0};
+  // user and system time of all threads of the process, in seconds. includes calls running on other threads
+  double cpu_time{0.0};
+  // growth of the peak resident set size of the process during the stage, in bytes. 0 if the stage stays below the
+  // peak reached earlier by the process
+  int64_t peak_rss_delta{0};
+  int32_t threads{1};
+  // numbers of elements processed or created in the stage
+  std::vector<std::pair<std::string, int64_t>> counts;
+};
+
+// appends counts as a json object, e.g. {"nodes": 10, "links": 20}
+void appendJsonCounts(std::string& buffer, const std::vector<std::pair<std::string, int64_t>>& counts);
+
+class StatsRecorder {
+ public:
+  StatsRecorder();
+
+  [[nodiscard]] const std::vector<StageStats>& stages() const;
+  // {"stages": [{"name": ..., "depth": ..., "start_time": ..., "wall_time": ..., "cpu_time": ..., "peak_rss_delta":
+  // ..., "threads": ..., "counts": {...}}, ...]}
+  [[nodiscard]] std::string toJson() const;
+  // writes the stages as complete events in the chrome trace event format, which can be opened in chrome://tracing or
+  // https://ui.perfetto.dev. false if the file cannot be written
+  bool writeChromeTrace(const std::filesystem::path& trace_filepath) const;
+  void clear();
+
+ private:
+  friend class StatsStage;
+
+  size_t beginStage(std::string name);
+  void endStage(size_t stage_idx, double start_cpu_time, int64_t start_peak_rss,
+                std::vector<std::pair<std::string, int64_t>> counts);
+  [[nodiscard]] double secondsSinceStart() const;
+
+  std::chrono::steady_clock::time_point start_time_;
+  std::vector<StageStats> stages_;
+  size_t depth_{0};
+};
+
+// Records a stage from construction until end() is called or the object is destroyed. The recorder may be nullptr.
+// Begin and end of the stage are also reported to the progress callback of the current RunControl.
+class StatsStage {
+ public:
+  StatsStage(StatsRecorder* recorder, std::string name);
+  ~StatsStage();
+  StatsStage(const StatsStage&) = delete;
+  StatsStage& operator=(const StatsStage&) = delete;
+  StatsStage(StatsStage&&) = delete;
+  StatsStage& operator=(StatsStage&&) = delete;
+
+  void addCount(std::string name, int64_t value);
+  // ends the stage. calls after the first one have no effect
+  void end();
+
+ private:
+  StatsRecorder* recorder_;
+  RunControl* control_;
+  std::string name_;
+  size_t stage_idx_{0};
+  double start_cpu_time_{0.0};
+  int64_t start_peak_rss_{0};
+  std::vector<std::pair<std::string, int64_t>> counts_;
+  bool ended_{false};
+};
+
+#endif  // OSM2GMNS_STATS_H
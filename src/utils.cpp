@@ -6,6 +6,7 @@
 
 #include <geos/geom/Coordinate.h>
 #include <geos/geom/CoordinateSequence.h>
+#include <geos/geom/Envelope.h>
 #include <geos/geom/Geometry.h>
 #include <geos/geom/GeometryFactory.h>
 #include <geos/geom/LineString.h>
@@ -13,8 +14,10 @@
 #include <geos/geom/Point.h>
 #include <geos/geom/Polygon.h>
 
+#include <GeographicLib/Constants.hpp>
 #include <GeographicLib/Geodesic.hpp>
 #include <GeographicLib/UTMUPS.hpp>
+#include <algorithm>
 #include <cmath>
 #include <cstddef>
 #include <memory>
@@ -22,6 +25,11 @@
 #include <vector>
 
 constexpr double EARTH_RADIUS = 6371000.0;
+// lower bounds of the length of one degree of latitude (meridional radius of curvature at the equator) and of one
+// degree of longitude on the equator (WGS84 semi-major axis), in meters
+constexpr double MIN_METERS_PER_DEGREE_LAT = 110574.0;
+constexpr double MIN_METERS_PER_DEGREE_LON_AT_EQUATOR = 111319.0;
+constexpr double GEODESIC_BUFFER_ENVELOPE_MARGIN = 1.01;
 
 // void initializeAbslLogging() {
 //   absl::InitializeLog();
@@ -61,13 +69,54 @@ double calculateLineStringLength(const geos::geom::LineString* lineString) {
   return totalLength;
 }
 
+double calculateLineStringLength(const double* coordinates, size_t number_of_coordinates) {
+  double totalLength = 0.0;
+  for (std::size_t i = 1; i < number_of_coordinates; ++i) {
+    totalLength += haversineDistance(coordinates[2 * i - 2], coordinates[2 * i - 1], coordinates[2 * i],  // NOLINT
+                                     coordinates[2 * i + 1]);                                             // NOLINT
+  }
+  return totalLength;
+}
+
 double calculateDistanceBetweenTwoPoints(const geos::geom::Point* point1, const geos::geom::Point* point2) {
+  return calculateDistanceBetweenTwoPoints(point1->getX(), point1->getY(), point2->getX(), point2->getY());
+}
+
+double calculateDistanceBetweenTwoPoints(double x1, double y1, double x2, double y2) {
   const GeographicLib::Geodesic& geod = GeographicLib::Geodesic::WGS84();
   double distance = 0.0;
-  geod.Inverse(point1->getY(), point1->getX(), point2->getY(), point2->getX(), distance);
+  geod.Inverse(y1, x1, y2, x2, distance);
   return distance;
 }
 
+std::vector<geos::geom::Envelope> getGeodesicBufferEnvelopes(const geos::geom::Point* point, double distance) {
+  const double lon = point->getX();
+  const double lat = point->getY();
+  const double delta_lat = distance / MIN_METERS_PER_DEGREE_LAT * GEODESIC_BUFFER_ENVELOPE_MARGIN;
+  const double min_lat = std::max(lat - delta_lat, MIN_LAT);
+  const double max_lat = std::min(lat + delta_lat, MAX_LAT);
+  // a geodesic of length `distance` never leaves [min_lat, max_lat], where a parallel is at least
+  // cos(max_abs_lat) times as long as the equator
+  const double max_abs_lat = std::abs(lat) + delta_lat;
+  const double cos_max_abs_lat = max_abs_lat >= MAX_LAT ? 0.0 : std::cos(toRadians(max_abs_lat));
+  const double delta_lon = distance / MIN_METERS_PER_DEGREE_LON_AT_EQUATOR * GEODESIC_BUFFER_ENVELOPE_MARGIN;
+  // envelopes on both sides of the antimeridian would overlap. use the full longitude range instead
+  if (cos_max_abs_lat * (MAX_LON - MIN_LON) / 2.0 <= delta_lon) {
+    return {geos::geom::Envelope(MIN_LON, MAX_LON, min_lat, max_lat)};
+  }
+  const double min_lon = lon - delta_lon / cos_max_abs_lat;
+  const double max_lon = lon + delta_lon / cos_max_abs_lat;
+  std::vector<geos::geom::Envelope> envelopes{
+      geos::geom::Envelope(std::max(min_lon, MIN_LON), std::min(max_lon, MAX_LON), min_lat, max_lat)};
+  if (min_lon < MIN_LON) {
+    envelopes.emplace_back(min_lon + (MAX_LON - MIN_LON), MAX_LON, min_lat, max_lat);
+  }
+  if (max_lon > MAX_LON) {
+    envelopes.emplace_back(MIN_LON, max_lon - (MAX_LON - MIN_LON), min_lat, max_lat);
+  }
+  return envelopes;
+}
+
 std::unique_ptr<geos::geom::Point> projectPointToUTM(const geos::geom::Point* point,
                                                      const geos::geom::GeometryFactory* factory) {
   double utm_x = 0.0;                                           // Easting (x) in meters
@@ -142,6 +191,26 @@ std::unique_ptr<geos::geom::Geometry> projectGeometryToUTM(const geos::geom::Geo
   return nullptr;
 }
 
+void UTMProjector::project(double lon, double lat, double& x, double& y) {
+  int zone = 0;
+  bool northp = true;
+  if (!zone_.has_value()) {
+    GeographicLib::UTMUPS::Forward(lat, lon, zone, northp, x, y);
+    zone_ = zone;
+    northp_ = northp;
+    return;
+  }
+  try {
+    GeographicLib::UTMUPS::Forward(lat, lon, zone, northp, x, y, zone_.value());  // NOLINT
+  } catch (const GeographicLib::GeographicErr&) {
+    GeographicLib::UTMUPS::Forward(lat, lon, zone, northp, x, y);
+    return;
+  }
+  if (northp != northp_) {
+    y += northp_ ? -GeographicLib::UTMUPS::UTMShift() : GeographicLib::UTMUPS::UTMShift();
+  }
+}
+
 // const GeographicLib::Geodesic& geod = GeographicLib::Geodesic::WGS84();
 //   // Distance from JFK to LHR
 //   double
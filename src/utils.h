@@ -5,12 +5,16 @@
 #ifndef OSM2GMNS_UTILS_H
 #define OSM2GMNS_UTILS_H
 
+#include <geos/geom/Envelope.h>
 #include <geos/geom/GeometryFactory.h>
 #include <geos/geom/LineString.h>
 #include <geos/geom/Point.h>
 #include <geos/geom/Polygon.h>
 
+#include <cstddef>
 #include <memory>
+#include <optional>
+#include <vector>
 
 constexpr double MIN_LAT = -90.0;
 constexpr double MAX_LAT = 90.0;
@@ -23,12 +27,32 @@ constexpr double MAX_LON = 180.0;
 
 // [[maybe_unused]] VerboseLevel verboseLevel(bool update = false, VerboseLevel new_level = VerboseLevel::Information);
 
+double haversineDistance(double lon1, double lat1, double lon2, double lat2);
 double calculateLineStringLength(const geos::geom::LineString* lineString);
+// coordinates are the x and y of each point of the line string, interleaved
+double calculateLineStringLength(const double* coordinates, size_t number_of_coordinates);
 // std::unique_ptr<geos::geom::Polygon> getPolygonFromOsmNodes(const std::vector<OsmNode*>& osm_nodes,
 //                                                             const geos::geom::GeometryFactory* factory);
 
 double calculateDistanceBetweenTwoPoints(const geos::geom::Point* point1, const geos::geom::Point* point2);
+double calculateDistanceBetweenTwoPoints(double x1, double y1, double x2, double y2);
+// lon/lat envelopes that together contain every point within geodesic distance `distance` (meters) of `point`. more
+// than one envelope is returned when the buffer crosses the antimeridian.
+std::vector<geos::geom::Envelope> getGeodesicBufferEnvelopes(const geos::geom::Point* point, double distance);
 
 std::unique_ptr<geos::geom::Geometry> projectGeometryToUTM(const geos::geom::Geometry* geometry,
                                                            const geos::geom::GeometryFactory* factory);
+
+// Projects points to the utm (or ups) zone of the first point projected. Following points are projected to the same
+// zone and hemisphere, so that a geometry crossing a zone boundary or the equator keeps its shape. A point too far from
+// the zone for the projection is projected to its own zone.
+class UTMProjector {
+ public:
+  // x and y are easting and northing in meters
+  void project(double lon, double lat, double& x, double& y);
+
+ private:
+  std::optional<int> zone_;
+  bool northp_{true};
+};
 #endif  // OSM2GMNS_UTILS_H